@@ -7,19 +7,30 @@ das hauptprogramm ist ein starter für die verschiedenen STSdispo-module.
 es unterhält die kommunikation mit dem simulator und leitet ereignisse and die module weiter.
 """
 
+import sys
+import time
+
+from stskit.utils.importtime import ImportTimer
+
+# die importzeitmessung muss vor den übrigen imports installiert werden.
+if "--import-report" in sys.argv:
+    import_timer = ImportTimer()
+    import_timer.install()
+else:
+    import_timer = None
+
 import argparse
 import functools
+import importlib
 import logging
 import os
 
 import outcome
 from pathlib import Path
 import signal
-import sys
 import traceback
-from typing import Any, Dict, Optional, Sequence
+from typing import Any, Callable, Dict, Optional, Sequence
 
-import matplotlib.style
 from PySide6 import QtCore, QtWidgets, QtGui
 from PySide6.QtCore import Qt, QEvent, QObject, QTimer, Signal, Slot
 from PySide6.QtWidgets import QApplication, QMainWindow
@@ -27,19 +38,65 @@ import trio
 
 from stskit.plugin.stsplugin import DEFAULT_HOST, DEFAULT_PORT
 from stskit.plugin.stsgraph import GraphClient
-from stskit.zentrale import DatenZentrale
+from stskit.zentrale import DatenZentrale, ereignis_stapel
 from stskit.utils.observer import Observable
-from stskit.widgets.anschlussmatrix import AnschlussmatrixWindow
-from stskit.widgets.einstellungen import EinstellungenWindow
-from stskit.widgets.gleisbelegung import GleisbelegungWindow
-from stskit.widgets.gleisnetz import GleisnetzWindow
-from stskit.widgets.ticker import TickerWindow
-from stskit.widgets.fahrplan import FahrplanWindow
-from stskit.widgets.rangierplan import RangierplanWindow
-from stskit.widgets.bildfahrplan import BildFahrplanWindow
 
 logger = logging.getLogger(__name__)
 
+# fenstermodule werden erst beim ersten öffnen (oder beim vorladen) importiert.
+FENSTER_KLASSEN: Dict[str, str] = {
+    "AnschlussmatrixWindow": "stskit.widgets.anschlussmatrix",
+    "BildFahrplanWindow": "stskit.widgets.bildfahrplan",
+    "EinstellungenWindow": "stskit.widgets.einstellungen",
+    "FahrplanWindow": "stskit.widgets.fahrplan",
+    "GleisbelegungWindow": "stskit.widgets.gleisbelegung",
+    "GleisnetzWindow": "stskit.widgets.gleisnetz",
+    "RangierplanWindow": "stskit.widgets.rangierplan",
+    "TickerWindow": "stskit.widgets.ticker",
+}
+
+_matplotlib_konfiguriert = False
+
+
+def matplotlib_konfigurieren():
+    """
+    matplotlib importieren und den STSdispo-stil setzen.
+
+    wird vor dem ersten import eines fenstermoduls aufgerufen,
+    damit matplotlib nicht schon beim programmstart geladen wird.
+    """
+
+    global _matplotlib_konfiguriert
+    if _matplotlib_konfiguriert:
+        return
+    _matplotlib_konfiguriert = True
+
+    mpl_style = importlib.import_module("matplotlib.style")
+    try:
+        p = Path(__file__).parent / r"mplstyle" / r"dark.mplstyle"
+        mpl_style.use(p)
+    except OSError:
+        pass
+
+
+@functools.cache
+def fenster_klasse(name: str) -> Callable:
+    """
+    fensterklasse nach namen laden.
+
+    das modul wird beim ersten aufruf importiert, die importzeit wird protokolliert.
+
+    :param name: klassenname, schlüssel von FENSTER_KLASSEN.
+    :return: fensterklasse
+    """
+
+    matplotlib_konfigurieren()
+    modul_name = FENSTER_KLASSEN[name]
+    t0 = time.perf_counter()
+    modul = importlib.import_module(modul_name)
+    logger.info(f"{modul_name} importiert in {time.perf_counter() - t0:.3f} s")
+    return getattr(modul, name)
+
 
 def setup_logging(filename: Optional[str] = "", level: Optional[str] = "ERROR", log_comm: bool = False):
     """
@@ -100,6 +157,7 @@ class StsDispoRunner(QObject):
         self.update_interval: float = 30  # seconds
         self.enable_update: bool = True
         self.notify_interval: float = 0.1
+        self.ereignis_interval: float = 0.2  # seconds
         self.enable_notify: bool = True
         self.status: str = "Keine Verbindung"
         self.status_update = Observable(self)
@@ -107,7 +165,8 @@ class StsDispoRunner(QObject):
         self.client = GraphClient(name='STSdispo', autor='Matthias Muntwiler', version='2.0',
                                   text='STSdispo: Grafische Fahrpläne, Disposition und Auswertung')
 
-        self.zentrale = DatenZentrale(config_path=self.config_path)
+        self.zentrale = DatenZentrale(config_path=self.config_path, prognose_export=arguments.prognose_export,
+                                      schnappschuesse=arguments.schnappschuesse)
         self.zentrale.client = self.client
 
         self.coroutines = []
@@ -154,8 +213,8 @@ class StsDispoRunner(QObject):
 
     async def ereignis_loop(self, *args, **kwargs):
         await self.zentrale.client.registered.wait()
-        async for ereignis in self.zentrale.client.ereignis_channel_out:
-            await self.zentrale.ereignis(ereignis)
+        async for ereignisse in ereignis_stapel(self.zentrale.client.ereignis_channel_out, self.ereignis_interval):
+            await self.zentrale.ereignisse(ereignisse)
 
     async def notify_loop(self, *args, **kwargs):
         await self.zentrale.client.registered.wait()
@@ -191,6 +250,10 @@ class MainWindow(QMainWindow):
         self.runner: Optional[StsDispoRunner] = None
         self.data_available: bool = False
         self.windows = WindowManager()
+        self.vorladen: list[str] = []
+        if self.arguments.preload:
+            self.vorladen = [name for name in FENSTER_KLASSEN
+                             if name != "GleisnetzWindow" or self.arguments.netgraph]
 
         self.setWindowTitle("STSdispo")
         self._main = QtWidgets.QWidget()
@@ -227,7 +290,7 @@ class MainWindow(QMainWindow):
         self.rangierplan_button.clicked.connect(self.rangierplan_clicked)
         layout.addWidget(self.rangierplan_button)
 
-        self.netz_button = QtWidgets.QPushButton("Gleisplan (Geduld!)", self)
+        self.netz_button = QtWidgets.QPushButton("Gleisplan", self)
         self.netz_button.setEnabled(False)
         self.netz_button.clicked.connect(self.netz_clicked)
         layout.addWidget(self.netz_button)
@@ -257,6 +320,8 @@ class MainWindow(QMainWindow):
             self.statusfeld.setText(self.runner.status)
             if self.runner.status == "":
                 self.data_available = True
+                if self.vorladen:
+                    QTimer.singleShot(0, self.fenster_vorladen)
             enable = self.runner.enable_update and self.data_available
         else:
             self.statusfeld.setText("Keine Verbindung")
@@ -273,15 +338,33 @@ class MainWindow(QMainWindow):
         self.ticker_button.setEnabled(enable)
         self.einstellungen_button.setEnabled(enable)
 
+    def fenster_vorladen(self):
+        """
+        fenstermodule im leerlauf vorladen.
+
+        pro aufruf wird ein modul geladen, damit die benutzeroberfläche reaktiv bleibt.
+        die übrigen module werden mit einem timer nachgeladen.
+        """
+
+        if not self.vorladen:
+            return
+        name = self.vorladen.pop(0)
+        try:
+            fenster_klasse(name)
+        except ImportError as e:
+            logger.error(f"fenstermodul {name} kann nicht geladen werden: {e}")
+        if self.vorladen:
+            QTimer.singleShot(0, self.fenster_vorladen)
+
     # todo : window-initialisierungen in entsprechende module verschieben
 
     def ticker_clicked(self):
-        window = TickerWindow(self.runner.zentrale)
+        window = fenster_klasse("TickerWindow")(self.runner.zentrale)
         window.show()
         self.windows.add(window)
 
     def einfahrten_clicked(self):
-        window = GleisbelegungWindow(self.runner.zentrale, "Agl")
+        window = fenster_klasse("GleisbelegungWindow")(self.runner.zentrale, "Agl", grafik=self.arguments.grafik)
         window.setWindowTitle("Einfahrten/Ausfahrten")
         window.vorlaufzeit = 25
         window.plan_update()
@@ -289,43 +372,43 @@ class MainWindow(QMainWindow):
         self.windows.add(window)
 
     def gleisbelegung_clicked(self):
-        window = GleisbelegungWindow(self.runner.zentrale, "Gl")
+        window = fenster_klasse("GleisbelegungWindow")(self.runner.zentrale, "Gl", grafik=self.arguments.grafik)
         window.plan_update()
         window.show()
         self.windows.add(window)
 
     def matrix_clicked(self):
-        window = AnschlussmatrixWindow(self.runner.zentrale)
+        window = fenster_klasse("AnschlussmatrixWindow")(self.runner.zentrale)
         window.plan_update()
         window.show()
         self.windows.add(window)
 
     def netz_clicked(self):
-        window = GleisnetzWindow(self.runner.zentrale)
+        window = fenster_klasse("GleisnetzWindow")(self.runner.zentrale)
         window.anlage_update()
         window.show()
         self.windows.add(window)
 
     def fahrplan_clicked(self):
-        window = FahrplanWindow(self.runner.zentrale)
+        window = fenster_klasse("FahrplanWindow")(self.runner.zentrale)
         window.plan_update()
         window.show()
         self.windows.add(window)
 
     def rangierplan_clicked(self):
-        window = RangierplanWindow(self.runner.zentrale)
+        window = fenster_klasse("RangierplanWindow")(self.runner.zentrale)
         window.plan_update()
         window.show()
         self.windows.add(window)
 
     def bildfahrplan_clicked(self):
-        window = BildFahrplanWindow(self.runner.zentrale)
+        window = fenster_klasse("BildFahrplanWindow")(self.runner.zentrale, grafik=self.arguments.grafik)
         window.plan_update()
         window.show()
         self.windows.add(window)
 
     def einstellungen_clicked(self):
-        window = EinstellungenWindow(self.runner.zentrale)
+        window = fenster_klasse("EinstellungenWindow")(self.runner.zentrale)
         window.update()
         window.show()
         self.windows.add(window)
@@ -347,6 +430,20 @@ class MainWindow(QMainWindow):
             except (AttributeError, OSError) as e:
                 logger.error(e)
 
+            try:
+                self.runner.zentrale.auswertung.fahrzeiten.historie.schliessen()
+            except AttributeError:
+                pass
+
+            try:
+                self.runner.zentrale.betrieb.prognose_export.schliessen()
+            except AttributeError:
+                pass
+
+            if import_timer is not None:
+                import_timer.uninstall()
+                print(import_timer.report(), file=sys.stderr)
+
         QApplication.quit()
 
 
@@ -441,6 +538,17 @@ def parse_args(arguments: Sequence[str]) -> argparse.Namespace:
                         help=f"Netzwerkport des Stellwerksim-Simulators. Default: {DEFAULT_PORT}")
     parser.add_argument("--netgraph", action="store_true",
                         help="Gleisnetzmodul anbieten. Das Gleisnetzmodul ist in Entwicklung und standardmässig verborgen.")
+    parser.add_argument("--grafik", choices=["mpl", "qt"], default="mpl",
+                        help="Darstellung von Gleisbelegung, Einfahrten und Bildfahrplan: "
+                             "mpl (Matplotlib) oder qt (QGraphicsScene, schnelleres Scrollen und Zoomen). "
+                             "Default: mpl")
+    parser.add_argument("--prognose-export", action="store_true",
+                        help="Prognosen jeder Abfrage für die Auswertung im Unterverzeichnis prognosen "
+                             "des Datenverzeichnisses speichern. Default: aus")
+    parser.add_argument("--schnappschuesse", type=int, default=0, metavar="N",
+                        help="Die letzten N Betriebszustände (einer pro Minute Simzeit) als Schnappschüsse "
+                             "im Speicher halten. Die Dispositionen können in der Gleisbelegung und im "
+                             "Streckenfahrplan auf einen dieser Stände zurückgesetzt werden. Default: 0 (aus)")
     parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default="ERROR",
                         help="Minimale Stufe für Protokollmeldungen. Default: ERROR")
     parser.add_argument("--log-file", default="stskit.log",
@@ -448,6 +556,11 @@ def parse_args(arguments: Sequence[str]) -> argparse.Namespace:
     parser.add_argument("--log-comm", action="store_true",
                         help="Ganze Kommunikation mit Server protokollieren. "
                              "log-level DEBUG muss dafür ausgewählt sein. default: aus")
+    parser.add_argument("--preload", action="store_true",
+                        help="Fenstermodule nach dem Verbinden im Hintergrund vorladen. "
+                             "Default: Module werden beim ersten Öffnen geladen.")
+    parser.add_argument("--import-report", action="store_true",
+                        help="Importzeiten messen und beim Beenden auf stderr ausgeben.")
 
     return parser.parse_args(arguments)
 
@@ -471,12 +584,6 @@ def main():
         config_path = Path.home() / r".stskit"
         config_path.mkdir(exist_ok=True)
 
-    try:
-        p = Path(__file__).parent / r"mplstyle" / r"dark.mplstyle"
-        matplotlib.style.use(p)
-    except OSError:
-        pass
-
     app.setStyle('Fusion')
     try:
         p = Path(__file__).parent / r"qt" / r"dark.css"
@@ -489,6 +596,8 @@ def main():
     async_helper = AsyncHelper(main_window, main_window.start_runner)
     QTimer.singleShot(0, async_helper.launch_guest_run)
     main_window.show()
+    if import_timer is not None:
+        logger.info(f"hauptfenster nach {time.perf_counter() - import_timer.t0:.3f} s angezeigt")
 
     signal.signal(signal.SIGINT, signal.SIG_DFL)
     app.exec()
@@ -0,0 +1,457 @@
+#!/env/python
+
+"""
+STSdispo als Hintergrunddienst ohne Benutzeroberfläche
+
+Der Dienst unterhält die Kommunikation mit dem Simulator und das Betriebsmodell
+(Anlage, Betrieb, Prognose, Gleisbelegung) wie das Hauptprogramm, aber ohne Qt-Fenster.
+Der aktuelle Zustand wird über eine lokale HTTP-Schnittstelle veröffentlicht,
+so dass mehrere einfache Anzeigen dasselbe Modell verwenden können.
+
+Schnittstelle (JSON, UTF-8):
+
+- `GET /snapshot`: Vollständiger Zustand mit Version.
+- `GET /delta?seit=<version>`: Änderungen seit der angegebenen Version.
+  Wenn die Version nicht mehr im Verlauf ist, wird der vollständige Zustand geliefert (`"voll": true`).
+- `GET /events`: Server-Sent-Events-Strom. Zuerst ein `snapshot`-Ereignis, dann ein `delta`-Ereignis pro neuer Version.
+
+Der Zustand ist in Abschnitte gegliedert: `zuege` (Positionen), `prognose` (t_prog der An-/Ab-Ereignisse),
+`slots` (Gleisbelegung) und `warnungen` (Gleisbelegungswarnungen).
+Ein Delta enthält pro Abschnitt die geänderten Einträge (`geaendert`) und die entfernten Schlüssel (`entfernt`).
+
+Start:
+
+```
+python -m stskit.dienst --http-port 3692
+```
+"""
+
+import argparse
+import collections
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import urllib.parse
+
+import trio
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from stskit.plugin.stsplugin import DEFAULT_HOST, DEFAULT_PORT
+from stskit.plugin.stsgraph import GraphClient
+from stskit.dispo.gleisbelegung import Gleisbelegung
+from stskit.zentrale import DatenZentrale, ereignis_stapel
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DEFAULT_HTTP_PORT = 3692
+
+ABSCHNITTE = ('zuege', 'prognose', 'slots', 'warnungen')
+
+ZustandType = Dict[str, Dict[str, Any]]
+DeltaType = Dict[str, Any]
+
+
+def json_kodieren(obj: Any) -> bytes:
+    """
+    Objekt kompakt als JSON kodieren.
+
+    Verwendet orjson, falls installiert.
+    Nicht serialisierbare Objekte (z.B. BahnhofElement) werden als String kodiert.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    else:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def delta_berechnen(alt: ZustandType, neu: ZustandType) -> DeltaType:
+    """
+    Änderungen zwischen zwei Zuständen bestimmen.
+
+    :param alt: Bisheriger Zustand, Abschnitte nach ABSCHNITTE.
+    :param neu: Neuer Zustand.
+    :return: Delta. Abschnitte ohne Änderungen fehlen.
+    """
+
+    delta = {}
+    for abschnitt in ABSCHNITTE:
+        a = alt.get(abschnitt, {})
+        n = neu.get(abschnitt, {})
+        geaendert = {k: v for k, v in n.items() if a.get(k) != v}
+        entfernt = [k for k in a if k not in n]
+        if geaendert or entfernt:
+            delta[abschnitt] = {'geaendert': geaendert, 'entfernt': entfernt}
+    return delta
+
+
+def delta_zusammenfassen(delta1: DeltaType, delta2: DeltaType) -> DeltaType:
+    """
+    Zwei aufeinanderfolgende Deltas zu einem zusammenfassen.
+    """
+
+    result = {}
+    for abschnitt in ABSCHNITTE:
+        d1 = delta1.get(abschnitt)
+        d2 = delta2.get(abschnitt)
+        if d1 is None and d2 is None:
+            continue
+        geaendert = dict(d1['geaendert']) if d1 else {}
+        entfernt = set(d1['entfernt']) if d1 else set()
+        if d2:
+            for k in d2['entfernt']:
+                geaendert.pop(k, None)
+                entfernt.add(k)
+            for k, v in d2['geaendert'].items():
+                geaendert[k] = v
+                entfernt.discard(k)
+        result[abschnitt] = {'geaendert': geaendert, 'entfernt': sorted(entfernt)}
+    return result
+
+
+class ZustandsVerteiler:
+    """
+    Versionierter Zustand mit Änderungsverlauf und Abonnenten.
+
+    Jede Veröffentlichung mit Änderungen erhöht die Version.
+    Die letzten `verlauf_laenge` Deltas werden aufbewahrt,
+    damit Abfragen mit älteren Versionen ohne vollständigen Zustand beantwortet werden können.
+    Abonnenten erhalten neue Deltas über einen trio-Kanal.
+    Abonnenten, die nicht nachkommen, werden abgemeldet.
+    """
+
+    def __init__(self, verlauf_laenge: int = 100, puffer: int = 16):
+        self.version: int = 0
+        self.simzeit: int = 0
+        self.zustand: ZustandType = {abschnitt: {} for abschnitt in ABSCHNITTE}
+        self.verlauf: Deque[Tuple[int, DeltaType]] = collections.deque(maxlen=verlauf_laenge)
+        self.puffer = puffer
+        self._abonnenten: Set[trio.MemorySendChannel] = set()
+
+    def veroeffentlichen(self, zustand: ZustandType, simzeit: int = 0) -> Optional[DeltaType]:
+        """
+        Neuen Zustand übernehmen und das Delta an die Abonnenten senden.
+
+        :param zustand: Neuer Zustand, Abschnitte nach ABSCHNITTE.
+        :param simzeit: Simulationszeit in Minuten.
+        :return: Delta oder None, wenn sich nichts geändert hat.
+        """
+
+        self.simzeit = simzeit
+        delta = delta_berechnen(self.zustand, zustand)
+        self.zustand = zustand
+        if not delta:
+            return None
+
+        self.version += 1
+        self.verlauf.append((self.version, delta))
+        nachricht = {'version': self.version, 'simzeit': simzeit, 'delta': delta}
+        for kanal in list(self._abonnenten):
+            try:
+                kanal.send_nowait(nachricht)
+            except (trio.WouldBlock, trio.BrokenResourceError, trio.ClosedResourceError):
+                logger.warning("Abonnent zu langsam oder getrennt, wird abgemeldet.")
+                self._abonnenten.discard(kanal)
+                kanal.close()
+        return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'version': self.version, 'simzeit': self.simzeit, 'voll': True, **self.zustand}
+
+    def delta_seit(self, version: int) -> Dict[str, Any]:
+        """
+        Änderungen seit einer Version.
+
+        :param version: Version, die der Empfänger kennt.
+        :return: Delta-Nachricht oder vollständiger Zustand (`"voll": true`),
+            wenn die Version nicht mehr im Verlauf ist.
+        """
+
+        if version == self.version:
+            return {'version': self.version, 'simzeit': self.simzeit, 'delta': {}}
+        if not self.verlauf or version < self.verlauf[0][0] - 1 or version > self.version:
+            return self.snapshot()
+
+        delta = {}
+        for v, d in self.verlauf:
+            if v > version:
+                delta = delta_zusammenfassen(delta, d)
+        return {'version': self.version, 'simzeit': self.simzeit, 'delta': delta}
+
+    def abonnieren(self) -> trio.MemoryReceiveChannel:
+        send, receive = trio.open_memory_channel(self.puffer)
+        self._abonnenten.add(send)
+        return receive
+
+
+class DispoDienst:
+    """
+    Hintergrunddienst: Datenzentrale ohne Qt mit HTTP-Schnittstelle.
+
+    Die Schleifen entsprechen denen von `StsDispoRunner` im Hauptprogramm.
+    Nach jeder Aktualisierung und (gebündelt) nach Ereignismeldungen wird der Zustand neu erfasst
+    und an den `ZustandsVerteiler` übergeben.
+    """
+
+    def __init__(self, arguments: argparse.Namespace, config_path: Optional[os.PathLike] = None):
+        self.arguments = arguments
+        self.config_path = config_path
+
+        self.update_interval: float = 30
+        self.publish_interval: float = 1
+        self.enable_update: bool = True
+
+        self.client = GraphClient(name='STSdispo-Dienst', autor='Matthias Muntwiler', version='2.0',
+                                  text='STSdispo: Hintergrunddienst')
+        self.zentrale = DatenZentrale(config_path=self.config_path)
+        self.zentrale.client = self.client
+        self.verteiler = ZustandsVerteiler()
+        self.gleisbelegung: Optional[Gleisbelegung] = None
+        self._geaendert = trio.Event()
+
+    async def start(self):
+        await self.client.connect(host=self.arguments.host, port=self.arguments.port)
+
+        async with self.client.stream:
+            async with trio.open_nursery() as nursery:
+                await nursery.start(self.client.receiver)
+                await self.client.register()
+                await self.client.request_simzeit()
+                await self.client.request_anlageninfo()
+                nursery.start_soon(self.update_loop)
+                nursery.start_soon(self.ereignis_loop)
+                nursery.start_soon(self.publish_loop)
+                await nursery.start(functools.partial(trio.serve_tcp, self.http_verbindung,
+                                                      self.arguments.http_port, host=self.arguments.http_host))
+                logger.info(f"HTTP-Schnittstelle auf {self.arguments.http_host}:{self.arguments.http_port}")
+
+    async def update_loop(self):
+        await self.client.registered.wait()
+        while self.enable_update:
+            try:
+                await self.zentrale.update()
+            except (trio.EndOfChannel, trio.BrokenResourceError, trio.ClosedResourceError):
+                self.enable_update = False
+                break
+            except trio.BusyResourceError:
+                pass
+            await self.zentrale.notify()
+            self._geaendert.set()
+            await trio.sleep(self.update_interval)
+
+    async def ereignis_loop(self):
+        await self.client.registered.wait()
+        async for ereignisse in ereignis_stapel(self.client.ereignis_channel_out):
+            await self.zentrale.ereignisse(ereignisse)
+            self._geaendert.set()
+
+    async def publish_loop(self):
+        """
+        Zustand gebündelt veröffentlichen.
+
+        Ereignisse können mehrmals pro Sekunde eintreffen.
+        Der Zustand wird höchstens alle `publish_interval` Sekunden neu erfasst.
+        """
+
+        while True:
+            await self._geaendert.wait()
+            self._geaendert = trio.Event()
+            try:
+                self.verteiler.veroeffentlichen(self.zustand_erfassen(), self.zentrale.simzeit_minuten)
+            except (AttributeError, KeyError):
+                logger.exception("Fehler beim Erfassen des Zustands")
+            await trio.sleep(self.publish_interval)
+
+    def zustand_erfassen(self) -> ZustandType:
+        """
+        Aktuellen Zustand aus Anlage, Betrieb und Gleisbelegung erfassen.
+
+        :return: Zustand mit Abschnitten nach ABSCHNITTE. Die Schlüssel sind Strings.
+        """
+
+        anlage = self.zentrale.anlage
+        betrieb = self.zentrale.betrieb
+        zustand = {abschnitt: {} for abschnitt in ABSCHNITTE}
+        if anlage is None or betrieb is None:
+            return zustand
+
+        for zid, zug in anlage.zuggraph.nodes(data=True):
+            if zug.get('ausgefahren', False):
+                continue
+            zustand['zuege'][str(zid)] = {k: zug.get(k) for k in
+                                          ('name', 'von', 'nach', 'gleis', 'plangleis',
+                                           'amgleis', 'sichtbar', 'verspaetung')}
+
+        for label, data in betrieb.ereignisgraph.nodes(data=True):
+            if data.get('typ') in {'An', 'Ab'}:
+                zustand['prognose'][f"{label.zid}:{label.typ}:{label.zeit}"] = {
+                    k: data.get(k) for k in ('zid', 'typ', 'plan', 'gleis', 't_plan', 't_prog', 't_mess')}
+
+        if self.gleisbelegung is None:
+            self.gleisbelegung = Gleisbelegung(self.zentrale)
+            self.gleisbelegung.gleise_auswaehlen([gleis for gleis in anlage.bahnhofgraph.nodes()
+                                                  if gleis.typ in {'Gl', 'Agl'}])
+        self.gleisbelegung.anlage = anlage
+        self.gleisbelegung.betrieb = betrieb
+        self.gleisbelegung.update()
+
+        def slot_key(key: Tuple[Any, int, int]) -> str:
+            return f"{key[0]}:{key[1]}:{key[2]}"
+
+        for slot in self.gleisbelegung.slots.values():
+            zustand['slots'][slot_key(slot.key)] = {
+                'gleis': str(slot.gleis), 'zid': slot.zid, 'zugname': slot.zugname,
+                'zeit': slot.zeit, 'dauer': slot.dauer, 'abfahrt': slot.abfahrt,
+                'verspaetung_an': slot.verspaetung_an, 'verspaetung_ab': slot.verspaetung_ab,
+                'titel': slot.titel, 'farbe': slot.farbe}
+
+        for warnung in self.gleisbelegung.warnungen.values():
+            slots = sorted(slot_key(k) for k in warnung.key)
+            zustand['warnungen']["|".join(slots)] = {
+                'gleise': sorted(str(g) for g in warnung.gleise),
+                'zeit': warnung.zeit, 'dauer': warnung.dauer, 'status': warnung.status, 'slots': slots}
+
+        return zustand
+
+    async def http_verbindung(self, stream: trio.abc.Stream):
+        """
+        Eine HTTP-Anfrage beantworten.
+
+        Es wird nur das Nötigste von HTTP/1.1 unterstützt: GET, eine Anfrage pro Verbindung.
+        Fehler werden protokolliert und beenden nur die betroffene Verbindung,
+        da trio.serve_tcp sonst den ganzen Dienst abbrechen würde.
+        """
+
+        try:
+            await self._anfrage_beantworten(stream)
+        except Exception:
+            logger.exception("Fehler in der HTTP-Verbindung")
+
+    async def _anfrage_beantworten(self, stream: trio.abc.Stream):
+        try:
+            kopf = await _kopf_lesen(stream)
+            methode, ziel, _ = kopf.split("\r\n", 1)[0].split(" ", 2)
+        except (ValueError, UnicodeDecodeError, trio.BrokenResourceError):
+            await _antworten(stream, 400, b'{"fehler":"ungueltige Anfrage"}')
+            return
+
+        url = urllib.parse.urlsplit(ziel)
+        query = urllib.parse.parse_qs(url.query)
+        if methode != "GET":
+            await _antworten(stream, 405, b'{"fehler":"nur GET"}')
+        elif url.path == "/snapshot":
+            await _antworten(stream, 200, json_kodieren(self.verteiler.snapshot()))
+        elif url.path == "/delta":
+            try:
+                seit = int(query['seit'][0])
+            except (KeyError, IndexError, ValueError):
+                seit = -1
+            await _antworten(stream, 200, json_kodieren(self.verteiler.delta_seit(seit)))
+        elif url.path == "/events":
+            await self._ereignisstrom(stream)
+        else:
+            await _antworten(stream, 404, b'{"fehler":"unbekannter Pfad"}')
+
+    async def _ereignisstrom(self, stream: trio.abc.Stream):
+        kanal = self.verteiler.abonnieren()
+        kopf = ("HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Access-Control-Allow-Origin: *\r\n"
+                "Connection: close\r\n\r\n")
+        try:
+            await stream.send_all(kopf.encode())
+            await stream.send_all(_sse("snapshot", self.verteiler.version, self.verteiler.snapshot()))
+            async with kanal:
+                async for nachricht in kanal:
+                    await stream.send_all(_sse("delta", nachricht['version'], nachricht))
+        except (trio.BrokenResourceError, trio.ClosedResourceError):
+            pass
+
+
+def _sse(ereignis: str, version: int, daten: Any) -> bytes:
+    return f"event: {ereignis}\nid: {version}\ndata: ".encode() + json_kodieren(daten) + b"\n\n"
+
+
+async def _kopf_lesen(stream: trio.abc.Stream, max_laenge: int = 8192) -> str:
+    daten = b""
+    while b"\r\n\r\n" not in daten:
+        teil = await stream.receive_some(1024)
+        if not teil:
+            break
+        daten += teil
+        if len(daten) > max_laenge:
+            raise ValueError("Anfrage zu lang")
+    return daten.decode('ascii')
+
+
+async def _antworten(stream: trio.abc.Stream, status: int, body: bytes):
+    texte = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+    kopf = (f"HTTP/1.1 {status} {texte.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\n"
+            f"Connection: close\r\n\r\n")
+    try:
+        await stream.send_all(kopf.encode() + body)
+    except (trio.BrokenResourceError, trio.ClosedResourceError):
+        pass
+
+
+def parse_args(arguments: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="""
+            STSdispo-Hintergrunddienst für Stellwerksim (https://www.stellwerksim.de).
+            Veröffentlicht Zugpositionen, Prognosen und Gleisbelegung über eine lokale HTTP-Schnittstelle.
+        """
+    )
+
+    default_config_path = Path.home() / r".stskit"
+
+    parser.add_argument("--data-dir",
+                        help=f"Daten- und Konfigurationsverzeichnis. Default: {default_config_path}")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"Hostname oder IP-Adresse des Stellwerksim-Simulators. Default: {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Netzwerkport des Stellwerksim-Simulators. Default: {DEFAULT_PORT}")
+    parser.add_argument("--http-host", default="127.0.0.1",
+                        help="Adresse der HTTP-Schnittstelle. Default: 127.0.0.1 (nur lokal)")
+    parser.add_argument("--http-port", type=int, default=DEFAULT_HTTP_PORT,
+                        help=f"Port der HTTP-Schnittstelle. Default: {DEFAULT_HTTP_PORT}")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default="ERROR",
+                        help="Minimale Stufe für Protokollmeldungen. Default: ERROR")
+    parser.add_argument("--log-file", default="stskit-dienst.log",
+                        help="Protokolldatei. Default: stskit-dienst.log im Arbeitsverzeichnis")
+
+    return parser.parse_args(arguments)
+
+
+def main():
+    arguments = parse_args()
+    logging.basicConfig(filename=arguments.log_file, encoding="utf-8",
+                        level=getattr(logging, arguments.log_level),
+                        format='%(asctime)s (%(name)s) %(levelname)s: %(message)s')
+
+    if arguments.data_dir and Path(arguments.data_dir).is_dir():
+        config_path = Path(arguments.data_dir)
+    else:
+        config_path = Path.home() / r".stskit"
+        config_path.mkdir(exist_ok=True)
+
+    dienst = DispoDienst(arguments, config_path)
+    try:
+        trio.run(dienst.start)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ Alle Daten können jederzeit ausgelesen werden,
 dürfen jedoch nur von Modulen aus dem dispo-Package direkt verändert werden.
 """
 
-import collections
 import logging
 import os
 from pathlib import Path
@@ -17,13 +16,14 @@ import networkx as nx
 from stskit.dispo.config import Config
 from stskit.plugin.stsgraph import GraphClient
 from stskit.plugin.stsobj import Ereignis, AnlagenInfo, time_to_minutes
-from stskit.model.signalgraph import SignalGraph
-from stskit.model.bahnhofgraph import BahnhofGraph, BahnsteigGraph
+from stskit.model.signalgraph import SignalGraph, SignalGraphWege
+from stskit.model.bahnhofgraph import BahnhofGraph, BahnhofLabelType, BahnsteigGraph
 from stskit.model.liniengraph import LinienGraph, LinienGraphEdge, Strecken
 from stskit.model.zuggraph import ZugGraph
-from stskit.model.zielgraph import ZielGraph
+from stskit.model.zielgraph import FahrzeitSpeicher, ZielGraph
 from stskit.model.ereignisgraph import EreignisGraph
-from stskit.utils.export import write_gml
+from stskit.model.zugarchiv import ZugArchiv
+from stskit.utils.export import dump_graph
 from stskit.model.gleisschema import Gleisschema
 from stskit.model.zugschema import Zugschema
 
@@ -45,12 +45,20 @@ class Anlage:
         self.aenderungen: Set[str] = set()
 
         self.signalgraph = SignalGraph()
+        # signalgraph auf Bf- und Anst-stufe, wird von liniengraph_mit_signalgraph_abgleichen nachgefuehrt
+        self.signalgraph_wege: Optional[SignalGraphWege] = None
         self.bahnsteiggraph = BahnsteigGraph()
         self.bahnhofgraph = BahnhofGraph()
         self.liniengraph = LinienGraph()
         self.zuggraph = ZugGraph()
         self.zielgraph = ZielGraph()
         self.ereignisgraph = EreignisGraph()
+        self.fahrzeitspeicher = FahrzeitSpeicher()
+        # zuege, deren fahrplan im liniengraph eingetragen ist
+        self._linien_zuege: Set[int] = set()
+        self.archiv = ZugArchiv()
+        # Minuten nach der Ausfahrt, nach denen ein Zug archiviert wird. None = nicht archivieren.
+        self.archiv_nachlaufzeit: Optional[int] = None
 
         self.strecken = Strecken()
         self.strecken.liniengraph = self.liniengraph
@@ -69,6 +77,8 @@ class Anlage:
         config_path = Path(config_path)
         debug_path = config_path / "debug"
 
+        zielgraph_vorher = self.zielgraph
+        self._zuege_archivieren(client)
         self._update_client(client, debug_path)
 
         for _ in range(2):
@@ -85,13 +95,60 @@ class Anlage:
             else:
                 break
 
-        self.zielgraph.einfahrtszeiten_korrigieren(self.liniengraph, self.bahnhofgraph)
-        self.ereignisgraph.zielgraph_importieren(self.zielgraph)
+        if 'bahnhofgraph' in self.aenderungen:
+            self.fahrzeitspeicher.betriebsstellen.clear()
+        if 'liniengraph' in self.aenderungen:
+            self.fahrzeitspeicher.liniengraph_abgleichen(self.liniengraph)
+        self.zielgraph.einfahrtszeiten_korrigieren(self.liniengraph, self.bahnhofgraph,
+                                                   vorher=zielgraph_vorher, speicher=self.fahrzeitspeicher)
+        if zielgraph_vorher:
+            self.ereignisgraph.zielgraph_importieren(self.zielgraph, zids=self.zielgraph.aenderungen)
+        else:
+            self.ereignisgraph.zielgraph_importieren(self.zielgraph)
+        try:
+            self.ereignisgraph.prognose_index_erstellen()
+        except nx.NetworkXUnfeasible:
+            # die schleifen werden von der prognose im betrieb aufgebrochen.
+            pass
 
         aenderungen = self.aenderungen
         self.aenderungen = set()
         return aenderungen
 
+    def messungen_uebernehmen(self, messungen: Dict[Tuple[str, str], Dict[str, float]]):
+        """
+        Gemessene Fahrzeiten in den Liniengraphen übernehmen.
+
+        Die von den Fahrzeiten abhängigen Ziele werden beim nächsten `update` abgeglichen.
+
+        Args:
+            messungen: s. `stskit.model.liniengraph.LinienGraph.messungen_uebernehmen`
+                und `stskit.dispo.auswertung.Auswertung.liniengraph_messungen`.
+        """
+
+        self.liniengraph.messungen_uebernehmen(messungen)
+        self.aenderungen.add('liniengraph')
+
+    def _zuege_archivieren(self, client: GraphClient):
+        """
+        Ausgefahrene Züge archivieren.
+
+        Züge, die seit `archiv_nachlaufzeit` Minuten ausgefahren sind,
+        werden in das Archiv übernommen und aus dem Zug- und Zielgraphen des Clients
+        sowie aus dem Ereignisgraphen entfernt.
+        Die Methode muss vor _update_client aufgerufen werden,
+        damit die Kopien der Client-Graphen die archivierten Züge nicht mehr enthalten.
+        """
+
+        zeit = time_to_minutes(client.calc_simzeit())
+        self.archiv.ausfahrten_erfassen(client.zuggraph, zeit)
+        if self.archiv_nachlaufzeit is None:
+            return
+
+        zids = self.archiv.kandidaten(client.zuggraph, zeit, self.archiv_nachlaufzeit)
+        if zids:
+            self.archiv.archivieren(zids, client.zuggraph, client.zielgraph, self.ereignisgraph)
+
     def _update_client(self, client, debug_path):
         """
         Update the graphs with the current state of the simulation.
@@ -117,14 +174,13 @@ class Anlage:
             self.signalgraph = client.signalgraph.copy(as_view=False)
             self.aenderungen.add('signalgraph')
             if logger.isEnabledFor(logging.DEBUG):
-                debug_path.mkdir(exist_ok=True)
-                write_gml(self.signalgraph, debug_path / f"{self.anlageninfo.aid}.signalgraph.gml")
+                dump_graph(self.signalgraph, debug_path / f"{self.anlageninfo.aid}.signalgraph")
 
         if not self.bahnsteiggraph or {'anlageninfo', 'signalgraph'} & self.aenderungen:
             self.bahnsteiggraph = client.bahnsteiggraph.copy(as_view=False)
             self.aenderungen.add('bahnsteiggraph')
             if logger.isEnabledFor(logging.DEBUG):
-                write_gml(self.bahnsteiggraph, debug_path / f"{self.anlageninfo.aid}.bahnsteiggraph.gml")
+                dump_graph(self.bahnsteiggraph, debug_path / f"{self.anlageninfo.aid}.bahnsteiggraph")
 
         self.zuggraph = client.zuggraph.copy(as_view=True)
         self.aenderungen.add('zuggraph')
@@ -179,7 +235,7 @@ class Anlage:
 
         if 'bahnhofgraph' in self.aenderungen:
             if logger.isEnabledFor(logging.DEBUG):
-                write_gml(self.bahnhofgraph, debug_path / f"{self.anlageninfo.aid}.bahnhofgraph.gml")
+                dump_graph(self.bahnhofgraph, debug_path / f"{self.anlageninfo.aid}.bahnhofgraph")
 
     def _init_linien(self):
         """
@@ -198,6 +254,9 @@ class Anlage:
         if 'bahnhofgraph' in aenderungen:
             aenderungen.add('signalgraph')
 
+        if 'config' in self.aenderungen or 'bahnhofgraph' in self.aenderungen:
+            self._linien_zuege.clear()
+
         if 'bahnhofgraph' in aenderungen:
             try:
                 logger.debug("Liniengraph konfigurieren.")
@@ -275,10 +334,16 @@ class Anlage:
 
         Jede Strecke aus dem Zielgraphen wird in eine Relation zwischen Bahnhöfen bzw. Anschlussstellen übersetzt
         und als Linie eingefügt.
+
+        Jeder Zug wird nur einmal eingetragen (s. `_linien_zuege`),
+        damit die Fahrtenstatistik nicht bei jeder Abfrage anwächst
+        und die gemessenen Fahrzeiten aus früheren Sitzungen ihr Gewicht behalten.
         """
 
+        zids = set()
         for node1, node2, kante in self.zielgraph.edges(data=True):
-            if kante.typ == 'P':
+            if kante.typ == 'P' and node1.zid not in self._linien_zuege:
+                zids.add(node1.zid)
                 ziel1_data = self.zielgraph.nodes[node1]
                 ziel2_data = self.zielgraph.nodes[node2]
                 try:
@@ -291,12 +356,16 @@ class Anlage:
                     bst2_data = self.bahnhofgraph.nodes[bst2]
                     self.liniengraph.linie_eintragen(ziel1_data, bst1_data, ziel2_data, bst2_data)
                     self.aenderungen.add('liniengraph')
+        self._linien_zuege.update(zids)
 
     def liniengraph_mit_signalgraph_abgleichen(self):
         """
         Liniengraph mittels Signalgraph vereinfachen.
 
         Die Methode trennt die Linien auf, die gemäss Signalgraphen über andere Haltestellen verlaufen.
+
+        Der auf Bahnhöfe und Anschlussstellen zusammengefasste Signalgraph wird in `signalgraph_wege` gehalten
+        und nur neu erstellt, wenn sich der Signalgraph oder die Gleiszuordnung geändert hat.
         """
         mapping = {}
         for gleis, gleis_data in self.bahnhofgraph.nodes(data=True):
@@ -306,9 +375,10 @@ class Anlage:
                     mapping[gleis_data.name] = bst
                 elif gleis.typ == 'Agl':
                     mapping[gleis_data.enr] = bst
-        signalgraph_einfach = nx.relabel_nodes(self.signalgraph, mapping)
-        signalgraph_einfach.remove_edges_from(nx.selfloop_edges(signalgraph_einfach))
-        
+        if self.signalgraph_wege is None or not self.signalgraph_wege.aktuell(self.signalgraph, mapping):
+            self.signalgraph_wege = SignalGraphWege(self.signalgraph, mapping)
+        wege = self.signalgraph_wege
+
         bearbeiten = {(ziel1, ziel2): kante for ziel1, ziel2, kante in self.liniengraph.edges(data=True)}
 
         while bearbeiten:
@@ -316,13 +386,10 @@ class Anlage:
             kante = bearbeiten[(ziel1, ziel2)]
             del bearbeiten[(ziel1, ziel2)]
 
-            try:
-                signal_strecke = nx.shortest_path(signalgraph_einfach, ziel1, ziel2)
-            except (nx.NodeNotFound, nx.NetworkXNoPath):
-                continue
+            signal_strecke = wege.weg(ziel1, ziel2)
 
             for zwischenziel in signal_strecke[1:-1]:
-                if isinstance(zwischenziel, collections.abc.Sequence) and zwischenziel.typ in {'Bf', 'Anst'}:
+                if isinstance(zwischenziel, BahnhofLabelType) and zwischenziel.typ in {'Bf', 'Anst'}:
                     neue_kante = LinienGraphEdge()
                     neue_kante.update(kante)
                     neue_kante.fahrzeit_max = kante.fahrzeit_max / 2
@@ -2,13 +2,14 @@ import datetime
 import logging
 import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, Mapping
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
 
 import networkx as nx
 import numpy as np
 
 from stskit.plugin.stsobj import ZugDetails, FahrplanZeile, Ereignis, time_to_seconds
 from stskit.dispo.anlage import Anlage
+from stskit.dispo.historie import FahrzeitHistorie
 from stskit.utils.export import JSONEncoder
 
 
@@ -16,18 +17,262 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+class FahrzeitStatistik:
+    """
+    numerischer speicher für fahrzeit-statistiken zwischen knoten (gleisen oder gruppen).
+
+    die knoten und kanten werden beim ersten messpunkt dicht durchnummeriert.
+    die statistik einer kante steht in der entsprechenden zeile der numpy-arrays:
+
+    - anzahl, minimum, maximum,
+    - mittel und m2 (summe der quadrierten abweichungen) nach dem online-algorithmus von welford,
+      der auch bei grossen werten numerisch stabil ist,
+    - histogramm mit festen klassen (HISTOGRAMM_BREITE sekunden) als skizze für quantile.
+      die letzte klasse nimmt alle grösseren werte auf.
+
+    der graph enthält nur die topologie (kante -> zeilenindex) und wird für pfadsuchen verwendet.
+    """
+
+    HISTOGRAMM_BREITE = 10.
+    HISTOGRAMM_KLASSEN = 361
+
+    def __init__(self, kapazitaet: int = 64):
+        self.knoten: Dict[Hashable, int] = {}
+        self.kanten: Dict[Tuple[Hashable, Hashable], int] = {}
+        self.graph = nx.DiGraph()
+
+        self.anzahl = np.zeros(kapazitaet, dtype=np.int64)
+        self.mittel = np.zeros(kapazitaet, dtype=np.float64)
+        self.m2 = np.zeros(kapazitaet, dtype=np.float64)
+        self.minimum = np.full(kapazitaet, np.inf, dtype=np.float64)
+        self.maximum = np.full(kapazitaet, -np.inf, dtype=np.float64)
+        self.histogramm = np.zeros((kapazitaet, self.HISTOGRAMM_KLASSEN), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.kanten)
+
+    def _vergroessern(self) -> None:
+        n = len(self.anzahl)
+        self.anzahl = np.concatenate((self.anzahl, np.zeros(n, dtype=np.int64)))
+        self.mittel = np.concatenate((self.mittel, np.zeros(n, dtype=np.float64)))
+        self.m2 = np.concatenate((self.m2, np.zeros(n, dtype=np.float64)))
+        self.minimum = np.concatenate((self.minimum, np.full(n, np.inf, dtype=np.float64)))
+        self.maximum = np.concatenate((self.maximum, np.full(n, -np.inf, dtype=np.float64)))
+        self.histogramm = np.concatenate((self.histogramm, np.zeros_like(self.histogramm)))
+
+    def zeile(self, u: Hashable, v: Hashable) -> int:
+        """
+        zeilenindex einer kante.
+
+        :return: zeilenindex oder -1, wenn die kante nicht erfasst ist.
+        """
+
+        return self.kanten.get((u, v), -1)
+
+    def _zeile_anlegen(self, u: Hashable, v: Hashable) -> int:
+        try:
+            return self.kanten[(u, v)]
+        except KeyError:
+            pass
+
+        i = len(self.kanten)
+        if i >= len(self.anzahl):
+            self._vergroessern()
+        self.kanten[(u, v)] = i
+        for k in (u, v):
+            if k not in self.knoten:
+                self.knoten[k] = len(self.knoten)
+        self.graph.add_edge(u, v, index=i)
+        return i
+
+    def hinzufuegen(self, u: Hashable, v: Hashable, wert: float) -> int:
+        """
+        messpunkt zur statistik der kante u -> v hinzufügen.
+
+        :param u: startknoten
+        :param v: zielknoten
+        :param wert: messwert in sekunden
+        :return: zeilenindex der kante
+        """
+
+        i = self._zeile_anlegen(u, v)
+        n = self.anzahl[i] + 1
+        delta = wert - self.mittel[i]
+        self.mittel[i] += delta / n
+        self.m2[i] += delta * (wert - self.mittel[i])
+        self.anzahl[i] = n
+        self.minimum[i] = min(self.minimum[i], wert)
+        self.maximum[i] = max(self.maximum[i], wert)
+        klasse = min(int(max(wert, 0.) // self.HISTOGRAMM_BREITE), self.HISTOGRAMM_KLASSEN - 1)
+        self.histogramm[i, klasse] += 1
+        return i
+
+    def zusammenfuehren(self, u: Hashable, v: Hashable, anzahl: int, minimum: float, maximum: float,
+                        mittel: float, m2: float, histogramm: Mapping[int, int]) -> int:
+        """
+        zusammengefasste messpunkte zur statistik der kante u -> v hinzufügen.
+
+        mittel und m2 werden nach dem parallelen algorithmus von chan kombiniert.
+
+        :param u: startknoten
+        :param v: zielknoten
+        :param anzahl: anzahl messpunkte
+        :param minimum: kleinster messwert in sekunden
+        :param maximum: grösster messwert in sekunden
+        :param mittel: mittelwert in sekunden
+        :param m2: summe der quadrierten abweichungen vom mittelwert
+        :param histogramm: anzahl messpunkte nach histogrammklasse
+        :return: zeilenindex der kante
+        """
+
+        i = self._zeile_anlegen(u, v)
+        if anzahl <= 0:
+            return i
+
+        n = self.anzahl[i] + anzahl
+        delta = mittel - self.mittel[i]
+        self.m2[i] += m2 + delta * delta * self.anzahl[i] * anzahl / n
+        self.mittel[i] += delta * anzahl / n
+        self.anzahl[i] = n
+        self.minimum[i] = min(self.minimum[i], minimum)
+        self.maximum[i] = max(self.maximum[i], maximum)
+        for klasse, k in histogramm.items():
+            self.histogramm[i, min(max(int(klasse), 0), self.HISTOGRAMM_KLASSEN - 1)] += k
+        return i
+
+    def abfragen(self, zeilen: Iterable[int], quantile: Iterable[float] = (0.5, 0.9)) -> Dict[str, np.ndarray]:
+        """
+        statistik mehrerer kanten in einem schritt auslesen.
+
+        :param zeilen: zeilenindizes (s. `zeile`). -1 für fehlende kanten.
+        :param quantile: gewünschte quantile (0..1). die werte werden aus dem histogramm geschätzt.
+        :return: dictionary von arrays in der reihenfolge der zeilen:
+            'anzahl', 'min', 'max', 'avg', 'sdev' und 'q50', 'q90' usw.
+            fehlende kanten ergeben anzahl 0 und nan.
+        """
+
+        zeilen = np.asarray(list(zeilen), dtype=np.int64).reshape(-1)
+        gueltig = zeilen >= 0
+        z = np.where(gueltig, zeilen, 0)
+        anzahl = np.where(gueltig, self.anzahl[z], 0)
+        erfasst = anzahl > 0
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = {'anzahl': anzahl,
+                      'min': np.where(erfasst, self.minimum[z], np.nan),
+                      'max': np.where(erfasst, self.maximum[z], np.nan),
+                      'avg': np.where(erfasst, self.mittel[z], np.nan),
+                      'sdev': np.where(erfasst, np.sqrt(self.m2[z] / np.maximum(anzahl, 1)), np.nan)}
+
+        kumuliert = np.cumsum(self.histogramm[z], axis=1)
+        for q in quantile:
+            klasse = np.argmax(kumuliert >= np.ceil(q * anzahl)[:, np.newaxis], axis=1)
+            wert = (klasse + 0.5) * self.HISTOGRAMM_BREITE
+            wert = np.clip(wert, result['min'], result['max'])
+            result[f"q{round(q * 100)}"] = np.where(erfasst, wert, np.nan)
+
+        return result
+
+    def fahrzeiten(self, start: Hashable, ziel: Hashable) -> List[float]:
+        """
+        mittlere fahrzeiten zwischen zwei knoten auslesen.
+
+        die methode gibt eine liste von bis zu drei werten aus:
+        1. direkte kante zwischen start und ziel,
+        2. direkte kante zwischen ziel und start (rückweg),
+        3. summe über den kürzesten pfad.
+
+        :param start: startgleis bzw. startbahnhof
+        :param ziel: zielgleis bzw. zielbahnhof
+        :return: liste von fahrzeiten in sekunden
+        """
+
+        result = []
+        for u, v in [(start, ziel), (ziel, start)]:
+            i = self.zeile(u, v)
+            if i >= 0:
+                result.append(float(self.mittel[i]))
+
+        def gewicht(u, v, d):
+            return self.mittel[d['index']]
+
+        try:
+            ud = self.graph.to_undirected(as_view=True)
+            p = nx.shortest_path(ud, start, ziel, gewicht)
+            s = 0.
+            for u, v in zip(p[:-1], p[1:]):
+                s += float(self.mittel[ud[u][v]['index']])
+        except (nx.NetworkXException, KeyError):
+            pass
+        else:
+            result.append(s)
+
+        return result
+
+    def als_liste(self) -> List[Dict[str, Any]]:
+        """
+        statistik aller kanten als liste von dictionaries (für den export).
+        """
+
+        paare = list(self.kanten.keys())
+        stat = self.abfragen(self.kanten.values())
+        return [{'source': u, 'target': v, **{k: stat[k][i].item() for k in stat}}
+                for i, (u, v) in enumerate(paare)]
+
+
 class FahrzeitAuswertung:
     """
     auswertungsklasse für fahrzeiten zwischen gleisen.
 
     messdaten werden per gleis hinzugefügt, können aber auch per gruppe ausgewertet werden.
     die gruppenzuordnung muss vor den daten definiert werden.
+    die statistiken werden in je einem `FahrzeitStatistik`-objekt für gleise und gruppen geführt.
+    wenn eine `FahrzeitHistorie` geladen ist, werden neue messpunkte auch dort gespeichert.
     """
 
     def __init__(self):
-        self.gleis_zeiten = nx.DiGraph()
-        self.bahnhof_zeiten = nx.DiGraph()
+        self.gleis_zeiten = FahrzeitStatistik()
+        self.bahnhof_zeiten = FahrzeitStatistik()
         self.gruppen: Dict[str, str] = {}
+        self.historie: Optional[FahrzeitHistorie] = None
+
+    def historie_laden(self, historie: FahrzeitHistorie,
+                       statistik: Optional[Mapping[str, Mapping[Tuple[str, str], Mapping[str, Any]]]] = None) -> None:
+        """
+        statistik aus früheren sitzungen laden und die historie für neue messpunkte verwenden.
+
+        die messpunkte werden in der datenbank zusammengefasst (s. `historie_statistik`)
+        und pro verbindung in einem schritt übernommen.
+
+        :param historie: FahrzeitHistorie der aktuellen anlage
+        :param statistik: vorab (z.b. in einem hintergrund-thread) gelesenes resultat von `historie_statistik`.
+            None = jetzt aus der historie lesen.
+        :return: None
+        """
+
+        if statistik is None:
+            statistik = self.historie_statistik(historie)
+        for ebene, zeiten in [('gleis', self.gleis_zeiten), ('bahnhof', self.bahnhof_zeiten)]:
+            for (start, ziel), daten in statistik.get(ebene, {}).items():
+                zeiten.zusammenfuehren(start, ziel, **daten)
+        self.historie = historie
+        logger.info(f"fahrzeithistorie geladen: {len(self.gleis_zeiten)} gleis- "
+                    f"und {len(self.bahnhof_zeiten)} bahnhofverbindungen")
+
+    @staticmethod
+    def historie_statistik(historie: FahrzeitHistorie) -> Dict[str, Dict[Tuple[str, str], Dict[str, Any]]]:
+        """
+        zusammengefasste messpunkte beider ebenen aus der historie lesen.
+
+        die methode greift nur auf die datenbank zu und kann in einem hintergrund-thread ausgeführt werden.
+
+        :param historie: FahrzeitHistorie der aktuellen anlage
+        :return: ebene ('gleis', 'bahnhof') -> resultat von `FahrzeitHistorie.statistik`
+        """
+
+        return {ebene: historie.statistik(ebene, FahrzeitStatistik.HISTOGRAMM_BREITE,
+                                          FahrzeitStatistik.HISTOGRAMM_KLASSEN)
+                for ebene in ('gleis', 'bahnhof')}
 
     def set_koordinaten(self, koordinaten: Mapping[str, Iterable[str]]) -> None:
         self.gruppen = {}
@@ -47,45 +292,24 @@ class FahrzeitAuswertung:
         """
 
         try:
-            self._add_edge_stats(self.bahnhof_zeiten, self.gruppen[start], self.gruppen[ziel], fahrzeit)
-            self._add_edge_stats(self.gleis_zeiten, start, ziel, fahrzeit)
-            logger.debug(f"add_fahrzeit({zug.name}, {start}, {ziel}, {fahrzeit})")
+            start_gruppe = self.gruppen[start]
+            ziel_gruppe = self.gruppen[ziel]
         except KeyError:
             logger.debug(f"add_fahrzeit: fehlende gruppenzuordnung für {start} oder {ziel}")
+            return
 
-    @staticmethod
-    def _add_edge_stats(g: nx.Graph, u: Any, v: Any, wert: float) -> Dict[str, Any]:
-        """
-        neue messung zu statistikattributen einer kante addieren
-
-        :param g: graph
-        :param u: startknoten
-        :param v: zielknoten
-        :param wert: messwert
-        :return: aktualisierter attribut-dict
-        """
-        try:
-            d = g.edges[u, v]
-        except KeyError:
-            d = {'min': wert, 'max': wert, 'sum': wert, 'sum2': wert**2, 'count': 1}
-        else:
-            d['min'] = min(d['min'], wert)
-            d['max'] = max(d['max'], wert)
-            d['sum'] = d['sum'] + wert
-            d['sum2'] = d['sum2'] + wert ** 2
-            d['count'] = d['count'] + 1
-
-        d['avg'] = d['sum'] / d['count']
-        d['sdev'] = np.sqrt(d['sum2'] / d['count'] - d['avg'] ** 2)
-
-        g.add_edge(u, v, **d)
-        return d
+        self.bahnhof_zeiten.hinzufuegen(start_gruppe, ziel_gruppe, fahrzeit)
+        self.gleis_zeiten.hinzufuegen(start, ziel, fahrzeit)
+        logger.debug(f"add_fahrzeit({zug.name}, {start}, {ziel}, {fahrzeit})")
+        if self.historie is not None:
+            self.historie.eintragen('bahnhof', start_gruppe, ziel_gruppe, fahrzeit)
+            self.historie.eintragen('gleis', start, ziel, fahrzeit)
 
     def report(self):
         if logger.isEnabledFor(logging.INFO):
             try:
-                d = {'gleis_zeiten': dict(nx.node_link_data(self.gleis_zeiten, edges="edges")),
-                     'bahnhof_zeiten': dict(nx.node_link_data(self.bahnhof_zeiten, edges="edges"))}
+                d = {'gleis_zeiten': self.gleis_zeiten.als_liste(),
+                     'bahnhof_zeiten': self.bahnhof_zeiten.als_liste()}
                 p = Path.home() / r".stskit" / "auswertung.json"
                 with open(p, "w", encoding='utf-8') as fp:
                     json.dump(d, fp, sort_keys=True, indent=4, cls=JSONEncoder)
@@ -112,7 +336,7 @@ class FahrzeitAuswertung:
         """
 
         fahrzeiten = []
-        fahrzeiten.extend(self._get_graph_fahrzeit(self.gleis_zeiten, start, ziel))
+        fahrzeiten.extend(self.gleis_zeiten.fahrzeiten(start, ziel))
 
         try:
             start_bahnhof = self.gruppen[start]
@@ -120,52 +344,31 @@ class FahrzeitAuswertung:
         except KeyError:
             pass
         else:
-            fahrzeiten.extend(self._get_graph_fahrzeit(self.bahnhof_zeiten, start_bahnhof, ziel_bahnhof))
+            fahrzeiten.extend(self.bahnhof_zeiten.fahrzeiten(start_bahnhof, ziel_bahnhof))
 
         return min(fahrzeiten, default=np.nan)
 
-    @staticmethod
-    def _get_graph_fahrzeit(graph, start, ziel):
+    def get_fahrzeiten(self, paare: Iterable[Tuple[str, str]],
+                       quantile: Iterable[float] = (0.5, 0.9)) -> Dict[str, np.ndarray]:
         """
-        fahrzeit aus einem graphen auslesen.
+        statistik direkter verbindungen für viele paare in einem schritt auslesen.
 
-        die fahrzeit wird aus dem 'avg'-attribut der kante im graphen ausgelesen.
-        die methode gibt eine liste von bis zu drei werten aus:
-        1. direkte kante zwischen start und ziel,
-        2. direkte kante zwischen ziel und start (rückweg),
-        3. summe über den kürzesten pfad.
+        pro paar wird die gleis-statistik verwendet, falls erfasst, sonst die statistik der gruppen.
+        anders als `get_fahrzeit` werden keine pfade gesucht.
 
-        :param graph: dies muss einer der eigenen graphen gleis_zeiten oder bahnhof_zeiten sein
-            (oder ein kompatibler graph).
-        :param start: startgleis bzw. startbahnhof
-        :param ziel: zielgleis bzw. zielbahnhof
-        :return: liste von fahrzeiten in sekunden
+        :param paare: sequenz von (start, ziel)-paaren (gleis- oder gruppennamen).
+        :param quantile: s. `FahrzeitStatistik.abfragen`.
+        :return: dictionary von arrays in der reihenfolge der paare, s. `FahrzeitStatistik.abfragen`.
         """
 
-        result = []
-
-        try:
-            result.append(graph[start][ziel]['avg'])
-        except KeyError:
-            pass
-
-        try:
-            result.append(graph[ziel][start]['avg'])
-        except KeyError:
-            pass
-
-        try:
-            ud = graph.to_undirected(as_view=True)
-            p = nx.shortest_path(ud, start, ziel, 'avg')
-            s = 0
-            for u, v in zip(p[:-1], p[1:]):
-                s = s + graph[u][v]['avg']
-        except (nx.NetworkXException, KeyError):
-            pass
-        else:
-            result.append(s)
-
-        return result
+        paare = list(paare)
+        gleis_zeilen = [self.gleis_zeiten.zeile(u, v) for u, v in paare]
+        bahnhof_zeilen = [self.bahnhof_zeiten.zeile(self.gruppen.get(u, u), self.gruppen.get(v, v))
+                          for u, v in paare]
+        gleis_stat = self.gleis_zeiten.abfragen(gleis_zeilen, quantile)
+        bahnhof_stat = self.bahnhof_zeiten.abfragen(bahnhof_zeilen, quantile)
+        gleis_erfasst = gleis_stat['anzahl'] > 0
+        return {k: np.where(gleis_erfasst, gleis_stat[k], bahnhof_stat[k]) for k in gleis_stat}
 
 
 class ZugAuswertung:
@@ -462,13 +665,40 @@ class Auswertung:
         """
         fahrzeit eines zuges von start zu ziel abschätzen.
 
+        die direkt gemessene verbindung wird bevorzugt,
+        ansonsten wird die fahrzeit über erfasste teilstrecken gesucht (s. `FahrzeitAuswertung.get_fahrzeit`).
+
         :param zug: zugname
         :param start: name des startpunkts (einfahrt oder bahnsteig)
         :param ziel: name des zielpunkts (ausfahrt oder bahnsteig)
-        :return: geschätzte fahrzeit in sekunden, oder None, falls eine schätzung unmöglich ist.
+        :return: geschätzte fahrzeit in sekunden, oder numpy.nan, falls eine schätzung unmöglich ist.
+        """
+
+        fahrzeit = self.fahrzeiten.get_fahrzeiten([(start, ziel)], quantile=())['avg'][0]
+        if np.isnan(fahrzeit):
+            return self.fahrzeiten.get_fahrzeit(start, ziel)
+        return float(fahrzeit)
+
+    def liniengraph_messungen(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        gemessene fahrzeiten zwischen bahnhöfen und anschlussstellen für den liniengraphen.
+
+        alle erfassten verbindungen werden in einem schritt ausgelesen (s. `FahrzeitAuswertung.get_fahrzeiten`).
+        die statistik enthält auch die aus der historie geladenen messungen.
+
+        :return: dictionary (start, ziel) -> {'fahrzeit_min', 'fahrzeit_schnitt', 'fahrzeit_max', 'fahrten'}
+            mit zeiten in minuten, s. `stskit.model.liniengraph.LinienGraph.messungen_uebernehmen`.
         """
 
-        return self.fahrzeiten.get_fahrzeit(start, ziel)
+        paare = list(self.fahrzeiten.bahnhof_zeiten.kanten)
+        stat = self.fahrzeiten.get_fahrzeiten(paare, quantile=())
+        return {paar: {'fahrzeit_min': float(minimum) / 60,
+                       'fahrzeit_schnitt': float(mittel) / 60,
+                       'fahrzeit_max': float(maximum) / 60,
+                       'fahrten': int(anzahl)}
+                for paar, anzahl, minimum, mittel, maximum
+                in zip(paare, stat['anzahl'], stat['min'], stat['avg'], stat['max'])
+                if anzahl > 0}
 
     def rotzeit_auswerten(self, zug: ZugDetails):
         """
@@ -20,12 +20,15 @@ from pathlib import Path
 from typing import Any, Optional, Set, Tuple, Union
 
 from stskit.dispo.anlage import Anlage
+from stskit.dispo.prognoseexport import PrognoseExport
+from stskit.dispo.schnappschuss import BetriebHistorie, BetriebSchnappschuss
 from stskit.model.journal import JournalEntry, JournalIDType, JournalEntryGroup, Journal
 from stskit.model.bahnhofgraph import BahnhofElement
-from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode, EreignisGraphEdge, EreignisLabelType
+from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode, EreignisGraphEdge, EreignisLabelType, \
+    PrognoseIndex
 from stskit.model.zielgraph import ZielGraph, ZielGraphEdge, ZielGraphNode, ZielLabelType
 from stskit.plugin.stsobj import Ereignis
-from stskit.utils.export import write_gml
+from stskit.utils.export import dump_graph
 from stskit.utils.observer import Observable
 
 logger = logging.getLogger(__name__)
@@ -39,7 +42,11 @@ class Betrieb:
         self.zielgraph = ZielGraph()
         self.ereignisgraph = EreignisGraph()
         self.journal = Journal()
+        self.historie: BetriebHistorie | None = None
+        self.prognose_export: PrognoseExport | None = None
         self.on_change = Observable(self)
+        # prognoseindex nach dem abspielen des journals: (index der anlage, journalstruktur, index)
+        self._prognose_index_dispo: tuple[PrognoseIndex, tuple, PrognoseIndex] | None = None
 
     def update(self, anlage: Anlage, config_path: os.PathLike):
         self.anlage = anlage
@@ -50,20 +57,73 @@ class Betrieb:
         self.zielgraph = copy.deepcopy(self.anlage.zielgraph)
         self.ereignisgraph = copy.deepcopy(self.anlage.ereignisgraph)
 
+        basis = self.ereignisgraph.prognose_index
+
         self.journal_bereinigen()
         self.journal.replay(graph_map={'ereignisgraph': self.ereignisgraph,
                                        'zielgraph': self.zielgraph})
 
-        self.ereignisgraph.prognose()
+        struktur = None
+        if basis is not None and self.ereignisgraph.prognose_index is None:
+            struktur = self._journal_struktur()
+            try:
+                vorher_basis, vorher_struktur, vorher_index = self._prognose_index_dispo
+            except TypeError:
+                pass
+            else:
+                if vorher_basis is basis and vorher_struktur == struktur:
+                    self.ereignisgraph.prognose_index_uebernehmen(vorher_index)
+
+        kanten = self.ereignisgraph.number_of_edges()
+        self.ereignisgraph.prognose_vektoriell()
+        # nach dem aufbrechen von schleifen passt der index nicht mehr zur journalstruktur
+        if struktur is not None and self.ereignisgraph.number_of_edges() == kanten:
+            self._prognose_index_dispo = (basis, struktur, self.ereignisgraph.prognose_index)
         self.ereignisgraph.verspaetungen_nach_zielgraph(self.zielgraph)
+        if self.historie is not None:
+            self.historie.erfassen(self)
+        if self.prognose_export is not None:
+            self.prognose_export.erfassen(self)
 
         self.on_change.trigger()
 
+    def _journal_struktur(self) -> tuple:
+        """
+        Strukturelle Änderungen des Journals am Ereignisgraphen
+
+        Journale mit derselben Struktur ergeben aus demselben Ereignisgraphen
+        Graphen mit denselben Knoten und Kanten.
+        """
+
+        struktur = []
+        for eintrag in self.journal.entries.values():
+            for e in getattr(eintrag, 'entries', [eintrag]):
+                if e.target_graph == 'ereignisgraph':
+                    struktur.append((frozenset(e.removed_edges), frozenset(e.removed_nodes),
+                                     frozenset(e.added_nodes), frozenset(e.added_edges)))
+        return tuple(struktur)
+
+    def journal_wiederherstellen(self, schnappschuss: BetriebSchnappschuss) -> None:
+        """
+        Dispositionen auf den Stand eines Schnappschusses zurücksetzen
+
+        Das Dispojournal wird durch eine Kopie des Journals im Schnappschuss ersetzt.
+        Alle seither getroffenen Dispositionen werden damit zurückgenommen.
+        Die Graphen werden anschliessend aus der aktuellen Anlage neu aufgebaut,
+        Ereignisse, die seit dem Schnappschuss eingetreten sind, bleiben also erhalten.
+
+        Args:
+            schnappschuss: Schnappschuss aus `historie`, sofern diese eingeschaltet ist.
+        """
+
+        self.journal = copy.deepcopy(schnappschuss.journal)
+        self._internal_update()
+
     def save_graphs(self):
         if logger.isEnabledFor(logging.DEBUG):
             debug_path = self.config_path / "debug"
-            write_gml(self.zielgraph, debug_path / f"{self.anlage.anlageninfo.aid}.zielgraph.gml")
-            write_gml(self.ereignisgraph, debug_path / f"{self.anlage.anlageninfo.aid}.ereignisgraph.gml")
+            dump_graph(self.zielgraph, debug_path / f"{self.anlage.anlageninfo.aid}.zielgraph")
+            dump_graph(self.ereignisgraph, debug_path / f"{self.anlage.anlageninfo.aid}.ereignisgraph")
             # with open(debug_path / f"{self.anlageninfo.aid}.strecken.json", "w") as f:
             #     json.dump(self.strecken.strecken, f)
 
@@ -402,8 +462,12 @@ class Betrieb:
     def journal_bereinigen(self):
         """
         Vergangene Abhaengigkeiten bereinigen
+
+        Einträge, die Ereignisse archivierter Züge betreffen, werden ebenfalls entfernt,
+        da das Abspielen sonst die Knoten ohne Daten wieder anlegen würde.
         """
 
+        archiv = self.anlage.archiv
         entfernen = []
         for jid, j in self.journal.entries.items():
             if not self.anlage.zuggraph.has_node(jid.zid) or self.anlage.zuggraph.nodes[jid.zid].get("ausgefahren", False):
@@ -411,6 +475,11 @@ class Betrieb:
                 logger.debug(f"journal_bereinigen: {jid} (zug ausgefahren)")
                 continue
 
+            if archiv and any(getattr(node, "zid", None) in archiv for _, node in j.nodes()):
+                entfernen.append(jid)
+                logger.debug(f"journal_bereinigen: {jid} (zug archiviert)")
+                continue
+
             for node in j.target_nodes():
                 if self.ereignisgraph.has_node(node):
                     data = self.ereignisgraph.nodes[node]
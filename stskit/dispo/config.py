@@ -1,16 +1,77 @@
 from collections import UserDict
 import json
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
 import logging
+import os
 from pathlib import Path
 import sys
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from stskit.model.bahnhofgraph import BahnhofGraph, BahnhofElement
 from stskit.utils.export import json_object_hook
 
 logger = logging.getLogger(__name__)
 
+SCHEMA_PATH = Path(__file__).parent.parent / 'schema' / 'config.schema3.json'
+
+# kompilierte Validatoren nach Schemapfad: (mtime_ns, schema, validator)
+_validatoren: Dict[Path, Tuple[int, Dict, Validator]] = {}
+
+
+def json_laden(path: os.PathLike) -> Any:
+    """
+    JSON-Datei laden.
+
+    Verwendet orjson, falls installiert, sonst das json-Modul der Standardbibliothek.
+
+    :param path: Pfad der JSON-Datei.
+    :return: Dekodierte Daten.
+    :raise: OSError, ValueError
+    """
+
+    if orjson is not None:
+        with open(path, 'rb') as fp:
+            return orjson.loads(fp.read())
+    else:
+        with open(path, 'r', encoding='utf-8') as fp:
+            return json.load(fp)
+
+
+def schema_validator(path: os.PathLike) -> Tuple[Dict, Validator]:
+    """
+    Kompilierten JSON-Schema-Validator holen.
+
+    Das Schema wird pro Prozess nur einmal geladen und geprüft.
+    Der Cache wird erneuert, wenn sich die Änderungszeit der Schemadatei ändert.
+
+    :param path: Pfad der Schemadatei.
+    :return: Tupel (Schema, Validator).
+    :raise: OSError, ValueError, jsonschema.SchemaError
+    """
+
+    path = Path(path)
+    mtime = path.stat().st_mtime_ns
+    try:
+        cache_mtime, schema, validator = _validatoren[path]
+        if cache_mtime == mtime:
+            return schema, validator
+    except KeyError:
+        pass
+
+    schema = json_laden(path)
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+    _validatoren[path] = (mtime, schema, validator)
+    return schema, validator
+
 
 class Config(UserDict):
     """
@@ -39,8 +100,7 @@ class Config(UserDict):
         :raise: OSError, JSONDecodeError(ValueError)
         """
 
-        with open(path, 'r', encoding='utf-8') as fp:
-            d = json.load(fp)
+        d = json_laden(path)
 
         if '_version' not in d:
             d['_version'] = 1
@@ -53,7 +113,7 @@ class Config(UserDict):
         if d['_version'] == 2:
             self.load_v2(path)
         elif d['_version'] == 3:
-            self.load_v3(path)
+            self.load_v3(path, data=d)
         else:
             logger.error(f"Inkompatible Konfigurationsdatei {path}, wird ignoriert.")
 
@@ -68,16 +128,26 @@ class Config(UserDict):
         self.loaded_from = path
         logger.info("Konfiguration geladen. Version 2.")
 
-    def load_v3(self, path: Path):
+    def load_v3(self, path: Path, data: Optional[Dict] = None):
+        """
+        Konfigurationsdatei Version 3 laden und validieren.
+
+        Der Schema-Validator wird pro Prozess zwischengespeichert (s. `schema_validator`).
+
+        :param path: Pfad der Konfigurationsdatei.
+        :param data: Bereits geladener Dateiinhalt. Wenn None, wird die Datei gelesen.
+        :return: None
+        :raise: OSError, JSONDecodeError(ValueError)
+        """
+
         if not self.schema_path:
-            self.schema_path = Path(__file__).parent.parent / 'schema' / 'config.schema3.json'
-        with open(self.schema_path, 'r', encoding='utf-8') as fp:
-            self.schema = json.load(fp)
-        with open(path, 'r', encoding='utf-8') as fp:
-            data = json.load(fp)
+            self.schema_path = SCHEMA_PATH
+        self.schema, validator = schema_validator(self.schema_path)
+        if data is None:
+            data = json_laden(path)
 
         try:
-            validate(data, schema=self.schema)
+            validator.validate(data)
         except ValidationError as e:
             logger.error(e)
             print(f"Fehlerhafte Konfigurationsdatei {path}: {e}", file=sys.stderr)
@@ -0,0 +1,294 @@
+"""
+Fahrzeithistorie über mehrere Sitzungen
+
+Gemessene Fahrzeiten werden in einer lokalen SQLite-Datenbank im Konfigurationsverzeichnis abgelegt,
+damit Auswertung und Prognose beim nächsten Start nicht bei Null beginnen.
+Die Messungen sind nach Anlagen-ID (`anlageninfo.aid`) und Ebene ('gleis' oder 'bahnhof') geordnet.
+
+Das Schreiben erfolgt in einem Hintergrund-Thread, der die Messungen in Transaktionen bündelt.
+Der Aufrufer (Ereignisschleife) wird dadurch nicht blockiert.
+Beim Start des Schreib-Threads werden Messungen gelöscht, die älter als `max_alter` sind.
+
+Beim Laden werden die Messungen in der Datenbank zusammengefasst (`aggregat`, `statistik`),
+damit nicht jede einzelne Messung in Python verarbeitet werden muss.
+"""
+
+import logging
+import os
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DATEINAME = "fahrzeiten.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messungen (
+    id INTEGER PRIMARY KEY,
+    aid INTEGER NOT NULL,
+    ebene TEXT NOT NULL,
+    start TEXT NOT NULL,
+    ziel TEXT NOT NULL,
+    fahrzeit REAL NOT NULL,
+    zeitpunkt REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messungen_aid ON messungen (aid, ebene);
+"""
+
+
+class FahrzeitHistorie:
+    """
+    Persistente Fahrzeitmessungen einer Anlage.
+
+    Lesende Methoden (`messungen`, `aggregat`) öffnen eine eigene, kurzlebige Verbindung.
+    `eintragen` reiht die Messung in eine Warteschlange ein,
+    die vom Schreib-Thread in Transaktionen von bis zu `BATCH` Messungen abgearbeitet wird.
+
+    Attributes:
+        pfad: Pfad der Datenbankdatei.
+        aid: Anlagen-ID.
+        max_alter: Messungen, die älter sind (in Sekunden), werden beim Laden nicht berücksichtigt
+            und beim Start des Schreib-Threads gelöscht.
+            None = unbegrenzt.
+    """
+
+    BATCH = 500
+
+    def __init__(self, pfad: os.PathLike, aid: int, max_alter: Optional[float] = 365 * 24 * 3600):
+        self.pfad = Path(pfad)
+        self.aid = aid
+        self.max_alter = max_alter
+        self._queue: queue.Queue[Optional[Tuple[str, str, str, float, float]]] = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def im_verzeichnis(cls, config_path: os.PathLike, aid: int) -> 'FahrzeitHistorie':
+        """
+        Historie im Konfigurationsverzeichnis anlegen.
+        """
+
+        return cls(Path(config_path) / DATEINAME, aid)
+
+    def _verbinden(self) -> sqlite3.Connection:
+        self.pfad.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.pfad)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(SCHEMA)
+        return con
+
+    def _zeitgrenze(self) -> float:
+        if self.max_alter is None:
+            return 0.
+        else:
+            return time.time() - self.max_alter
+
+    def messungen(self, ebene: str) -> Iterator[Tuple[str, str, float]]:
+        """
+        Gespeicherte Messungen einer Ebene in der Reihenfolge der Erfassung.
+
+        :param ebene: 'gleis' oder 'bahnhof'
+        :return: Iterator von (start, ziel, fahrzeit in Sekunden)
+        """
+
+        try:
+            con = self._verbinden()
+        except sqlite3.Error as e:
+            logger.error(f"Fahrzeithistorie {self.pfad} kann nicht geöffnet werden: {e}")
+            return
+
+        try:
+            yield from con.execute("SELECT start, ziel, fahrzeit FROM messungen "
+                                   "WHERE aid = ? AND ebene = ? AND zeitpunkt >= ? ORDER BY id",
+                                   (self.aid, ebene, self._zeitgrenze()))
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Lesen der Fahrzeithistorie {self.pfad}: {e}")
+        finally:
+            con.close()
+
+    def aggregat(self, ebene: str = 'bahnhof') -> Dict[Tuple[str, str], Dict[str, float]]:
+        """
+        Zusammengefasste Fahrzeiten einer Ebene.
+
+        Die Zusammenfassung erfolgt in der Datenbank (GROUP BY).
+
+        :param ebene: 'gleis' oder 'bahnhof'
+        :return: Dictionary (start, ziel) -> {'fahrzeit_min', 'fahrzeit_schnitt', 'fahrzeit_max', 'fahrten'}.
+            Die Zeiten sind wie im Liniengraph in Minuten angegeben.
+        """
+
+        result = {}
+        try:
+            con = self._verbinden()
+        except sqlite3.Error as e:
+            logger.error(f"Fahrzeithistorie {self.pfad} kann nicht geöffnet werden: {e}")
+            return result
+
+        try:
+            for start, ziel, anzahl, minimum, mittel, maximum in con.execute(
+                    "SELECT start, ziel, COUNT(*), MIN(fahrzeit), AVG(fahrzeit), MAX(fahrzeit) FROM messungen "
+                    "WHERE aid = ? AND ebene = ? AND zeitpunkt >= ? GROUP BY start, ziel",
+                    (self.aid, ebene, self._zeitgrenze())):
+                result[(start, ziel)] = {'fahrzeit_min': minimum / 60,
+                                         'fahrzeit_schnitt': mittel / 60,
+                                         'fahrzeit_max': maximum / 60,
+                                         'fahrten': anzahl}
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Lesen der Fahrzeithistorie {self.pfad}: {e}")
+        finally:
+            con.close()
+
+        return result
+
+    def statistik(self, ebene: str, klassenbreite: float, klassen: int) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Zusammengefasste Messungen einer Ebene für `stskit.dispo.auswertung.FahrzeitStatistik`.
+
+        Anzahl, Extremwerte, Mittelwert, Quadratsumme und Histogramm werden in der Datenbank berechnet.
+
+        :param ebene: 'gleis' oder 'bahnhof'
+        :param klassenbreite: Breite der Histogrammklassen in Sekunden.
+        :param klassen: Anzahl Histogrammklassen. Die letzte Klasse nimmt alle grösseren Werte auf.
+        :return: Dictionary (start, ziel) -> {'anzahl', 'minimum', 'maximum', 'mittel', 'm2', 'histogramm'}.
+            m2 ist die Summe der quadrierten Abweichungen vom Mittelwert,
+            histogramm ein Dictionary Klasse -> Anzahl.
+            Die Zeiten sind in Sekunden angegeben.
+        """
+
+        result = {}
+        try:
+            con = self._verbinden()
+        except sqlite3.Error as e:
+            logger.error(f"Fahrzeithistorie {self.pfad} kann nicht geöffnet werden: {e}")
+            return result
+
+        parameter = (self.aid, ebene, self._zeitgrenze())
+        try:
+            for start, ziel, anzahl, minimum, maximum, mittel, quadrate in con.execute(
+                    "SELECT start, ziel, COUNT(*), MIN(fahrzeit), MAX(fahrzeit), AVG(fahrzeit), "
+                    "SUM(fahrzeit * fahrzeit) FROM messungen "
+                    "WHERE aid = ? AND ebene = ? AND zeitpunkt >= ? GROUP BY start, ziel", parameter):
+                result[(start, ziel)] = {'anzahl': anzahl,
+                                         'minimum': minimum,
+                                         'maximum': maximum,
+                                         'mittel': mittel,
+                                         'm2': max(0., quadrate - anzahl * mittel * mittel),
+                                         'histogramm': {}}
+
+            for start, ziel, klasse, anzahl in con.execute(
+                    "SELECT start, ziel, MIN(CAST(MAX(fahrzeit, 0) / ? AS INTEGER), ?) AS klasse, COUNT(*) "
+                    "FROM messungen WHERE aid = ? AND ebene = ? AND zeitpunkt >= ? GROUP BY start, ziel, klasse",
+                    (klassenbreite, klassen - 1, *parameter)):
+                result[(start, ziel)]['histogramm'][klasse] = anzahl
+        except (sqlite3.Error, KeyError) as e:
+            logger.error(f"Fehler beim Lesen der Fahrzeithistorie {self.pfad}: {e}")
+        finally:
+            con.close()
+
+        return result
+
+    def bereinigen(self, con: sqlite3.Connection) -> None:
+        """
+        Messungen löschen, die älter als `max_alter` sind.
+
+        Betrifft alle Anlagen in der Datenbank.
+
+        :param con: Offene Verbindung.
+        """
+
+        if self.max_alter is None:
+            return
+
+        try:
+            with con:
+                anzahl = con.execute("DELETE FROM messungen WHERE zeitpunkt < ?", (self._zeitgrenze(),)).rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Fehler beim Bereinigen der Fahrzeithistorie {self.pfad}: {e}")
+        else:
+            if anzahl:
+                logger.info(f"{anzahl} veraltete Fahrzeitmessungen gelöscht")
+
+    def eintragen(self, ebene: str, start: str, ziel: str, fahrzeit: float) -> None:
+        """
+        Messung zum Speichern vormerken.
+
+        Die Methode blockiert nicht. Die Messung wird vom Schreib-Thread gespeichert.
+
+        :param ebene: 'gleis' oder 'bahnhof'
+        :param start: Start (Gleis- oder Gruppenname)
+        :param ziel: Ziel (Gleis- oder Gruppenname)
+        :param fahrzeit: Fahrzeit in Sekunden
+        """
+
+        self._queue.put((ebene, str(start), str(ziel), float(fahrzeit), time.time()))
+        self._starten()
+
+    def flush(self) -> None:
+        """
+        Warten, bis alle vorgemerkten Messungen gespeichert sind.
+        """
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def schliessen(self) -> None:
+        """
+        Vorgemerkte Messungen speichern und den Schreib-Thread beenden.
+        """
+
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+    def _starten(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._schreiben, name="FahrzeitHistorie", daemon=True)
+                self._thread.start()
+
+    def _schreiben(self) -> None:
+        try:
+            con = self._verbinden()
+        except sqlite3.Error as e:
+            logger.error(f"Fahrzeithistorie {self.pfad} kann nicht geöffnet werden: {e}")
+            con = None
+        else:
+            self.bereinigen(con)
+
+        ende = False
+        while not ende:
+            eintraege = [self._queue.get()]
+            while len(eintraege) < self.BATCH:
+                try:
+                    eintraege.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            zeilen = []
+            for eintrag in eintraege:
+                if eintrag is None:
+                    ende = True
+                else:
+                    zeilen.append((self.aid, *eintrag))
+
+            if con is not None and zeilen:
+                try:
+                    with con:
+                        con.executemany("INSERT INTO messungen (aid, ebene, start, ziel, fahrzeit, zeitpunkt) "
+                                        "VALUES (?, ?, ?, ?, ?, ?)", zeilen)
+                except sqlite3.Error as e:
+                    logger.error(f"Fehler beim Schreiben der Fahrzeithistorie {self.pfad}: {e}")
+
+            for _ in eintraege:
+                self._queue.task_done()
+
+        if con is not None:
+            con.close()
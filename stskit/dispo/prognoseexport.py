@@ -0,0 +1,130 @@
+"""
+Export der Prognosen für die Auswertung nach der Schicht
+
+Der `PrognoseExport` schreibt nach jeder Aktualisierung des Betriebs den Zustand der Ereignisse
+(Plan, Disposition, Prognose und Messung) spaltenweise in komprimierte NumPy-Dateien
+(s. `stskit.utils.export.ColumnarWriter`).
+Pro Ereignis wird nur eine Zeile geschrieben, wenn sich einer der Werte seit der letzten Abfrage geändert hat.
+Wenn ein Ereignis aus dem Ereignisgraphen verschwindet (z.B. weil der Zug archiviert wurde),
+wird eine Zeile mit `geloescht` = True geschrieben.
+Der Zustand zu einer bestimmten Abfrage ergibt sich daher aus der letzten Zeile jedes Ereignisses
+mit `abfrage` kleiner oder gleich der Abfragezeit, sofern diese nicht als gelöscht markiert ist.
+
+Die Dateien werden im Hintergrund geschrieben und können wie folgt geladen werden:
+
+~~~~~~{.py}
+import pandas as pd
+df = pd.DataFrame(prognosen_laden(verzeichnis, name))
+~~~~~~
+"""
+
+from __future__ import annotations
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from stskit.utils.export import ColumnarWriter, read_columnar
+
+if TYPE_CHECKING:
+    from stskit.dispo.betrieb import Betrieb
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+PROGNOSE_SPALTEN = {
+    'abfrage': 'i4',
+    'zid': 'i4',
+    'zeit': 'f8',
+    'typ': 'category',
+    'geloescht': 'bool',
+    'plan': 'category',
+    'gleis': 'category',
+    't_plan': 'f4',
+    't_prog': 'f4',
+    't_mess': 'f4',
+    't_fdl': 'f4',
+}
+"""
+Spalten der Prognosedateien
+
+- abfrage: Simzeit der Abfrage in Minuten.
+- zid, zeit, typ: Identifikation des Ereignisses (`EreignisLabelType`).
+- geloescht: Das Ereignis ist seit dieser Abfrage nicht mehr im Ereignisgraphen.
+  Die übrigen Spalten sind dann leer bzw. NaN.
+- plan, gleis: Gleis nach Fahrplan und nach Disposition.
+- t_plan, t_prog, t_mess, t_fdl: Uhrzeiten in Minuten, NaN wenn nicht definiert.
+"""
+
+
+class PrognoseExport:
+    """
+    Prognosen der Ereignisse pro Abfrage exportieren
+
+    `erfassen` wird nach jeder Aktualisierung des Betriebs aufgerufen.
+    Auf dem aufrufenden Thread werden nur die Knotendaten des Ereignisgraphs in Tupel kopiert,
+    Vergleich, Kodierung und Schreiben erfolgen im Hintergrund.
+
+    Attributes:
+        pfad: Verzeichnis und Namensstamm der Dateien.
+        writer: Spaltenweiser Schreiber.
+    """
+
+    def __init__(self, verzeichnis: os.PathLike, name: str, zeilen_pro_datei: int = 100_000):
+        """
+        Args:
+            verzeichnis: Ausgabeverzeichnis.
+            name: Namensstamm der Dateien, z.B. Anlagen-ID und Datum.
+            zeilen_pro_datei: Anzahl Zeilen pro Datei.
+        """
+
+        self.pfad = Path(verzeichnis) / name
+        self.writer = ColumnarWriter(self.pfad, PROGNOSE_SPALTEN, stamp='abfrage', key=('zid', 'zeit', 'typ'),
+                                     deleted='geloescht', chunk_rows=zeilen_pro_datei)
+
+    def erfassen(self, betrieb: Betrieb) -> bool:
+        """
+        Aktuellen Zustand der Ereignisse übergeben.
+
+        Args:
+            betrieb: Aktualisierter Betrieb.
+
+        Returns:
+            True, wenn die Daten übernommen wurden,
+            False, wenn die Warteschlange voll ist und die Abfrage verworfen wurde.
+        """
+
+        try:
+            abfrage = betrieb.anlage.simzeit_minuten
+        except AttributeError:
+            abfrage = 0
+
+        zeilen = [(data.get('zid'), data.get('zeit'), data.get('typ'), data.get('plan'), data.get('gleis'),
+                   data.get('t_plan'), data.get('t_prog'), data.get('t_mess'), data.get('t_fdl'))
+                  for _, data in betrieb.ereignisgraph.nodes(data=True)]
+        return self.writer.append(zeilen, stamp=abfrage)
+
+    def schliessen(self):
+        """
+        Alle ausstehenden Daten schreiben.
+        """
+
+        self.writer.close()
+
+
+def prognosen_laden(verzeichnis: os.PathLike, name: str) -> dict[str, np.ndarray]:
+    """
+    Von `PrognoseExport` geschriebene Prognosen laden.
+
+    Args:
+        verzeichnis: Ausgabeverzeichnis.
+        name: Namensstamm der Dateien.
+
+    Returns:
+        Spaltenname -> Array, s. `PROGNOSE_SPALTEN`.
+    """
+
+    return read_columnar(Path(verzeichnis) / name)
@@ -0,0 +1,145 @@
+"""
+Verlauf des Betriebszustands
+
+Der Betrieb baut Ziel- und Ereignisgraph bei jeder Aktualisierung neu auf.
+Um die aktuelle Prognose mit einer früheren zu vergleichen oder Dispositionen zurückzunehmen,
+hält die `BetriebHistorie` eine begrenzte Anzahl von unveränderlichen Schnappschüssen.
+
+Aufeinanderfolgende Schnappschüsse teilen sich die unveränderten Knoten- und Kantendaten
+(s. `graphbasics.frozen_snapshot`).
+Ein Schnappschuss kostet daher nur den Speicher der geänderten Daten und der Knotenverzeichnisse.
+Das Erfassen kostet dennoch bei jeder Aktualisierung Zeit und Speicher,
+der Betrieb führt die Historie deshalb nur, wenn sie eingeschaltet ist (s. `DatenZentrale`).
+"""
+
+from __future__ import annotations
+from collections import deque
+from collections.abc import Iterator
+import copy
+from dataclasses import dataclass
+import logging
+from typing import TYPE_CHECKING
+
+from stskit.model.ereignisgraph import EreignisGraph
+from stskit.model.graphbasics import frozen_snapshot
+from stskit.model.journal import Journal
+from stskit.model.zielgraph import ZielGraph, MAX_MINUTES
+
+if TYPE_CHECKING:
+    from stskit.dispo.anlage import Anlage
+    from stskit.dispo.betrieb import Betrieb
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@dataclass(frozen=True)
+class BetriebSchnappschuss:
+    """
+    Unveränderlicher Zustand des Betriebs zu einer Simzeit
+
+    Der Schnappschuss hat dieselben Datenattribute wie der `Betrieb`
+    und kann daher an Stelle des Betriebs an Grafik- und Tabellenmodule übergeben werden,
+    die nur lesend auf `zielgraph` und `ereignisgraph` zugreifen.
+    Die Graphen sind mit `nx.freeze` eingefroren.
+
+    Attributes:
+        zeit: Simzeit in Minuten.
+        anlage: Anlage, auf die sich der Schnappschuss bezieht (nicht kopiert).
+        zielgraph: Zielgraph mit den Dispositionen.
+        ereignisgraph: Ereignisgraph mit Prognose.
+        journal: Kopie des Dispositionsjournals.
+    """
+
+    zeit: int
+    anlage: Anlage | None
+    zielgraph: ZielGraph
+    ereignisgraph: EreignisGraph
+    journal: Journal
+
+
+class BetriebHistorie:
+    """
+    Ringspeicher von Betriebsschnappschüssen
+
+    `erfassen` wird nach jeder Aktualisierung des Betriebs aufgerufen.
+    Pro Intervall wird ein Schnappschuss behalten, die Intervalle beginnen bei Vielfachen von `intervall`.
+    Innerhalb desselben Intervalls ersetzt ein neuer Schnappschuss den letzten,
+    so dass jeweils der letzte Zustand eines Intervalls erhalten bleibt.
+    Wenn die Kapazität erreicht ist, wird der älteste Schnappschuss verworfen.
+
+    Attributes:
+        kapazitaet: Maximale Anzahl von Schnappschüssen.
+        intervall: Länge der Intervalle in Minuten Simzeit.
+    """
+
+    def __init__(self, kapazitaet: int = 60, intervall: int = 1):
+        self.kapazitaet = kapazitaet
+        self.intervall = intervall
+        self._ring: deque[BetriebSchnappschuss] = deque(maxlen=kapazitaet)
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def __iter__(self) -> Iterator[BetriebSchnappschuss]:
+        """
+        Schnappschüsse vom ältesten zum neuesten.
+        """
+
+        return iter(self._ring)
+
+    def __getitem__(self, index: int) -> BetriebSchnappschuss:
+        return self._ring[index]
+
+    def leeren(self):
+        self._ring.clear()
+
+    def erfassen(self, betrieb: Betrieb) -> BetriebSchnappschuss:
+        """
+        Aktuellen Zustand des Betriebs festhalten.
+
+        Args:
+            betrieb: Aktualisierter Betrieb.
+
+        Returns:
+            Neuer Schnappschuss.
+        """
+
+        try:
+            zeit = betrieb.anlage.simzeit_minuten
+        except AttributeError:
+            zeit = 0
+
+        vorher = self._ring[-1] if self._ring else None
+        if vorher is not None and vorher.zeit // self.intervall == zeit // self.intervall:
+            self._ring.pop()
+
+        schnappschuss = BetriebSchnappschuss(
+            zeit=zeit,
+            anlage=betrieb.anlage,
+            zielgraph=frozen_snapshot(betrieb.zielgraph, vorher.zielgraph if vorher else None),
+            ereignisgraph=frozen_snapshot(betrieb.ereignisgraph, vorher.ereignisgraph if vorher else None),
+            journal=copy.deepcopy(betrieb.journal))
+        self._ring.append(schnappschuss)
+        return schnappschuss
+
+    def suchen(self, minuten: int) -> BetriebSchnappschuss | None:
+        """
+        Schnappschuss von vor einer bestimmten Zeit.
+
+        Args:
+            minuten: Alter in Minuten relativ zum neuesten Schnappschuss.
+
+        Returns:
+            Neuester Schnappschuss, der mindestens `minuten` älter ist als der neueste,
+            oder None, wenn keiner so weit zurückreicht.
+        """
+
+        if not self._ring:
+            return None
+
+        jetzt = self._ring[-1].zeit
+        for schnappschuss in reversed(self._ring):
+            if (jetzt - schnappschuss.zeit) % MAX_MINUTES >= minuten:
+                return schnappschuss
+        return None
@@ -26,13 +26,17 @@ Der Ablauf ist wie folgt:
 """
 
 from abc import ABCMeta, abstractmethod
-from collections.abc import Generator
+import bisect
+from collections.abc import Generator, Iterable
 import copy
+from dataclasses import dataclass, field
+import itertools
 import logging
 import math
 from typing import List, NamedTuple, Optional
 
 import networkx as nx
+import numpy as np
 
 from stskit.plugin.stsobj import Ereignis, format_minutes
 from stskit.model.graphbasics import dict_property
@@ -178,6 +182,99 @@ class EreignisGraphEdge(dict):
     auswahl = dict_property("auswahl", int)
 
 
+@dataclass
+class ZugpfadIndex:
+    """
+    Geordnete Ereignisfolge eines Zuges
+
+    Der Index enthält die Ereignislabels eines Zuges in der Reihenfolge ihres Auftretens
+    sowie die Verweise auf die durch Ersatz, Kupplung und Flügelung verbundenen Züge.
+    Er wird vom EreignisGraph bei Bedarf erstellt und verworfen, wenn sich der Subgraph des Zuges ändert.
+    Die Objekte werden nach der Erstellung nicht mehr verändert und dürfen daher zwischen Kopien geteilt werden.
+
+    Die Verweise auf andere Züge zeigen auf das Label, bei dem der Pfad im anderen Zug fortgesetzt wird.
+    Ersatz und Kupplung werden nur am Ende der Folge verfolgt,
+    Flügelungen an jedem F-Ereignis, Kupplungen rückwärts an jedem K-Ereignis.
+
+    Attributes:
+        zid: Zug-ID.
+        labels: Ereignislabels des Zuges, beginnend mit dem Zuganfang.
+        positionen: Position jedes Labels in `labels`.
+        ersatz: Abfahrt des Folgezuges nach dem E-Ereignis am Ende der Folge.
+        kupplung: K-Ereignis des durchgehenden Zuges nach dem Ende der Folge.
+        fluegelungen: Position jedes F-Ereignisses und erste Abfahrt des Flügelzuges (oder None).
+        ersatz_vorher: E-Ereignis des Stammzuges vor dem Zuganfang.
+        fluegel_vorher: F-Ereignis des Stammzuges vor dem Zuganfang.
+        kupplungen_vorher: Position jedes K-Ereignisses und letztes Ereignis des endenden Zuges (oder None).
+        typen: Aufsteigende Positionen der Ereignisse nach Ereignistyp.
+        typen_plan: Aufsteigende Positionen der Ereignisse nach Ereignistyp und Plangleis.
+    """
+
+    zid: int
+    labels: list[EreignisLabelType] = field(default_factory=list)
+    positionen: dict[EreignisLabelType, int] = field(default_factory=dict)
+    ersatz: EreignisLabelType | None = None
+    kupplung: EreignisLabelType | None = None
+    fluegelungen: dict[int, EreignisLabelType | None] = field(default_factory=dict)
+    ersatz_vorher: EreignisLabelType | None = None
+    fluegel_vorher: EreignisLabelType | None = None
+    kupplungen_vorher: dict[int, EreignisLabelType | None] = field(default_factory=dict)
+    typen: dict[str, list[int]] = field(default_factory=dict)
+    typen_plan: dict[tuple[str, str], list[int]] = field(default_factory=dict)
+
+
+@dataclass
+class PrognoseIndex:
+    """
+    Struktur des Ereignisgraphen in Arrayform für die vektorielle Prognose
+
+    Die Knoten sind nach topologischen Ebenen geordnet:
+    Alle Vorgänger eines Knotens liegen in einer tieferen Ebene.
+    Die einlaufenden Kanten sind im CSR-Format nach Zielknoten gruppiert,
+    innerhalb eines Zielknotens in der Reihenfolge von `EreignisGraph.pred`.
+
+    Der Index wird von `EreignisGraph.prognose_index_erstellen` erstellt
+    und von den Graphmethoden verworfen, wenn Knoten oder Kanten hinzugefügt oder entfernt werden.
+    Die Knoten- und Kantenattribute werden bei jeder Prognose neu ausgelesen.
+    Die Anlage erstellt den Index nach dem Import des Zielgraphs,
+    damit ihn die Kopien im Betrieb übernehmen, solange das Dispojournal die Struktur nicht ändert.
+
+    Attributes:
+        labels: Ereignislabels in Ebenenreihenfolge.
+        ebenen: Startposition jeder Ebene in `labels`, mit der Knotenzahl als letztem Element.
+        indptr: Startposition der einlaufenden Kanten jedes Knotens in `quellen`, Länge len(labels) + 1.
+        quellen: Position des Startknotens jeder Kante.
+        ziele: Position des Zielknotens jeder Kante.
+        kanten: Kanten (Start- und Ziellabel) in der Reihenfolge von `quellen`.
+    """
+
+    labels: list[EreignisLabelType] = field(default_factory=list)
+    ebenen: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.intp))
+    indptr: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.intp))
+    quellen: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    ziele: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    kanten: list[tuple[EreignisLabelType, EreignisLabelType]] = field(default_factory=list)
+
+    def __deepcopy__(self, memo):
+        # der index wird nach der erstellung nicht mehr verändert und kann zwischen kopien geteilt werden.
+        return self
+
+
+def _erste_gueltige(*werte: np.ndarray) -> np.ndarray:
+    """
+    Elementweises Gegenstück zu `a or b or ... or z`.
+
+    Fehlende Werte sind NaN. Wie beim or-Operator gelten auch Nullen als fehlend.
+    Wenn kein Wert gültig ist, wird der letzte übernommen.
+    """
+
+    result = werte[-1].copy()
+    for w in reversed(werte[:-1]):
+        gueltig = ~np.isnan(w) & (w != 0)
+        result[gueltig] = w[gueltig]
+    return result
+
+
 class EreignisGraph(nx.DiGraph):
     """
     Zeitliche Abfolge von Ereignissen
@@ -207,12 +304,21 @@ class EreignisGraph(nx.DiGraph):
             Wird von der Ereignisauswertung in sim_ereignis_uebernehmen verwaltet und gebraucht.
         zugplanereignisse: Nächste erwartete Ereignisse der sichtbaren Züge.
             Wird von der Ereignisauswertung in sim_ereignis_uebernehmen verwaltet und gebraucht.
+        _prognose_index: Zwischenspeicher der Graphstruktur für prognose_vektoriell (PrognoseIndex).
+            Wird verworfen, wenn Knoten oder Kanten hinzugefügt oder entfernt werden.
+        _zugpfade: Zwischenspeicher der Ereignisfolgen (ZugpfadIndex) nach Zug-ID.
+            Einträge werden von den Graphmethoden verworfen, wenn sich Knoten oder Kanten eines Zuges ändern,
+            und von _zugpfad_index bei Bedarf neu erstellt.
+            Der Typ- und Gleisindex wird nur über add_node aktualisiert,
+            die Attribute typ und plan dürfen daher nicht direkt in den Knotendaten geändert werden.
     """
 
     node_attr_dict_factory = EreignisGraphNode
     edge_attr_dict_factory = EreignisGraphEdge
 
     def __init__(self, incoming_graph_data=None, **attr):
+        self._zugpfade: dict[int, ZugpfadIndex] = {}
+        self._prognose_index: Optional[PrognoseIndex] = None
         super().__init__(incoming_graph_data, **attr)
         self.zuege: set[int] = set()
         self.zuganfaenge: dict[int, EreignisLabelType] = {}
@@ -231,6 +337,8 @@ class EreignisGraph(nx.DiGraph):
             obj.zugpositionen = self.zugpositionen
             obj.zugplangleise = self.zugplangleise
             obj.zugplanereignisse = self.zugplanereignisse
+            obj._zugpfade = self._zugpfade
+            obj._prognose_index = self._prognose_index
         else:
             obj.zuege = self.zuege.copy()
             obj.zuganfaenge = self.zuganfaenge.copy()
@@ -238,9 +346,219 @@ class EreignisGraph(nx.DiGraph):
             obj.zugpositionen = self.zugpositionen.copy()
             obj.zugplangleise = self.zugplangleise.copy()
             obj.zugplanereignisse = self.zugplanereignisse.copy()
+            obj._zugpfade = self._zugpfade.copy()
+            obj._prognose_index = self._prognose_index
 
         return obj
 
+    def add_node(self, node_for_adding, **attr):
+        neu = node_for_adding not in self._node
+        super().add_node(node_for_adding, **attr)
+        if neu:
+            self._prognose_index = None
+        if neu or 'typ' in attr:
+            self._zugpfade_verwerfen(node_for_adding, nachbarn=not neu)
+        elif 'plan' in attr:
+            self._zugpfade_verwerfen(node_for_adding)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self._zugpfade.clear()
+        self._prognose_index = None
+
+    def remove_node(self, n):
+        if n in self._node:
+            self._zugpfade_verwerfen(n, nachbarn=True)
+        super().remove_node(n)
+        self._prognose_index = None
+
+    def remove_nodes_from(self, nodes):
+        nodes = list(nodes)
+        super().remove_nodes_from(nodes)
+        if nodes:
+            self._zugpfade.clear()
+            self._prognose_index = None
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        if u_of_edge not in self._node or v_of_edge not in self._succ[u_of_edge]:
+            self._prognose_index = None
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self._zugpfade.pop(u_of_edge.zid, None)
+        self._zugpfade.pop(v_of_edge.zid, None)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        super().add_edges_from(ebunch_to_add, **attr)
+        self._zugpfade.clear()
+        self._prognose_index = None
+
+    def remove_edge(self, u, v):
+        super().remove_edge(u, v)
+        self._prognose_index = None
+        self._zugpfade.pop(u.zid, None)
+        self._zugpfade.pop(v.zid, None)
+
+    def remove_edges_from(self, ebunch):
+        super().remove_edges_from(ebunch)
+        self._zugpfade.clear()
+        self._prognose_index = None
+
+    def clear(self):
+        super().clear()
+        self._zugpfade.clear()
+        self._prognose_index = None
+
+    def clear_edges(self):
+        super().clear_edges()
+        self._zugpfade.clear()
+        self._prognose_index = None
+
+    def _zugpfade_verwerfen(self, label: EreignisLabelType, nachbarn: bool = False):
+        """
+        Zwischengespeicherte Ereignisfolgen nach einer Änderung verwerfen.
+
+        Args:
+            label: Geänderter Ereignisknoten.
+            nachbarn: Auch die Ereignisfolgen der Nachbarzüge verwerfen,
+                deren Verweise von Typ oder Existenz des Knotens abhängen.
+        """
+
+        self._zugpfade.pop(label.zid, None)
+        if nachbarn:
+            for n in self._succ.get(label, ()):
+                self._zugpfade.pop(n.zid, None)
+            for n in self._pred.get(label, ()):
+                self._zugpfade.pop(n.zid, None)
+
+    def _zugpfad_index(self, zid: int) -> ZugpfadIndex:
+        """
+        Ereignisfolge eines Zuges abrufen.
+
+        Die Folge wird aus dem Zwischenspeicher geliefert
+        oder neu erstellt, wenn sich der Subgraph des Zuges oder der Zuganfang geändert hat.
+
+        Args:
+            zid: Zug-ID
+
+        Returns:
+            ZugpfadIndex. Die Label-Liste ist leer, wenn der Anfangsknoten fehlt.
+
+        Raises:
+            KeyError: Der Zug ist nicht in zuganfaenge verzeichnet.
+        """
+
+        anfang = self.zuganfaenge[zid]
+        try:
+            index = self._zugpfade[zid]
+        except KeyError:
+            pass
+        else:
+            if index.labels and index.labels[0] == anfang:
+                return index
+
+        index = self._zugpfad_erstellen(zid, anfang)
+        self._zugpfade[zid] = index
+        return index
+
+    def _zugpfad_erstellen(self, zid: int, anfang: EreignisLabelType) -> ZugpfadIndex:
+        """
+        Ereignisfolge eines Zuges aus dem Graphen erstellen.
+
+        Unterfunktion von _zugpfad_index.
+        Die Folge wird ab dem Anfangsknoten entlang der Nachfolger mit gleicher Zug-ID aufgebaut.
+        Dabei werden die Verweise auf Folge- und Stammzüge nach den Regeln von zugpfad und rueckpfad notiert.
+        """
+
+        index = ZugpfadIndex(zid)
+        if anfang not in self._node:
+            return index
+
+        aktuell = anfang
+        while aktuell is not None:
+            if aktuell in index.positionen:
+                logger.error(f"Schleife im Zugpfad von {zid} bei {aktuell}")
+                break
+
+            pos = len(index.labels)
+            index.labels.append(aktuell)
+            index.positionen[aktuell] = pos
+            knoten_data = self._node[aktuell]
+            knoten_typ = knoten_data.get('typ')
+            index.typen.setdefault(knoten_typ, []).append(pos)
+            index.typen_plan.setdefault((knoten_typ, knoten_data.get('plan')), []).append(pos)
+
+            if knoten_typ == 'F':
+                index.fluegelungen[pos] = None
+            elif knoten_typ == 'K':
+                index.kupplungen_vorher[pos] = None
+                for vorher, kante in self._pred[aktuell].items():
+                    if kante.get('typ') == 'K':
+                        index.kupplungen_vorher[pos] = vorher
+                        break
+
+            nachfolger = None
+            for nachher, kante in self._succ[aktuell].items():
+                if nachher.zid == zid:
+                    if nachfolger is None:
+                        nachfolger = nachher
+                elif knoten_typ == 'F' and kante.get('typ') == 'H':
+                    if index.fluegelungen[pos] is None:
+                        index.fluegelungen[pos] = nachher
+            aktuell = nachfolger
+
+        letzter = index.labels[-1]
+        letzter_typ = self._node[letzter].get('typ')
+        for nachher, kante in self._succ[letzter].items():
+            if nachher.zid == zid:
+                continue
+            if letzter_typ == 'E' and kante.get('typ') == 'H':
+                index.ersatz = index.ersatz or nachher
+            elif kante.get('typ') == 'K' and self._node[nachher].get('typ') == 'K':
+                index.kupplung = index.kupplung or nachher
+
+        for vorher, kante in self._pred[anfang].items():
+            if vorher.zid == zid:
+                continue
+            vorher_typ = self._node[vorher].get('typ')
+            if vorher_typ == 'E':
+                index.ersatz_vorher = index.ersatz_vorher or vorher
+            elif vorher_typ == 'F' and kante.get('typ') == 'H':
+                index.fluegel_vorher = index.fluegel_vorher or vorher
+
+        return index
+
+    def zuege_entfernen(self, zids: Iterable[int]) -> None:
+        """
+        Ereignisse von Zügen aus dem Graphen und den Zugverzeichnissen entfernen.
+
+        Wird von der Archivierung (s. `ZugArchiv`) verwendet.
+        Die Knoten werden anhand der Ereignisfolgen (s. `ZugpfadIndex`) bestimmt.
+        Verworfen werden nur die Ereignisfolgen der entfernten und der mit ihnen verknüpften Züge.
+        """
+
+        labels = []
+        nachbarn = set()
+        for zid in zids:
+            try:
+                labels.extend(self._zugpfad_index(zid).labels)
+            except KeyError:
+                pass
+            nachbarn.add(zid)
+
+            self.zuege.discard(zid)
+            self.zuganfaenge.pop(zid, None)
+            self.zugenden.pop(zid, None)
+            self.zugpositionen.pop(zid, None)
+            self.zugplangleise.pop(zid, None)
+            self.zugplanereignisse.pop(zid, None)
+
+        for label in labels:
+            nachbarn.update(n.zid for n in self._succ[label])
+            nachbarn.update(n.zid for n in self._pred[label])
+        super().remove_nodes_from(labels)
+        self._prognose_index = None
+        for zid in nachbarn:
+            self._zugpfade.pop(zid, None)
+
     def to_undirected_class(self):
         return EreignisGraphUngerichtet
 
@@ -298,6 +616,9 @@ class EreignisGraph(nx.DiGraph):
 
         Das Verhalten des Generators bei Ersatz/Flügeln/Kuppeln kann mit Flags angepasst werden.
 
+        Der Generator arbeitet auf den zwischengespeicherten Ereignisfolgen der Züge (s. ZugpfadIndex)
+        und liefert jeweils Ausschnitte daraus.
+
         Args:
             zid: Zug-ID
             start: Knoten-ID des ersten Knotens.
@@ -315,45 +636,70 @@ class EreignisGraph(nx.DiGraph):
             Generator von Knoten-IDs.
         """
 
-        aktuell = self.zuganfaenge[zid]
-        if not self.has_node(aktuell):
-            logger.debug(f"EreignisGraph.zugpfad(zid={zid}, start={start}, stop={stop}), node {aktuell} fehlt.")
+        for pfad, anfang, ende in self._zugpfad_abschnitte(zid, start, stop, ersatz, kuppeln, fluegeln):
+            yield from pfad.labels[anfang:ende]
+
+    def _zugpfad_abschnitte(self,
+                            zid: int,
+                            start: EreignisLabelType | None,
+                            stop: EreignisLabelType | None,
+                            ersatz: bool,
+                            kuppeln: bool,
+                            fluegeln: bool,
+                            ) -> Generator[tuple[ZugpfadIndex, int, int], None, None]:
+        """
+        Abschnitte des Zugpfads in den Ereignisfolgen der beteiligten Züge
+
+        Unterfunktion von zugpfad und zug_ereignis_suchen.
+        Die Argumente haben dieselbe Bedeutung wie bei zugpfad.
+
+        Returns:
+            Generator von Tupeln (Ereignisfolge, erste Position, Position nach dem Abschnitt).
+        """
+
+        pfad = self._zugpfad_index(zid)
+        if not pfad.labels:
+            logger.debug(f"EreignisGraph.zugpfad(zid={zid}, start={start}, stop={stop}), node {self.zuganfaenge[zid]} fehlt.")
             return
 
-        while aktuell is not None:
-            if aktuell == start:
-                start = None
-            if aktuell == stop:
-                return
-            if start is None:
-                yield aktuell
-
-            for nachher in self.successors(aktuell):
-                knoten_typ = self.nodes[aktuell]['typ']
-                kanten_typ = self.edges[(aktuell, nachher)]['typ']
-
-                if knoten_typ == 'F' and fluegeln:
-                    if nachher.zid == zid:
-                        # stamm ignorieren
-                        continue
-                    elif kanten_typ == 'H':
-                        # fluegel
-                        aktuell = nachher
-                        zid = nachher.zid
-                        break
-                elif nachher.zid == zid:
-                    aktuell = nachher
-                    break
-                elif ersatz and knoten_typ == 'E' and kanten_typ == 'H':
-                    aktuell = nachher
-                    zid = nachher.zid
-                    break
-                elif kuppeln and kanten_typ == 'K' and self.nodes[nachher]['typ'] == 'K':
-                    aktuell = nachher
-                    zid = nachher.zid
+        pos = 0
+        besucht = set()
+        while True:
+            besucht.add(pfad.zid)
+            ende = len(pfad.labels)
+            weiter = None
+            for f_pos, fluegel in (pfad.fluegelungen.items() if fluegeln else ()):
+                if f_pos >= pos:
+                    ende = f_pos + 1
+                    weiter = fluegel
                     break
             else:
-                aktuell = None
+                if ersatz and pfad.ersatz is not None:
+                    weiter = pfad.ersatz
+                elif kuppeln and pfad.kupplung is not None:
+                    weiter = pfad.kupplung
+
+            if stop is not None:
+                stop_pos = pfad.positionen.get(stop)
+                if stop_pos is not None and pos <= stop_pos < ende:
+                    ende = stop_pos
+                    weiter = None
+            if start is not None:
+                start_pos = pfad.positionen.get(start)
+                if start_pos is not None and pos <= start_pos < ende:
+                    pos = start_pos
+                    start = None
+            if start is None:
+                yield pfad, pos, ende
+
+            if weiter is None or weiter.zid in besucht:
+                return
+            try:
+                pfad = self._zugpfad_index(weiter.zid)
+                pos = pfad.positionen[weiter]
+            except KeyError:
+                logger.debug(f"EreignisGraph.zugpfad(zid={zid}), Fortsetzung {weiter} nicht im Zugpfad.")
+                return
 
     def rueckpfad(self,
                   zid: int,
@@ -371,6 +717,8 @@ class EreignisGraph(nx.DiGraph):
 
         Das Verhalten des Generators bei Ersatz/Flügeln/Kuppeln kann mit Flags angepasst werden.
 
+        Der Generator arbeitet wie zugpfad auf den zwischengespeicherten Ereignisfolgen der Züge.
+
         Args:
             zid: Zug-ID
             start: Knoten-ID des ersten Knotens.
@@ -387,42 +735,55 @@ class EreignisGraph(nx.DiGraph):
             Generator von Knoten-IDs.
         """
 
-        aktuell = self.zugenden[zid]
-        if not self.has_node(aktuell):
-            logger.debug(f"EreignisGraph.rueckpfad(zid={zid}, start={start}, stop={stop}), node {aktuell} fehlt.")
+        ende_label = self.zugenden[zid]
+        if not self.has_node(ende_label):
+            logger.debug(f"EreignisGraph.rueckpfad(zid={zid}, start={start}, stop={stop}), node {ende_label} fehlt.")
             return
 
-        while aktuell is not None:
-            if aktuell == start:
-                start = None
-            if aktuell == stop:
-                return
-            if start is None:
-                yield aktuell
-
-            for vorher in self.predecessors(aktuell):
-                knoten_typ = self.nodes[vorher]['typ']
-                kanten_typ = self.edges[(vorher, aktuell)]['typ']
-                if self.nodes[aktuell]['typ'] == 'K' and kuppeln:
-                    if kanten_typ == 'K':
-                        aktuell = vorher
-                        zid = vorher.zid
-                        break
-                    else:
-                        continue
-                elif vorher.zid == zid:
-                    aktuell = vorher
-                    break
-                elif ersatz and knoten_typ == 'E':
-                    aktuell = vorher
-                    zid = vorher.zid
-                    break
-                elif fluegeln and knoten_typ == 'F' and kanten_typ == 'H':
-                    aktuell = vorher
-                    zid = vorher.zid
+        pfad = self._zugpfad_index(zid)
+        try:
+            pos = pfad.positionen[ende_label]
+        except KeyError:
+            logger.debug(f"EreignisGraph.rueckpfad(zid={zid}), Zugende {ende_label} nicht im Zugpfad.")
+            return
+
+        besucht = set()
+        while True:
+            besucht.add(pfad.zid)
+            anfang = 0
+            weiter = None
+            for k_pos, kupplung in (reversed(pfad.kupplungen_vorher.items()) if kuppeln else ()):
+                if k_pos <= pos:
+                    anfang = k_pos
+                    weiter = kupplung
                     break
             else:
-                aktuell = None
+                if ersatz and pfad.ersatz_vorher is not None:
+                    weiter = pfad.ersatz_vorher
+                elif fluegeln and pfad.fluegel_vorher is not None:
+                    weiter = pfad.fluegel_vorher
+
+            if stop is not None:
+                stop_pos = pfad.positionen.get(stop)
+                if stop_pos is not None and anfang <= stop_pos <= pos:
+                    anfang = stop_pos + 1
+                    weiter = None
+            if start is not None:
+                start_pos = pfad.positionen.get(start)
+                if start_pos is not None and anfang <= start_pos <= pos:
+                    pos = start_pos
+                    start = None
+            if start is None:
+                yield from reversed(pfad.labels[anfang:pos + 1])
+
+            if weiter is None or weiter.zid in besucht:
+                return
+            try:
+                pfad = self._zugpfad_index(weiter.zid)
+                pos = pfad.positionen[weiter]
+            except KeyError:
+                logger.debug(f"EreignisGraph.rueckpfad(zid={zid}), Fortsetzung {weiter} nicht im Zugpfad.")
+                return
 
     def prev_ereignis(self, label: EreignisLabelType, typ: Optional[str] = None) -> Optional[EreignisLabelType]:
         """
@@ -479,31 +840,37 @@ class EreignisGraph(nx.DiGraph):
 
         return None
 
-    def _zuganfaenge_suchen(self):
+    def _zuganfaenge_suchen(self, nodes: Iterable[EreignisLabelType] | None = None):
         """
         Startknoten jedes Zuges markieren
 
         Der Startknoten eines Zuges ist in zuganfaenge verzeichnet.
         Dies ist unabhängig davon, ob der Startknoten aus einer Einfahrt, Startaufstellung oder
         einem anderen Zug hervorgeht.
+
+        Args:
+            nodes: Nur diese Knoten prüfen. Per Default alle Knoten des Graphen.
         """
 
-        for node in self.nodes:
+        for node in self.nodes if nodes is None else nodes:
             for p in self.predecessors(node):
                 if p.zid == node.zid:
                     break
             else:
                 self.zuganfaenge[node.zid] = node
 
-    def _zugenden_suchen(self):
+    def _zugenden_suchen(self, nodes: Iterable[EreignisLabelType] | None = None):
         """
         Endknoten jedes Zuges markieren
 
         Der Endknoten eines Zuges ist in zugenden verzeichnet.
         Dies ist unabhängig davon, ob der Zug ausfährt oder in einen andern Zug übergeht.
+
+        Args:
+            nodes: Nur diese Knoten prüfen. Per Default alle Knoten des Graphen.
         """
 
-        for node in self.nodes:
+        for node in self.nodes if nodes is None else nodes:
             for s in self.successors(node):
                 if s.zid == node.zid:
                     break
@@ -514,11 +881,15 @@ class EreignisGraph(nx.DiGraph):
                               zg: ZielGraph,
                               clean: bool = False,
                               quelle: str = 'sts',
+                              zids: Iterable[int] | None = None,
                               ) -> None:
         """
         Zielgraph importieren
 
         Der Ereignisgraph wird anhand eines vollständigen Zielgraphs aufgebaut oder aktualisiert.
+        Mit dem zids-Argument kann der Import auf die geänderten Züge beschränkt werden (s. ZielGraph.aenderungen).
+        Da die Builder verknüpfter Züge voneinander abhängen,
+        werden dabei alle über Ersatz, Kupplung und Flügelung verbundenen Züge mitimportiert.
 
         Fahrplanhalte werden in Ankunfts- und Abfahrtsereignisse aufgelöst,
         Betriebsvorgänge werden in entsprechende graphische Muster übersetzt.
@@ -549,21 +920,37 @@ class EreignisGraph(nx.DiGraph):
                 Bei True gehen Änderungen an den Attributen verloren, bei False werden sie beibehalten.
             quelle: Name der Datenquelle oder des Autors.
                 Wird in die Ereignisnodes geschrieben.
+            zids: Nur diese Züge (und die mit ihnen verknüpften) importieren.
+                Per Default (None) oder mit clean=True wird der ganze Zielgraph importiert.
         """
 
         if clean:
             self.clear()
             self.zuege = set()
+            zids = None
+
+        if zids is None:
+            ziele = zg.nodes
+            zielkanten = zg.edges
+        else:
+            ziele = set()
+            for zid in self._verknuepfte_zuege(zg, zids):
+                ziele.update(zg.zugpfad(zid))
+            zielkanten = zg.out_edges(ziele)
+            if not ziele:
+                return
 
         node_builders = {}
-        for zg1, zg1_data in zg.nodes(data=True):
+        for zg1 in ziele:
+            zg1_data = zg.nodes[zg1]
             builder = ZielEreignisNodeBuilder(self)
             builder.import_ziel(zg, zg1_data)
             builder.quelle = quelle
             node_builders[zg1] = builder
 
         edge_builders = {}
-        for zg1, zg2, zge_data in zg.edges(data=True):
+        for zg1, zg2 in zielkanten:
+            zge_data = zg.edges[zg1, zg2]
             builder = None
 
             if zge_data.typ == 'P':
@@ -587,17 +974,51 @@ class EreignisGraph(nx.DiGraph):
         for builder in edge_builders.values():
             builder.add_to_graph()
 
-        self._import_validieren()
-        self._zuganfaenge_suchen()
-        self._zugenden_suchen()
+        if zids is None:
+            self._import_validieren()
+            self._zuganfaenge_suchen()
+            self._zugenden_suchen()
+        else:
+            nodes = {node.node_id for builder in node_builders.values() for node in builder.nodes}
+            self._import_validieren(nodes)
+            nodes = [node for node in nodes if node in self._node]
+            self._zuganfaenge_suchen(nodes)
+            self._zugenden_suchen(nodes)
+
+    @staticmethod
+    def _verknuepfte_zuege(zg: ZielGraph, zids: Iterable[int]) -> set[int]:
+        """
+        Über Ersatz, Kupplung und Flügelung verbundene Züge im Zielgraph finden.
+
+        Unterfunktion von zielgraph_importieren.
 
-    def _import_validieren(self):
+        Returns:
+            Menge der angegebenen und aller direkt oder indirekt mit ihnen verknüpften Zug-IDs,
+            die im Zielgraph vorkommen.
+        """
+
+        offen = [zid for zid in zids if zid in zg.zuganfaenge]
+        gefunden = set(offen)
+        while offen:
+            zid = offen.pop()
+            for fid in zg.zugpfad(zid):
+                for fid2 in itertools.chain(zg.successors(fid), zg.predecessors(fid)):
+                    if fid2.zid not in gefunden and fid2.zid in zg.zuganfaenge:
+                        gefunden.add(fid2.zid)
+                        offen.append(fid2.zid)
+
+        return gefunden
+
+    def _import_validieren(self, nodes: Iterable[EreignisLabelType] | None = None):
         """
         Mögliche Probleme beim Import beheben.
 
         Wir prüfen auf folgende Fälle:
         
         - Hängende H-Kante neben K-Kante
+
+        Args:
+            nodes: Nur die Kanten dieser Knoten prüfen. Per Default alle Kanten des Graphen.
         """
 
         knoten_loeschen = set()
@@ -608,7 +1029,7 @@ class EreignisGraph(nx.DiGraph):
                     logger.warning(f"Hängende {_d.typ}-Ereigniskante ({_u}, {_v}) neben Kupplung ({u}, {v}).")
                     knoten_loeschen.add(_v)
 
-        for u, v, d in self.edges(data=True):
+        for u, v, d in self.out_edges(nodes, data=True):
             if d.typ == 'K':
                 _k_nachbarn_pruefen()
 
@@ -712,6 +1133,161 @@ class EreignisGraph(nx.DiGraph):
             else:
                 logger.warning(f"Keine Zeitprognose möglich für Ereignis {zielnode}")
 
+    def prognose_vektoriell(self):
+        """
+        Zeitprognose mit Arrayoperationen durchführen
+
+        Liefert dasselbe Resultat wie `prognose` nach denselben Regeln,
+        berechnet die Zeiten aber ebenenweise mit NumPy-Reduktionen statt Knoten für Knoten.
+        Die Graphstruktur wird dazu als `PrognoseIndex` zwischengespeichert
+        und nur nach dem Hinzufügen oder Entfernen von Knoten und Kanten neu erstellt.
+        Schleifen werden nur gesucht und aufgebrochen, wenn die topologische Sortierung fehlschlägt.
+        Die Methode eignet sich für vollständige Neuberechnungen grosser Graphen,
+        z.B. wenn sich viele Journaleinträge gleichzeitig geändert haben.
+        """
+
+        try:
+            index = self.prognose_index_erstellen()
+        except nx.NetworkXUnfeasible:
+            self._schleifen_aufbrechen()
+            try:
+                index = self.prognose_index_erstellen()
+            except nx.NetworkXUnfeasible as e:
+                logger.error("Fehler beim Sortieren des Zielgraphen")
+                logger.exception(e)
+                return
+
+        n = len(index.labels)
+        if n == 0:
+            return
+
+        def knotenwerte(attr: str) -> np.ndarray:
+            return np.array([self._node[label].get(attr) for label in index.labels], dtype=float)
+
+        def kantenwerte(attr: str) -> np.ndarray:
+            return np.array([self._succ[u][v].get(attr) or 0 for u, v in index.kanten], dtype=float)
+
+        t_mess = knotenwerte("t_mess")
+        t_fdl = knotenwerte("t_fdl")
+        t_prog = knotenwerte("t_prog")
+        t_plan = knotenwerte("t_plan")
+        dt_min = kantenwerte("dt_min")
+        dt_max = kantenwerte("dt_max")
+        dt_fdl = kantenwerte("dt_fdl")
+        d_kante = np.array([self._succ[u][v].get("typ", "P") == "D" for u, v in index.kanten], dtype=bool)
+
+        gemessen = ~np.isnan(t_mess)
+        typ_ab = np.array([self._node[label].get("typ") == "Ab" for label in index.labels], dtype=bool)
+        einfahrt = np.array([label.zeit == MIN_MINUTES for label in index.labels], dtype=bool)
+        minus_inf = np.full(n, -np.inf)
+        ziel_zeit = np.where(einfahrt,
+                             _erste_gueltige(t_mess, t_fdl, t_prog, t_plan, minus_inf),
+                             _erste_gueltige(t_fdl, t_plan, minus_inf))
+        ziel_zeit[~typ_ab] = -np.inf
+
+        # startzeit der knoten für die nachfolger. wird ebenenweise mit den neuen prognosen nachgeführt.
+        start_zeit = _erste_gueltige(t_mess, t_fdl, t_prog, t_plan)
+        berechnet = np.zeros(n, dtype=bool)
+        kanten_nr = np.arange(len(index.quellen))
+
+        for ebene in range(len(index.ebenen) - 1):
+            k0 = index.ebenen[ebene]
+            k1 = index.ebenen[ebene + 1]
+            e0 = index.indptr[k0]
+            e1 = index.indptr[k1]
+            knoten = slice(k0, k1)
+            zeit_min = np.full(k1 - k0, -np.inf)
+            zeit_max = np.full(k1 - k0, np.inf)
+            ziel = ziel_zeit[knoten].copy()
+
+            if e1 > e0:
+                kanten = slice(e0, e1)
+                start = start_zeit[index.quellen[kanten]]
+                gueltig = ~np.isnan(start)
+                pos = index.ziele[kanten] - k0
+
+                # D-kanten übernehmen die startzeit als zielzeit, die letzte D-Kante in der Kantenfolge gilt.
+                # die negative fdl-korrektur bezieht sich auf die zielzeit beim Durchlaufen der Kante.
+                d = gueltig & d_kante[kanten]
+                letzte_d = np.maximum.accumulate(np.where(d, kanten_nr[kanten], -1))
+                hat_d = letzte_d >= index.indptr[index.ziele[kanten]]
+                ziel_bei_kante = np.where(hat_d, start_zeit[index.quellen[np.maximum(letzte_d, 0)]], ziel[pos])
+                letzte = kanten_nr[kanten] == index.indptr[index.ziele[kanten] + 1] - 1
+
+                np.maximum.at(zeit_min, pos[gueltig], (start + dt_min[kanten] + dt_fdl[kanten])[gueltig])
+                m = gueltig & (dt_max[kanten] > 0)
+                np.minimum.at(zeit_max, pos[m], (start + dt_max[kanten])[m])
+                m = gueltig & (dt_fdl[kanten] < 0)
+                np.minimum.at(zeit_max, pos[m], (ziel_bei_kante + dt_fdl[kanten])[m])
+
+                ziel[pos[letzte]] = ziel_bei_kante[letzte]
+
+            result = np.maximum(np.minimum(ziel, zeit_max), zeit_min)
+            offen = ~gemessen[knoten]
+            ok = offen & ~np.isinf(result)
+            t_prog[knoten] = np.where(ok, result, t_prog[knoten])
+            berechnet[knoten] = ok
+            start_zeit[knoten] = _erste_gueltige(t_mess[knoten], t_fdl[knoten], t_prog[knoten], t_plan[knoten])
+
+            for i in np.flatnonzero(offen & np.isinf(result)):
+                logger.warning(f"Keine Zeitprognose möglich für Ereignis {index.labels[k0 + i]}")
+
+        for i in np.flatnonzero(berechnet):
+            self._node[index.labels[i]].t_prog = float(t_prog[i])
+
+    @property
+    def prognose_index(self) -> Optional[PrognoseIndex]:
+        """
+        Zwischengespeicherte Graphstruktur für prognose_vektoriell, None wenn sie nicht aktuell ist.
+        """
+
+        return self._prognose_index
+
+    def prognose_index_uebernehmen(self, index: PrognoseIndex) -> None:
+        """
+        Graphstruktur eines strukturgleichen Graphen übernehmen.
+
+        Der Aufrufer ist dafür verantwortlich, dass der Graph dieselben Knoten und Kanten enthält
+        wie der Graph, für den der Index erstellt wurde.
+        """
+
+        self._prognose_index = index
+
+    def prognose_index_erstellen(self) -> PrognoseIndex:
+        """
+        Graphstruktur für prognose_vektoriell abrufen.
+
+        Der Index wird aus dem Zwischenspeicher geliefert oder neu erstellt.
+
+        Raises:
+            nx.NetworkXUnfeasible: Der Graph enthält Schleifen.
+        """
+
+        if self._prognose_index is not None:
+            return self._prognose_index
+
+        index = PrognoseIndex()
+        ebenen = [0]
+        for generation in nx.topological_generations(self):
+            index.labels.extend(generation)
+            ebenen.append(len(index.labels))
+        positionen = {label: pos for pos, label in enumerate(index.labels)}
+
+        indptr = [0]
+        quellen = []
+        for label in index.labels:
+            for start in self._pred[label]:
+                quellen.append(positionen[start])
+                index.kanten.append((start, label))
+            indptr.append(len(quellen))
+
+        index.ebenen = np.array(ebenen, dtype=np.intp)
+        index.indptr = np.array(indptr, dtype=np.intp)
+        index.quellen = np.array(quellen, dtype=np.intp)
+        index.ziele = np.repeat(np.arange(len(index.labels), dtype=np.intp), np.diff(index.indptr))
+        self._prognose_index = index
+        return index
+
     def _schleifen_aufbrechen(self):
         """
         Schleifen aufbrechen
@@ -1224,6 +1800,9 @@ class EreignisGraph(nx.DiGraph):
         läuft über durch E/F/K-Ereignisse verbundene Folgezüge
         und endet am Knoten, der keine Nachfolger hat.
 
+        Die Kandidaten werden über den Typ- und Gleisindex der Ereignisfolgen (ZugpfadIndex) bestimmt,
+        sofern das typ-Argument angegeben ist.
+
         Args:
             zid: Gesuchte Zug-ID.
                 Das gesuchte Ereignis muss diese Zug-ID haben.
@@ -1250,22 +1829,31 @@ class EreignisGraph(nx.DiGraph):
             if zid is not None:
                 kwargs['zid'] = zid
 
-        for label in self.zugpfad(start_zid, ersatz=True, kuppeln=True):
-            if start is not None:
-                if label == start:
-                    start = None
-                else:
-                    continue
+        typ = kwargs.get('typ')
+        for pfad, anfang, ende in self._zugpfad_abschnitte(start_zid, start, None, True, True, False):
+            if kwargs.get('zid', pfad.zid) != pfad.zid:
+                continue
 
-            data = self.nodes[label]
-            for kw, arg in kwargs.items():
-                if kw in {'t_mess', 't_plan', 't_prog', 's'}:
-                    if abs(arg - data.get(kw)) > 0.0001:
-                        break
-                elif data.get(kw) != arg:
-                    break
+            if typ is None:
+                positionen = range(anfang, ende)
             else:
-                return label
+                if 'plan' in kwargs:
+                    positionen = pfad.typen_plan.get((typ, kwargs['plan']), [])
+                else:
+                    positionen = pfad.typen.get(typ, [])
+                positionen = positionen[bisect.bisect_left(positionen, anfang):bisect.bisect_left(positionen, ende)]
+
+            for pos in positionen:
+                label = pfad.labels[pos]
+                data = self._node[label]
+                for kw, arg in kwargs.items():
+                    if kw in {'t_mess', 't_plan', 't_prog', 's'}:
+                        if abs(arg - data.get(kw)) > 0.0001:
+                            break
+                    elif data.get(kw) != arg:
+                        break
+                else:
+                    return label
 
         raise ValueError(f"Suche nach {kwargs} im Pfad von {start or zid} fehlgeschlagen.")
 
@@ -1,6 +1,9 @@
+import copy
 import logging
 from typing import TypeVar
 
+import networkx as nx
+
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -41,3 +44,97 @@ def dict_property(
             pass
 
     return property(getter, setter, deleter, doc=docstring)
+
+
+# attributes holding the structure of a networkx graph. all other instance attributes are subclass data.
+_NX_STRUCTURE = {'graph', '_node', '_adj', '_succ', '_pred'}
+
+
+def _share_neighbors(new: dict, old: dict | None) -> dict:
+    """
+    return the old neighbor dict if it holds the same edge records as the new one.
+    """
+
+    if old is not None and len(old) == len(new) and all(old.get(v) is d for v, d in new.items()):
+        return old
+    return new
+
+
+def frozen_snapshot(graph: nx.DiGraph, previous: nx.DiGraph | None = None) -> nx.DiGraph:
+    """
+    Frozen copy of a directed graph that shares unchanged data with a previous snapshot.
+
+    Node and edge attribute dicts that compare equal to the record of the previous snapshot
+    are taken over from there, all others are shallow copies of the records of the graph.
+    Neighbor dicts are shared, too, if they contain the same records,
+    and the whole adjacency if the structure of the graph has not changed.
+    Node labels that equal a label of the previous snapshot are replaced by the object of the previous snapshot.
+    A snapshot without structural changes therefore only costs the node dict and the changed records.
+
+    Public subclass attributes that a new instance of the graph class initializes (e.g. `ZielGraph.zuganfaenge`)
+    are copied shallowly.
+    Private attributes (caches) keep the initial value of the new instance.
+
+    The snapshot is frozen by `nx.freeze` and must not be modified by other means,
+    since its records may be shared with other snapshots.
+    The original graph is not modified and does not share any data with the snapshot.
+
+    Args:
+        graph: directed graph, e.g. ZielGraph or EreignisGraph.
+        previous: previous snapshot of the same graph, or None.
+
+    Returns:
+        new frozen instance of the class of graph.
+    """
+
+    snapshot = graph.__class__()
+    for name in vars(snapshot):
+        if name not in _NX_STRUCTURE and not name.startswith('_'):
+            setattr(snapshot, name, copy.copy(getattr(graph, name)))
+    snapshot.graph.update(graph.graph)
+
+    if previous is not None:
+        old_nodes = previous._node
+        old_succ = previous._succ
+        old_pred = previous._pred
+        old_keys = getattr(previous, '_snapshot_keys', {})
+    else:
+        old_nodes = old_succ = old_pred = old_keys = {}
+
+    # equal node labels of consecutive snapshots are mapped to the same object
+    keys = {n: old_keys.get(n, n) for n in graph._node}
+    if len(keys) == len(old_keys) and all(k is old_keys.get(k) for k in keys.values()):
+        keys = old_keys
+    snapshot._snapshot_keys = keys
+
+    node_factory = snapshot.node_attr_dict_factory
+    for n, d in graph._node.items():
+        n = keys[n]
+        old = old_nodes.get(n)
+        snapshot._node[n] = old if old is not None and old == d else node_factory(d)
+
+    edge_factory = snapshot.edge_attr_dict_factory
+    records = {}
+    for u, nbrs in graph._succ.items():
+        u = keys[u]
+        old_nbrs = old_succ.get(u, {})
+        new_nbrs = {}
+        for v, d in nbrs.items():
+            v = keys[v]
+            old = old_nbrs.get(v)
+            new_nbrs[v] = old if old is not None and old == d else edge_factory(d)
+        records[u] = new_nbrs
+        snapshot._succ[u] = _share_neighbors(new_nbrs, old_succ.get(u))
+
+    for v, nbrs in graph._pred.items():
+        v = keys[v]
+        new_nbrs = {keys[u]: records[keys[u]][v] for u in nbrs}
+        snapshot._pred[v] = _share_neighbors(new_nbrs, old_pred.get(v))
+
+    # without structural changes, the adjacency can be shared as a whole
+    if previous is not None and _share_neighbors(snapshot._succ, old_succ) is old_succ \
+            and _share_neighbors(snapshot._pred, old_pred) is old_pred:
+        snapshot._adj = snapshot._succ = old_succ
+        snapshot._pred = old_pred
+
+    return nx.freeze(snapshot)
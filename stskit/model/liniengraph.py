@@ -37,6 +37,8 @@ class LinienGraphEdge(dict):
                                    docstring="Summe aller ausgewerteten Fahrzeiten in Minuten")
     fahrzeit_schnitt = dict_property("fahrzeit_schnitt", float,
                                      docstring="Mittelwert aller ausgewerteten Fahrzeiten in Minuten")
+    fahrten_gemessen = dict_property("fahrten_gemessen", int,
+                                     docstring="Anzahl der eingerechneten Messungen aus früheren Sitzungen")
     fahrzeit_manuell = dict_property("fahrzeit_manuell", int | float,
                                   docstring="Vom Benutzer eingestellte Fahrzeit. Ersetzt die berechnete Fahrzeit, sofern gesetzt und grösser Null.")
     markierung = dict_property("markierung", str,
@@ -53,20 +55,119 @@ class LinienGraph(nx.Graph):
     Dieser Graph zeigt bediente Verbindungen zwischen Bahnhöfen.
     Der Graph wird anhand der Zugfahrpläne erstellt.
 
+    Die Fahrzeitstatistik der Kanten wird mit den gemessenen Fahrzeiten aus früheren Sitzungen vorbelegt,
+    sofern diese mit `messungen_uebernehmen` übergeben werden.
 
+    Attributes:
+        messungen: Gemessene Fahrzeiten nach Paar von Betriebsstellennamen,
+            s. `stskit.dispo.auswertung.Auswertung.liniengraph_messungen`.
+        _baeume: Zwischenspeicher der Breitensuche nach Startknoten (s. `strecke`).
+            Jeder Baum ordnet den erreichbaren Knoten ihren Vorgänger und ihre Tiefe (Anzahl Kanten) zu.
+            Die Graphmethoden verwerfen nur die Bäume, deren kürzeste Wege von einer Änderung betroffen sind.
     """
     node_attr_dict_factory = LinienGraphNode
     edge_attr_dict_factory = LinienGraphEdge
     MAX_FAHRZEIT = 24 * 60
 
     def __init__(self, incoming_graph_data=None, **attr):
+        self._baeume: dict[LinienLabelType, dict[LinienLabelType, tuple[LinienLabelType | None, int]]] = {}
+        self.messungen: dict[tuple[str, str], dict[str, float]] = {}
         super().__init__(incoming_graph_data, **attr)
 
-        self._strecken_cache: dict[tuple[LinienLabelType, LinienLabelType], list[LinienLabelType]] = {}
-
     def to_undirected_class(self):
         return self.__class__
 
+    def remove_node(self, n):
+        super().remove_node(n)
+        self._baeume_verwerfen(lambda baum: n in baum)
+
+    def remove_nodes_from(self, nodes):
+        nodes = set(nodes)
+        super().remove_nodes_from(nodes)
+        self._baeume_verwerfen(lambda baum: not nodes.isdisjoint(baum))
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        neu = not self.has_edge(u_of_edge, v_of_edge)
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        if neu:
+            self._baeume_verwerfen(lambda baum: self._abkuerzung(baum, u_of_edge, v_of_edge))
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        super().add_edges_from(ebunch_to_add, **attr)
+        self._baeume.clear()
+
+    def remove_edge(self, u, v):
+        super().remove_edge(u, v)
+        self._baeume_verwerfen(lambda baum: self._baumkante(baum, u, v))
+
+    def remove_edges_from(self, ebunch):
+        super().remove_edges_from(ebunch)
+        self._baeume.clear()
+
+    def clear(self):
+        super().clear()
+        self._baeume.clear()
+
+    def clear_edges(self):
+        super().clear_edges()
+        self._baeume.clear()
+
+    def _baeume_verwerfen(self, betroffen: Callable[[dict], bool]):
+        for start in [start for start, baum in self._baeume.items() if betroffen(baum)]:
+            del self._baeume[start]
+
+    @staticmethod
+    def _abkuerzung(baum: dict, u: LinienLabelType, v: LinienLabelType) -> bool:
+        """
+        Prüfen, ob eine neue Kante u-v einen Baum ungültig macht.
+
+        Der Baum bleibt gültig, wenn keiner der Knoten erreichbar ist
+        oder sich ihre Tiefen um höchstens eins unterscheiden.
+        """
+
+        try:
+            return abs(baum[u][1] - baum[v][1]) > 1
+        except KeyError:
+            return u in baum or v in baum
+
+    @staticmethod
+    def _baumkante(baum: dict, u: LinienLabelType, v: LinienLabelType) -> bool:
+        """
+        Prüfen, ob die Kante u-v zu einem Baum gehört.
+        """
+
+        return baum.get(v, (None, 0))[0] == u or baum.get(u, (None, 0))[0] == v
+
+    def _baum(self, start: LinienLabelType) -> dict[LinienLabelType, tuple[LinienLabelType | None, int]]:
+        """
+        Breitensuche ab einem Startknoten.
+
+        Raises:
+            KeyError: Der Startknoten ist nicht im Graph.
+        """
+
+        try:
+            return self._baeume[start]
+        except KeyError:
+            pass
+
+        adj = self._adj
+        baum = {start: (None, 0)}
+        ebene = [start]
+        tiefe = 0
+        while ebene:
+            tiefe += 1
+            naechste = []
+            for u in ebene:
+                for v in adj[u]:
+                    if v not in baum:
+                        baum[v] = (u, tiefe)
+                        naechste.append(v)
+            ebene = naechste
+
+        self._baeume[start] = baum
+        return baum
+
     @staticmethod
     def label(typ: str, name: str) -> LinienLabelType:
         """
@@ -114,6 +215,7 @@ class LinienGraph(nx.Graph):
         except KeyError:
             liniendaten = LinienGraphEdge(fahrzeit_min=self.MAX_FAHRZEIT, fahrzeit_max=0,
                                           fahrten=0, fahrzeit_summe=0., fahrzeit_schnitt=0.)
+            self._messungen_einrechnen(liniendaten, bft1, bft2)
 
         liniendaten.fahrzeit_min = min(liniendaten.fahrzeit_min, fahrzeit)
         liniendaten.fahrzeit_max = max(liniendaten.fahrzeit_max, fahrzeit)
@@ -125,6 +227,50 @@ class LinienGraph(nx.Graph):
         self.add_node(bft1, **knoten1_daten)
         self.add_node(bft2, **knoten2_daten)
 
+    def messungen_uebernehmen(self, messungen: dict[tuple[str, str], dict[str, float]]):
+        """
+        Gemessene Fahrzeiten aus früheren Sitzungen in die Kantenstatistik einrechnen.
+
+        Die Messungen werden in bestehende Kanten eingerechnet und bei neuen Kanten in `linie_eintragen`.
+        Da der Liniengraph ungerichtet ist, werden die Messungen beider Richtungen zusammengefasst.
+        Jede Kante übernimmt die Messungen nur einmal (s. `LinienGraphEdge.fahrten_gemessen`).
+
+        Args:
+            messungen: Dictionary (start, ziel) -> {'fahrzeit_min', 'fahrzeit_schnitt', 'fahrzeit_max', 'fahrten'}
+                mit Namen von Bahnhöfen und Anschlussstellen und Zeiten in Minuten,
+                s. `stskit.dispo.auswertung.Auswertung.liniengraph_messungen`.
+        """
+
+        self.messungen = messungen
+        for u, v, data in self.edges(data=True):
+            self._messungen_einrechnen(data, u, v)
+
+    def _messungen_einrechnen(self, liniendaten: LinienGraphEdge, u: LinienLabelType, v: LinienLabelType):
+        if liniendaten.get('fahrten_gemessen'):
+            return
+
+        anzahl = 0
+        summe = 0.
+        minimum = self.MAX_FAHRZEIT
+        maximum = 0
+        for paar in [(u.name, v.name), (v.name, u.name)]:
+            try:
+                messung = self.messungen[paar]
+            except KeyError:
+                continue
+            anzahl += messung['fahrten']
+            summe += messung['fahrten'] * messung['fahrzeit_schnitt']
+            minimum = min(minimum, messung['fahrzeit_min'])
+            maximum = max(maximum, messung['fahrzeit_max'])
+
+        if anzahl:
+            liniendaten.fahrzeit_min = min(liniendaten.get('fahrzeit_min', self.MAX_FAHRZEIT), minimum)
+            liniendaten.fahrzeit_max = max(liniendaten.get('fahrzeit_max', 0), maximum)
+            liniendaten.fahrten = liniendaten.get('fahrten', 0) + anzahl
+            liniendaten.fahrzeit_summe = liniendaten.get('fahrzeit_summe', 0.) + summe
+            liniendaten.fahrzeit_schnitt = liniendaten.fahrzeit_summe / liniendaten.fahrten
+            liniendaten.fahrten_gemessen = anzahl
+
     def schleifen_aufloesen(self):
         """
         Schleifen auflösen
@@ -185,9 +331,9 @@ class LinienGraph(nx.Graph):
         Start und Ziel sind die Labels zweier beliebiger Knoten im Liniengraph.
         Die berechnete Strecke ist eine geordnete Liste von Labels.
 
-        Da die Streckenberechnung aufwändig sein kann, werden die Resultate im
-        `_strecken_cache` gespeichert. Der Cache muss gelöscht werden, wenn der
-        Graph verändert wird.
+        Die Strecke wird aus dem Breitensuchbaum des Startknotens rekonstruiert.
+        Der Baum wird für weitere Abfragen mit demselben Start zwischengespeichert
+        und bei einer Änderung des Graphen nur verworfen, wenn er davon betroffen ist.
 
         Args:
             start: Bahnhof- oder Anschlussname.
@@ -199,16 +345,16 @@ class LinienGraph(nx.Graph):
         """
 
         try:
-            return self._strecken_cache[(start, ziel)]
+            baum = self._baum(start)
+            knoten, _ = baum[ziel]
         except KeyError:
-            pass
-
-        try:
-            strecke: list[LinienLabelType] = nx.shortest_path(self, start, ziel)
-        except nx.NetworkXException:
-            strecke: list[LinienLabelType] = []
+            return []
 
-        self._strecken_cache[(start, ziel)] = strecke
+        strecke = [ziel]
+        while knoten is not None:
+            strecke.append(knoten)
+            knoten, _ = baum[knoten]
+        strecke.reverse()
         return strecke
 
     def strecken_vorschlagen(self, min_fahrten: int = 0, min_laenge: int = 2) -> list[list[LinienLabelType]]:
@@ -217,6 +363,7 @@ class LinienGraph(nx.Graph):
 
         Diese Funktion bestimmt die kürzesten Strecken zwischen allen Kombinationen von Anschlüssen.
         Wenig frequentierte Anschlüsse können ausgeschlossen werden.
+        Pro Einfahrt wird nur eine Breitensuche ausgeführt (s. `strecke`).
 
         Eine Strecke besteht aus einer Liste von Bahnhöfen inklusive Einfahrt am Anfang und Ausfahrt am Ende.
         Die Elemente sind Knotenlabels des Liniengraphen.
@@ -234,19 +381,14 @@ class LinienGraph(nx.Graph):
             Liste von Listen von Liniengraphlabels
         """
 
-        anschluesse = [x for x, d in self.nodes(data=True) if d.get('typ', '?') == 'Anst']
+        anschluesse = [x for x, d in self.nodes(data=True)
+                       if d.get('typ', '?') == 'Anst' and d.get('fahrten', -1) >= min_fahrten]
         strecken = []
 
         for ein, aus in itertools.permutations(anschluesse, 2):
-            try:
-                fahrten: int = min(self.nodes[ein]['fahrten'], self.nodes[aus]['fahrten'])
-            except KeyError:
-                fahrten = -1
-
-            if ein != aus and fahrten >= min_fahrten:
-                strecke = self.strecke(ein, aus)
-                if len(strecke) >= min_laenge:
-                    strecken.append(strecke)
+            strecke = self.strecke(ein, aus)
+            if len(strecke) >= min_laenge:
+                strecken.append(strecke)
 
         return strecken
 
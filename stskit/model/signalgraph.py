@@ -1,5 +1,6 @@
 from collections.abc import Iterable, Sequence
 import logging
+from typing import Any
 
 import networkx as nx
 
@@ -96,8 +97,345 @@ class SignalGraphUngerichtet(nx.Graph):
         return SignalGraph
 
 
+class SignalGraphWege:
+    """
+    Kürzeste Wege zwischen Betriebsstellen im Signalgraph
+
+    Die Knoten des Signalgraphen werden gemäss einer Zuordnung (z.B. Gleis zu Bahnhof) zusammengefasst.
+    Der zusammengefasste Graph wird nur als Nachbarschaftsliste gespeichert.
+    Die Breitensuchbäume werden pro Startknoten erstellt und für alle Ziele wiederverwendet.
+
+    Die Objekte sind unveränderlich.
+    Wenn sich der Signalgraph oder die Zuordnung ändert, muss ein neues Objekt erstellt werden (s. `aktuell`).
+
+    Attributes:
+        signalgraph: Ursprünglicher Signalgraph.
+        zuordnung: Zuordnung von Signalgraphknoten zu Betriebsstellen.
+            Nicht zugeordnete Knoten bleiben bestehen.
+    """
+
+    def __init__(self, signalgraph: nx.DiGraph, zuordnung: dict[Any, Any]):
+        self.signalgraph = signalgraph
+        self.zuordnung = zuordnung
+
+        # dict statt set, damit gleich lange wege reproduzierbar gewaehlt werden
+        self._adj: dict[Any, dict[Any, None]] = {zuordnung.get(n, n): {} for n in signalgraph.nodes}
+        for u, v in signalgraph.edges():
+            u = zuordnung.get(u, u)
+            v = zuordnung.get(v, v)
+            if u != v:
+                self._adj[u][v] = None
+
+        self._baeume: dict[Any, dict[Any, Any]] = {}
+
+    def aktuell(self, signalgraph: nx.DiGraph, zuordnung: dict[Any, Any]) -> bool:
+        """
+        Prüfen, ob das Objekt zum angegebenen Signalgraph und zur Zuordnung passt.
+        """
+
+        return signalgraph is self.signalgraph and zuordnung == self.zuordnung
+
+    def _baum(self, start: Any) -> dict[Any, Any]:
+        try:
+            return self._baeume[start]
+        except KeyError:
+            pass
+
+        adj = self._adj
+        baum = {start: None}
+        ebene = [start]
+        while ebene:
+            naechste = []
+            for u in ebene:
+                for v in adj[u]:
+                    if v not in baum:
+                        baum[v] = u
+                        naechste.append(v)
+            ebene = naechste
+
+        self._baeume[start] = baum
+        return baum
+
+    def weg(self, start: Any, ziel: Any) -> list[Any]:
+        """
+        Kürzester Weg im zusammengefassten Signalgraph.
+
+        Args:
+            start: Betriebsstelle oder nicht zugeordneter Signalgraphknoten.
+            ziel: Betriebsstelle oder nicht zugeordneter Signalgraphknoten.
+
+        Returns:
+            Knotenliste vom Start zum Ziel.
+            Leer, wenn einer der Knoten nicht im Graph ist oder kein Weg besteht.
+        """
+
+        if start not in self._adj:
+            return []
+        baum = self._baum(start)
+        if ziel not in baum:
+            return []
+
+        weg = [ziel]
+        knoten = baum[ziel]
+        while knoten is not None:
+            weg.append(knoten)
+            knoten = baum[knoten]
+        weg.reverse()
+        return weg
+
+
 # verschiedene funktionen zur signalgraphbearbeitung
 
+SIGNALGRAPH_VEREINFACHUNGEN = ('weichen_ersetzen',
+                               'anschluesse_pruefen',
+                               'nachbarbahnsteige_vereinen',
+                               'bahnsteigsignale_ersetzen',
+                               'signalpaare_ersetzen',
+                               'schleifen_aufloesen',
+                               'zwischensignale_entfernen')
+
+
+class SignalGraphVereinfachung:
+    """
+    Vereinfachung eines ungerichteten Signalgraphen
+
+    Die Vereinfachungsschritte (s. `SIGNALGRAPH_VEREINFACHUNGEN`) arbeiten auf einer gemeinsamen Arbeitskopie
+    aus Nachbarschaftsmengen, der Ergebnisgraph wird erst am Schluss mit `graph` einmal erstellt.
+    Kontraktionen werden in einer Union-Find-Struktur verzeichnet,
+    so dass jeder Schritt nur O(V+E) kostet,
+    während `nx.contracted_nodes` bei jedem Aufruf Kanten und Knotendaten kopiert.
+
+    Die Zuordnung von ursprünglichen zu verbleibenden Knoten liefert `zuordnung`.
+
+    Beispiel:
+        vereinfachung = SignalGraphVereinfachung(signalgraph.to_undirected())
+        vereinfachung.anwenden(['weichen_ersetzen', 'signalpaare_ersetzen'])
+        g = vereinfachung.graph()
+    """
+
+    def __init__(self, g: nx.Graph):
+        self._original = g
+        self._knoten = dict(g.nodes(data=True))
+        # knoten -> nachbar -> kantendaten. beide richtungen teilen dasselbe datenobjekt wie in nx.Graph.
+        self._adj: dict[Any, dict[Any, dict]] = {n: {} for n in g.nodes}
+        for u, v, d in g.edges(data=True):
+            if u != v:
+                d = g.edge_attr_dict_factory(d)
+                self._adj[u][v] = d
+                self._adj[v][u] = d
+        self._eltern: dict[Any, Any] = {}
+
+    def typ(self, n: Any) -> Any:
+        return self._knoten[n].get('typ', None)
+
+    def knoten_vom_typ(self, *typen: Knoten.Typ) -> list[Any]:
+        """
+        Verbleibende Knoten eines der angegebenen Typen.
+        """
+
+        return [n for n in self._adj if self.typ(n) in typen]
+
+    def vertreter(self, n: Any) -> Any:
+        """
+        Verbleibender Knoten, in den der Knoten `n` kontrahiert wurde.
+
+        Gibt `n` zurück, wenn der Knoten nicht kontrahiert wurde.
+        """
+
+        wurzel = n
+        while wurzel in self._eltern:
+            wurzel = self._eltern[wurzel]
+        while n != wurzel:
+            self._eltern[n], n = wurzel, self._eltern[n]
+        return wurzel
+
+    def kontrahieren(self, ziel: Any, quelle: Any):
+        """
+        Knoten `quelle` in Knoten `ziel` aufnehmen.
+
+        Die Kanten von `quelle` werden auf `ziel` umgehängt, Schleifen werden verworfen.
+        Wie bei `nx.contracted_nodes` überschreiben die Daten einer umgehängten Kante die einer bestehenden.
+        Beide Knoten müssen verbleibende Knoten sein.
+        """
+
+        nachbarn_ziel = self._adj[ziel]
+        for x, d in self._adj.pop(quelle).items():
+            del self._adj[x][quelle]
+            if x == ziel:
+                continue
+            try:
+                nachbarn_ziel[x].update(d)
+            except KeyError:
+                nachbarn_ziel[x] = d
+                self._adj[x][ziel] = d
+        self._eltern[quelle] = ziel
+
+    def kante_entfernen(self, u: Any, v: Any):
+        self._adj[u].pop(v, None)
+        self._adj[v].pop(u, None)
+
+    def anwenden(self, schritte: Iterable[str]) -> 'SignalGraphVereinfachung':
+        """
+        Vereinfachungsschritte nacheinander anwenden.
+
+        Args:
+            schritte: Namen von Methoden aus `SIGNALGRAPH_VEREINFACHUNGEN`.
+
+        Returns:
+            self
+
+        Raises:
+            ValueError: Unbekannter Schritt.
+        """
+
+        for schritt in schritte:
+            if schritt not in SIGNALGRAPH_VEREINFACHUNGEN:
+                raise ValueError(f"Unbekannter Vereinfachungsschritt {schritt}")
+            getattr(self, schritt)()
+        return self
+
+    def weichen_ersetzen(self):
+        """
+        Weichen in einen ihrer Nachbarknoten kontrahieren.
+
+        Siehe `graph_weichen_ersetzen`.
+        """
+
+        for w in self.knoten_vom_typ(Knoten.Typ.WEICHE_OBEN, Knoten.Typ.WEICHE_UNTEN):
+            for v in self._adj[w]:
+                self.kontrahieren(v, w)
+                break
+
+    def anschluesse_pruefen(self):
+        """
+        Direkte Verbindungen von Anschlüssen zu anderen Knoten als Signalen entfernen.
+
+        Siehe `graph_anschluesse_pruefen`.
+        """
+
+        for a in self.knoten_vom_typ(Knoten.Typ.EINFAHRT, Knoten.Typ.AUSFAHRT):
+            nbr = list(self._adj[a])
+            if any(self.typ(n) == Knoten.Typ.SIGNAL for n in nbr):
+                for n in nbr:
+                    if self.typ(n) != Knoten.Typ.SIGNAL:
+                        self.kante_entfernen(a, n)
+
+    def nachbarbahnsteige_vereinen(self):
+        """
+        Durch Kanten vom Typ 'nachbar' verbundene Knoten kontrahieren.
+
+        Die Nachbarkanten stammen aus dem Bahnsteiggraph.
+        """
+
+        for u in list(self._adj):
+            if u not in self._adj:
+                continue
+            kandidaten = [v for v, d in self._adj[u].items() if d.get('typ') == 'nachbar']
+            while kandidaten:
+                v = kandidaten.pop()
+                if v not in self._adj[u] or self._adj[u][v].get('typ') != 'nachbar':
+                    continue
+                kandidaten.extend(x for x, d in self._adj[v].items() if x != u and d.get('typ') == 'nachbar')
+                self.kontrahieren(u, v)
+
+    def bahnsteigsignale_ersetzen(self):
+        """
+        Signale in benachbarte Bahnsteige und Haltepunkte kontrahieren.
+
+        Siehe `graph_bahnsteigsignale_ersetzen`.
+        """
+
+        for b in self.knoten_vom_typ(Knoten.Typ.BAHNSTEIG, Knoten.Typ.HALTEPUNKT):
+            for v in list(self._adj[b]):
+                if v in self._adj[b] and self.typ(v) == Knoten.Typ.SIGNAL:
+                    self.kontrahieren(b, v)
+
+    def signalpaare_ersetzen(self):
+        """
+        Zusammenhängende Signale zu einem einzelnen kontrahieren.
+
+        Siehe `graph_signalpaare_ersetzen`.
+        """
+
+        for s1 in self.knoten_vom_typ(Knoten.Typ.SIGNAL):
+            if s1 not in self._adj:
+                continue
+            kandidaten = [s2 for s2 in self._adj[s1] if self.typ(s2) == Knoten.Typ.SIGNAL]
+            while kandidaten:
+                s2 = kandidaten.pop()
+                if s2 not in self._adj[s1]:
+                    continue
+                kandidaten.extend(x for x in self._adj[s2] if x != s1 and self.typ(x) == Knoten.Typ.SIGNAL)
+                self.kontrahieren(s1, s2)
+
+    def zwischensignale_entfernen(self):
+        """
+        Signale in einen benachbarten Bahnsteig oder Haltepunkt kontrahieren.
+
+        Siehe `graph_zwischensignale_entfernen`.
+        """
+
+        for s1 in self.knoten_vom_typ(Knoten.Typ.SIGNAL):
+            for s2 in self._adj[s1]:
+                if self.typ(s2) in {Knoten.Typ.BAHNSTEIG, Knoten.Typ.HALTEPUNKT}:
+                    self.kontrahieren(s2, s1)
+                    break
+
+    def schleifen_aufloesen(self):
+        """
+        Dreiecke mit einem Knoten vom Grad 2 auflösen.
+
+        Siehe `graph_schleifen_aufloesen`.
+        """
+
+        for n in list(self._adj):
+            nbr = self._adj[n]
+            if len(nbr) != 2 or self.typ(n) in {Knoten.Typ.EINFAHRT, Knoten.Typ.AUSFAHRT}:
+                continue
+            a, b = nbr
+            if b in self._adj[a]:
+                self.kante_entfernen(a, b)
+
+    def graph(self) -> nx.Graph:
+        """
+        Vereinfachter Graph.
+
+        Der Graph hat dieselbe Klasse und dieselben Graphattribute wie der ursprüngliche.
+        Knoten- und Kantendaten werden übernommen.
+        """
+
+        g = self._original.__class__()
+        g.graph.update(self._original.graph)
+        g.add_nodes_from((n, self._knoten[n]) for n in self._adj)
+        g.add_edges_from((u, v, d) for u, nbr in self._adj.items() for v, d in nbr.items())
+        return g
+
+    def zuordnung(self) -> dict[Any, Any]:
+        """
+        Zuordnung von allen ursprünglichen Knoten zu den verbleibenden Knoten des vereinfachten Graphen.
+
+        Damit können z.B. Elementnummern aus der Wegeliste in den vereinfachten Graphen übertragen werden.
+        """
+
+        return {n: self.vertreter(n) for n in self._knoten}
+
+
+def graph_vereinfachen(g: nx.Graph, schritte: Iterable[str]) -> tuple[nx.Graph, dict[Any, Any]]:
+    """
+    Signalgraph in mehreren Schritten vereinfachen.
+
+    Args:
+        g: Ungerichteter Graph. Wird nicht verändert.
+        schritte: Namen der Schritte aus `SIGNALGRAPH_VEREINFACHUNGEN` in der gewünschten Reihenfolge.
+
+    Returns:
+        Vereinfachter Graph und Zuordnung der ursprünglichen zu den verbleibenden Knoten.
+    """
+
+    vereinfachung = SignalGraphVereinfachung(g).anwenden(schritte)
+    return vereinfachung.graph(), vereinfachung.zuordnung()
+
+
 def graph_weichen_ersetzen(g: nx.Graph) -> nx.Graph:
     """
     Weichen durch Kanten ersetzen.
@@ -108,17 +446,10 @@ def graph_weichen_ersetzen(g: nx.Graph) -> nx.Graph:
         g: Ungerichteter Graph.
 
     Returns:
-        Graph `g` mit ersetzten Weichen.
+        Neuer Graph mit ersetzten Weichen.
     """
-    weichen = {n for n, _d in g.nodes.items()
-               if _d.get('typ', None) in {Knoten.Typ.WEICHE_OBEN, Knoten.Typ.WEICHE_UNTEN}}
-    for w in weichen:
-        for v in g[w]:
-            # w wird entfernt
-            g = nx.contracted_nodes(g, v, w, self_loops=False, copy=False)
-            break
 
-    return g
+    return SignalGraphVereinfachung(g).anwenden(['weichen_ersetzen']).graph()
 
 
 def graph_anschluesse_pruefen(g: nx.Graph) -> nx.Graph:
@@ -133,23 +464,10 @@ def graph_anschluesse_pruefen(g: nx.Graph) -> nx.Graph:
         g: Ungerichteter Graph.
 
     Returns:
-        Graph `g` mit geänderten Anschlüssen.
+        Neuer Graph mit geänderten Anschlüssen.
     """
-    anschl = {n for n, _d in g.nodes.items()
-              if _d.get('typ', None) in {Knoten.Typ.EINFAHRT, Knoten.Typ.AUSFAHRT}}
-    for a in anschl:
-        edges_to_remove = []
-        signal_gefunden = False
-        nbr = [n for n in g[a]]
-        for n in nbr:
-            if g.nodes[n]['typ'] == Knoten.Typ.SIGNAL:
-                signal_gefunden = True
-            else:
-                edges_to_remove.append((a, n))
-        if signal_gefunden:
-            g.remove_edges_from(edges_to_remove)
 
-    return g
+    return SignalGraphVereinfachung(g).anwenden(['anschluesse_pruefen']).graph()
 
 
 def graph_bahnsteigsignale_ersetzen(g: nx.Graph) -> nx.Graph:
@@ -165,17 +483,10 @@ def graph_bahnsteigsignale_ersetzen(g: nx.Graph) -> nx.Graph:
         g: Ungerichteter Graph.
 
     Returns:
-        Graph `g` mit ersetzten Weichen.
+        Neuer Graph mit ersetzten Signalen.
     """
-    bahnsteige = {n for n, _d in g.nodes.items() if _d.get('typ', None)
-                  in {Knoten.Typ.BAHNSTEIG, Knoten.Typ.HALTEPUNKT}}
-    for b in bahnsteige:
-        nbr = [n for n in g[b]]
-        for v in nbr:
-            if g.nodes[v]['typ'] == Knoten.Typ.SIGNAL:
-                g = nx.contracted_nodes(g, b, v, self_loops=False, copy=False)
 
-    return g
+    return SignalGraphVereinfachung(g).anwenden(['bahnsteigsignale_ersetzen']).graph()
 
 
 def graph_signalpaare_ersetzen(g: nx.Graph) -> nx.Graph:
@@ -188,24 +499,10 @@ def graph_signalpaare_ersetzen(g: nx.Graph) -> nx.Graph:
         g: Ungerichteter Graph.
 
     Returns:
-        Graph `g` mit ersetzten Signalpaaren.
+        Neuer Graph mit ersetzten Signalpaaren.
     """
-    while True:
-        signale = {n for n, _d in g.nodes.items()
-                   if _d.get('typ', None) == Knoten.Typ.SIGNAL}
-        for s1 in signale:
-            for s2 in g[s1]:
-                if g.nodes[s2]['typ'] == Knoten.Typ.SIGNAL:
-                    g = nx.contracted_nodes(g, s1, s2, self_loops=False, copy=False)
-                    signale.remove(s2)
-                    break
-            else:
-                continue
-            break
-        else:
-            break
 
-    return g
+    return SignalGraphVereinfachung(g).anwenden(['signalpaare_ersetzen']).graph()
 
 
 def graph_zwischensignale_entfernen(g: nx.Graph) -> nx.Graph:
@@ -216,18 +513,10 @@ def graph_zwischensignale_entfernen(g: nx.Graph) -> nx.Graph:
         g: Ungerichteter Graph.
 
     Returns:
-        Graph `g` mit entfernten Signalen.
+        Neuer Graph mit entfernten Signalen.
     """
-    signale = {n for n, _d in g.nodes.items()
-               if _d.get('typ', None) == Knoten.Typ.SIGNAL}
-    while signale:
-        s1 = signale.pop()
-        for s2 in g[s1]:
-            if g.nodes[s2]['typ'] in {Knoten.Typ.BAHNSTEIG, Knoten.Typ.HALTEPUNKT}:
-                g = nx.contracted_nodes(g, s2, s1, self_loops=False, copy=False)
-                break
 
-    return g
+    return SignalGraphVereinfachung(g).anwenden(['zwischensignale_entfernen']).graph()
 
 
 def graph_gleise_zuordnen(g: nx.Graph,
@@ -249,31 +538,21 @@ def graph_gleise_zuordnen(g: nx.Graph,
 
 
 def graph_schleifen_aufloesen(g: nx.Graph) -> nx.Graph:
-    cycles = nx.cycle_basis(g)
-    degrees = g.degree()
-    edges_to_remove = []
-    for c in cycles:
-        ds = []
-        dmin = len(c)
-        nmin = None
-        for n in c:
-            if g.nodes[n]['typ'] in {Knoten.Typ.EINFAHRT, Knoten.Typ.AUSFAHRT}:
-                d = len(c)
-            else:
-                d = degrees[n]
-            ds.append(d)
-            if d < dmin:
-                nmin = n
-                dmin = d
-
-        # nur dreiecke bearbeiten
-        if len(ds) == 3 and dmin == 2:
-            c.remove(nmin)
-            edges_to_remove.append((c[0], c[1]))
+    """
+    Dreiecke mit einem Knoten vom Grad 2 auflösen.
 
-    g.remove_edges_from(edges_to_remove)
+    Von drei paarweise verbundenen Knoten, von denen einer (kein Anschluss) nur mit den beiden anderen verbunden ist,
+    wird die Kante zwischen den beiden anderen entfernt.
+    Die Pfade führen dann über den mittleren Knoten.
 
-    return g
+    Args:
+        g: Ungerichteter Graph.
+
+    Returns:
+        Neuer Graph mit aufgelösten Dreiecken.
+    """
+
+    return SignalGraphVereinfachung(g).anwenden(['schleifen_aufloesen']).graph()
 
 
 def graph_mehrdeutige_strecken(g: nx.Graph,
@@ -8,10 +8,10 @@ Ausserdem können durch Flags entstehende Züge mit dem Stammzug verbunden werde
 """
 
 from __future__ import annotations
-from collections.abc import Generator
-from dataclasses import dataclass
-import datetime
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass, field
 import logging
+import math
 from typing import Any, NamedTuple, TYPE_CHECKING
 
 import networkx as nx
@@ -45,6 +45,103 @@ class PlanungParams:
 MIN_MINUTES = 0
 MAX_MINUTES = 24 * 60
 
+# Zielattribute, die der Ereignisgraph beim Import übernimmt (s. ZielGraph._zug_signatur)
+# plan_bst und gleis_bst sind Properties von ZielGraphNode, die aus typ, plan und gleis berechnet werden.
+# Sie sind nicht in den Knotendaten gespeichert und daher über typ, plan und gleis abgedeckt.
+ZUG_SIGNATUR_ATTRIBUTE = ('typ', 'plan', 'gleis', 'flags', 'p_an', 'p_ab', 'v_an', 'v_ab', 'mindestaufenthalt')
+
+
+@dataclass
+class FahrzeitSpeicher:
+    """
+    Zwischenspeicher für ZielGraph.einfahrtszeiten_korrigieren
+
+    Der Speicher überdauert die Zielgraphen der einzelnen Pollingzyklen.
+    Die Fahrzeiten werden beim Wechsel der Metrik automatisch verworfen.
+    Der Besitzer muss die Betriebsstellen verwerfen, wenn sich der Bahnhofgraph ändert,
+    und `liniengraph_abgleichen` aufrufen, wenn sich der Liniengraph geändert haben kann.
+
+    Attributes:
+        metrik: Metrik, mit der die Fahrzeiten bestimmt wurden.
+        betriebsstellen: Übergeordnete Betriebsstelle (Bf oder Anst) nach Planbahnhofelement.
+            None, wenn keine gefunden wird.
+        fahrzeiten: Fahrzeit in Minuten nach Betriebsstellenpaar.
+        kanten: Fahrzeitattribute (s. `FAHRZEIT_ATTRIBUTE`) der Liniengraphkanten beim letzten Abgleich.
+    """
+
+    FAHRZEIT_ATTRIBUTE = ('fahrzeit_min', 'fahrzeit_max', 'fahrzeit_schnitt', 'fahrzeit_manuell')
+
+    metrik: str = ""
+    betriebsstellen: dict[BahnhofElement, BahnhofElement | None] = field(default_factory=dict)
+    fahrzeiten: dict[tuple[BahnhofElement | None, BahnhofElement | None], int | float] = field(default_factory=dict)
+    kanten: dict[frozenset, tuple] = field(default_factory=dict)
+
+    def liniengraph_abgleichen(self, lg: LinienGraph) -> bool:
+        """
+        Fahrzeiten verwerfen, wenn sich Kanten oder Fahrzeitattribute des Liniengraphs geändert haben.
+
+        Returns:
+            True, wenn die Fahrzeiten verworfen wurden.
+        """
+
+        kanten = {frozenset((u, v)): tuple(data.get(attr) for attr in self.FAHRZEIT_ATTRIBUTE)
+                  for u, v, data in lg.edges(data=True)}
+        if kanten == self.kanten:
+            return False
+        self.kanten = kanten
+        self.fahrzeiten = {}
+        return True
+
+    def betriebsstelle(self, bg: BahnhofGraph, element: BahnhofElement) -> BahnhofElement | None:
+        try:
+            return self.betriebsstellen[element]
+        except KeyError:
+            pass
+
+        try:
+            bst = bg.find_superior(element, {'Anst', 'Bf'})
+        except KeyError:
+            bst = None
+        self.betriebsstellen[element] = bst
+        return bst
+
+    def fahrzeit(self, lg: LinienGraph, bst1: BahnhofElement | None, bst2: BahnhofElement | None, metrik: str) -> int | float:
+        if metrik != self.metrik:
+            self.fahrzeiten = {}
+            self.metrik = metrik
+        try:
+            return self.fahrzeiten[(bst1, bst2)]
+        except KeyError:
+            pass
+
+        try:
+            data: LinienGraphEdge = lg.edges[(bst1, bst2)]
+            fahrzeit = max(1, data.get("fahrzeit_manuell", 0) or data.get(metrik, 0))
+        except KeyError:
+            logger.warning(f"Verbindung {bst1}-{bst2} nicht im Liniengraph.")
+            fahrzeit = 1
+        self.fahrzeiten[(bst1, bst2)] = fahrzeit
+        return fahrzeit
+
+
+def minuten_verschieben(minuten: int | float, dt: int | float) -> int:
+    """
+    Uhrzeit in Minuten verschieben.
+
+    Entspricht der Umrechnung via datetime und time_to_minutes, d.h.
+    das Resultat läuft über Mitternacht um und wird auf ganze Minuten gerundet.
+
+    Args:
+        minuten: Minuten seit Mitternacht.
+        dt: Verschiebung in Minuten.
+
+    Returns:
+        Minuten seit Mitternacht, ganzzahlig.
+    """
+
+    sekunden = math.floor(round(minuten * 60) + dt * 60) % (24 * 60 * 60)
+    return sekunden // 60 + round(sekunden % 60 / 60)
+
 
 class ZielLabelType(NamedTuple):
     """
@@ -308,6 +405,18 @@ class ZielGraph(nx.DiGraph):
     und dispositiven Abhängigkeiten (Kreuzung, Ueberholen, Abwarten, Betriebshalt, etc.) verbunden.
 
     Der Zielgraph ist gerichtet.
+
+    Attributes:
+        zuganfaenge: Erster Zielknoten jedes Zuges.
+        zugenden: Letzter Zielknoten jedes Zuges.
+        einausfahrten: Index der Ein- und Ausfahrtsknoten.
+            Ordnet jedem Ein- oder Ausfahrtsknoten den benachbarten Fahrplanknoten des Zuges zu.
+            Wird von zug_details_importieren nachgeführt.
+        aenderungen: Zug-IDs, deren Ziele oder Verknüpfungen seit dem letzten `reset_aenderungen` geändert wurden.
+            Wird von zug_details_importieren und einfahrtszeiten_korrigieren nachgeführt
+            und erlaubt dem Ereignisgraphen, nur die geänderten Züge zu importieren.
+        rangierziele: Ziele mit Lokumlauf oder Lokwechsel.
+            Wird von zug_details_importieren nachgeführt.
     """
     node_attr_dict_factory = ZielGraphNode
     edge_attr_dict_factory = ZielGraphEdge
@@ -317,6 +426,9 @@ class ZielGraph(nx.DiGraph):
         self.zuganfaenge: dict[int, ZielLabelType] = {}
         self.zugenden: dict[int, ZielLabelType] = {}
         self._pendente_verbindungen: set[tuple[ZielLabelType, int, str]] = set()
+        self.einausfahrten: dict[ZielLabelType, ZielLabelType] = {}
+        self.aenderungen: set[int] = set()
+        self.rangierziele: set[ZielLabelType] = set()
 
     def to_undirected_class(self) -> type[ZielGraphUngerichtet]:
         return ZielGraphUngerichtet
@@ -330,12 +442,65 @@ class ZielGraph(nx.DiGraph):
         if as_view:
             obj.zuganfaenge = self.zuganfaenge
             obj.zugenden = self.zugenden
+            obj.einausfahrten = self.einausfahrten
+            obj.aenderungen = self.aenderungen
+            obj.rangierziele = self.rangierziele
         else:
             obj.zuganfaenge = self.zuganfaenge.copy()
             obj.zugenden = self.zugenden.copy()
+            obj.einausfahrten = self.einausfahrten.copy()
+            obj.aenderungen = self.aenderungen.copy()
+            obj.rangierziele = self.rangierziele.copy()
 
         return obj
 
+    def reset_aenderungen(self):
+        self.aenderungen = set()
+
+    def _zug_signatur(self, zid: int) -> tuple | None:
+        """
+        Vergleichswert der für den Ereignisgraphen relevanten Daten eines Zuges.
+
+        Unterfunktion von zug_details_importieren.
+        Enthält pro Ziel die Fahrplanattribute und die abgehenden Kanten.
+
+        Returns:
+            Tupel, das sich bei jeder relevanten Änderung ändert, oder None, wenn der Zug unbekannt ist.
+        """
+
+        if zid not in self.zuganfaenge:
+            return None
+
+        return tuple((fid,
+                      tuple(self.nodes[fid].get(attr) for attr in ZUG_SIGNATUR_ATTRIBUTE),
+                      tuple(sorted((str(v), d.get('typ')) for v, d in self._succ[fid].items())))
+                     for fid in self.zugpfad(zid))
+
+    def zuege_entfernen(self, zids: Iterable[int]) -> None:
+        """
+        Ziele von Zügen aus dem Graphen und den Indizes entfernen.
+
+        Wird von der Archivierung (s. `ZugArchiv`) verwendet.
+        Pendente Verbindungen von und zu den Zügen werden verworfen,
+        damit sie die Knoten nicht wieder anlegen.
+        """
+
+        zids = {zid for zid in zids if zid in self.zuganfaenge}
+        if not zids:
+            return
+
+        ziele = [fid for zid in zids for fid in self.zugpfad(zid)]
+        for zid in zids:
+            del self.zuganfaenge[zid]
+            self.zugenden.pop(zid, None)
+        for fid in ziele:
+            self.einausfahrten.pop(fid, None)
+            self.rangierziele.discard(fid)
+        self._pendente_verbindungen = {v for v in self._pendente_verbindungen
+                                       if v[0].zid not in zids and v[1] not in zids}
+        self.aenderungen.difference_update(zids)
+        self.remove_nodes_from(ziele)
+
     def zugpfad(self, zid: int) -> Generator[ZielLabelType, None, None]:
         """
         Generator für die Knoten eines Zuges
@@ -442,6 +607,7 @@ class ZielGraph(nx.DiGraph):
         zug2: ZugDetails = zug
         zid2: int = zug2.zid
         links: set[tuple[str, int, int]] = set()
+        signatur = self._zug_signatur(zid2)
 
         for ziel2 in zug2.fahrplan:
             fid2 = ZielLabelType.from_fahrplanzeile(ziel2.fid)
@@ -452,6 +618,10 @@ class ZielGraph(nx.DiGraph):
             ziel_data = ZielGraphNode.from_fahrplanzeile(ziel2)
             ziel_data.mindestaufenthalt_setzen(params)
             self.add_node(fid2, **ziel_data)
+            if ziel_data.lokumlauf or ziel_data.lokwechsel is not None:
+                self.rangierziele.add(fid2)
+            else:
+                self.rangierziele.discard(fid2)
 
             if ziel1:
                 if fid1 != fid2 and not self.has_edge(fid1, fid2):
@@ -503,6 +673,7 @@ class ZielGraph(nx.DiGraph):
                     ende = fid1
                 if not self.has_edge(fid1, fid2):
                     self.add_edge(fid1, fid2, typ='P')
+                self.einausfahrten[fid1] = fid2
 
         if zug2.nach and ausfahrt is not None:
             fz2 = zug2.fahrplan[-1]
@@ -535,6 +706,7 @@ class ZielGraph(nx.DiGraph):
                 ende = fid1
                 if not self.has_edge(fid2, fid1):
                     self.add_edge(fid2, fid1, typ='P')
+                self.einausfahrten[fid1] = fid2
 
         if zid2 not in self.zuganfaenge:
             if anfang is not None:
@@ -545,6 +717,9 @@ class ZielGraph(nx.DiGraph):
         self.verspaetung_von_zug(zug2)
         self._verbindungen_herstellen(zid2)
 
+        if signatur is None or signatur != self._zug_signatur(zid2):
+            self.aenderungen.add(zid2)
+
         return links
 
     def _ziele_verbinden(self, fid1: ZielLabelType, zid2: int, typ: str):
@@ -647,6 +822,8 @@ class ZielGraph(nx.DiGraph):
                 logger.debug(f"Finde kein {typ}-Ziel von Zug {ziel1.zid}, Ziel {fid1} zu Zug {zid2}.")
 
         if fid2 is not None and fid1 != fid2:
+            if not self.has_edge(fid1, fid2):
+                self.aenderungen.update((fid1.zid, fid2.zid))
             self.add_edge(fid1, fid2, typ=typ)
 
         return fid1, fid2
@@ -704,6 +881,8 @@ class ZielGraph(nx.DiGraph):
                                     lg: LinienGraph,
                                     bg: BahnhofGraph,
                                     metrik: str = "fahrzeit_schnitt",
+                                    vorher: ZielGraph | None = None,
+                                    speicher: FahrzeitSpeicher | None = None,
                                     ) -> None:
         """
         Ein- und Ausfahrtszeiten korrigieren.
@@ -720,57 +899,52 @@ class ZielGraph(nx.DiGraph):
 
         Da die Fahrzeiten im Liniengraph zur Laufzeit eines Spiels gemessen werden, können sie am Anfang fehlen.
 
+        Die Ein- und Ausfahrten werden dem Index `einausfahrten` entnommen.
+
         Args:
             lg: Der Liniengraph enthält die Fahrzeiten zwischen den Bahnhofteilen.
                 Wird die Verbindung nicht gefunden, wird die Fahrzeit auf 1 Minute geschätzt.
             bg: Der Bahnhofgraph enthält die Zuordnung von Gleisen zu Bahnhofteilen.
             metrik: Name des LinienGraph-Attributs, das die Fahrzeit angibt
                 (normalerweise eines von: `fahrzeit_schnitt`, `fahrzeit_min`, `fahrzeit_max`).
+            vorher: Zielgraph mit den korrigierten Zeiten des letzten Durchgangs.
+                Züge, deren korrigierte Zeit davon abweicht, werden in `aenderungen` eingetragen.
+                Ohne Angabe werden alle korrigierten Züge eingetragen.
+            speicher: Zwischenspeicher der Betriebsstellen und Fahrzeiten über mehrere Aufrufe.
+                Ohne Angabe wird ein temporärer Speicher verwendet.
         """
 
-        for fid1, fid2 in self.edges(data=False):
-            ziel1_data: ZielGraphNode = self.nodes[fid1]
-            ziel2_data: ZielGraphNode = self.nodes[fid2]
-            if ziel1_data.typ == 'E' or ziel2_data.typ == 'A':
-                try:
-                    bst1 = bg.find_superior(ziel1_data.plan_bst, {'Anst', 'Bf'})
-                except KeyError:
-                    bst1 = None
-                try:
-                    bst2 = bg.find_superior(ziel2_data.plan_bst, {'Anst', 'Bf'})
-                except KeyError:
-                    bst2 = None
+        if speicher is None:
+            speicher = FahrzeitSpeicher()
 
-                try:
-                    data: LinienGraphEdge = lg.edges[(bst1, bst2)]
-                    if TYPE_CHECKING:
-                        assert isinstance(data, LinienGraphEdge)
-                    fahrzeit = max(1, data.get("fahrzeit_manuell", 0) or data.get(metrik, 0))
-                except KeyError:
-                    logger.warning(f"Verbindung {bst1}-{bst2} nicht im Liniengraph.")
-                    fahrzeit = 1
-
-                if ziel1_data.typ == 'E':
-                    try:
-                        dt = datetime.datetime.combine(datetime.datetime.today(), minutes_to_time(ziel2_data.p_an))
-                    except AttributeError:
-                        continue
-                    else:
-                        dt -= datetime.timedelta(minutes=fahrzeit)
-                        einfahrtszeit = dt.time()
-                        ziel1_data.update(p_an=time_to_minutes(einfahrtszeit),
-                                          p_ab=time_to_minutes(einfahrtszeit))
-
-                elif ziel2_data.typ == 'A':
-                    try:
-                        dt = datetime.datetime.combine(datetime.datetime.today(), minutes_to_time(ziel1_data.p_ab))
-                    except AttributeError:
-                        continue
-                    else:
-                        dt += datetime.timedelta(minutes=fahrzeit)
-                        ausfahrtszeit = dt.time()
-                        ziel2_data.update(p_an=time_to_minutes(ausfahrtszeit),
-                                          p_ab=time_to_minutes(ausfahrtszeit))
+        for fid, nachbar in self.einausfahrten.items():
+            try:
+                data: ZielGraphNode = self.nodes[fid]
+                nachbar_data: ZielGraphNode = self.nodes[nachbar]
+            except KeyError:
+                continue
+
+            try:
+                if data.typ == 'E':
+                    bst1 = speicher.betriebsstelle(bg, data.plan_bst)
+                    bst2 = speicher.betriebsstelle(bg, nachbar_data.plan_bst)
+                    zeit = minuten_verschieben(nachbar_data.p_an, -speicher.fahrzeit(lg, bst1, bst2, metrik))
+                elif data.typ == 'A':
+                    bst1 = speicher.betriebsstelle(bg, nachbar_data.plan_bst)
+                    bst2 = speicher.betriebsstelle(bg, data.plan_bst)
+                    zeit = minuten_verschieben(nachbar_data.p_ab, speicher.fahrzeit(lg, bst1, bst2, metrik))
+                else:
+                    continue
+            except (AttributeError, TypeError):
+                continue
+
+            data.update(p_an=zeit, p_ab=zeit)
+            try:
+                if vorher.nodes[fid].p_an == zeit:
+                    continue
+            except (AttributeError, KeyError):
+                pass
+            self.aenderungen.add(data.zid)
 
 
 class ZielGraphUngerichtet(nx.Graph):
@@ -0,0 +1,230 @@
+"""
+Archiv der ausgefahrenen Züge
+
+Zug-, Ziel- und Ereignisgraph behalten ausgefahrene Züge, damit sie in den Fahrplan- und Grafikfenstern
+noch eine Weile angezeigt werden können.
+Über eine lange Sitzung wachsen die Graphen dadurch unbegrenzt,
+obwohl die alten Züge in keinem Fenster mehr sichtbar sind.
+
+Das Zugarchiv übernimmt Züge, die seit einer Nachlaufzeit ausgefahren sind, in eine kompakte Form
+und entfernt sie aus den Graphen.
+Archivierte Züge können über die Zug-ID weiterhin abgefragt werden.
+"""
+
+from __future__ import annotations
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+import logging
+
+import networkx as nx
+
+from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode
+from stskit.model.zielgraph import ZielGraph, ZielGraphNode, ZielLabelType, MAX_MINUTES
+from stskit.model.zuggraph import ZugGraph, ZugGraphNode
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@dataclass
+class ArchivierterZug:
+    """
+    Kompakte Daten eines archivierten Zuges
+
+    Attributes:
+        zid: Zug-ID.
+        zug: Zugdaten aus dem Zuggraph (ohne das Zugobjekt `obj`).
+        ziele: Ziele aus dem Zielgraph in der Fahrplanreihenfolge.
+        verknuepfungen: Kanten des Zielgraphs zu anderen Zügen (Ursprung, Folge, Typ).
+        ereignisse: Ereignisse aus dem Ereignisgraph in der Reihenfolge ihres Auftretens.
+        t_ausgefahren: Simzeit in Minuten, zu der der Zug als ausgefahren erkannt wurde.
+    """
+
+    zid: int
+    zug: ZugGraphNode
+    ziele: list[ZielGraphNode] = field(default_factory=list)
+    verknuepfungen: list[tuple[ZielLabelType, ZielLabelType, str]] = field(default_factory=list)
+    ereignisse: list[EreignisGraphNode] = field(default_factory=list)
+    t_ausgefahren: int = 0
+
+
+class ZugArchiv:
+    """
+    Archiv der ausgefahrenen Züge
+
+    Das Archiv wird von der Anlage bei jedem Pollingzyklus nachgeführt:
+
+    1. `ausfahrten_erfassen` merkt sich die Simzeit, zu der ein Zug ausgefahren ist.
+    2. `kandidaten` bestimmt die Züge, deren Ausfahrt länger als die Nachlaufzeit zurückliegt.
+       Über Ersatz, Kupplung oder Flügelung verbundene Züge werden nur gemeinsam archiviert.
+    3. `archivieren` übernimmt die Züge in das Archiv und entfernt sie aus den Graphen.
+
+    Attributes:
+        zuege: Archivierte Züge nach Zug-ID.
+        ausfahrzeiten: Ausfahrzeit (Simzeit in Minuten) der ausgefahrenen, noch nicht archivierten Züge.
+    """
+
+    def __init__(self):
+        self.zuege: dict[int, ArchivierterZug] = {}
+        self.ausfahrzeiten: dict[int, int] = {}
+
+    def __contains__(self, zid: int) -> bool:
+        return zid in self.zuege
+
+    def __len__(self) -> int:
+        return len(self.zuege)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.zuege)
+
+    def zug(self, zid: int) -> ZugGraphNode:
+        """
+        Zugdaten eines archivierten Zuges.
+
+        Raises:
+            KeyError: Der Zug ist nicht archiviert.
+        """
+
+        return self.zuege[zid].zug
+
+    def ziele(self, zid: int) -> list[ZielGraphNode]:
+        """
+        Ziele eines archivierten Zuges in der Fahrplanreihenfolge.
+
+        Raises:
+            KeyError: Der Zug ist nicht archiviert.
+        """
+
+        return self.zuege[zid].ziele
+
+    def zielgraph(self, zid: int) -> ZielGraph:
+        """
+        Ziele und Verknüpfungen eines archivierten Zuges als Zielgraph.
+
+        Der Graph enthält die Ziele des Zuges, verbunden durch P-Kanten,
+        und die Verknüpfungen zu anderen Zügen.
+        Die Ziele der anderen Züge sind ohne Attribute eingetragen.
+        Anzeigemodule können den Graphen an Stelle des Zielgraphen des Betriebs verwenden.
+
+        Raises:
+            KeyError: Der Zug ist nicht archiviert.
+        """
+
+        eintrag = self.zuege[zid]
+        graph = ZielGraph()
+        for ziel in eintrag.ziele:
+            graph.add_node(ziel.fid, **ziel)
+        for ziel1, ziel2 in zip(eintrag.ziele[:-1], eintrag.ziele[1:]):
+            graph.add_edge(ziel1.fid, ziel2.fid, typ='P')
+        for u, v, typ in eintrag.verknuepfungen:
+            graph.add_edge(u, v, typ=typ)
+        if eintrag.ziele:
+            graph.zuganfaenge[zid] = eintrag.ziele[0].fid
+            graph.zugenden[zid] = eintrag.ziele[-1].fid
+        return graph
+
+    def ausfahrten_erfassen(self, zuggraph: ZugGraph, zeit: int):
+        """
+        Ausfahrzeit der neu ausgefahrenen Züge erfassen.
+
+        Geprüft werden die Züge in `ZugGraph.aenderungen`.
+        Die Methode muss daher bei jeder Aktualisierung des Zuggraphen aufgerufen werden.
+
+        Args:
+            zuggraph: Aktueller Zuggraph.
+            zeit: Aktuelle Simzeit in Minuten.
+        """
+
+        for zid in zuggraph.aenderungen:
+            try:
+                ausgefahren = zuggraph.nodes[zid].get('ausgefahren', False)
+            except KeyError:
+                continue
+            if ausgefahren:
+                self.ausfahrzeiten.setdefault(zid, zeit)
+            else:
+                self.ausfahrzeiten.pop(zid, None)
+
+    def kandidaten(self, zuggraph: ZugGraph, zeit: int, nachlaufzeit: int) -> set[int]:
+        """
+        Züge, die archiviert werden können.
+
+        Ein Zug kann archiviert werden, wenn er seit mindestens `nachlaufzeit` Minuten ausgefahren ist
+        und das auch für alle mit ihm verknüpften Züge zutrifft.
+
+        Args:
+            zuggraph: Aktueller Zuggraph.
+            zeit: Aktuelle Simzeit in Minuten.
+            nachlaufzeit: Minimale Zeit seit der Ausfahrt in Minuten.
+
+        Returns:
+            Menge von Zug-IDs.
+        """
+
+        def faellig(zid: int) -> bool:
+            try:
+                t = self.ausfahrzeiten[zid]
+                return zuggraph.nodes[zid].get('ausgefahren', False) and (zeit - t) % MAX_MINUTES >= nachlaufzeit
+            except KeyError:
+                return False
+
+        for zid in [zid for zid in self.ausfahrzeiten if zid not in zuggraph]:
+            del self.ausfahrzeiten[zid]
+
+        ungerichtet = zuggraph.to_undirected(as_view=True)
+        result = set()
+        geprueft = set()
+        for zid in self.ausfahrzeiten:
+            if zid in geprueft:
+                continue
+            gruppe = nx.node_connected_component(ungerichtet, zid)
+            geprueft.update(gruppe)
+            if all(faellig(z) for z in gruppe):
+                result.update(gruppe)
+
+        return result
+
+    def archivieren(self,
+                    zids: Iterable[int],
+                    zuggraph: ZugGraph,
+                    zielgraph: ZielGraph,
+                    ereignisgraph: EreignisGraph | None = None):
+        """
+        Züge archivieren und aus den Graphen entfernen.
+
+        Args:
+            zids: Zug-IDs, z.B. von `kandidaten`.
+            zuggraph: Zuggraph, aus dem die Züge entfernt werden.
+            zielgraph: Zielgraph, aus dem die Züge entfernt werden.
+            ereignisgraph: Ereignisgraph, aus dem die Züge entfernt werden.
+        """
+
+        zids = [zid for zid in zids if zid in zuggraph]
+        for zid in zids:
+            zug = ZugGraphNode(zuggraph.nodes[zid])
+            zug.pop('obj', None)
+            eintrag = ArchivierterZug(zid=zid, zug=zug, t_ausgefahren=self.ausfahrzeiten.pop(zid, 0))
+
+            if zid in zielgraph.zuganfaenge:
+                for fid in zielgraph.zugpfad(zid):
+                    eintrag.ziele.append(ZielGraphNode(zielgraph.nodes[fid]))
+                    for u, v, typ in zielgraph.in_edges(fid, data='typ'):
+                        if u.zid != zid:
+                            eintrag.verknuepfungen.append((u, v, typ))
+                    for u, v, typ in zielgraph.out_edges(fid, data='typ'):
+                        if v.zid != zid:
+                            eintrag.verknuepfungen.append((u, v, typ))
+
+            if ereignisgraph is not None and zid in ereignisgraph.zuganfaenge:
+                eintrag.ereignisse = [EreignisGraphNode(ereignisgraph.nodes[label])
+                                      for label in ereignisgraph.zugpfad(zid)]
+
+            self.zuege[zid] = eintrag
+
+        zielgraph.zuege_entfernen(zids)
+        if ereignisgraph is not None:
+            ereignisgraph.zuege_entfernen(zids)
+        zuggraph.zuege_entfernen(zids)
+
+        if zids:
+            logger.debug(f"{len(zids)} Züge archiviert, {len(zuggraph)} Züge aktiv.")
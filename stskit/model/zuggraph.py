@@ -74,6 +74,11 @@ class ZugGraph(nx.DiGraph):
             sollte aber die Objekte nicht verändern.
 
             Die ZugGraphNode-Objekte sind unvollständig und sollten daher nicht direkt in den Graphen übernommen werden.
+        loks: Index der Loks (Zugname mit Präfix 'Lok') nach Zugname ohne Präfix.
+            Wird von zug_details_importieren nachgeführt.
+        ersatzloks: Index der Ersatzloks (Zugname mit Präfix 'Ersatzlok') nach Zugname ohne Präfix.
+            Wird von zug_details_importieren nachgeführt.
+        lok_rollen: Rolle ('Lok' oder 'Ersatzlok') der Loks in `loks` und `ersatzloks` nach Zug-ID.
     """
 
     node_attr_dict_factory = ZugGraphNode
@@ -85,9 +90,37 @@ class ZugGraph(nx.DiGraph):
     def to_directed_class(self):
         return self.__class__
 
+    LOK_PRAEFIXE = {"Lok": "loks", "Ersatzlok": "ersatzloks"}
+
     def __init__(self, incoming_graph_data=None, **attr):
         super().__init__(incoming_graph_data, **attr)
         self.aenderungen: Dict[int, ZugGraphNode | None] = {}
+        self.loks: Dict[str, int] = {}
+        self.ersatzloks: Dict[str, int] = {}
+        self.lok_rollen: Dict[int, str] = {}
+
+    def copy(self, as_view=False) -> 'ZugGraph':
+        obj = super().copy(as_view)
+
+        if as_view:
+            obj.aenderungen = self.aenderungen
+            obj.loks = self.loks
+            obj.ersatzloks = self.ersatzloks
+            obj.lok_rollen = self.lok_rollen
+        else:
+            obj.aenderungen = self.aenderungen.copy()
+            obj.loks = self.loks.copy()
+            obj.ersatzloks = self.ersatzloks.copy()
+            obj.lok_rollen = self.lok_rollen.copy()
+
+        return obj
+
+    def clear(self):
+        super().clear()
+        self.aenderungen = {}
+        self.loks = {}
+        self.ersatzloks = {}
+        self.lok_rollen = {}
 
     def vollstaendige_zuege(self) -> 'ZugGraph':
         """
@@ -126,7 +159,8 @@ class ZugGraph(nx.DiGraph):
 
         changes = {}
         zug_data = ZugGraphNode.from_zug_details(zug)
-        if self.has_node(zug.zid):
+        neu = not self.has_node(zug.zid) or 'name' not in self.nodes[zug.zid]
+        if not neu:
             old_data = self.nodes[zug.zid]
             for key, data in zug_data.items():
                 if key != "obj" and key in old_data:
@@ -134,12 +168,54 @@ class ZugGraph(nx.DiGraph):
                         changes[key] = old_data[key]
 
         self.add_node(zug.zid, **zug_data)
+        if zug.zid < 0 and (neu or 'name' in changes):
+            self._lok_eintragen(zug.zid, zug.name)
 
         changed = ZugGraphNode(**changes) if changes else None
-        self.aenderungen[zug.zid] = changed
+        if neu or changed:
+            self.aenderungen[zug.zid] = changed
 
         return changed
 
+    def _lok_eintragen(self, zid: int, name: str | None):
+        """
+        Lok in den Indizes `loks`, `ersatzloks` und `lok_rollen` nachführen.
+
+        Unterfunktion von zug_details_importieren.
+        Loks haben eine negative Zug-ID und einen Namen mit dem Präfix 'Lok' oder 'Ersatzlok'.
+        """
+
+        if rolle := self.lok_rollen.pop(zid, None):
+            index = getattr(self, self.LOK_PRAEFIXE[rolle])
+            for zug_name in [n for n, z in index.items() if z == zid]:
+                del index[zug_name]
+
+        try:
+            praefix, *teile = name.split()
+            index = getattr(self, self.LOK_PRAEFIXE[praefix])
+        except (AttributeError, KeyError, ValueError):
+            return
+
+        zug_name = " ".join(teile)
+
+        index[zug_name] = zid
+        self.lok_rollen[zid] = praefix
+
+    def zuege_entfernen(self, zids: Iterable[int]):
+        """
+        Züge aus dem Graphen und den Indizes entfernen.
+
+        Wird von der Archivierung (s. `ZugArchiv`) verwendet.
+        Unbekannte Zug-IDs werden ignoriert.
+        """
+
+        zids = [zid for zid in zids if zid in self._node]
+        for zid in zids:
+            if zid in self.lok_rollen:
+                self._lok_eintragen(zid, None)
+            self.aenderungen.pop(zid, None)
+        self.remove_nodes_from(zids)
+
     def zuege_verknuepfen(self, typ: str, zid1: int, zid2: int):
         if zid1 != zid2:
             self.add_edge(zid1, zid2, typ=typ)
@@ -6,9 +6,11 @@ Es ist mittels Konfigurationsdateien einstellbar.
 
 Die Zugbeschriftung definiert, wie Züge in den Grafiken beschriftet werden.
 
-Das Modul enthält neben den Datenklassen auch Modelle für Qt-Widgets.
+Die Qt-Modelle zum Zugschema befinden sich in `stskit.widgets.zugschema`,
+damit das Datenmodell ohne PySide6 und matplotlib geladen werden kann.
 """
 
+import importlib
 import json
 import logging
 import os
@@ -16,19 +18,25 @@ import typing
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
-import matplotlib as mpl
-from PySide6 import QtCore, QtGui
-from PySide6.QtCore import QModelIndex
-
 from stskit.model.bahnhofgraph import BahnhofElement
 from stskit.model.ereignisgraph import EreignisGraphNode
 from stskit.model.zielgraph import ZielGraphNode
 from stskit.plugin.stsobj import ZugDetails
 from stskit.model.zuggraph import ZugGraphNode
 
+if typing.TYPE_CHECKING:
+    import matplotlib.colors
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
+
+def _mpl_colors():
+    """
+    matplotlib.colors erst bei Bedarf laden.
+    """
+    return importlib.import_module("matplotlib.colors")
+
 # Uebersetzung von Regionen in Schema-Regionen (Regionen, die das gleiche Schema verwenden).
 # Das erste Wort des Regionsnamens ist ausschlaggebend.
 REGIONEN_SCHEMA = {
@@ -88,6 +96,10 @@ class Zugschema:
     schemadateien: Dict[str, os.PathLike] = {}
     # titel = Benutzerfreundlicher Name des Zugschemas
     schematitel: Dict[str, str] = {}
+    # zwischenspeicher von find_schemas. key = dateipfad, value = (mtime_ns, titel)
+    _titel_cache: Dict[Path, Tuple[int, str]] = {}
+    # zwischenspeicher von find_schemas. key = verzeichnis, value = (mtime_ns, dateipfade)
+    _dateien_cache: Dict[Path, Tuple[int, List[Path]]] = {}
 
     def __init__(self):
         # Name des Zugschemas, wie er im Namen der Konfigurationsdatei vorkommt
@@ -108,7 +120,7 @@ class Zugschema:
         # Farbschema: Kategorienkürzel -> Index in Farbtabelle
         self.farbwert: Dict[str, float] = {}
         # Farbschema in Matplotlib-Colormap: kategorienindex -> Farbe
-        self.farbtabelle: Optional[mpl.Colormap] = None
+        self.farbtabelle: Optional['matplotlib.colors.Colormap'] = None
 
         d = {"kategorien": self.DEFAULT_KATEGORIEN}
         self.set_config(d)
@@ -136,7 +148,7 @@ class Zugschema:
         n = len(self.farben) - 1
         self.farbwert = {kat: idx / n for idx, kat in enumerate(self.farben.keys())}
         farben = [farbe for farbe in self.farben.values()]
-        self.farbtabelle = mpl.colors.ListedColormap(farben)
+        self.farbtabelle = _mpl_colors().ListedColormap(farben)
 
     def set_config(self, config: Dict):
         """
@@ -259,28 +271,54 @@ class Zugschema:
         Sucht Zugschemadateien im angegebenen Verzeichnis und nimmt ihre Pfade in die klasseninterne Liste schemadateien auf.
         Die Methode kann mehrmals aufgerufen werden (z.B. für Vorgabe und Benutzerkonfiguration).
         Sie überschreibt dann vorbestehende Pfade gleichen Namens.
+        Die Dateiliste wird nach Verzeichnis und dessen Änderungszeit zwischengespeichert,
+        so dass das Verzeichnis nur nach dem Hinzufügen, Umbenennen oder Löschen von Dateien neu durchsucht wird.
+        Die Titel werden nach Dateipfad und Änderungszeit zwischengespeichert,
+        so dass nur neue oder geänderte Dateien gelesen werden.
 
         :param path: Directorypfad
         :return:
         """
 
         p = Path(path)
-        for fp in p.glob("zugschema.*.json"):
+        try:
+            verzeichnis_mtime = p.stat().st_mtime_ns
+        except OSError:
+            return
+
+        try:
+            cache_mtime, dateien = cls._dateien_cache[p]
+            if cache_mtime != verzeichnis_mtime:
+                raise KeyError(p)
+        except KeyError:
+            dateien = sorted(p.glob("zugschema.*.json"))
+            cls._dateien_cache[p] = (verzeichnis_mtime, dateien)
+
+        for fp in dateien:
             try:
                 name = fp.name.split('.')[1]
             except IndexError:
                 continue
 
             try:
-                with open(fp, encoding='utf-8') as f:
-                    d = json.load(f)
-                    try:
-                        titel = d['titel']
-                    except KeyError:
+                mtime = fp.stat().st_mtime_ns
+                cache_mtime, titel = cls._titel_cache[fp]
+                if cache_mtime != mtime:
+                    raise KeyError(fp)
+            except KeyError:
+                try:
+                    with open(fp, encoding='utf-8') as f:
+                        d = json.load(f)
                         try:
-                            titel = d['name']
+                            titel = d['titel']
                         except KeyError:
-                            titel = name
+                            try:
+                                titel = d['name']
+                            except KeyError:
+                                titel = name
+                except OSError:
+                    continue
+                cls._titel_cache[fp] = (mtime, titel)
             except OSError:
                 continue
 
@@ -327,7 +365,7 @@ class Zugschema:
         """
 
         farbe = self.zugfarbe(zug)
-        frgb = mpl.colors.to_rgb(farbe)
+        frgb = _mpl_colors().to_rgb(farbe)
         rgb = [round(255 * v) for v in frgb]
         return tuple(rgb)
 
@@ -367,359 +405,11 @@ class Zugschema:
         """
 
         farbe = self.farben[kat]
-        frgb = mpl.colors.to_rgb(farbe)
+        frgb = _mpl_colors().to_rgb(farbe)
         rgb = [round(255 * v) for v in frgb]
         return tuple(rgb)
 
 
-class ZugschemaAuswahlModell(QtCore.QAbstractTableModel):
-    """
-    Tabellenmodell zur Auswahl von Zugkategorien
-
-    Diese Klasse enthält die ganze Logik, um dem User die Auswahl von Zugkategorien in einem QTableView zu ermöglichen.
-
-    Dazu muss eine Instanz erzeugt werden und dem betreffenden QTableView zugewiesen werden.
-    Die Auswahl wird dann über das Property auswahl ein- und ausgelesen.
-
-    Wenn das Zugschema verändert wurde, muss danach die Update-Methode aufgerufen werden.
-
-    Die privaten Attribute dürfen von aussen nicht verändert werden!
-    """
-
-    def __init__(self, *args, zugschema: Zugschema = ..., **kwargs) -> None:
-        super().__init__(*args, **kwargs)
-        self._zugschema = zugschema
-        self.auswahl_erlauben = True
-        self._kategorien: List[str] = []
-        self._titel: Dict[str, str] = {}
-        self._farben: Dict[str, QtGui.QColor] = {}
-        self._spalten: List[str] = []
-        try:
-            self._auswahl = set(zugschema.kategorien.keys())
-        except AttributeError:
-            self._auswahl = set()
-        self.update()
-
-    def data(self, index: QModelIndex, role: int = ...) -> typing.Any:
-        """
-        Daten an das QListView übergeben.
-
-        :param index: enthält spalte und zeile der gewünschten zelle
-        :param role: gewünschtes datenfeld:
-            - UserRole gibt die originaldaten aus (zum sortieren benötigt).
-            - DisplayRole gibt die daten formatiert als str oder int aus.
-            - CheckStateRole gibt an, ob ein zug am gleis steht.
-            - DecorationRole
-            - ForegroundRole färbt die eingefahrenen, ausgefahrenen und noch unsichtbaren züge unterschiedlich ein.
-            - TextAlignmentRole richtet den text aus.
-            - ToolTipRole
-        :return: verschiedene
-        """
-
-        if not index.isValid():
-            return None
-
-        try:
-            col = index.column()
-            if self.auswahl_erlauben:
-                col -= 1
-            row = index.row()
-            kat = self._kategorien[row]
-        except (IndexError, KeyError):
-            return None
-
-        if role == QtCore.Qt.DisplayRole:
-            if col == 0:
-                return kat
-            elif col == 1:
-                return self._titel[kat]
-
-        elif role == QtCore.Qt.CheckStateRole:
-            if self.auswahl_erlauben and col == -1:
-                if kat in self._auswahl:
-                    return QtCore.Qt.Checked
-                else:
-                    return QtCore.Qt.Unchecked
-
-        elif role == QtCore.Qt.ForegroundRole:
-            return self._farben[kat]
-
-        elif role == QtCore.Qt.TextAlignmentRole:
-            if col < 1:
-                return QtCore.Qt.AlignHCenter + QtCore.Qt.AlignVCenter
-            else:
-                return QtCore.Qt.AlignVCenter
-
-        return None
-
-    def setData(self, index: QModelIndex, value: typing.Any, role: int = ...) -> bool:
-        """
-        Datenänderung vom QListView übernehmen.
-
-        Wir reagieren nur auf geänderte Auswahl
-
-        :param index: Zeilenindex
-        :param role: Rolle
-        :param value: neuer Wert
-        :return: True, wenn sich das Model geändert hat.
-        """
-
-        if not index.isValid():
-            return False
-
-        try:
-            col = index.column()
-            if self.auswahl_erlauben:
-                col -= 1
-            row = index.row()
-            kat = self._kategorien[row]
-        except (IndexError, KeyError):
-            return False
-
-        if role == QtCore.Qt.CheckStateRole:
-            value = QtCore.Qt.CheckState(value)
-            if self.auswahl_erlauben and col == -1:
-                if value == QtCore.Qt.Checked:
-                    self._auswahl.add(kat)
-                else:
-                    self._auswahl.discard(kat)
-                return True
-
-        return False
-
-    def flags(self, index: QModelIndex) -> Optional[QtCore.Qt.ItemFlags]:
-        """
-        Flags an QListView übergeben
-
-        :param index: Zeilenindex
-        :return: Alle Felder enabled und selectable. Erste Spalte checkable, wenn Auswahl erlaubt.
-        """
-
-        if not index.isValid():
-            return None
-
-        try:
-            col = index.column()
-            if self.auswahl_erlauben:
-                col -= 1
-            row = index.row()
-            kat = self._kategorien[row]
-        except (IndexError, KeyError):
-            return None
-
-        if col == -1:
-            return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsUserCheckable
-        elif col == 0:
-            return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
-        elif col == 1:
-            return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
-
-        return None
-
-    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = ...) -> Any:
-        """
-        gibt den text der kopfzeile und -spalte aus.
-        :param section: element-index
-        :param orientation: wahl zeile oder spalte
-        :param role: DisplayRole gibt den titel aus.
-        :return:
-        """
-
-        if role == QtCore.Qt.DisplayRole:
-            if orientation == QtCore.Qt.Horizontal:
-                return self._spalten[section]
-            elif orientation == QtCore.Qt.Vertical:
-                return None
-
-    def columnCount(self, parent: QModelIndex = ...) -> int:
-        """
-        Zeilenanzahl an QListView übergeben
-
-        :param parent: nicht verwendet
-        :return:
-        """
-
-        return len(self._spalten)
-
-    def rowCount(self, parent: QModelIndex = ...) -> int:
-        """
-        Zeilenanzahl an QListView übergeben
-
-        :param parent: nicht verwendet
-        :return: Anzahl wählbare Kategorien
-        """
-
-        return len(self._kategorien)
-
-    def update(self):
-        """
-        Zugschema übernehmen
-
-        Das Zugschema wird aus der Anlage ausgelesen und Modell und View neu aufgebaut.
-
-        :return: None
-        """
-
-        self.beginResetModel()
-        self._kategorien = list(self._zugschema.kategorien.keys())
-        self._titel = self._zugschema.kategorien.copy()
-        self._farben = {k: QtGui.QColor(*self._zugschema.kategorie_rgb(k)) for k in self._kategorien}
-        self._auswahl.intersection_update(self._kategorien)
-        self._spalten = ["Kürzel", "Titel"]
-        if self.auswahl_erlauben:
-            self._spalten.insert(0, "Auswahl")
-        self.endResetModel()
-
-    @property
-    def auswahl(self) -> Set[str]:
-        """
-        Aktuelle Auswahl
-
-        :return: Menge von Kategorieschlüsseln, z.B. {"X", "F", "N"}
-        """
-
-        return self._auswahl.copy()
-
-    @auswahl.setter
-    def auswahl(self, auswahl: Set[str]):
-        """
-        Auswahl ändern
-
-        :param auswahl: Menge von Kategorieschlüsseln, z.B. {"X", "F", "N"}.
-        :return:
-        """
-
-        self.beginResetModel()
-        self._auswahl = auswahl
-        self.endResetModel()
-
-
-class ZugschemaBearbeitungModell(QtCore.QAbstractTableModel):
-    """
-    Tabellenmodell zur Bearbeitung von Zugkategorien
-
-    Diese Klasse enthält die ganze Logik,
-    um dem User die Bearbeitung von Zugkategorien in einem QTableView zu ermöglichen.
-
-    Dazu muss eine Instanz erzeugt werden und dem betreffenden QTableView zugewiesen werden.
-    Die Auswahl wird dann über das Property zugschema ein- und ausgelesen.
-
-    Wenn das Zugschema verändert wurde, muss danach die Update-Methode aufgerufen werden.
-
-    Die privaten Attribute dürfen von aussen nicht verändert werden!
-    """
-
-    def __init__(self, *args, zugschema: Zugschema = ..., **kwargs) -> None:
-        super().__init__(*args, **kwargs)
-        self._zugschema = zugschema
-        self._tabelle: List[Dict[str, Union[int, str, QtGui.QColor]]] = []
-        self._spalten: List[str] = ["Gattung", "Nummern", "Kürzel", "Kategorie"]
-        self.update()
-
-    def data(self, index: QModelIndex, role: int = ...) -> typing.Any:
-        """
-        Daten an das QListView übergeben.
-
-        :param index: enthält spalte und zeile der gewünschten zelle
-        :param role: gewünschtes datenfeld:
-            - UserRole gibt die originaldaten aus (zum sortieren benötigt).
-            - DisplayRole gibt die daten formatiert als str oder int aus.
-            - CheckStateRole gibt an, ob ein zug am gleis steht.
-            - DecorationRole
-            - ForegroundRole färbt die eingefahrenen, ausgefahrenen und noch unsichtbaren züge unterschiedlich ein.
-            - TextAlignmentRole richtet den text aus.
-            - ToolTipRole
-        :return: verschiedene
-        """
-
-        if not index.isValid():
-            return None
-
-        try:
-            col = index.column()
-            spalte = self._spalten[col]
-            row = index.row()
-            datum = self._tabelle[row]
-        except (IndexError, KeyError):
-            return None
-
-        if role == QtCore.Qt.DisplayRole:
-            try:
-                return datum[spalte]
-            except KeyError:
-                return None
-
-        elif role == QtCore.Qt.ForegroundRole:
-            try:
-                return datum["Farbe"]
-            except KeyError:
-                return None
-
-        elif role == QtCore.Qt.TextAlignmentRole:
-            if spalte == "Kategorie":
-                return QtCore.Qt.AlignVCenter
-            else:
-                return QtCore.Qt.AlignHCenter + QtCore.Qt.AlignVCenter
-
-        return None
-
-    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = ...) -> Any:
-        """
-        gibt den text der kopfzeile und -spalte aus.
-        :param section: element-index
-        :param orientation: wahl zeile oder spalte
-        :param role: DisplayRole gibt den titel aus.
-        :return:
-        """
-
-        if role == QtCore.Qt.DisplayRole:
-            if orientation == QtCore.Qt.Horizontal:
-                return self._spalten[section]
-            elif orientation == QtCore.Qt.Vertical:
-                return None
-
-    def columnCount(self, parent: QModelIndex = ...) -> int:
-        """
-        Zeilenanzahl an QListView übergeben
-
-        :param parent: nicht verwendet
-        :return:
-        """
-
-        return len(self._spalten)
-
-    def rowCount(self, parent: QModelIndex = ...) -> int:
-        """
-        Zeilenanzahl an QListView übergeben
-
-        :param parent: nicht verwendet
-        :return: Anzahl wählbare Kategorien
-        """
-
-        return len(self._tabelle)
-
-    def update(self):
-        """
-        Zugschema übernehmen
-
-        Das Zugschema wird aus der Anlage ausgelesen und Modell und View neu aufgebaut.
-
-        :return: None
-        """
-
-        self.beginResetModel()
-        liste_gattungen = [{"Kürzel": kat, "Kategorie": self._zugschema.kategorien[kat],
-                            "Gattung": gatt, "Nummern": "",
-                            "Farbe": QtGui.QColor(*self._zugschema.kategorie_rgb(kat))}
-                           for gatt, kat in self._zugschema.gattungen.items()]
-        liste_nummern = [{"Kürzel": kat, "Kategorie": self._zugschema.kategorien[kat],
-                          "Gattung": "", "Nummern": f"{num[0]}-{num[1]}",
-                          "Farbe": QtGui.QColor(*self._zugschema.kategorie_rgb(kat))}
-                         for num, kat in self._zugschema.nummern.items()]
-        self._tabelle = liste_gattungen + liste_nummern
-        self.endResetModel()
-
-
 class ZugFormatter:
     """
     Formatiert Elemente der Zugbeschriftung
@@ -9,6 +9,7 @@ from matplotlib.lines import Line2D
 from matplotlib.image import AxesImage
 from matplotlib.text import Text
 import networkx as nx
+from PySide6 import QtCore, QtGui
 
 from stskit.model.bahnhofgraph import BahnhofElement
 from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode, EreignisGraphEdge, EreignisLabelType
@@ -17,6 +18,7 @@ from stskit.model.zuggraph import ZugGraphNode
 from stskit.model.zugschema import Zugbeschriftung
 from stskit.plugin.stsobj import format_verspaetung, format_minutes
 from stskit.plots.plotbasics import hour_minutes_formatter
+from stskit.plots.szene import ZeitachsenAnsicht, qfarbe, qstift
 from stskit.utils.observer import Observable
 from stskit.zentrale import DatenZentrale
 
@@ -63,6 +65,13 @@ class BildfahrplanPlot:
         self.auswahl_bahnhoefe: List[BahnhofElement] = []
         self._auswahl_journal: Journal = Journal()
 
+        self._grafik_einrichten(canvas)
+
+    def _grafik_einrichten(self, canvas: mpl.backend_bases.FigureCanvasBase):
+        """
+        Zeichenfläche übernehmen und Maus- und Resize-Events registrieren.
+        """
+
         self._canvas = canvas
         self._axes = self._canvas.figure.subplots()
         self._pick_event: bool = False
@@ -71,7 +80,6 @@ class BildfahrplanPlot:
         self._canvas.mpl_connect("pick_event", self.on_pick)
         self._canvas.mpl_connect("resize_event", self.on_resize)
 
-
     def default_strecke_waehlen(self):
         """
         Hauptstrecke auswählen.
@@ -744,3 +752,141 @@ class BildfahrplanPlot:
             info = self.zugbeschriftung.format_trasse_info(zug, ankunft=ankunft, abfahrt=abfahrt)
 
         return info
+
+
+class BildfahrplanSzene(BildfahrplanPlot):
+    """
+    Bildfahrplan in einer QGraphicsScene
+
+    Alternative zu `BildfahrplanPlot` mit derselben Schnittstelle.
+    Die Trassen bleiben zwischen Aktualisierungen als Grafikelemente erhalten (s. `ElementCache`),
+    Scrollen, Zoomen und Grössenänderungen werden von der `ZeitachsenAnsicht` ohne Neuaufbau erledigt.
+    Nur die Ausrichtung der Trassentitel wird bei einer Änderung des Sichtbereichs nachgeführt.
+    """
+
+    def _grafik_einrichten(self, ansicht: ZeitachsenAnsicht):
+        self._ansicht = ansicht
+        self._ansicht.x_gitter = False
+        self._elemente = ansicht.elemente
+        # titel-key -> (x, t, titel, dx, dt) der trassenmitte und -richtung
+        self._titel: Dict[Tuple, Tuple[float, float, str, float, float]] = {}
+        self._ansicht.element_geklickt.connect(self.on_element_geklickt)
+        self._ansicht.sichtbereich_geaendert.connect(self.titel_ausrichten)
+
+    def draw_graph(self):
+        x_labels = [s for _, s in self.strecke]
+        x_labels_pos = self.distanz
+
+        self._elemente.beginnen()
+        self._titel = {}
+        if len(x_labels_pos) < 2:
+            self._ansicht.achse_setzen([], [])
+            self._elemente.abschliessen()
+            return
+
+        self._ansicht.achse_setzen(x_labels, x_labels_pos, bereich=(x_labels_pos[0], x_labels_pos[-1]))
+        self._ansicht.zeitlinie = self.nachlaufzeit > 0
+        self._ansicht.zeitfenster_setzen(self.zeit, self.nachlaufzeit, self.vorlaufzeit)
+
+        t_min = -1440
+        t_max = 3 * 1440
+        stile = self.linienstil or [':' for _ in x_labels]
+        for label, pos, stil in zip(x_labels, x_labels_pos, stile):
+            if label == self.strecke_via:
+                stil = '-'
+            if stil:
+                farbe = mpl.rcParams['axes.edgecolor'] if 'w' in stil else mpl.rcParams['grid.color']
+                self._elemente.linie(('station', label), pos, t_min, pos, t_max,
+                                     qstift(farbe, mpl.rcParams['axes.linewidth'], stil.replace('w', '')), z=-2)
+
+        try:
+            markierungen = {(e1, e2): m for e1, e2, m in self.anlage.liniengraph.edges(data='markierung') if m}
+        except AttributeError:
+            markierungen = {}
+        for strecke, art in markierungen.items():
+            try:
+                x1 = x_labels_pos[x_labels.index(strecke[0][1])]
+                x2 = x_labels_pos[x_labels.index(strecke[1][1])]
+            except ValueError:
+                continue
+            farbe = self.markierungs_farben.get(art)
+            if farbe:
+                self._elemente.rechteck(('markierung', strecke), QtCore.QRectF(x1, t_min, x2 - x1, t_max - t_min),
+                                        QtGui.QPen(QtCore.Qt.NoPen), QtGui.QBrush(qfarbe(farbe, 0.1)), z=-3)
+
+        for u, v, data in self.bildgraph.edges(data=True):
+            u_data = self.bildgraph.nodes[u]
+            v_data = self.bildgraph.nodes[v]
+
+            try:
+                for s_u, s_v, s_key, s_data in self.streckengraph.edges(u_data.bst, keys=True, data=True):
+                    if s_v == v_data.bst:
+                        key = (u, v, s_u, s_v, s_key)
+                        args = self.line_args(u_data, v_data, data)
+                        self._elemente.linie(('trasse', key),
+                                             s_data['s0'], u_data.t_eff, s_data['s1'], v_data.t_eff,
+                                             qstift(args['color'], args['linewidth'], args['linestyle'],
+                                                    args.get('alpha')),
+                                             daten=((s_u, s_v, s_key), (u, v)))
+                        if data.titel:
+                            self._titel[key] = ((s_data['s0'] + s_data['s1']) / 2,
+                                                (u_data.t_eff + v_data.t_eff) / 2,
+                                                data.titel,
+                                                s_data['s1'] - s_data['s0'],
+                                                v_data.t_eff - u_data.t_eff)
+            except AttributeError as e:
+                logger.debug("Fehlendes Attribut im Bildgraph beim Kantenzeichnen", exc_info=e)
+
+        for u, u_data in self.bildgraph.nodes(data=True):
+            try:
+                if not u_data.get('marker', ''):
+                    continue
+                for s_u, s_v, s_key, s_data in self.streckengraph.edges(u_data.bst, keys=True, data=True):
+                    if s_v == u_data.bst:
+                        args = self.marker_args(u_data)
+                        self._elemente.marker(('marker', u, s_key), s_data['s0'], u_data.t_eff,
+                                              args['marker'], args['c'], args.get('alpha'))
+            except AttributeError as e:
+                logger.debug("Fehlendes Attribut im Bildgraph beim Knotenzeichnen", exc_info=e)
+
+        self.titel_ausrichten()
+        self._elemente.abschliessen()
+
+    def titel_ausrichten(self):
+        """
+        Trassentitel entlang der Trassen drehen.
+
+        Die Titel werden wie im `BildfahrplanPlot` nur angezeigt,
+        wenn die Trasse mindestens 30 Pixel breit ist und ihre Mitte im sichtbaren Zeitbereich liegt.
+        """
+
+        sx, sy = self._ansicht.skalierung()
+        t0, t1 = self._ansicht.zeitbereich()
+        farbe = mpl.rcParams['text.color']
+        for key, (x, t, titel, dx, dt) in self._titel.items():
+            try:
+                winkel = math.degrees(math.atan(dt * sy / (dx * sx)))
+            except ZeroDivisionError:
+                winkel = 0.
+            element = self._elemente.text(('titel', key), x, t, titel, farbe,
+                                          ausrichtung=QtCore.Qt.AlignHCenter | QtCore.Qt.AlignBottom,
+                                          winkel=winkel)
+            element.setVisible(abs(dx * sx) > 30 and t0 < t < t1)
+
+    def on_element_geklickt(self, daten: Any, x: float, t: float):
+        """
+        Mausklick in der Ansicht
+
+        Ein Klick auf eine Trasse wählt sie aus (s. `select_trasse`),
+        ein Klick auf den Hintergrund löscht die Auswahl.
+        """
+
+        if daten is None:
+            self.clear_selection()
+        else:
+            strecken_edge, ereignis_edge = daten
+            self.select_trasse(strecken_edge, ereignis_edge, float(x), float(t))
+            self.auswahl_text = [self.format_zuginfo(*tr) for tr in self.auswahl_kanten]
+
+        self.draw_graph()
+        self.auswahl_geaendert.notify()
@@ -0,0 +1,556 @@
+"""
+Zeitachsengrafik mit QGraphicsScene
+
+Dieses Modul enthält die Grundlagen für die Qt-eigene Darstellung von Gleisbelegung und Bildfahrplan.
+Im Gegensatz zur Matplotlib-Darstellung wird die Grafik nicht bei jeder Änderung vollständig neu gerendert:
+
+- Die Grafikelemente sind QGraphicsItems, die zwischen Aktualisierungen erhalten bleiben.
+  Qt zeichnet nur die Bereiche neu, in denen sich ein Element verändert hat.
+- Scrollen, Zoomen und Grössenänderungen ändern nur die Transformation der Ansicht.
+- Mausklicks werden direkt den Elementen zugeordnet.
+
+Die x-Achse ist kategorisch (Gleise) oder eine Distanz (Bildfahrplan),
+die y-Achse ist die Zeit in Minuten und zeigt nach unten.
+Die Achsenbeschriftung wird im Vordergrund über die Grafik gelegt.
+"""
+
+from __future__ import annotations
+from collections.abc import Hashable, Sequence
+import functools
+import logging
+import math
+from typing import Any
+
+import matplotlib as mpl
+from PySide6 import QtCore, QtGui, QtWidgets
+from PySide6.QtCore import QPointF, QRectF, Qt, Signal
+
+from stskit.plots.plotbasics import hour_minutes_formatter
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+LINIENSTILE = {
+    '-': Qt.SolidLine,
+    'solid': Qt.SolidLine,
+    '--': Qt.DashLine,
+    'dashed': Qt.DashLine,
+    ':': Qt.DotLine,
+    'dotted': Qt.DotLine,
+    '-.': Qt.DashDotLine,
+    'dashdot': Qt.DashDotLine,
+    '': Qt.NoPen,
+    'None': Qt.NoPen,
+}
+
+
+@functools.lru_cache(maxsize=256)
+def qfarbe(farbe: Any, alpha: float | None = None) -> QtGui.QColor:
+    """
+    Matplotlib-Farbangabe in QColor umwandeln.
+
+    Unbekannte Farben werden grau dargestellt.
+    """
+
+    try:
+        r, g, b, a = mpl.colors.to_rgba(farbe, alpha)
+    except ValueError:
+        r, g, b, a = 0.5, 0.5, 0.5, 1.
+    return QtGui.QColor.fromRgbF(r, g, b, a)
+
+
+def qstift(farbe: Any, breite: float | None = 1., stil: str | None = '-', alpha: float | None = None) -> QtGui.QPen:
+    """
+    Kosmetischen Stift erstellen.
+
+    Die Linienbreite ist in Pixeln und hängt nicht vom Zoom der Ansicht ab.
+    """
+
+    stift = QtGui.QPen(qfarbe(farbe, alpha))
+    stift.setCosmetic(True)
+    stift.setWidthF(breite if breite is not None else 1.)
+    stift.setStyle(LINIENSTILE.get(stil if stil is not None else '-', Qt.SolidLine))
+    return stift
+
+
+class ElementCache:
+    """
+    Grafikelemente einer Szene über Aktualisierungen hinweg erhalten
+
+    Die Elemente werden über einen Schlüssel identifiziert.
+    Bei jeder Aktualisierung ruft der Aufrufer zwischen `beginnen` und `abschliessen`
+    die Erzeugermethoden für alle darzustellenden Elemente auf.
+    Bestehende Elemente werden angepasst, neue erstellt und nicht mehr benötigte entfernt.
+    Da Qt unveränderte Eigenschaften nicht neu zeichnet, wird nur der veränderte Teil der Grafik aufgefrischt.
+
+    Den Elementen kann ein Datenobjekt mitgegeben werden, das bei einem Mausklick gemeldet wird
+    (s. `ZeitachsenAnsicht.element_geklickt`).
+    """
+
+    DATEN = 0
+
+    def __init__(self, szene: QtWidgets.QGraphicsScene):
+        self.szene = szene
+        self.elemente: dict[Hashable, QtWidgets.QGraphicsItem] = {}
+        self._benutzt: set[Hashable] = set()
+
+    def beginnen(self):
+        self._benutzt = set()
+
+    def abschliessen(self):
+        for key in [key for key in self.elemente if key not in self._benutzt]:
+            self.szene.removeItem(self.elemente.pop(key))
+
+    def leeren(self):
+        self.beginnen()
+        self.abschliessen()
+
+    def _element(self, key: Hashable, klasse: type, daten: Any, z: float) -> Any:
+        self._benutzt.add(key)
+        element = self.elemente.get(key)
+        if not isinstance(element, klasse):
+            if element is not None:
+                self.szene.removeItem(element)
+            element = klasse()
+            self.szene.addItem(element)
+            self.elemente[key] = element
+        element.setData(self.DATEN, daten)
+        element.setZValue(z)
+        return element
+
+    def rechteck(self, key: Hashable, rect: QRectF, stift: QtGui.QPen, pinsel: QtGui.QBrush,
+                 daten: Any = None, z: float = 0) -> QtWidgets.QGraphicsRectItem:
+        element = self._element(key, QtWidgets.QGraphicsRectItem, daten, z)
+        element.setRect(rect)
+        element.setPen(stift)
+        element.setBrush(pinsel)
+        return element
+
+    def linie(self, key: Hashable, x0: float, y0: float, x1: float, y1: float, stift: QtGui.QPen,
+              daten: Any = None, z: float = 0) -> QtWidgets.QGraphicsLineItem:
+        element = self._element(key, QtWidgets.QGraphicsLineItem, daten, z)
+        element.setLine(x0, y0, x1, y1)
+        element.setPen(stift)
+        return element
+
+    def text(self, key: Hashable, x: float, y: float, text: str, farbe: Any,
+             ausrichtung: Qt.AlignmentFlag = Qt.AlignHCenter | Qt.AlignTop,
+             winkel: float = 0., kursiv: bool = False,
+             daten: Any = None, z: float = 1) -> QtWidgets.QGraphicsSimpleTextItem:
+        """
+        Text mit fester Schriftgrösse an einem Punkt der Szene.
+
+        Die Ausrichtung bezieht sich auf den Punkt (x, y).
+        Der Winkel dreht den Text in Bildschirmkoordinaten im Uhrzeigersinn.
+        """
+
+        element = self._element(key, QtWidgets.QGraphicsSimpleTextItem, daten, z)
+        element.setFlag(QtWidgets.QGraphicsItem.ItemIgnoresTransformations, True)
+        element.setText(text)
+        element.setBrush(QtGui.QBrush(qfarbe(farbe)))
+        schrift = element.font()
+        if schrift.italic() != kursiv:
+            schrift.setItalic(kursiv)
+            element.setFont(schrift)
+        element.setPos(x, y)
+
+        rect = element.boundingRect()
+        if ausrichtung & Qt.AlignHCenter:
+            dx = -rect.width() / 2
+        elif ausrichtung & Qt.AlignRight:
+            dx = -rect.width()
+        else:
+            dx = 0.
+        if ausrichtung & Qt.AlignVCenter:
+            dy = -rect.height() / 2
+        elif ausrichtung & Qt.AlignBottom:
+            dy = -rect.height()
+        else:
+            dy = 0.
+        transform = QtGui.QTransform()
+        transform.rotate(winkel)
+        transform.translate(dx, dy)
+        element.setTransform(transform)
+        return element
+
+    def marker(self, key: Hashable, x: float, y: float, form: str, farbe: Any, alpha: float | None = None,
+               groesse: float = 6., daten: Any = None, z: float = 2) -> QtWidgets.QGraphicsPathItem:
+        """
+        Marker mit fester Grösse in Pixeln.
+
+        Die Form entspricht den gebräuchlichsten Matplotlib-Markern ('o', '.', 's', 'P', '*', 'v', '^', '|').
+        """
+
+        element = self._element(key, QtWidgets.QGraphicsPathItem, daten, z)
+        element.setFlag(QtWidgets.QGraphicsItem.ItemIgnoresTransformations, True)
+        element.setPath(_marker_pfad(form, groesse))
+        element.setPos(x, y)
+        f = qfarbe(farbe, alpha)
+        if form in {'|', '_', '+', 'x'}:
+            stift = QtGui.QPen(f)
+            stift.setWidthF(1.5)
+            element.setPen(stift)
+            element.setBrush(Qt.NoBrush)
+        else:
+            element.setPen(Qt.NoPen)
+            element.setBrush(QtGui.QBrush(f))
+        return element
+
+
+@functools.lru_cache(maxsize=64)
+def _marker_pfad(form: str, groesse: float) -> QtGui.QPainterPath:
+    r = groesse / 2
+    pfad = QtGui.QPainterPath()
+    if form == '.':
+        pfad.addEllipse(QPointF(0, 0), r / 2, r / 2)
+    elif form == 's':
+        pfad.addRect(QRectF(-r, -r, 2 * r, 2 * r))
+    elif form == 'D':
+        pfad.addPolygon(QtGui.QPolygonF([QPointF(0, -r), QPointF(r, 0), QPointF(0, r), QPointF(-r, 0)]))
+    elif form == 'v':
+        pfad.addPolygon(QtGui.QPolygonF([QPointF(-r, -r), QPointF(r, -r), QPointF(0, r)]))
+    elif form == '^':
+        pfad.addPolygon(QtGui.QPolygonF([QPointF(-r, r), QPointF(r, r), QPointF(0, -r)]))
+    elif form == '*':
+        punkte = [QPointF((r if i % 2 == 0 else r / 2.5) * math.sin(i * math.pi / 5),
+                          -(r if i % 2 == 0 else r / 2.5) * math.cos(i * math.pi / 5)) for i in range(10)]
+        pfad.addPolygon(QtGui.QPolygonF(punkte))
+    elif form == 'P':
+        d = r / 3
+        pfad.addPolygon(QtGui.QPolygonF([QPointF(-d, -r), QPointF(d, -r), QPointF(d, -d), QPointF(r, -d),
+                                         QPointF(r, d), QPointF(d, d), QPointF(d, r), QPointF(-d, r),
+                                         QPointF(-d, d), QPointF(-r, d), QPointF(-r, -d), QPointF(-d, -d)]))
+    elif form == '|':
+        pfad.moveTo(0, -r)
+        pfad.lineTo(0, r)
+    elif form == '_':
+        pfad.moveTo(-r, 0)
+        pfad.lineTo(r, 0)
+    elif form == '+':
+        pfad.moveTo(0, -r)
+        pfad.lineTo(0, r)
+        pfad.moveTo(-r, 0)
+        pfad.lineTo(r, 0)
+    elif form == 'x':
+        pfad.moveTo(-r, -r)
+        pfad.lineTo(r, r)
+        pfad.moveTo(-r, r)
+        pfad.lineTo(r, -r)
+    else:
+        pfad.addEllipse(QPointF(0, 0), r, r)
+    pfad.closeSubpath()
+    return pfad
+
+
+class ZeitachsenAnsicht(QtWidgets.QGraphicsView):
+    """
+    Ansicht einer Szene mit kategorischer oder metrischer x-Achse und nach unten laufender Zeitachse
+
+    Die x-Achse wird immer auf die Breite der Ansicht eingepasst und oben beschriftet.
+    Der sichtbare Zeitbereich ergibt sich aus der Bezugszeit (Simzeit), Nach- und Vorlaufzeit
+    sowie aus der Verschiebung und dem Zoom, die der Benutzer mit dem Mausrad einstellt:
+
+    - Mausrad: Zeitachse verschieben.
+    - Ctrl + Mausrad: Zeitachse zoomen.
+    - Ziehen mit der Maus: Zeitachse verschieben.
+    - Doppelklick auf den Hintergrund: Verschiebung und Zoom zurücksetzen.
+
+    Ein Klick auf ein Element, das Daten trägt (s. `ElementCache`), wird mit `element_geklickt` gemeldet,
+    ein Klick auf den Hintergrund mit Daten None.
+    Die Fangdistanz beträgt `fangradius` Pixel.
+    Nach jeder Änderung der Transformation wird `sichtbereich_geaendert` gesendet.
+    """
+
+    element_geklickt = Signal(object, float, float)
+    sichtbereich_geaendert = Signal()
+
+    def __init__(self, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+        self.setScene(QtWidgets.QGraphicsScene(self))
+        self.scene().setItemIndexMethod(QtWidgets.QGraphicsScene.BspTreeIndex)
+        self.setRenderHint(QtGui.QPainter.Antialiasing)
+        self.setViewportUpdateMode(QtWidgets.QGraphicsView.MinimalViewportUpdate)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.NoAnchor)
+        self.setResizeAnchor(QtWidgets.QGraphicsView.NoAnchor)
+        self.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
+
+        self.elemente = ElementCache(self.scene())
+
+        self.x_labels: list[str] = []
+        self.x_labels_pos: list[float] = []
+        self.x_bereich: tuple[float, float] = (0., 1.)
+        self.x_gitter: bool = True
+
+        self.zeit: float = 0.
+        self.nachlaufzeit: float = 5.
+        self.vorlaufzeit: float = 55.
+        self.zeitlinie: bool = True
+        self.verschiebung: float = 0.
+        self.zoom: float = 1.
+
+        self.rand_links = 45
+        self.rand_oben = 70
+        self.rand_rechts = 10
+        self.fangradius = 4
+
+        self._maus_start: QtCore.QPoint | None = None
+        self._maus_verschiebung: float = 0.
+        self._gezogen = False
+
+        self.hintergrundfarbe = qfarbe(mpl.rcParams['axes.facecolor'])
+        self.achsenfarbe = mpl.rcParams['axes.edgecolor']
+        self.gitterfarbe = mpl.rcParams['grid.color']
+        self.textfarbe = qfarbe(mpl.rcParams['text.color'])
+        self.setBackgroundBrush(QtGui.QBrush(self.hintergrundfarbe))
+
+    def achse_setzen(self, labels: Sequence[str], positionen: Sequence[float],
+                     bereich: tuple[float, float] | None = None):
+        """
+        Beschriftung und Bereich der x-Achse setzen.
+
+        Args:
+            labels: Beschriftungen.
+            positionen: x-Koordinaten der Beschriftungen.
+            bereich: Sichtbarer Bereich der x-Achse.
+                Per Default eine halbe Einheit links und rechts der äussersten Positionen.
+        """
+
+        self.x_labels = list(labels)
+        self.x_labels_pos = [float(x) for x in positionen]
+        if bereich is None:
+            if self.x_labels_pos:
+                bereich = (min(self.x_labels_pos) - 0.5, max(self.x_labels_pos) + 0.5)
+            else:
+                bereich = (0., 1.)
+        if bereich[1] <= bereich[0]:
+            bereich = (bereich[0], bereich[0] + 1.)
+        self.x_bereich = (float(bereich[0]), float(bereich[1]))
+        self.resetCachedContent()
+        self.viewport().update()
+
+    def zeitfenster_setzen(self, zeit: float, nachlaufzeit: float, vorlaufzeit: float):
+        """
+        Bezugszeit und Zeitfenster setzen.
+
+        Die Verschiebung und der Zoom des Benutzers bleiben erhalten.
+        """
+
+        self.zeit = float(zeit)
+        self.nachlaufzeit = float(nachlaufzeit)
+        self.vorlaufzeit = float(vorlaufzeit)
+        self.sichtbereich_anwenden()
+
+    def zeitbereich(self) -> tuple[float, float]:
+        """
+        Sichtbarer Zeitbereich (Anfang, Ende) in Minuten.
+        """
+
+        dauer = max(1., (self.nachlaufzeit + self.vorlaufzeit) * self.zoom)
+        anfang = self.zeit - self.nachlaufzeit * self.zoom + self.verschiebung
+        return anfang, anfang + dauer
+
+    def skalierung(self) -> tuple[float, float]:
+        """
+        Pixel pro x-Einheit und pro Minute.
+        """
+
+        t0, t1 = self.zeitbereich()
+        breite = max(1, self.viewport().width() - self.rand_links - self.rand_rechts)
+        hoehe = max(1, self.viewport().height() - self.rand_oben)
+        return breite / (self.x_bereich[1] - self.x_bereich[0]), hoehe / (t1 - t0)
+
+    def sichtbereich_anwenden(self):
+        """
+        Transformation der Ansicht aus Achsenbereich und Zeitfenster berechnen.
+
+        Die Szene wird dabei nicht verändert.
+        """
+
+        t0, t1 = self.zeitbereich()
+        sx, sy = self.skalierung()
+        x0 = self.x_bereich[0]
+        w = self.viewport().width()
+        h = self.viewport().height()
+
+        self.setSceneRect(QRectF(x0 - (self.rand_links + 1) / sx, t0 - (self.rand_oben + 1) / sy,
+                                 (w + 2) / sx, (h + 2) / sy))
+        self.setTransform(QtGui.QTransform.fromScale(sx, sy))
+        self.centerOn(x0 + (w / 2 - self.rand_links) / sx, t0 + (h / 2 - self.rand_oben) / sy)
+        self.resetCachedContent()
+        self.viewport().update()
+        self.sichtbereich_geaendert.emit()
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        super().resizeEvent(event)
+        self.sichtbereich_anwenden()
+
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        schritte = event.angleDelta().y() / 120
+        if not schritte:
+            return
+        t0, t1 = self.zeitbereich()
+        if event.modifiers() & Qt.ControlModifier:
+            t_maus = self.mapToScene(event.position().toPoint()).y()
+            faktor = 0.8 ** schritte
+            zoom = min(20., max(0.05, self.zoom * faktor))
+            # die zeit unter dem mauszeiger bleibt stehen
+            anfang = t_maus - (t_maus - t0) * zoom / self.zoom
+            self.zoom = zoom
+            self.verschiebung = anfang - self.zeit + self.nachlaufzeit * self.zoom
+        else:
+            self.verschiebung -= schritte * (t1 - t0) / 10
+        self.sichtbereich_anwenden()
+        event.accept()
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent):
+        if event.button() != Qt.LeftButton:
+            super().mousePressEvent(event)
+            return
+        self._maus_start = event.position().toPoint()
+        self._maus_verschiebung = self.verschiebung
+        self._gezogen = False
+        event.accept()
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent):
+        if self._maus_start is None:
+            super().mouseMoveEvent(event)
+            return
+        dy = event.position().toPoint().y() - self._maus_start.y()
+        if self._gezogen or abs(dy) > QtWidgets.QApplication.startDragDistance():
+            self._gezogen = True
+            self.verschiebung = self._maus_verschiebung - dy / self.skalierung()[1]
+            self.sichtbereich_anwenden()
+        event.accept()
+
+    def mouseReleaseEvent(self, event: QtGui.QMouseEvent):
+        if self._maus_start is None or event.button() != Qt.LeftButton:
+            super().mouseReleaseEvent(event)
+            return
+        pos = event.position().toPoint()
+        self._maus_start = None
+        if not self._gezogen:
+            punkt = self.mapToScene(pos)
+            self.element_geklickt.emit(self.element_daten(pos), punkt.x(), punkt.y())
+        event.accept()
+
+    def mouseDoubleClickEvent(self, event: QtGui.QMouseEvent):
+        if self.element_daten(event.position().toPoint()) is None:
+            self.verschiebung = 0.
+            self.zoom = 1.
+            self.sichtbereich_anwenden()
+        event.accept()
+
+    def element_daten(self, pos: QtCore.QPoint) -> Any:
+        """
+        Daten des obersten Elements mit Daten in der Nähe einer Bildschirmposition.
+        """
+
+        r = self.fangradius
+        for element in self.items(QtCore.QRect(pos.x() - r, pos.y() - r, 2 * r + 1, 2 * r + 1)):
+            daten = element.data(ElementCache.DATEN)
+            if daten is not None and self._getroffen(element, QPointF(pos), r):
+                return daten
+        return None
+
+    def _getroffen(self, element: QtWidgets.QGraphicsItem, pos: QPointF, r: float) -> bool:
+        """
+        Genaue Trefferprüfung in Bildschirmkoordinaten.
+
+        Qt berechnet die Form von Elementen mit kosmetischem Stift in Szenenkoordinaten,
+        was bei einer stark gestreckten Transformation viel zu breite Formen ergibt.
+        Linien und Rechtecke werden deshalb hier geprüft.
+        """
+
+        if isinstance(element, QtWidgets.QGraphicsLineItem):
+            linie = element.line()
+            p1 = QPointF(self.mapFromScene(element.mapToScene(linie.p1())))
+            p2 = QPointF(self.mapFromScene(element.mapToScene(linie.p2())))
+            d = p2 - p1
+            laenge2 = QPointF.dotProduct(d, d)
+            if laenge2 > 0:
+                u = min(1., max(0., QPointF.dotProduct(pos - p1, d) / laenge2))
+            else:
+                u = 0.
+            q = pos - (p1 + d * u)
+            return math.hypot(q.x(), q.y()) <= r + element.pen().widthF() / 2
+        elif isinstance(element, QtWidgets.QGraphicsRectItem):
+            rect = self.mapFromScene(element.mapRectToScene(element.rect())).boundingRect()
+            return QRectF(rect).adjusted(-r, -r, r, r).contains(pos)
+        else:
+            return True
+
+    def drawBackground(self, painter: QtGui.QPainter, rect: QRectF):
+        super().drawBackground(painter, rect)
+
+        t0 = math.floor(rect.top() / 5) * 5
+        stift = qstift(self.gitterfarbe, 0.5)
+        painter.setPen(stift)
+        t = t0
+        while t <= rect.bottom():
+            painter.drawLine(QPointF(rect.left(), t), QPointF(rect.right(), t))
+            t += 5
+
+        for x in self.x_labels_pos if self.x_gitter else []:
+            painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+
+    def drawForeground(self, painter: QtGui.QPainter, rect: QRectF):
+        """
+        Achsen und Zeitlinie über die Grafik legen.
+
+        Gezeichnet wird in Bildschirmkoordinaten.
+        """
+
+        painter.save()
+        painter.resetTransform()
+        w = self.viewport().width()
+        h = self.viewport().height()
+        t0, t1 = self.zeitbereich()
+        sx, sy = self.skalierung()
+
+        def px(x: float) -> float:
+            return self.rand_links + (x - self.x_bereich[0]) * sx
+
+        def py(t: float) -> float:
+            return self.rand_oben + (t - t0) * sy
+
+        if self.zeitlinie and self.nachlaufzeit > 0 and t0 <= self.zeit <= t1:
+            painter.setPen(qstift(self.achsenfarbe, mpl.rcParams['axes.linewidth']))
+            painter.drawLine(QPointF(self.rand_links, py(self.zeit)), QPointF(w, py(self.zeit)))
+
+        painter.fillRect(QRectF(0, 0, self.rand_links, h), self.hintergrundfarbe)
+        painter.fillRect(QRectF(0, 0, w, self.rand_oben), self.hintergrundfarbe)
+        painter.setPen(qstift(self.achsenfarbe, mpl.rcParams['axes.linewidth']))
+        painter.drawLine(QPointF(self.rand_links, self.rand_oben), QPointF(self.rand_links, h))
+        painter.drawLine(QPointF(self.rand_links, self.rand_oben), QPointF(w, self.rand_oben))
+
+        schrift = painter.font()
+        schrift.setPointSizeF(max(6., schrift.pointSizeF() * 0.85))
+        painter.setFont(schrift)
+        metrik = QtGui.QFontMetricsF(schrift)
+        painter.setPen(self.textfarbe)
+
+        schritt = 5
+        while schritt * sy < metrik.height() * 1.5:
+            schritt *= 2
+        t = math.ceil(t0 / schritt) * schritt
+        while t <= t1:
+            y = py(t)
+            if y > self.rand_oben + metrik.height() / 2:
+                text = hour_minutes_formatter(t, None)
+                painter.drawText(QRectF(0, y - metrik.height() / 2, self.rand_links - 4, metrik.height()),
+                                 Qt.AlignRight | Qt.AlignVCenter, text)
+            t += schritt
+
+        painter.setClipRect(QRectF(self.rand_links - 10, 0, w, self.rand_oben))
+        for label, x in zip(self.x_labels, self.x_labels_pos):
+            painter.save()
+            painter.translate(px(x), self.rand_oben - 4)
+            painter.rotate(-45)
+            painter.drawText(QPointF(0, 0), label)
+            painter.restore()
+
+        painter.restore()
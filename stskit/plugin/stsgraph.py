@@ -56,6 +56,9 @@ class GraphClient(PluginClient):
 
             Bei Ein- und Ausfahrten wird die Ankunfts- und Abfahrtszeit auf 1 Minute vor bzw. nach dem Halt geschätzt.
 
+            Die Änderungen (ZielGraph.aenderungen) werden bei jeder Abfrage der Zugliste zurückgesetzt
+            und umfassen daher die Züge, deren Fahrplan sich seit dem letzten Polling geändert hat.
+
         bahnhofteile: Ordnet jedem Gleis einen Bahnhofteil zu.
             Der Bahnhofteil entspricht dem alphabetisch ersten Gleis in der Nachbarschaft.
             Der Dictionary wird durch _bahnhofteile_gruppieren gefüllt.
@@ -82,22 +85,27 @@ class GraphClient(PluginClient):
         self._anschluesse_gruppieren()
 
     async def request_zugliste(self):
+        self.zielgraph.reset_aenderungen()
         await super().request_zugliste()
         self._zuggraph_erstellen()
 
-    async def request_zugdetails_einzeln(self, zid: int):
-        result = await super().request_zugdetails_einzeln(zid)
+    def _zugdetails_uebernehmen(self, zid: int, response) -> bool:
+        result = super()._zugdetails_uebernehmen(zid, response)
         if result:
             self.zuggraph.zug_details_importieren(self.zugliste[zid])
         return result
 
-    async def request_zugfahrplan_einzeln(self, zid: int) -> bool:
-        result = await super().request_zugfahrplan_einzeln(zid)
+    def _zugfahrplan_uebernehmen(self, zid: int, response) -> bool:
+        result = super()._zugfahrplan_uebernehmen(zid, response)
         if result:
             self._zielgraph_update_zug(self.zugliste[zid])
 
         return result
 
+    def _folgezug_eintragen(self, zug):
+        super()._folgezug_eintragen(zug)
+        self.zuggraph.zug_details_importieren(zug)
+
     def _signalgraph_erstellen(self):
         """
         Signalgraph erstellen.
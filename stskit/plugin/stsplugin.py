@@ -35,6 +35,7 @@ Tip:
 """
 import sys
 
+import collections
 from collections.abc import Iterable
 import trio
 import datetime
@@ -128,10 +129,16 @@ class PluginClient:
             Der entsprechende Endpunkt ist in `fehlende_wege_knoten` eingetragen.
             Die nicht aufgelösten Kanten sind trotzdem in `wege_verbindungen` enthalten.
 
+        _folgezuege: Zwischenspeicher der von resolve_zugflags angefragten Folgezüge
+            mit dem Zeitpunkt der Anfrage, nach zid.
+
     Example:
         Siehe Beispielcode am Ende des Moduls (test-Funktion).
     """
 
+    # Folgezüge, die nicht in der Zugliste stehen, werden nach dieser Zeit erneut angefragt.
+    FOLGEZUG_MAX_ALTER = datetime.timedelta(minutes=1)
+
     def __init__(self, name: str, autor: str, version: str, text: str):
         self._stream: trio.abc.Stream | None = None
         self._antwort_channel_in: trio.MemorySendChannel[untangle.Element] | None = None
@@ -162,6 +169,14 @@ class PluginClient:
         self.zuggattungen: set[str] = set()
 
         self.registrierte_ereignisse: dict[str, set[int]] = {art: set() for art in Ereignis.arten}
+        self._folgezuege: dict[int, tuple[ZugDetails, datetime.datetime]] = {}
+        self._bahnsteig_zuordnung: dict[int, set[str]] = {}
+        self._bahnsteig_offen: set[int] = set()
+        self._wege_zuordnung: dict[int, set[Knoten]] = {}
+        self._wege_offen: set[int] = set()
+        self._wege_einfahrten: dict[str, Knoten] = {}
+        self._wege_ausfahrten: dict[str, Knoten] = {}
+        self._wege_haltepunkte: dict[str, Knoten] = {}
 
         self.client_datetime: datetime.datetime = datetime.datetime.now()
         self.server_datetime: datetime.datetime = datetime.datetime.now()
@@ -237,14 +252,39 @@ class PluginClient:
             tag: Name des xml-Tags
             kwargs: Attribute des xml-Tags
         """
-        args = [f"{k}='{v}'" for k, v in kwargs.items()]
-        args = " ".join(args)
-        req = f"<{tag} {args} />"
+        req = self._format_request(tag, **kwargs)
         logger.debug("senden: " + req)
         req += "\n"
         data = req.encode()
         await self.stream.send_all(data)
 
+    async def _send_requests(self, requests: Iterable[tuple[str, dict[str, str | int]]]) -> None:
+        """
+        Mehrere Anfragen in einem Block senden.
+
+        Die Anfragen werden zusammengefasst und mit einem einzigen `send_all` übertragen.
+        Das ist für Anfragen gedacht, auf die der Simulator nicht antwortet (z.B. Ereignisanmeldungen).
+
+        Args:
+            requests: Sequenz von (Tag, Attribute)-Paaren wie bei `_send_request`.
+        """
+        reqs = [self._format_request(tag, **kwargs) for tag, kwargs in requests]
+        if not reqs:
+            return
+        for req in reqs:
+            logger.debug("senden: " + req)
+        data = "".join(req + "\n" for req in reqs).encode()
+        await self.stream.send_all(data)
+
+    @staticmethod
+    def _format_request(tag: str, **kwargs: str | int) -> str:
+        """
+        Anfrage als xml-Tag formatieren (ohne Zeilenumbruch).
+        """
+        args = [f"{k}='{v}'" for k, v in kwargs.items()]
+        args = " ".join(args)
+        return f"<{tag} {args} />"
+
     async def receiver(self, *, task_status=trio.TASK_STATUS_IGNORED):
         """
         Empfangsschleife: Antworten empfangen und verteilen
@@ -273,14 +313,18 @@ class PluginClient:
         self._ereignis_channel_in, self._ereignis_channel_out = trio.open_memory_channel(0)
         task_status.started()
 
+        roh: list[str] = []
+
         async with self.antwort_channel_in:
             async with self.ereignis_channel_in:
                 async for bs in self.stream:
-                    for s in bs.decode().split('\n'):
+                    zeilen = bs.decode().split('\n')
+                    for i, s in enumerate(zeilen):
                         logger.debug("empfang: " + s)
                         if not s:
                             continue
 
+                        roh.append(s + "\n" if i < len(zeilen) - 1 else s)
                         s = re.sub(ro, resolve_char_ref, s)
                         try:
                             parser.feed(s)
@@ -297,10 +341,13 @@ class PluginClient:
                                 logger.exception(e)
                                 logger.error(f"offending string: {s}")
                                 print(e.getMessage(), file=sys.stderr)
+                                roh = []
                                 continue
 
                             handler.root = untangle.Element(None, None)
                             handler.root.is_root = True
+                            text = "".join(roh).strip()
+                            roh = []
 
                             try:
                                 tag = dir(element)[0]
@@ -308,12 +355,28 @@ class PluginClient:
                                 # leeres element
                                 continue
                             else:
-                                if tag == "ereignis":
-                                    ereignis = Ereignis().update(getattr(element, tag))
-                                    ereignis.zeit = self.calc_simzeit()
-                                    await self.ereignis_channel_in.send(ereignis)
-                                else:
-                                    await self.antwort_channel_in.send(element)
+                                await self._element_verteilen(tag, element, text)
+
+    async def _element_verteilen(self, tag: str, element: untangle.Element, text: str) -> None:
+        """
+        Vollständig empfangenes Element verteilen.
+
+        Unterfunktion von `receiver`.
+        Ereignisse werden als Ereignis-Objekte an die Ereignis-Queue, alle anderen Elemente an die Antworten-Queue übergeben.
+        Abgeleitete Klassen (z.B. der Proxy) können die Verteilung anpassen.
+
+        Args:
+            tag: Name des Wurzel-Tags.
+            element: Geparstes Element.
+            text: Empfangener xml-Text des Elements (ohne Auflösung von Entitäten).
+        """
+
+        if tag == "ereignis":
+            ereignis = Ereignis().update(getattr(element, tag))
+            ereignis.zeit = self.calc_simzeit()
+            await self.ereignis_channel_in.send(ereignis)
+        else:
+            await self.antwort_channel_in.send(element)
 
     async def register(self) -> None:
         """
@@ -351,6 +414,8 @@ class PluginClient:
 
         self.bahnsteigliste = {}
         self.gleisabgleich = {}
+        self._bahnsteig_zuordnung = {}
+        self._bahnsteig_offen = set(self.zugliste.keys())
 
         await self._send_request("bahnsteigliste")
         response = await self.antwort_channel_out.receive()
@@ -512,6 +577,13 @@ class PluginClient:
                 knoten1.nachbarn[knoten2.key] = knoten2
                 knoten2.nachbarn[knoten1.key] = knoten1
 
+        self._wege_einfahrten = {knoten.name: knoten for knoten in self.wege_nach_typ[6]}
+        self._wege_ausfahrten = {knoten.name: knoten for knoten in self.wege_nach_typ[7]}
+        self._wege_haltepunkte = {knoten.name: knoten for knoten in self.wege_nach_typ[12]}
+        self._wege_haltepunkte.update({knoten.name: knoten for knoten in self.wege_nach_typ[5]})
+        self._wege_zuordnung = {}
+        self._wege_offen = set(self.zugliste.keys())
+
         logger.info(f"Wege: Fehlende Knoten {self.fehlende_wege_knoten}")
         logger.info(f"Wege: Fehlende Kanten {self.fehlende_wege_kanten}")
 
@@ -557,6 +629,17 @@ class PluginClient:
 
         await self._send_request("zugdetails", zid=zid)
         response = await self.antwort_channel_out.receive()
+        return self._zugdetails_uebernehmen(zid, response)
+
+    def _zugdetails_uebernehmen(self, zid: int, response: untangle.Element) -> bool:
+        """
+        Antwort auf eine zugdetails-Anfrage übernehmen.
+
+        Unterfunktion von request_zugdetails_einzeln und request_zuege.
+
+        Returns:
+            True (Erfolg) oder False (Fehler, Zug entfernt)
+        """
 
         try:
             zug = self.zugliste[zid]
@@ -564,12 +647,14 @@ class PluginClient:
             zug = ZugDetails()
             zug.zid = zid
             self.zugliste[zid] = zug
+            self._zug_markieren(zid)
 
         try:
             zug.update(response.zugdetails)
             logger.debug(f"request_zugdetails: {zug}")
         except AttributeError:
             del self.zugliste[zid]
+            self._zug_markieren(zid)
             log_status_warning("request_zugdetails", response)
             return False
         else:
@@ -579,23 +664,70 @@ class PluginClient:
 
     async def request_ereignis(self, art: str, zids: Iterable[int]) -> None:
         """
-        Ereignismeldung anfordern
+        Ereignismeldung einer Art anfordern
+
+        Wie `request_ereignisse`, aber nur für eine Ereignisart.
+
+        Args:
+            art: art des ereignisses, cf. model.Ereignis.arten
+            zids: menge oder sequenz von zug-id-nummern
+        """
+        await self.request_ereignisse(zids, arten=[art])
+
+    async def request_ereignisse(self,
+                                 zids: Iterable[int] | None = None,
+                                 arten: Iterable[str] | None = None) -> None:
+        """
+        Ereignismeldungen anfordern
 
         Nach Nummernwechsel muss man Ereignismeldungen neu anfordern.
         Ausser für "Einfahrt" schicken wir daher Anforderungen nur, wenn der Zug sichtbar ist.
+        Wird ein Zug später sichtbar, werden die übrigen Arten beim nächsten Aufruf nachgeholt.
 
+        Die neuen (Art, Zug)-Paare werden einmal pro Aufruf bestimmt
+        und in einem einzigen Block gesendet (s. `_send_requests`).
         Anforderungen werden in `registrierte_ereignisse` notiert,
         damit sie nicht wiederholt gesendet werden.
+        Einträge von Zügen, die nicht mehr in der Zugliste stehen, werden dabei entfernt.
 
         Args:
-            art: art des ereignisses, cf. model.Ereignis.arten
-            zids: menge oder sequenz von zug-id-nummern
+            zids: menge oder sequenz von zug-id-nummern.
+                None (default) = alle Züge der Zugliste.
+            arten: Ereignisarten, cf. model.Ereignis.arten.
+                None (default) = alle Arten.
         """
-        zids = set(zids).difference(self.registrierte_ereignisse[art])
-        for zid in zids:
-            if zid in self.zugliste and (art == "einfahrt" or self.zugliste[zid].sichtbar):
-                await self._send_request("ereignis", art=art, zid=zid)
-                self.registrierte_ereignisse[art].add(zid)
+        if zids is None:
+            zids = self.zugliste.keys()
+        if arten is None:
+            arten = Ereignis.arten
+
+        zids = {zid for zid in zids if zid in self.zugliste}
+        for registriert in self.registrierte_ereignisse.values():
+            registriert.intersection_update(self.zugliste.keys())
+
+        paare = self._neue_ereignisse(zids, arten)
+        await self._send_requests(("ereignis", {'art': art, 'zid': zid}) for art, zid in paare)
+        for art, zid in paare:
+            self.registrierte_ereignisse[art].add(zid)
+
+    def _neue_ereignisse(self, zids: Iterable[int], arten: Iterable[str]) -> list[tuple[str, int]]:
+        """
+        Noch nicht registrierte (Art, Zug)-Paare bestimmen.
+
+        Args:
+            zids: Zug-IDs, die in der Zugliste stehen.
+            arten: Ereignisarten.
+
+        Returns:
+            Liste von (Art, zid)-Paaren, nach Art und zid sortiert.
+        """
+        zids = set(zids)
+        sichtbare = {zid for zid in zids if self.zugliste[zid].sichtbar}
+        paare = []
+        for art in sorted(arten):
+            kandidaten = zids if art == "einfahrt" else sichtbare
+            paare.extend((art, zid) for zid in sorted(kandidaten - self.registrierte_ereignisse[art]))
+        return paare
 
     async def request_zugfahrplan(self, zid: int | Iterable[int] | None = None):
         """
@@ -665,11 +797,23 @@ class PluginClient:
             True (Erfolg) oder False (Fehler)
         """
 
-        zug = self.zugliste[zid]
-        akt_ziel_index = None
-
         await self._send_request("zugfahrplan", zid=zid)
         response = await self.antwort_channel_out.receive()
+        return self._zugfahrplan_uebernehmen(zid, response)
+
+    def _zugfahrplan_uebernehmen(self, zid: int, response: untangle.Element) -> bool:
+        """
+        Antwort auf eine zugfahrplan-Anfrage übernehmen.
+
+        Unterfunktion von request_zugfahrplan_einzeln und request_zuege.
+        Das ZugDetails-Objekt muss in der Zugliste bereits existieren.
+
+        Returns:
+            True (Erfolg) oder False (Fehler)
+        """
+
+        zug = self.zugliste[zid]
+        akt_ziel_index = None
 
         try:
             neuer_fahrplan = []
@@ -697,15 +841,19 @@ class PluginClient:
         if not zug.fahrplan:
             zug.fahrplan = neuer_fahrplan
             zug.ziel_index = akt_ziel_index
+            self._zug_markieren(zid)
             return True
 
         for zeile_alt, zeile_neu in zip(reversed(zug.fahrplan), reversed(neuer_fahrplan)):
             if zeile_neu.plan == zeile_alt.plan:
-                zeile_alt.gleis = zeile_neu.gleis
+                if zeile_alt.gleis != zeile_neu.gleis:
+                    zeile_alt.gleis = zeile_neu.gleis
+                    self._zug_markieren(zid)
             else:
                 logger.warning(f"ersetze fahrplan von {zug}, weil {zeile_alt.plan} ungleich {zeile_neu.plan}")
                 zug.fahrplan = neuer_fahrplan
                 zug.ziel_index = akt_ziel_index
+                self._zug_markieren(zid)
                 break
         else:
             if akt_ziel_index is not None:
@@ -747,9 +895,14 @@ class PluginClient:
                 try:
                     zid = int(zug['zid'])
                     if zid in self.zugliste:
-                        self.zugliste[zid].update(zug)
+                        zd = self.zugliste[zid]
+                        von_nach = (zd.von, zd.nach)
+                        zd.update(zug)
+                        if (zd.von, zd.nach) != von_nach:
+                            self._zug_markieren(zid)
                     else:
                         self.zugliste[zid] = ZugDetails().update(zug)
+                        self._zug_markieren(zid)
                     aktuelle_zugliste.add(zid)
                 except (KeyError, ValueError):
                     logger.error(f"request_zugliste: fehlerhafter zug-eintrag: {zug}")
@@ -775,6 +928,7 @@ class PluginClient:
                 del self.zugliste[zid]
             except KeyError:
                 pass
+            self._zug_markieren(zid)
 
     async def request_zug(self, zid: int) -> ZugDetails | None:
         """
@@ -802,15 +956,61 @@ class PluginClient:
         except KeyError:
             return None
 
+    async def request_zuege(self, zids: Iterable[int]) -> None:
+        """
+        Details und Fahrpläne mehrerer Züge gebündelt anfragen.
+
+        Die Anfragen werden ohne Warten auf die Antworten nacheinander gesendet,
+        zuerst die Zugdetails, dann die Fahrpläne der gefundenen Züge.
+        Der Simulator beantwortet die Anfragen in der Reihenfolge ihres Eingangs.
+
+        Die Züge werden wie bei `request_zug` in die Zugliste eingetragen bzw. aktualisiert.
+
+        Args:
+            zids: Zug-IDs. Null wird ignoriert.
+        """
+
+        zids = [zid for zid in map(int, zids) if zid]
+
+        for zid in zids:
+            await self._send_request("zugdetails", zid=zid)
+        gefunden = []
+        for zid in zids:
+            response = await self.antwort_channel_out.receive()
+            if self._zugdetails_uebernehmen(zid, response):
+                gefunden.append(zid)
+
+        for zid in gefunden:
+            await self._send_request("zugfahrplan", zid=zid)
+        for zid in gefunden:
+            response = await self.antwort_channel_out.receive()
+            self._zugfahrplan_uebernehmen(zid, response)
+
+    def _folgezug_eintragen(self, zug: ZugDetails) -> None:
+        """
+        Zwischengespeicherten Folgezug wieder in die Zugliste eintragen.
+
+        Unterfunktion von resolve_zugflags.
+        Abgeleitete Klassen können die Methode erweitern, um abhängige Daten nachzuführen.
+        """
+
+        self.zugliste[zug.zid] = zug
+        self._zug_markieren(zug.zid)
+
     async def resolve_zugflags(self, zid: int | Iterable[int] | None = None) -> None:
         """
         Folgezüge aus den Zugflags auflösen.
 
         Da `request_zugliste` die Folgezüge (Ersatz-, Flügel- und Kuppelzüge) nicht automatisch erhält,
         lesen wir diese aus den Zugflags aus und fragen ihre Details und Fahrpläne explizit an.
-        Die Funktion arbeitet iterativ, bis alle Folgezüge aufgelöst sind.
+        Die Funktion arbeitet stufenweise, bis alle Folgezüge aufgelöst sind.
         Die Züge werden in die Zugliste eingetragen und im Stammzug referenziert.
 
+        Folgezüge, die in der Zugliste stehen, werden nicht erneut angefragt.
+        Die übrigen werden in `_folgezuege` zwischengespeichert
+        und erst nach Ablauf von `FOLGEZUG_MAX_ALTER` wieder angefragt.
+        Die Anfragen einer Stufe werden mit `request_zuege` gebündelt.
+
         Info:
             zids sind nicht geordnet. Ersatzzüge können eine tiefere zid als der Stammzug haben.
 
@@ -818,53 +1018,82 @@ class PluginClient:
             zid: Einzelne Zug-ID, Iterable von Zug-IDs, oder None (alle in der Liste).
         """
         if zid is not None:
-            zids = [int(zid)]
+            zids = collections.deque([int(zid)])
         else:
-            zids = list(self.zugliste.keys())
+            zids = collections.deque(self.zugliste.keys())
 
-        erledigte_zids = []
+        jetzt = datetime.datetime.now()
+        self._folgezuege = {zid2: (zug2, zeit) for zid2, (zug2, zeit) in self._folgezuege.items()
+                            if jetzt - zeit < self.FOLGEZUG_MAX_ALTER}
+
+        erledigte_zids = set()
         while zids:
-            zid = zids.pop(0)
-            if zid in erledigte_zids:
-                continue  # unendliche rekursion verhindern
-            else:
-                erledigte_zids.append(zid)
+            verknuepfungen = []
+            while zids:
+                zid = zids.popleft()
+                if zid in erledigte_zids:
+                    continue  # unendliche rekursion verhindern
+                erledigte_zids.add(zid)
 
-            try:
-                zug = self.zugliste[zid]
-            except KeyError:
-                continue
-
-            for planzeile in zug.fahrplan:
-                if zid2 := planzeile.ersatz_zid():
-                    logger.info(f"zid {zid2} als ersatz für {zid} anfragen")
-                    zug2 = await self.request_zug(zid2)
-                    if zug2 is not None:
-                        planzeile.ersatzzug = zug2
-                        zug2.stamm_zids.add(zug.zid)
-                        zug2.verspaetung = zug.verspaetung
-                        zids.append(zid2)
-                    else:
-                        logger.warning(f"keine antwort für zug {zid2}")
-                if zid2 := planzeile.fluegel_zid():
-                    logger.info(f"zid {zid2} als flügel für {zid} anfragen")
-                    zug2 = await self.request_zug(zid2)
-                    if zug2 is not None:
-                        planzeile.fluegelzug = zug2
-                        zug2.stamm_zids.add(zug.zid)
-                        zug2.verspaetung = zug.verspaetung
-                        zids.append(zid2)
-                    else:
-                        logger.warning(f"keine antwort für zug {zid2}")
-                if zid2 := planzeile.kuppel_zid():
-                    logger.info(f"zid {zid2} als kuppel für {zid} anfragen")
-                    zug2 = await self.request_zug(zid2)
-                    if zug2 is not None:
-                        planzeile.kuppelzug = zug2
-                        zug2.stamm_zids.add(zug.zid)
-                        zids.append(zid2)
-                    else:
-                        logger.warning(f"keine antwort für zug {zid2}")
+                try:
+                    zug = self.zugliste[zid]
+                except KeyError:
+                    continue
+
+                for planzeile in zug.fahrplan:
+                    if zid2 := planzeile.ersatz_zid():
+                        verknuepfungen.append(('ersatz', zug, planzeile, zid2))
+                    if zid2 := planzeile.fluegel_zid():
+                        verknuepfungen.append(('flügel', zug, planzeile, zid2))
+                    if zid2 := planzeile.kuppel_zid():
+                        verknuepfungen.append(('kuppel', zug, planzeile, zid2))
+
+            anfragen = {}
+            for art, zug, planzeile, zid2 in verknuepfungen:
+                if zid2 in self.zugliste or zid2 in anfragen:
+                    continue
+                try:
+                    zug2, _ = self._folgezuege[zid2]
+                except KeyError:
+                    logger.info(f"zid {zid2} als {art} für {zug.zid} anfragen")
+                    anfragen[zid2] = art
+                else:
+                    self._folgezug_eintragen(zug2)
+
+            if anfragen:
+                await self.request_zuege(anfragen.keys())
+                for zid2 in anfragen:
+                    if zid2 in self.zugliste:
+                        self._folgezuege[zid2] = (self.zugliste[zid2], jetzt)
+
+            for art, zug, planzeile, zid2 in verknuepfungen:
+                try:
+                    zug2 = self.zugliste[zid2]
+                except KeyError:
+                    logger.warning(f"keine antwort für zug {zid2}")
+                    continue
+
+                if art == 'ersatz':
+                    planzeile.ersatzzug = zug2
+                    zug2.verspaetung = zug.verspaetung
+                elif art == 'flügel':
+                    planzeile.fluegelzug = zug2
+                    zug2.verspaetung = zug.verspaetung
+                else:
+                    planzeile.kuppelzug = zug2
+                zug2.stamm_zids.add(zug.zid)
+                zids.append(zid2)
+
+    def _zug_markieren(self, zid: int) -> None:
+        """
+        Zug zur Nachführung der Bahnsteig- und Wegezuordnung vormerken.
+
+        Muss aufgerufen werden, wenn ein Zug in die Zugliste eingetragen oder daraus entfernt wird,
+        oder wenn sich von, nach oder die Gleise seines Fahrplans ändern.
+        """
+
+        self._bahnsteig_offen.add(zid)
+        self._wege_offen.add(zid)
 
     def update_bahnsteig_zuege(self):
         """
@@ -873,20 +1102,33 @@ class PluginClient:
         Im `zuege`-attribut der Bahnsteige werden die an den Bahnsteig disponierten Züge aufgelistet.
         `zuege` ist ein Dictionary und bildet zid auf ZugDetails ab.
         Die ZugDetails sind weak References.
+
+        Die Zuordnung wird inkrementell nachgeführt:
+        Bearbeitet werden nur Züge, die seit dem letzten Aufruf geändert wurden (s. `_zug_markieren`).
+        Nach `request_bahnsteigliste` werden alle Züge neu eingetragen.
         """
 
-        for bahnsteig in self.bahnsteigliste.values():
-            bahnsteig.zuege.clear()
+        for zid in self._bahnsteig_offen:
+            alt = self._bahnsteig_zuordnung.pop(zid, set())
+            try:
+                zug = self.zugliste[zid]
+            except KeyError:
+                neu = set()
+            else:
+                neu = {fahrplanzeile.gleis for fahrplanzeile in zug.fahrplan
+                       if fahrplanzeile.gleis in self.bahnsteigliste}
 
-        for zid in self.zugliste.keys():
-            zug = self.zugliste[zid]
-            for fahrplanzeile in zug.fahrplan:
+            for name in alt - neu:
                 try:
-                    bahnsteig = self.bahnsteigliste[fahrplanzeile.gleis]
+                    del self.bahnsteigliste[name].zuege[zid]
                 except KeyError:
                     pass
-                else:
-                    bahnsteig.zuege[zid] = zug
+            for name in neu:
+                self.bahnsteigliste[name].zuege[zid] = zug
+            if neu:
+                self._bahnsteig_zuordnung[zid] = neu
+
+        self._bahnsteig_offen = set()
 
     def update_wege_zuege(self):
         """
@@ -894,32 +1136,45 @@ class PluginClient:
 
         Im Züge-Attribut der Wege und Knoten (Einfahrten, Ausfahrten, Haltepunkte)
         werden die fahrplanmässig daran vorbei kommenden Züge aufgelistet.
-        """
-        for knoten in self.wege.values():
-            knoten.zuege.clear()
-
-        einfahrten = {knoten.name: knoten for knoten in self.wege_nach_typ[6]}
-        ausfahrten = {knoten.name: knoten for knoten in self.wege_nach_typ[7]}
-        bahnsteige = {knoten.name: knoten for knoten in self.wege_nach_typ[5]}
-        haltepunkte = {knoten.name: knoten for knoten in self.wege_nach_typ[12]}
-        haltepunkte.update(bahnsteige)
 
-        for zid in self.zugliste.keys():
-            zug = self.zugliste[zid]
+        Die Zuordnung wird inkrementell nachgeführt:
+        Bearbeitet werden nur Züge, die seit dem letzten Aufruf geändert wurden (s. `_zug_markieren`).
+        Die Namenstabellen der Einfahrten, Ausfahrten und Haltepunkte werden von `request_wege` erstellt.
+        """
 
+        for zid in self._wege_offen:
+            alt = self._wege_zuordnung.pop(zid, set())
+            neu = set()
             try:
-                einfahrten[zug.von].zuege[zid] = zug
-            except KeyError:
-                pass
-            try:
-                ausfahrten[zug.nach].zuege[zid] = zug
+                zug = self.zugliste[zid]
             except KeyError:
                 pass
-            for fahrplanzeile in zug.fahrplan:
+            else:
                 try:
-                    haltepunkte[fahrplanzeile.gleis].zuege[zid] = zug
+                    neu.add(self._wege_einfahrten[zug.von])
                 except KeyError:
                     pass
+                try:
+                    neu.add(self._wege_ausfahrten[zug.nach])
+                except KeyError:
+                    pass
+                for fahrplanzeile in zug.fahrplan:
+                    try:
+                        neu.add(self._wege_haltepunkte[fahrplanzeile.gleis])
+                    except KeyError:
+                        pass
+
+            for knoten in alt - neu:
+                try:
+                    del knoten.zuege[zid]
+                except KeyError:
+                    pass
+            for knoten in neu:
+                knoten.zuege[zid] = zug
+            if neu:
+                self._wege_zuordnung[zid] = neu
+
+        self._wege_offen = set()
 
 
 def zugsortierschluessel(gleis: str, attr: str, default: datetime.time) -> Callable:
@@ -0,0 +1,392 @@
+#!/env/python
+
+"""
+Multiplexing-Proxy für die Plugin-Schnittstelle
+
+Der Proxy hält eine einzige Verbindung zum Simulator und bietet lokal dieselbe Plugin-Schnittstelle an.
+Mehrere Plugins (STSdispo, Ticker, eigene Programme) verbinden sich mit dem Proxy statt mit dem Simulator.
+
+- Antworten werden mit Zeitstempel zwischengespeichert.
+  Solange eine Antwort frisch ist (s. `FRISCHE`), wird sie ohne Anfrage an den Simulator ausgeliefert.
+- Gleiche Anfragen, die gleichzeitig von mehreren Klienten eintreffen, werden nur einmal weitergeleitet.
+- Ereignisanmeldungen werden pro Klient notiert und nur einmal an den Simulator gesendet.
+  Ereignismeldungen des Simulators werden an alle angemeldeten Klienten verteilt.
+- Die Simulatorzeit wird aus dem kalibrierten Zeitversatz berechnet (s. `PluginClient.calc_simzeit`).
+
+Die Antworten werden als xml-Text unverändert weitergegeben.
+
+Start:
+
+```
+python -m stskit.plugin.stsproxy --listen-port 3693
+```
+
+Die Plugins werden dann mit `--port 3693` gestartet.
+"""
+
+import argparse
+import collections
+import functools
+from dataclasses import dataclass
+import datetime
+import logging
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+import xml.etree.ElementTree as ET
+
+import trio
+import untangle
+
+from stskit.plugin.stsplugin import PluginClient, DEFAULT_HOST, DEFAULT_PORT
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+DEFAULT_PROXY_PORT = 3693
+
+STATUS_BEREIT = "<status code='300'>Proxy bereit</status>"
+STATUS_REGISTRIERT = "<status code='220'>OK</status>"
+STATUS_FEHLER = "<status code='400'>Anfrage nicht verstanden</status>"
+
+# Gültigkeitsdauer der zwischengespeicherten Antworten in Sekunden nach Tag.
+# None = unbegrenzt (statische Anlagendaten), 0 = nur gleichzeitige Anfragen zusammenfassen.
+FRISCHE: Dict[str, Optional[float]] = {
+    'anlageninfo': None,
+    'bahnsteigliste': None,
+    'wege': None,
+    'zugliste': 5.,
+    'zugdetails': 5.,
+    'zugfahrplan': 5.,
+}
+
+AnfrageKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+@dataclass
+class CacheEintrag:
+    """
+    Zwischengespeicherte Antwort
+
+    Attributes:
+        text: xml-Text der Antwort.
+        zeit: Empfangszeit (trio.current_time).
+    """
+
+    text: str
+    zeit: float
+
+
+class ProxyUpstream(PluginClient):
+    """
+    PluginClient für die Verbindung des Proxys zum Simulator.
+
+    Antworten werden als xml-Text in `rohantworten` abgelegt (in der gleichen Reihenfolge wie in der Antworten-Queue).
+    Ereignismeldungen werden nicht als Ereignis-Objekte weitergegeben, sondern an den Proxy zur Verteilung übergeben.
+    """
+
+    def __init__(self, proxy: 'PluginProxy', *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.proxy = proxy
+        self.rohantworten: Deque[str] = collections.deque()
+
+    async def _element_verteilen(self, tag: str, element: untangle.Element, text: str) -> None:
+        if tag == "ereignis":
+            try:
+                art = str(element.ereignis['art'])
+                zid = int(element.ereignis['zid'])
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Ereignis nicht lesbar: {text}")
+            else:
+                self.proxy.ereignis_verteilen(art, zid, text)
+        else:
+            self.rohantworten.append(text)
+            await self.antwort_channel_in.send(element)
+
+    async def anfrage(self, tag: str, attribute: Dict[str, str]) -> str:
+        """
+        Anfrage an den Simulator senden und xml-Text der Antwort zurückgeben.
+
+        Der Aufrufer muss sicherstellen, dass nicht mehrere Anfragen gleichzeitig laufen.
+        Nicht abgeholte Texte früherer Antworten (z.B. von `register` oder `request_simzeit`) werden verworfen.
+        """
+
+        self.rohantworten.clear()
+        await self._send_request(tag, **attribute)
+        await self.antwort_channel_out.receive()
+        return self.rohantworten.popleft()
+
+
+class ProxyKlient:
+    """
+    Verbindung eines Plugins zum Proxy
+
+    Attributes:
+        name: Name des Plugins aus der Registrierung.
+        ereignisse: Angemeldete Ereignisse als (Art, zid)-Paare.
+        ausgang: Warteschlange der zu sendenden xml-Texte.
+    """
+
+    def __init__(self, nummer: int, puffer: int = 1000):
+        self.nummer = nummer
+        self.name: str = ""
+        self.ereignisse: Set[Tuple[str, int]] = set()
+        self.ausgang, self._eingang = trio.open_memory_channel(puffer)
+
+    def __str__(self):
+        return f"Klient {self.nummer} ({self.name})"
+
+
+class PluginProxy:
+    """
+    Multiplexing-Proxy zwischen mehreren Plugins und einem Simulator
+
+    Attributes:
+        upstream: Verbindung zum Simulator.
+        frische: Gültigkeitsdauer der Antworten nach Tag, s. `FRISCHE`.
+        simzeit_intervall: Abstand in Sekunden, in dem die Simulatorzeit neu kalibriert wird.
+        klienten: Verbundene Plugins.
+        upstream_ereignisse: Beim Simulator angemeldete (Art, zid)-Paare.
+        statistik: Zähler der Anfragen nach Herkunft ('cache', 'dedupliziert', 'simulator', 'lokal').
+    """
+
+    def __init__(self):
+        self.upstream = ProxyUpstream(self, name='STSdispo-Proxy', autor='Matthias Muntwiler', version='2.0',
+                                      text='STSdispo: Multiplexing-Proxy')
+        self.frische: Dict[str, Optional[float]] = dict(FRISCHE)
+        self.simzeit_intervall: float = 60.
+        self.klienten: Set[ProxyKlient] = set()
+        self.upstream_ereignisse: Set[Tuple[str, int]] = set()
+        self.statistik: Dict[str, int] = collections.Counter()
+
+        self._cache: Dict[AnfrageKey, CacheEintrag] = {}
+        self._laufend: Dict[AnfrageKey, trio.Event] = {}
+        self._lock = trio.Lock()
+        self._simzeit_kalibriert: float = -float('inf')
+        self._nummer = 0
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    listen_host: str = "127.0.0.1", listen_port: int = DEFAULT_PROXY_PORT,
+                    *, task_status=trio.TASK_STATUS_IGNORED):
+        """
+        Mit dem Simulator verbinden und auf Plugins warten.
+
+        Läuft, bis die Verbindung zum Simulator unterbrochen wird.
+        `task_status.started` liefert die Liste der Listener (für Port 0).
+        """
+
+        await self.upstream.connect(host=host, port=port)
+        async with self.upstream.stream:
+            async with trio.open_nursery() as nursery:
+                await nursery.start(self.upstream.receiver)
+                await self.upstream.register()
+                await self._simzeit_kalibrieren()
+                listeners = await nursery.start(functools.partial(trio.serve_tcp, self.verbindung, listen_port,
+                                                                  host=listen_host))
+                logger.info(f"Proxy bereit auf {listen_host}:{listen_port}")
+                task_status.started(listeners)
+                await self._upstream_beendet(nursery)
+
+    async def _upstream_beendet(self, nursery: trio.Nursery):
+        async for _ in self.upstream.ereignis_channel_out:
+            pass
+        nursery.cancel_scope.cancel()
+
+    async def _simzeit_kalibrieren(self):
+        async with self._lock:
+            await self.upstream.request_simzeit()
+        self._simzeit_kalibriert = trio.current_time()
+        self.statistik['simulator'] += 1
+
+    @staticmethod
+    def anfrage_key(tag: str, attribute: Dict[str, str]) -> AnfrageKey:
+        return tag, tuple(sorted(attribute.items()))
+
+    async def anfrage(self, tag: str, attribute: Dict[str, str]) -> str:
+        """
+        Anfrage aus dem Zwischenspeicher oder vom Simulator beantworten.
+
+        Wenn die gleiche Anfrage bereits unterwegs ist, wird auf deren Antwort gewartet.
+
+        Returns:
+            xml-Text der Antwort.
+        """
+
+        key = self.anfrage_key(tag, attribute)
+        frische = self.frische.get(tag, 0.)
+
+        eintrag = self._cache.get(key)
+        if eintrag is not None and (frische is None or trio.current_time() - eintrag.zeit <= frische):
+            self.statistik['cache'] += 1
+            return eintrag.text
+
+        laufend = self._laufend.get(key)
+        if laufend is not None:
+            await laufend.wait()
+            try:
+                eintrag = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                self.statistik['dedupliziert'] += 1
+                return eintrag.text
+
+        event = self._laufend[key] = trio.Event()
+        try:
+            async with self._lock:
+                text = await self.upstream.anfrage(tag, attribute)
+            self._cache[key] = CacheEintrag(text, trio.current_time())
+            self.statistik['simulator'] += 1
+        finally:
+            # nach einem fehler können mehrere wartende die anfrage wiederholen.
+            # der eintrag gehört dann dem zuletzt gestarteten.
+            if self._laufend.get(key) is event:
+                del self._laufend[key]
+            event.set()
+        return text
+
+    async def simzeit(self, attribute: Dict[str, str]) -> str:
+        """
+        Simzeit-Anfrage lokal beantworten.
+
+        Der Zeitversatz wird nach `simzeit_intervall` Sekunden beim Simulator neu kalibriert.
+        """
+
+        if trio.current_time() - self._simzeit_kalibriert > self.simzeit_intervall:
+            await self._simzeit_kalibrieren()
+        else:
+            self.statistik['lokal'] += 1
+
+        zeit = self.upstream.calc_simzeit()
+        mitternacht = datetime.datetime.combine(zeit.date(), datetime.time())
+        ms = int((zeit - mitternacht).total_seconds() * 1000)
+        sender = attribute.get('sender', '0')
+        return f"<simzeit sender='{sender}' zeit='{ms}' />"
+
+    async def ereignis_anmelden(self, klient: ProxyKlient, art: str, zid: int) -> None:
+        klient.ereignisse.add((art, zid))
+        if (art, zid) not in self.upstream_ereignisse:
+            self.upstream_ereignisse.add((art, zid))
+            async with self._lock:
+                await self.upstream._send_request("ereignis", art=art, zid=zid)
+
+    def ereignis_verteilen(self, art: str, zid: int, text: str) -> None:
+        """
+        Ereignismeldung an alle angemeldeten Klienten senden.
+
+        Die Meldung wird nicht blockierend in die Ausgangswarteschlange gestellt.
+        Ist die Warteschlange eines Klienten voll, geht die Meldung für diesen Klienten verloren.
+        """
+
+        for klient in list(self.klienten):
+            if (art, zid) in klient.ereignisse:
+                try:
+                    klient.ausgang.send_nowait(text)
+                except trio.WouldBlock:
+                    logger.warning(f"{klient}: Ausgangspuffer voll, Ereignis verworfen: {text}")
+                except (trio.BrokenResourceError, trio.ClosedResourceError):
+                    pass
+
+    async def verbindung(self, stream: trio.abc.Stream):
+        """
+        Verbindung eines Plugins bedienen.
+
+        Die Anfragen eines Plugins werden in der Reihenfolge des Eingangs beantwortet.
+        """
+
+        self._nummer += 1
+        klient = ProxyKlient(self._nummer)
+        self.klienten.add(klient)
+        logger.info(f"{klient} verbunden")
+
+        try:
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(self._senden, klient, stream)
+                async with klient.ausgang:
+                    await klient.ausgang.send(STATUS_BEREIT)
+                    await self._empfangen(klient, stream)
+        except (trio.BrokenResourceError, trio.ClosedResourceError):
+            pass
+        finally:
+            self.klienten.discard(klient)
+            logger.info(f"{klient} getrennt")
+
+    async def _senden(self, klient: ProxyKlient, stream: trio.abc.Stream):
+        async with klient._eingang:
+            async for text in klient._eingang:
+                await stream.send_all(text.encode() + b"\n")
+
+    async def _empfangen(self, klient: ProxyKlient, stream: trio.abc.Stream):
+        puffer = b""
+        async for daten in stream:
+            puffer += daten
+            *zeilen, puffer = puffer.split(b"\n")
+            for zeile in zeilen:
+                zeile = zeile.strip()
+                if zeile:
+                    await self._bearbeiten(klient, zeile.decode())
+
+    async def _bearbeiten(self, klient: ProxyKlient, zeile: str):
+        try:
+            element = ET.fromstring(zeile)
+        except ET.ParseError:
+            logger.warning(f"{klient}: Anfrage nicht lesbar: {zeile}")
+            await klient.ausgang.send(STATUS_FEHLER)
+            return
+
+        tag = element.tag
+        attribute = dict(element.attrib)
+        if tag == "register":
+            klient.name = attribute.get('name', "")
+            await klient.ausgang.send(STATUS_REGISTRIERT)
+        elif tag == "ereignis":
+            try:
+                await self.ereignis_anmelden(klient, attribute['art'], int(attribute['zid']))
+            except (KeyError, ValueError):
+                logger.warning(f"{klient}: Ereignisanmeldung nicht lesbar: {zeile}")
+        elif tag == "simzeit":
+            await klient.ausgang.send(await self.simzeit(attribute))
+        else:
+            await klient.ausgang.send(await self.anfrage(tag, attribute))
+
+
+def parse_args(arguments: Optional[Any] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="""
+            Multiplexing-Proxy für die Plugin-Schnittstelle von Stellwerksim (https://www.stellwerksim.de).
+            Mehrere Plugins teilen sich eine Verbindung zum Simulator.
+        """
+    )
+
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"Hostname oder IP-Adresse des Stellwerksim-Simulators. Default: {DEFAULT_HOST}")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Netzwerkport des Stellwerksim-Simulators. Default: {DEFAULT_PORT}")
+    parser.add_argument("--listen-host", default="127.0.0.1",
+                        help="Adresse, auf der der Proxy Plugins annimmt. Default: 127.0.0.1 (nur lokal)")
+    parser.add_argument("--listen-port", type=int, default=DEFAULT_PROXY_PORT,
+                        help=f"Port, auf dem der Proxy Plugins annimmt. Default: {DEFAULT_PROXY_PORT}")
+    parser.add_argument("--frische", type=float, default=FRISCHE['zugliste'],
+                        help=f"Gültigkeit der Zugdaten im Zwischenspeicher in Sekunden. "
+                             f"Default: {FRISCHE['zugliste']}")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default="WARNING",
+                        help="Minimale Stufe für Protokollmeldungen. Default: WARNING")
+
+    return parser.parse_args(arguments)
+
+
+def main():
+    arguments = parse_args()
+    logging.basicConfig(level=getattr(logging, arguments.log_level),
+                        format='%(asctime)s (%(name)s) %(levelname)s: %(message)s')
+
+    proxy = PluginProxy()
+    for tag in ('zugliste', 'zugdetails', 'zugfahrplan'):
+        proxy.frische[tag] = arguments.frische
+
+    try:
+        trio.run(proxy.start, arguments.host, arguments.port, arguments.listen_host, arguments.listen_port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
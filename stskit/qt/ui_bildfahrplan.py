@@ -42,6 +42,8 @@ class Ui_BildfahrplanWindow(object):
         self.actionFix.setObjectName(u"actionFix")
         self.actionLoeschen = QAction(BildfahrplanWindow)
         self.actionLoeschen.setObjectName(u"actionLoeschen")
+        self.actionRueckgaengig = QAction(BildfahrplanWindow)
+        self.actionRueckgaengig.setObjectName(u"actionRueckgaengig")
         self.actionAnkunftAbwarten = QAction(BildfahrplanWindow)
         self.actionAnkunftAbwarten.setObjectName(u"actionAnkunftAbwarten")
         self.actionAbfahrtAbwarten = QAction(BildfahrplanWindow)
@@ -257,6 +259,7 @@ class Ui_BildfahrplanWindow(object):
         self.toolBar.addAction(self.actionAbfahrtAbwarten)
         self.toolBar.addSeparator()
         self.toolBar.addAction(self.actionLoeschen)
+        self.toolBar.addAction(self.actionRueckgaengig)
 
         self.retranslateUi(BildfahrplanWindow)
 
@@ -302,6 +305,13 @@ class Ui_BildfahrplanWindow(object):
 #endif // QT_CONFIG(tooltip)
 #if QT_CONFIG(shortcut)
         self.actionLoeschen.setShortcut(QCoreApplication.translate("BildfahrplanWindow", u"Del", None))
+#endif // QT_CONFIG(shortcut)
+        self.actionRueckgaengig.setText(QCoreApplication.translate("BildfahrplanWindow", u"Zur\u00fccksetzen", None))
+#if QT_CONFIG(tooltip)
+        self.actionRueckgaengig.setToolTip(QCoreApplication.translate("BildfahrplanWindow", u"Dispositionen auf einen fr\u00fcheren Stand zur\u00fccksetzen (Ctrl+Z)", None))
+#endif // QT_CONFIG(tooltip)
+#if QT_CONFIG(shortcut)
+        self.actionRueckgaengig.setShortcut(QCoreApplication.translate("BildfahrplanWindow", u"Ctrl+Z", None))
 #endif // QT_CONFIG(shortcut)
         self.actionAnkunftAbwarten.setText(QCoreApplication.translate("BildfahrplanWindow", u"Ankunft abwarten", None))
 #if QT_CONFIG(tooltip)
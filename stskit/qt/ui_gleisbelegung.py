@@ -37,6 +37,8 @@ class Ui_GleisbelegungWindow(object):
         self.actionFix.setObjectName(u"actionFix")
         self.actionLoeschen = QAction(GleisbelegungWindow)
         self.actionLoeschen.setObjectName(u"actionLoeschen")
+        self.actionRueckgaengig = QAction(GleisbelegungWindow)
+        self.actionRueckgaengig.setObjectName(u"actionRueckgaengig")
         self.actionAnkunftAbwarten = QAction(GleisbelegungWindow)
         self.actionAnkunftAbwarten.setObjectName(u"actionAnkunftAbwarten")
         self.actionAbfahrtAbwarten = QAction(GleisbelegungWindow)
@@ -202,6 +204,7 @@ class Ui_GleisbelegungWindow(object):
         self.toolBar.addAction(self.actionAbfahrtAbwarten)
         self.toolBar.addSeparator()
         self.toolBar.addAction(self.actionLoeschen)
+        self.toolBar.addAction(self.actionRueckgaengig)
 
         self.retranslateUi(GleisbelegungWindow)
 
@@ -247,6 +250,13 @@ class Ui_GleisbelegungWindow(object):
 #endif // QT_CONFIG(tooltip)
 #if QT_CONFIG(shortcut)
         self.actionLoeschen.setShortcut(QCoreApplication.translate("GleisbelegungWindow", u"Del", None))
+#endif // QT_CONFIG(shortcut)
+        self.actionRueckgaengig.setText(QCoreApplication.translate("GleisbelegungWindow", u"Zur\u00fccksetzen", None))
+#if QT_CONFIG(tooltip)
+        self.actionRueckgaengig.setToolTip(QCoreApplication.translate("GleisbelegungWindow", u"Dispositionen auf einen fr\u00fcheren Stand zur\u00fccksetzen (Ctrl+Z)", None))
+#endif // QT_CONFIG(tooltip)
+#if QT_CONFIG(shortcut)
+        self.actionRueckgaengig.setShortcut(QCoreApplication.translate("GleisbelegungWindow", u"Ctrl+Z", None))
 #endif // QT_CONFIG(shortcut)
         self.actionAnkunftAbwarten.setText(QCoreApplication.translate("GleisbelegungWindow", u"Ankunft abwarten", None))
 #if QT_CONFIG(tooltip)
@@ -1,7 +1,14 @@
 import json
 import logging
+from pathlib import Path
+import pickle
+import queue
+import threading
+import time
+from typing import Any, Iterable, Sequence
 
 import networkx as nx
+import numpy as np
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -74,3 +81,372 @@ def write_gml(graph, filename, stringizer=str):
         nx.write_gml(graph, filename, stringizer=stringizer)
     except UnicodeEncodeError as e:
         logger.error(f"Fehler beim Schreiben des GML-Files: {e}")
+
+
+class GraphDumper:
+    """
+    Write debug snapshots of networkx graphs in a background thread.
+
+    `dump` takes a cheap snapshot of the graph (shallow copies of the node, edge and graph attribute dicts)
+    on the calling thread and hands it to a worker thread,
+    which rebuilds a graph of the same class and pickles it.
+    The files can be loaded again with `read_graph_dump`.
+
+    Dumps are rate-limited per file name (`min_interval` seconds).
+    Before a new dump is written, existing files are rotated like `logging.handlers.RotatingFileHandler`:
+    `name.pickle` becomes `name.1.pickle` and so on, up to `backup_count` old files.
+
+    If the queue is full, the snapshot is dropped rather than blocking the caller.
+    """
+
+    suffix = ".pickle"
+
+    def __init__(self, min_interval: float = 60., backup_count: int = 3, max_queue: int = 8):
+        self.min_interval = min_interval
+        self.backup_count = backup_count
+        self._last_dump: dict[Path, float] = {}
+        self._queue: queue.Queue[tuple[Path, type, Any, list, list]] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def dump(self, graph: nx.Graph, filename: Path | str, force: bool = False) -> bool:
+        """
+        Queue a snapshot of a graph for writing.
+
+        Args:
+            graph: networkx graph. The graph is not modified or referenced after the call.
+            filename: Path of the dump file. `.pickle` is appended unless already present.
+            force: Ignore the rate limit.
+
+        Returns:
+            True if the snapshot was queued,
+            False if it was skipped because of the rate limit or a full queue.
+        """
+
+        path = Path(filename)
+        if path.suffix != self.suffix:
+            path = path.with_name(path.name + self.suffix)
+        now = time.monotonic()
+        if not force and now - self._last_dump.get(path, -self.min_interval) < self.min_interval:
+            return False
+
+        nodes = [(n, dict(d)) for n, d in graph.nodes(data=True)]
+        edges = [(u, v, dict(d)) for u, v, d in graph.edges(data=True)]
+        try:
+            self._queue.put_nowait((path, graph.__class__, dict(graph.graph), nodes, edges))
+        except queue.Full:
+            logger.warning(f"graph dump queue full, skipping {path.name}")
+            return False
+
+        self._last_dump[path] = now
+        self._start()
+        return True
+
+    def flush(self) -> None:
+        """
+        Wait until all queued dumps are written.
+        """
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="GraphDumper", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            path, cls, graph_attr, nodes, edges = self._queue.get()
+            try:
+                self._write(path, cls, graph_attr, nodes, edges)
+            except Exception as e:
+                logger.error(f"error writing graph dump {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: Path, cls: type, graph_attr: dict, nodes: list, edges: list) -> None:
+        graph = cls()
+        graph.graph.update(graph_attr)
+        graph.add_nodes_from(nodes)
+        graph.add_edges_from(edges)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._rotate(path)
+        tmp.replace(path)
+
+    def _rotate(self, path: Path) -> None:
+        if self.backup_count <= 0:
+            return
+
+        def backup(i: int) -> Path:
+            return path.with_suffix(f".{i}{self.suffix}")
+
+        for i in range(self.backup_count - 1, 0, -1):
+            if backup(i).exists():
+                backup(i).replace(backup(i + 1))
+        if path.exists():
+            path.replace(backup(1))
+
+
+graph_dumper = GraphDumper()
+
+
+def dump_graph(graph: nx.Graph, filename: Path | str, force: bool = False) -> bool:
+    """
+    Queue a graph dump with the module-level `GraphDumper`.
+
+    See `GraphDumper.dump`.
+    """
+
+    return graph_dumper.dump(graph, filename, force=force)
+
+
+def read_graph_dump(filename: Path | str) -> nx.Graph:
+    """
+    Load a graph written by `GraphDumper`.
+
+    The graph has the same class as the original.
+    """
+
+    with open(filename, "rb") as f:
+        return pickle.load(f)
+
+
+class ColumnarWriter:
+    """
+    Append record batches to compressed NumPy `.npz` chunk files in a background thread.
+
+    Each call of `append` hands a batch of row tuples to a worker thread.
+    The worker collects the rows and writes them column by column into a new chunk file
+    whenever `chunk_rows` rows are buffered, and the remaining rows on `close`.
+    Chunk files are named `<stem>-00001.npz`, `<stem>-00002.npz` etc. next to `path`,
+    numbering continues after existing chunks.
+    `read_columnar` concatenates the chunks again.
+
+    Columns are declared by name and numpy dtype.
+    Float columns accept None (stored as NaN).
+    Columns of dtype `category` hold strings and are stored dictionary-encoded
+    as int32 codes (`<name>`) plus an array of distinct values (`<name>.categories`).
+
+    If `key` names the columns that identify a record,
+    only rows that differ from the last written row with the same key are kept.
+    Time series of slowly changing states (e.g. forecasts polled every 30 seconds) thus shrink to their changes.
+    The `stamp` column is filled with the stamp value of the batch and excluded from the comparison.
+    If in addition a `deleted` column is declared, a record whose key is missing from a batch
+    is closed by a tombstone row: key values, stamp, True in the `deleted` column and None in all other columns.
+    The writer fills the `deleted` column (False for regular rows).
+
+    Memory is bounded by `chunk_rows` buffered rows and `max_queue` pending batches.
+    If the queue is full, the batch is dropped rather than blocking the caller.
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, path: Path | str, columns: dict[str, str],
+                 stamp: str | None = None,
+                 key: Sequence[str] | None = None,
+                 deleted: str | None = None,
+                 chunk_rows: int = 100_000,
+                 max_queue: int = 8):
+        """
+        Args:
+            path: Directory and stem of the chunk files.
+            columns: Column names and numpy dtypes (or `category`) in file order,
+                including the stamp and deleted columns.
+            stamp: Name of the column that holds the stamp argument of `append`, or None.
+            key: Names of the columns that identify a record. None writes all rows.
+            deleted: Name of a boolean column that marks tombstone rows, or None. Requires `key`.
+            chunk_rows: Number of rows per chunk file.
+            max_queue: Number of batches that can be pending.
+
+        Raises:
+            ValueError: `deleted` is given without `key`,
+                or a column other than key, stamp and deleted is neither float nor category.
+        """
+
+        self.path = Path(path)
+        self.columns = dict(columns)
+        self.stamp = stamp
+        self.deleted = deleted
+        self.chunk_rows = chunk_rows
+        self.dropped = 0
+        self._fields = [name for name in self.columns if name not in {stamp, deleted}]
+        self._key = [self._fields.index(name) for name in key] if key else None
+        self._names = [name for name in (stamp, deleted) if name is not None] + self._fields
+        if deleted is not None:
+            if not key:
+                raise ValueError("deleted column requires key columns")
+            for name in self._fields:
+                dtype = self.columns[name]
+                if name not in key and dtype != "category" and np.dtype(dtype).kind != "f":
+                    raise ValueError(f"column {name} cannot hold the None values of tombstone rows")
+        self._last: dict[tuple, tuple] = {}
+        self._rows: list[tuple] = []
+        self._chunk = 0
+        self._queue: queue.Queue[tuple[Any, list[tuple]] | None] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def append(self, rows: Iterable[tuple], stamp: Any = None) -> bool:
+        """
+        Queue a batch of rows for writing.
+
+        Args:
+            rows: Tuples with the values of the declared columns (without the stamp and deleted columns)
+                in declaration order.
+                The rows are copied into a list on the calling thread.
+            stamp: Value of the stamp column for all rows of the batch.
+
+        Returns:
+            True if the batch was queued, False if it was dropped because the queue is full.
+        """
+
+        try:
+            self._queue.put_nowait((stamp, list(rows)))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"columnar export queue full, skipping batch of {self.path.name}")
+            return False
+
+        self._start()
+        return True
+
+    def flush(self) -> None:
+        """
+        Wait until all queued batches are processed.
+
+        Buffered rows are not written until the chunk is full or the writer is closed.
+        """
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """
+        Write all pending and buffered rows.
+
+        The writer can be used further and starts a new chunk with the next rows.
+        """
+
+        self._queue.put(None)
+        self._start()
+        self._queue.join()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ColumnarWriter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    self._write_chunk()
+                else:
+                    self._add(*item)
+            except Exception as e:
+                logger.error(f"error writing columnar export {self.path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _add(self, stamp: Any, rows: list[tuple]) -> None:
+        prefix = (stamp,) if self.stamp is not None else ()
+        if self.deleted is not None:
+            prefix = (*prefix, False)
+
+        if self._key is not None:
+            key = self._key
+            last = self._last
+            changed = []
+            keys = set()
+            for row in rows:
+                k = tuple(row[i] for i in key)
+                keys.add(k)
+                if last.get(k) != row:
+                    last[k] = row
+                    changed.append(row)
+            rows = changed
+
+            if self.deleted is not None:
+                for k in [k for k in last if k not in keys]:
+                    del last[k]
+                    tombstone = [None] * len(self._fields)
+                    for i, v in zip(key, k):
+                        tombstone[i] = v
+                    self._rows.append((*prefix[:-1], True, *tombstone))
+
+        self._rows.extend((*prefix, *row) for row in rows)
+
+        if len(self._rows) >= self.chunk_rows:
+            self._write_chunk()
+
+    def _chunk_path(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.name}-{index:05d}{self.suffix}")
+
+    def _write_chunk(self) -> None:
+        if not self._rows:
+            return
+
+        rows = self._rows
+        self._rows = []
+        values_by_name = dict(zip(self._names, zip(*rows)))
+        data = {}
+        for name, dtype in self.columns.items():
+            values = values_by_name[name]
+            if dtype == "category":
+                values = np.array(["" if v is None else v for v in values], dtype=str)
+                categories, codes = np.unique(values, return_inverse=True)
+                data[name] = codes.astype(np.int32)
+                data[name + ".categories"] = categories
+            else:
+                data[name] = np.array(values, dtype=dtype)
+
+        if not self._chunk:
+            self._chunk = max((int(p.stem[-5:]) for p in _chunk_files(self.path)), default=0)
+        self._chunk += 1
+        path = self._chunk_path(self._chunk)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **data)
+        tmp.replace(path)
+
+
+def _chunk_files(path: Path) -> list[Path]:
+    return sorted(path.parent.glob(f"{path.name}-{'[0-9]' * 5}{ColumnarWriter.suffix}"))
+
+
+def read_columnar(path: Path | str) -> dict[str, np.ndarray]:
+    """
+    Load the chunks written by a `ColumnarWriter`.
+
+    Category columns are decoded to string arrays.
+    The result can be passed directly to `pandas.DataFrame`.
+
+    Args:
+        path: Directory and stem of the chunk files, as given to the writer.
+
+    Returns:
+        Dictionary of column name to concatenated array, in file order.
+        Empty if no chunk exists.
+    """
+
+    parts: dict[str, list[np.ndarray]] = {}
+    for chunk in _chunk_files(Path(path)):
+        with np.load(chunk, allow_pickle=False) as f:
+            for name in f.files:
+                if name.endswith(".categories"):
+                    continue
+                values = f[name]
+                if name + ".categories" in f.files:
+                    values = f[name + ".categories"][values]
+                parts.setdefault(name, []).append(values)
+
+    return {name: np.concatenate(values) for name, values in parts.items()}
@@ -0,0 +1,177 @@
+"""
+Built-in import time measurement
+
+Similar to `python -X importtime`, but can be switched on at run time
+and reports in a compact, sorted form.
+
+~~~~~~{.py}
+timer = ImportTimer()
+timer.install()
+import some_module
+print(timer.report())
+~~~~~~
+"""
+
+from dataclasses import dataclass
+import importlib.abc
+import logging
+import sys
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@dataclass
+class ImportRecord:
+    """
+    Import time of a module.
+
+    Attributes:
+        name: Full module name.
+        parent: Name of the module that triggered the import, or None at top level.
+        cumulative: Time in seconds including nested imports.
+        self_time: Time in seconds excluding nested imports.
+    """
+
+    name: str
+    parent: str | None = None
+    cumulative: float = 0.
+    self_time: float = 0.
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """
+    Loader proxy which reports the time spent in `create_module` and `exec_module`.
+
+    All other attributes are delegated to the original loader.
+    """
+
+    def __init__(self, loader: Any, name: str, timer: 'ImportTimer'):
+        self._loader = loader
+        self._name = name
+        self._timer = timer
+
+    def create_module(self, spec):
+        try:
+            create = self._loader.create_module
+        except AttributeError:
+            return None
+        self._timer._enter(self._name)
+        try:
+            return create(spec)
+        finally:
+            self._timer._leave()
+
+    def exec_module(self, module):
+        self._timer._enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._leave()
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder which measures the import time of every module loaded while it is installed.
+
+    The finder asks the other finders in `sys.meta_path` for the module spec
+    and wraps the loader in a `_TimedLoader`.
+    Nested imports are tracked on a stack, so that cumulative and self times can be reported.
+
+    Modules imported before `install` are not measured.
+    """
+
+    def __init__(self):
+        self.records: dict[str, ImportRecord] = {}
+        self._stack: list[list] = []
+        self._searching: set[str] = set()
+        self.t0: float = time.perf_counter()
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        try:
+            sys.meta_path.remove(self)
+        except ValueError:
+            pass
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in self._searching:
+            return None
+
+        self._searching.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._searching.discard(fullname)
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    def _enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.])
+
+    def _leave(self) -> None:
+        name, start, children = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        try:
+            record = self.records[name]
+        except KeyError:
+            parent = self._stack[-1][0] if self._stack else None
+            record = self.records[name] = ImportRecord(name, parent)
+        record.cumulative += elapsed
+        record.self_time += elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def total(self, name: str) -> float:
+        """
+        Cumulative import time of a module in seconds, 0 if it was not measured.
+        """
+
+        try:
+            return self.records[name].cumulative
+        except KeyError:
+            return 0.
+
+    def report(self, count: int = 20) -> str:
+        """
+        Import time report.
+
+        Lists the top-level imports by cumulative time
+        and the modules with the highest self time.
+
+        Args:
+            count: Maximum number of lines per section.
+
+        Returns:
+            Multi-line text.
+        """
+
+        top = sorted((r for r in self.records.values() if r.parent is None),
+                     key=lambda r: r.cumulative, reverse=True)
+        heavy = sorted(self.records.values(), key=lambda r: r.self_time, reverse=True)
+
+        lines = [f"import time: {len(self.records)} modules, "
+                 f"{sum(r.cumulative for r in top):.3f} s total, "
+                 f"{time.perf_counter() - self.t0:.3f} s since start"]
+        lines.append("top-level imports (cumulative s):")
+        lines.extend(f"  {r.cumulative:8.3f}  {r.name}" for r in top[:count])
+        lines.append("modules (self s):")
+        lines.extend(f"  {r.self_time:8.3f}  {r.name}" for r in heavy[:count])
+        return "\n".join(lines)
@@ -0,0 +1,249 @@
+"""
+node layouts for graph diagrams.
+
+computing a force-directed layout of a large signal graph takes long.
+this module provides the pieces to avoid doing it more often than necessary:
+
+- `graph_signature` identifies the topology of a graph.
+- `LayoutCache` stores node positions on disk, keyed by plant, build and filter set.
+- `seed_positions` carries over coordinates from a previous layout to a modified graph.
+- `spring_layout` refines positions in stages and reports intermediate results.
+
+the functions do not depend on Qt and can be called from a worker thread.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import random
+from typing import Any, Callable, Dict, Hashable, Iterable, Mapping, Optional, Tuple
+
+import networkx as nx
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+Position = Tuple[float, float]
+
+
+def graph_signature(graph: nx.Graph) -> str:
+    """
+    hash of the nodes and edges of a graph.
+
+    nodes are identified by their string representation.
+    the direction of edges is ignored.
+    """
+
+    h = hashlib.sha1()
+    for node in sorted(str(n) for n in graph.nodes):
+        h.update(node.encode())
+        h.update(b"\0")
+    h.update(b"\1")
+    for edge in sorted("\0".join(sorted((str(u), str(v)))) for u, v in graph.edges()):
+        h.update(edge.encode())
+        h.update(b"\1")
+    return h.hexdigest()
+
+
+def normalize_positions(positions: Mapping[Hashable, Position], margin: float = 0.05) -> Dict[Hashable, Position]:
+    """
+    scale positions into the unit box preserving the aspect ratio.
+
+    netgraph expects explicit node positions within the box given by origin (0, 0) and scale (1, 1).
+    """
+
+    if not positions:
+        return {}
+
+    xs = [p[0] for p in positions.values()]
+    ys = [p[1] for p in positions.values()]
+    x0 = min(xs)
+    y0 = min(ys)
+    extent = max(max(xs) - x0, max(ys) - y0)
+    if extent <= 0:
+        return {n: (0.5, 0.5) for n in positions}
+
+    f = (1. - 2. * margin) / extent
+    dx = (1. - f * (max(xs) - x0)) / 2.
+    dy = (1. - f * (max(ys) - y0)) / 2.
+    return {n: (dx + f * (p[0] - x0), dy + f * (p[1] - y0)) for n, p in positions.items()}
+
+
+def seed_positions(graph: nx.Graph,
+                   previous: Optional[Mapping[Hashable, Position]],
+                   rng: Optional[random.Random] = None) -> Dict[Hashable, Position]:
+    """
+    initial positions derived from a previous layout.
+
+    nodes that are still present keep their coordinates.
+    new nodes are placed next to the centre of their placed neighbours,
+    or at a random position if none of their neighbours is placed.
+    nodes are processed in breadth-first order so that chains of new nodes grow from placed ones.
+    components without any placed node start at a random position.
+
+    :param graph: graph to lay out.
+    :param previous: node positions of an earlier layout (may contain nodes which are not in graph).
+    :param rng: random number generator, for reproducible results.
+    :return: position for every node of graph.
+    """
+
+    if rng is None:
+        rng = random.Random(0)
+    if previous is None:
+        previous = {}
+
+    positions = {n: tuple(previous[n]) for n in graph.nodes if n in previous}
+    if positions:
+        xs = [p[0] for p in positions.values()]
+        ys = [p[1] for p in positions.values()]
+        x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    else:
+        x0, x1, y0, y1 = 0., 1., 0., 1.
+    jitter = max(x1 - x0, y1 - y0, 1e-3) * 0.02
+
+    ungraph = graph.to_undirected(as_view=True) if graph.is_directed() else graph
+    _grow(ungraph, list(positions), positions, jitter, rng)
+    for n in graph.nodes:
+        if n not in positions:
+            positions[n] = (rng.uniform(x0, x1), rng.uniform(y0, y1))
+            _grow(ungraph, [n], positions, jitter, rng)
+
+    return positions
+
+
+def _grow(graph: nx.Graph, sources: Iterable[Hashable], positions: Dict[Hashable, Position],
+          jitter: float, rng: random.Random) -> None:
+    """
+    place the unplaced nodes reachable from sources in breadth-first order.
+    """
+
+    queue = collections.deque(sources)
+    while queue:
+        u = queue.popleft()
+        for v in graph.neighbors(u):
+            if v not in positions:
+                _place_near(graph, v, positions, jitter, rng)
+                queue.append(v)
+
+
+def _place_near(graph: nx.Graph, node: Hashable, positions: Dict[Hashable, Position],
+                jitter: float, rng: random.Random) -> bool:
+    placed = [positions[n] for n in graph.neighbors(node) if n in positions]
+    if not placed:
+        return False
+    x = sum(p[0] for p in placed) / len(placed) + rng.uniform(-jitter, jitter)
+    y = sum(p[1] for p in placed) / len(placed) + rng.uniform(-jitter, jitter)
+    positions[node] = (x, y)
+    return True
+
+
+def spring_layout(graph: nx.Graph,
+                  positions: Optional[Mapping[Hashable, Position]] = None,
+                  stages: Iterable[int] = (10, 50),
+                  progress: Optional[Callable[[Dict[Hashable, Position]], Any]] = None,
+                  cancelled: Optional[Callable[[], bool]] = None) -> Dict[Hashable, Position]:
+    """
+    force-directed layout computed in stages.
+
+    each stage runs the given number of Fruchterman-Reingold iterations
+    starting from the result of the previous stage.
+    intermediate results are passed to the progress callback.
+
+    :param graph: graph to lay out.
+    :param positions: initial positions (e.g. from `seed_positions`). random if None.
+    :param stages: number of iterations of each stage.
+    :param progress: called with the normalized positions after each stage.
+    :param cancelled: polled before each stage. the computation stops when it returns True.
+    :return: normalized node positions (see `normalize_positions`).
+    """
+
+    pos = dict(positions) if positions else None
+    result = normalize_positions(pos) if pos else {}
+    for iterations in stages:
+        if cancelled is not None and cancelled():
+            break
+        pos = nx.spring_layout(graph, pos=pos, iterations=iterations, weight=None, seed=0)
+        result = normalize_positions({n: (float(p[0]), float(p[1])) for n, p in pos.items()})
+        if progress is not None:
+            progress(result)
+    return result
+
+
+class LayoutCache:
+    """
+    node positions on disk.
+
+    each layout is stored in a separate JSON file.
+    the file name is derived from the key, e.g. (aid, build, diagram, filter names).
+    the file also records the graph signature, a cached layout is only returned for the same topology.
+    nodes are stored by their string representation and mapped back to the nodes of the graph on load.
+    """
+
+    def __init__(self, directory: Optional[os.PathLike]):
+        self.directory = Path(directory) if directory is not None else None
+
+    def _path(self, key: Tuple) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.directory / f"{name}.json"
+
+    def load(self, key: Tuple, graph: nx.Graph, signature: Optional[str] = None) -> Optional[Dict[Hashable, Position]]:
+        """
+        cached positions for the given key and graph.
+
+        :return: positions of all nodes of graph, or None if nothing suitable is cached.
+        """
+
+        path = self._path(key)
+        if path is None or not path.is_file():
+            return None
+
+        try:
+            with open(path, encoding="utf-8") as f:
+                d = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"layout cache {path} unreadable: {e}")
+            return None
+
+        if signature is None:
+            signature = graph_signature(graph)
+        if d.get("signature") != signature:
+            return None
+
+        stored = d.get("positions", {})
+        try:
+            positions = {n: tuple(stored[str(n)]) for n in graph.nodes}
+        except KeyError:
+            return None
+        return positions
+
+    def save(self, key: Tuple, graph: nx.Graph, positions: Mapping[Hashable, Position],
+             signature: Optional[str] = None) -> None:
+        """
+        store positions for the given key and graph.
+
+        errors are logged and otherwise ignored.
+        """
+
+        path = self._path(key)
+        if path is None:
+            return
+
+        if signature is None:
+            signature = graph_signature(graph)
+        d = {"key": [str(k) for k in key],
+             "signature": signature,
+             "positions": {str(n): [float(p[0]), float(p[1])] for n, p in positions.items() if n in graph}}
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(d, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"layout cache {path} not writable: {e}")
@@ -16,7 +16,7 @@ from PySide6.QtCore import Slot
 
 from stskit.plots.anschlussmatrix import Anschlussmatrix, \
     ANSCHLUSS_OK, ANSCHLUSS_ABWARTEN, ANSCHLUSS_WARNUNG, ANSCHLUSS_AUFGEBEN
-from stskit.model.zugschema import ZugschemaAuswahlModell
+from stskit.widgets.zugschema import ZugschemaAuswahlModell
 
 from stskit.qt.icons import set_action_icons
 from stskit.qt.ui_anschlussmatrix import Ui_AnschlussmatrixWindow
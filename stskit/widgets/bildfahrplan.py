@@ -18,8 +18,10 @@ from stskit.model.bahnhofgraph import BahnhofElement
 from stskit.model.ereignisgraph import EreignisGraphNode, EreignisGraphEdge, EreignisLabelType
 from stskit.plugin.stsobj import time_to_minutes
 from stskit.plugin.stsplugin import PluginClient
-from stskit.plots.bildfahrplan import BildfahrplanPlot
+from stskit.plots.bildfahrplan import BildfahrplanPlot, BildfahrplanSzene
+from stskit.plots.szene import ZeitachsenAnsicht
 from stskit.qt.icons import set_action_icons
+from stskit.widgets.schnappschuss import SchnappschussMenu
 from stskit.zentrale import DatenZentrale
 
 from stskit.qt.ui_bildfahrplan import Ui_BildfahrplanWindow
@@ -103,7 +105,12 @@ class GleiswahlDialog(QtWidgets.QDialog):
 
 class BildFahrplanWindow(QtWidgets.QMainWindow):
 
-    def __init__(self, zentrale: DatenZentrale):
+    def __init__(self, zentrale: DatenZentrale, grafik: str = "mpl"):
+        """
+        :param zentrale: DatenZentrale
+        :param grafik: "mpl" für die Darstellung mit Matplotlib oder "qt" für die Darstellung mit QGraphicsScene
+        """
+
         super().__init__()
 
         self.zentrale = zentrale
@@ -118,7 +125,10 @@ class BildFahrplanWindow(QtWidgets.QMainWindow):
 
         self.setWindowTitle("Streckenfahrplan")
 
-        self.display_canvas = FigureCanvas(Figure(figsize=(5, 3)))
+        if grafik == "qt":
+            self.display_canvas = ZeitachsenAnsicht()
+        else:
+            self.display_canvas = FigureCanvas(Figure(figsize=(5, 3)))
         self.ui.displayLayout = QtWidgets.QHBoxLayout(self.ui.grafikWidget)
         self.ui.displayLayout.setObjectName("displayLayout")
         self.ui.displayLayout.addWidget(self.display_canvas)
@@ -133,6 +143,7 @@ class BildFahrplanWindow(QtWidgets.QMainWindow):
         self.ui.actionZugfolge.setEnabled(False)
         self.ui.actionBetriebshaltEinfuegen.triggered.connect(self.action_betriebshalt_einfuegen)
         self.ui.actionVorzeitigeAbfahrt.triggered.connect(self.action_vorzeitige_abfahrt)
+        self.schnappschuss_menu = SchnappschussMenu(self.zentrale, self.ui.actionRueckgaengig, self.ui.toolBar)
 
         self.ui.stackedWidget.currentChanged.connect(self.page_changed)
 
@@ -154,8 +165,12 @@ class BildFahrplanWindow(QtWidgets.QMainWindow):
         self.ui.vorlaufzeit_spin.valueChanged.connect(self.vorlaufzeit_changed)
         self.ui.nachlaufzeit_spin.valueChanged.connect(self.nachlaufzeit_changed)
 
-        self.plot = BildfahrplanPlot(zentrale, self.display_canvas)
+        if grafik == "qt":
+            self.plot = BildfahrplanSzene(zentrale, self.display_canvas)
+        else:
+            self.plot = BildfahrplanPlot(zentrale, self.display_canvas)
         self.plot.auswahl_geaendert.register(self.plot_selection_changed)
+        self.zentrale.nachlaufzeit_melden(self, self.plot.nachlaufzeit)
 
         self.plot.default_strecke_waehlen()
         self.anlage_update()
@@ -174,6 +189,7 @@ class BildFahrplanWindow(QtWidgets.QMainWindow):
         self.zentrale.anlage_update.unregister(self)
         self.zentrale.plan_update.unregister(self)
         self.zentrale.betrieb_update.unregister(self)
+        self.zentrale.nachlaufzeit_abmelden(self)
         super().closeEvent(event)
 
     def anlage_update(self, *args, **kwargs):
@@ -319,6 +335,7 @@ class BildFahrplanWindow(QtWidgets.QMainWindow):
         else:
             bh_ein = False
         self.ui.actionBetriebshaltEinfuegen.setEnabled(bh_ein)
+        self.schnappschuss_menu.update_action()
 
         self.updating = False
 
@@ -387,6 +404,7 @@ class BildFahrplanWindow(QtWidgets.QMainWindow):
     def nachlaufzeit_changed(self):
         try:
             self.plot.nachlaufzeit = self.ui.nachlaufzeit_spin.value()
+            self.zentrale.nachlaufzeit_melden(self, self.plot.nachlaufzeit)
         except ValueError:
             pass
 
@@ -13,7 +13,8 @@ from PySide6 import QtWidgets
 from PySide6.QtCore import Slot
 from PySide6.QtWidgets import QMessageBox
 
-from stskit.model.zugschema import Zugschema, ZugschemaBearbeitungModell
+from stskit.model.zugschema import Zugschema
+from stskit.widgets.zugschema import ZugschemaBearbeitungModell
 from stskit.dispo.anlage import Anlage
 from stskit.zentrale import DatenZentrale
 from stskit.widgets.bahnhofeditor import BahnhofEditor
@@ -340,6 +340,7 @@ class FahrplanModell(QtCore.QAbstractTableModel):
     jede zeile entspricht einem fahrplanziel.
 
     der anzuzeigende zug wird durch set_zug gesetzt.
+    archivierte züge (s. `ZugArchiv`) werden aus dem archiv der anlage angezeigt.
     """
     def __init__(self, anlage: Anlage, betrieb: Betrieb):
         super().__init__()
@@ -351,6 +352,8 @@ class FahrplanModell(QtCore.QAbstractTableModel):
         self.zugpfad: List[ZielLabelType] = []
         self.zweige: Dict[ZielLabelType, ZielLabelType] = {}
         self._columns: List[str] = ['Gleis', 'An', 'VAn', 'Ab', 'VAb', 'Flags', 'Vermerke']
+        # zielgraph des angezeigten archivierten zuges
+        self._archiv_zielgraph: Optional[ZielGraph] = None
 
     @property
     def zuggraph(self) -> ZugGraph:
@@ -358,6 +361,8 @@ class FahrplanModell(QtCore.QAbstractTableModel):
 
     @property
     def zielgraph(self) -> ZielGraph:
+        if self._archiv_zielgraph is not None:
+            return self._archiv_zielgraph
         return self.betrieb.zielgraph
 
     def set_zug(self, zid: int):
@@ -372,15 +377,30 @@ class FahrplanModell(QtCore.QAbstractTableModel):
 
     def update(self):
         self.beginResetModel()
-        if self.zid:
+        self._archiv_zielgraph = None
+        if self.zid in self.zuggraph:
             self.zug = self.zuggraph.nodes[self.zid]
             self.zugpfad = list(self.zielgraph.zugpfad(self.zid))
+        elif self.zid in self.anlage.archiv:
+            self.zug = self.anlage.archiv.zug(self.zid)
+            self._archiv_zielgraph = self.anlage.archiv.zielgraph(self.zid)
+            self.zugpfad = [ziel.fid for ziel in self.anlage.archiv.ziele(self.zid)]
         else:
             self.zug = None
             self.zugpfad = []
         self._update_zweige()
         self.endResetModel()
 
+    def _zugname(self, zid: int) -> str:
+        try:
+            return self.zuggraph.nodes[zid].name
+        except KeyError:
+            pass
+        try:
+            return self.anlage.archiv.zug(zid).name
+        except (AttributeError, KeyError):
+            return "?"
+
     def _update_zweige(self):
         self.zweige = {}
 
@@ -492,26 +512,14 @@ class FahrplanModell(QtCore.QAbstractTableModel):
 
         for u, v, d in self.zielgraph.in_edges(ziel.fid, data=True):
             if d.typ in {"A", "E", "K", "F"}:
-                try:
-                    ursprung = self.zuggraph.nodes[u[0]]
-                    ursprung_name = ursprung.name
-                except KeyError:
-                    ursprung_name = "?"
-
-                operations.append(f"{d.typ} ← {ursprung_name}")
+                operations.append(f"{d.typ} ← {self._zugname(u[0])}")
 
         if ziel.typ == "B":
             operations.append("B")
 
         for u, v, d in self.zielgraph.out_edges(ziel.fid, data=True):
             if d.typ in {"E", "K", "F"}:
-                try:
-                    folge = self.zuggraph.nodes[v[0]]
-                    folge_name = folge.name
-                except KeyError:
-                    folge_name = "?"
-
-                operations.append(f"{d.typ} → {folge_name}")
+                operations.append(f"{d.typ} → {self._zugname(v[0])}")
 
         return ", ".join(operations)
 
@@ -576,6 +584,7 @@ class FahrplanWindow(QtWidgets.QWidget):
         self.ui.nachlaufzeit_spin.setValue(self.zugliste_sort_filter.nachlaufzeit)
         self.ui.vorlaufzeit_spin.valueChanged.connect(self.vorlaufzeit_changed)
         self.ui.nachlaufzeit_spin.valueChanged.connect(self.nachlaufzeit_changed)
+        self.zentrale.nachlaufzeit_melden(self, self.zugliste_sort_filter.nachlaufzeit)
 
         self.ui.suche_zug_edit.textEdited.connect(self.suche_zug_changed)
         self.ui.suche_loeschen_button.clicked.connect(self.suche_loeschen_clicked)
@@ -610,6 +619,7 @@ class FahrplanWindow(QtWidgets.QWidget):
         self.zentrale.anlage_update.unregister(self)
         self.zentrale.plan_update.unregister(self)
         self.zentrale.betrieb_update.unregister(self)
+        self.zentrale.nachlaufzeit_abmelden(self)
         super().closeEvent(event)
 
     def plan_update(self, *args, **kwargs) -> None:
@@ -763,6 +773,7 @@ class FahrplanWindow(QtWidgets.QWidget):
     def nachlaufzeit_changed(self):
         try:
             self.zugliste_sort_filter.nachlaufzeit = self.ui.nachlaufzeit_spin.value()
+            self.zentrale.nachlaufzeit_melden(self, self.zugliste_sort_filter.nachlaufzeit)
         except ValueError:
             pass
 
@@ -9,10 +9,13 @@ from matplotlib.figure import Figure
 
 from stskit.dispo.anlage import Anlage
 from stskit.model.bahnhofgraph import BAHNHOFELEMENT_TYPEN, BahnhofElement
-from stskit.plots.gleisbelegung import GleisbelegungPlot, Slot, SlotWarnung
+from stskit.dispo.gleisbelegung import Slot, SlotWarnung
+from stskit.plots.gleisbelegung import GleisbelegungPlot, GleisbelegungSzene
+from stskit.plots.szene import ZeitachsenAnsicht
 from stskit.qt.ui_gleisbelegung import Ui_GleisbelegungWindow
 from stskit.qt.icons import set_action_icons
 from stskit.widgets.gleisauswahl import GleisauswahlModell
+from stskit.widgets.schnappschuss import SchnappschussMenu
 from stskit.zentrale import DatenZentrale
 
 logger = logging.getLogger(__name__)
@@ -21,10 +24,11 @@ logger.addHandler(logging.NullHandler())
 
 class GleisbelegungWindow(QtWidgets.QMainWindow):
 
-    def __init__(self, zentrale: DatenZentrale, ansicht: str = "Gl"):
+    def __init__(self, zentrale: DatenZentrale, ansicht: str = "Gl", grafik: str = "mpl"):
         """
         :param zentrale: DatenZentrale
         :param ansicht: "Gl" für Gleisbelegung von Bahnhöfen oder "Agl" für Ein- und Ausfahrten
+        :param grafik: "mpl" für die Darstellung mit Matplotlib oder "qt" für die Darstellung mit QGraphicsScene
         """
 
         super().__init__()
@@ -46,7 +50,10 @@ class GleisbelegungWindow(QtWidgets.QMainWindow):
 
         self.setWindowTitle("Gleisbelegung")
 
-        self.display_canvas = FigureCanvas(Figure(figsize=(5, 3)))
+        if grafik == "qt":
+            self.display_canvas = ZeitachsenAnsicht()
+        else:
+            self.display_canvas = FigureCanvas(Figure(figsize=(5, 3)))
 
         self.ui.displayLayout = QtWidgets.QHBoxLayout(self.ui.grafikWidget)
         self.ui.displayLayout.setObjectName("displayLayout")
@@ -66,13 +73,18 @@ class GleisbelegungWindow(QtWidgets.QMainWindow):
         self.ui.actionAnkunftAbwarten.triggered.connect(self.action_ankunft_abwarten)
         self.ui.actionAbfahrtAbwarten.triggered.connect(self.action_abfahrt_abwarten)
         self.ui.actionKreuzung.triggered.connect(self.action_kreuzung)
+        self.schnappschuss_menu = SchnappschussMenu(self.zentrale, self.ui.actionRueckgaengig, self.ui.toolBar)
         self.ui.stackedWidget.currentChanged.connect(self.page_changed)
 
         self.ui.vorlaufzeit_spin.valueChanged.connect(self.vorlaufzeit_changed)
         self.ui.nachlaufzeit_spin.valueChanged.connect(self.nachlaufzeit_changed)
 
-        self.plot = GleisbelegungPlot(self.zentrale, self.display_canvas)
+        if grafik == "qt":
+            self.plot = GleisbelegungSzene(self.zentrale, self.display_canvas)
+        else:
+            self.plot = GleisbelegungPlot(self.zentrale, self.display_canvas)
         self.plot.selection_changed.register(self.plot_selection_changed)
+        self.zentrale.nachlaufzeit_melden(self, self.plot.nachlaufzeit)
         if ansicht == "Agl":
             self.plot.vorlaufzeit = 15
 
@@ -83,6 +95,7 @@ class GleisbelegungWindow(QtWidgets.QMainWindow):
         self.zentrale.anlage_update.unregister(self)
         self.zentrale.plan_update.unregister(self)
         self.zentrale.betrieb_update.unregister(self)
+        self.zentrale.nachlaufzeit_abmelden(self)
         super().closeEvent(event)
 
     @property
@@ -116,6 +129,7 @@ class GleisbelegungWindow(QtWidgets.QMainWindow):
         self.ui.actionAbfahrtAbwarten.setEnabled(n_slots == 2)
         self.ui.actionAnkunftAbwarten.setEnabled(n_slots == 2)
         self.ui.actionKreuzung.setEnabled(n_slots == 2)
+        self.schnappschuss_menu.update_action()
 
     def update_widgets(self):
         self.ui.vorlaufzeit_spin.setValue(self.plot.vorlaufzeit)
@@ -195,6 +209,7 @@ class GleisbelegungWindow(QtWidgets.QMainWindow):
     def nachlaufzeit_changed(self):
         try:
             self.plot.nachlaufzeit = self.ui.nachlaufzeit_spin.value()
+            self.zentrale.nachlaufzeit_melden(self, self.plot.nachlaufzeit)
         except ValueError:
             pass
 
@@ -229,6 +244,7 @@ class GleisbelegungWindow(QtWidgets.QMainWindow):
 
         self.plot.belegung.update()
         self.plot.grafik_update()
+        self.schnappschuss_menu.update_action()
 
     def plot_selection_changed(self, *args, **kwargs):
         text = "\n".join(self.plot.selection_text)
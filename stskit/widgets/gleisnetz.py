@@ -4,10 +4,13 @@ schematischer netzplan (experimentell)
 dieses modul ist in entwicklung.
 """
 
+from abc import ABCMeta, abstractmethod
 import logging
 import math
+from pathlib import Path
 import sys
-from typing import Callable, Iterable, Optional
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
 
 import matplotlib as mpl
 import matplotlib.pyplot as plt
@@ -16,15 +19,15 @@ from matplotlib.figure import Figure
 import networkx as nx
 import netgraph
 from PySide6 import QtCore, QtWidgets
-from PySide6.QtCore import Slot
+from PySide6.QtCore import Signal, Slot
 
 from stskit.dispo.anlage import Anlage
 from stskit.model.bahnhofgraph import BahnhofGraph
 from stskit.model.liniengraph import LinienGraph
-from stskit.model.signalgraph import (graph_weichen_ersetzen, graph_anschluesse_pruefen,
-                                      graph_bahnsteigsignale_ersetzen, graph_signalpaare_ersetzen,
-                                      graph_schleifen_aufloesen, graph_zwischensignale_entfernen)
+from stskit.model.signalgraph import SignalGraphVereinfachung
 
+from stskit.utils.layout import (LayoutCache, Position, graph_signature, normalize_positions, seed_positions,
+                                 spring_layout)
 from stskit.zentrale import DatenZentrale
 from stskit.qt.ui_gleisnetz import Ui_GleisnetzWindow
 
@@ -33,20 +36,6 @@ logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
-def graph_nachbarbahnsteige_vereinen(g: nx.DiGraph) -> nx.DiGraph:
-    while True:
-        for u, v, t in g.edges(data="typ", default="unkannt"):
-            if t == "nachbar":
-                g = nx.contracted_nodes(g, u, v, self_loops=False, copy=False)
-                break
-        else:
-            break
-
-    g.remove_edges_from(nx.selfloop_edges(g))
-
-    return g
-
-
 BAHNHOF_COLORMAP = {'Bf': "tab:red",
                     'Bft': "tab:orange",
                     'Bs': "tab:blue",
@@ -64,36 +53,189 @@ SIGNAL_COLORMAP = {2: "tab:blue",  # Signal
                    12: "tab:orange"}  # Haltepunkt
 
 
-class SignalDiagramm:
+def topologie(graph: nx.Graph) -> nx.Graph:
     """
-    Stellt einen SignalGraph grafisch dar.
+    Knoten und Kanten eines Graphen ohne Attribute.
+
+    Die Kopie wird an die Layoutberechnung übergeben,
+    damit der Hintergrund-Thread nicht auf Graphen zugreift, die im GUI-Thread verändert werden.
     """
-    def __init__(self):
+
+    g = nx.Graph()
+    g.add_nodes_from(graph.nodes)
+    g.add_edges_from(graph.edges())
+    return g
+
+
+class LayoutBerechnung(QtCore.QObject):
+    """
+    Berechnet Knotenpositionen in einem Hintergrund-Thread.
+
+    Die Berechnungsfunktion erhält zwei Callbacks:
+    `zwischenstand(positionen)` meldet ein Zwischenergebnis,
+    `abgebrochen()` zeigt an, dass das Ergebnis nicht mehr gebraucht wird.
+    Zwischen- und Endergebnisse werden über das Signal `fortschritt` im GUI-Thread zugestellt.
+    Der Auftrag ist durch die Graphsignatur gekennzeichnet.
+    Ein neuer Auftrag macht den laufenden ungültig.
+    """
+
+    # signatur, positionen, fertig
+    fortschritt = Signal(str, object, bool)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._auftrag: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def starten(self, signatur: str, funktion: Callable[[Callable, Callable], Dict[Hashable, Position]]):
+        if self._auftrag == signatur and self._thread is not None and self._thread.is_alive():
+            return
+
+        self._auftrag = signatur
+        self._thread = threading.Thread(target=self._ausfuehren, args=(signatur, funktion),
+                                        name="LayoutBerechnung", daemon=True)
+        self._thread.start()
+
+    def abbrechen(self):
+        self._auftrag = None
+
+    def _ausfuehren(self, signatur: str, funktion: Callable[[Callable, Callable], Dict[Hashable, Position]]):
+        def abgebrochen() -> bool:
+            return self._auftrag != signatur
+
+        def zwischenstand(positionen: Dict[Hashable, Position]):
+            if not abgebrochen():
+                self.fortschritt.emit(signatur, positionen, False)
+
+        try:
+            positionen = funktion(zwischenstand, abgebrochen)
+        except (ValueError, AssertionError, nx.NetworkXException) as e:
+            logger.error(f"Fehler in der Layoutberechnung: {e}")
+            return
+
+        if not abgebrochen():
+            self.fortschritt.emit(signatur, positionen, True)
+
+
+class LayoutDiagramm(metaclass=ABCMeta):
+    """
+    Basisklasse für Diagramme mit berechnetem Layout.
+
+    Das Layout wird im Hintergrund berechnet (`layout_berechnen`) und
+    pro Schlüssel (Anlage, Build, Diagramm, Filter) im `LayoutCache` abgelegt.
+    Bis das Ergebnis vorliegt, zeigt das Diagramm die Koordinaten der vorherigen Darstellung,
+    soweit die Knoten noch vorhanden sind.
+    """
+
+    def __init__(self, cache: Optional[LayoutCache] = None):
         self.canvas = FigureCanvas(Figure(figsize=(5, 3)))
         self.axes = self.canvas.figure.subplots()
-        self.colormap = SIGNAL_COLORMAP
         self.netgraph = None
+        self.cache = cache
+        self.graph: Optional[nx.Graph] = None
+        self.signatur: Optional[str] = None
+        self.schluessel: Optional[Tuple] = None
+        self.positionen: Dict[Hashable, Position] = {}
+        self.berechnung = LayoutBerechnung()
+        self.berechnung.fortschritt.connect(self.layout_fortschritt)
+
+    def layout_anwenden(self, graph: nx.Graph, schluessel: Optional[Tuple] = None):
+        """
+        Layout aus dem Cache laden oder die Berechnung starten und das Diagramm zeichnen.
+
+        :param graph: darzustellender Graph (nach Anwendung der Filter).
+        :param schluessel: Cache-Schlüssel. None = nicht cachen.
+        """
+
+        self.graph = graph
+        self.signatur = signatur = graph_signature(graph)
+        self.schluessel = schluessel
+
+        positionen = None
+        if self.cache is not None and schluessel is not None:
+            positionen = self.cache.load(schluessel, graph, signatur)
+
+        if positionen is not None:
+            self.berechnung.abbrechen()
+            self.positionen = positionen
+            self.zeichnen()
+        else:
+            vorher = any(n in self.positionen for n in graph.nodes)
+            self.positionen = normalize_positions(seed_positions(graph, self.positionen))
+            self.berechnung.starten(signatur, self.layout_berechnen(graph, self.positionen if vorher else None))
+            if vorher:
+                self.zeichnen()
+            else:
+                self.platzhalter_zeichnen()
 
-    def draw_graph(self, graph: nx.Graph, bahnsteig_graph: nx.Graph, filters: Optional[Iterable[Callable]] = None):
+    def layout_berechnen(self, graph: nx.Graph, positionen: Optional[Dict[Hashable, Position]]) -> Callable:
+        """
+        Berechnungsfunktion für `LayoutBerechnung` erstellen.
+
+        Die Funktion wird im Hintergrund-Thread ausgeführt und darf nur auf Kopien der Daten zugreifen.
+        """
+
+        g = topologie(graph)
+
+        def berechnen(zwischenstand: Callable, abgebrochen: Callable) -> Dict[Hashable, Position]:
+            return spring_layout(g, positionen, progress=zwischenstand, cancelled=abgebrochen)
+
+        return berechnen
+
+    def layout_fortschritt(self, signatur: str, positionen: Dict[Hashable, Position], fertig: bool):
+        if signatur != self.signatur:
+            return
+
+        self.positionen = positionen
+        if fertig and self.cache is not None and self.schluessel is not None:
+            self.cache.save(self.schluessel, self.graph, positionen, signatur)
+        self.zeichnen()
+
+    def platzhalter_zeichnen(self):
         self.axes.clear()
+        self.netgraph = None
+        self.axes.text(0.5, 0.5, "Layout wird berechnet...", ha="center", va="center",
+                       transform=self.axes.transAxes)
+        self.axes.set_xticks([])
+        self.axes.set_yticks([])
+        self.axes.figure.canvas.draw()
+
+    @abstractmethod
+    def zeichnen(self):
+        """
+        Graph mit den aktuellen Positionen darstellen.
+        """
+
+
+class SignalDiagramm(LayoutDiagramm):
+    """
+    Stellt einen SignalGraph grafisch dar.
+
+    Das Federlayout wird im Hintergrund berechnet und schrittweise verfeinert.
+    """
+    def __init__(self, cache: Optional[LayoutCache] = None):
+        super().__init__(cache)
+        self.colormap = SIGNAL_COLORMAP
+        self.zuordnung: Dict[Hashable, Hashable] = {}
+
+    def draw_graph(self, graph: nx.Graph, bahnsteig_graph: nx.Graph, schritte: Optional[Iterable[str]] = None,
+                   schluessel: Optional[Tuple] = None):
+        """
+        Signalgraph vereinfachen und darstellen.
+
+        :param schritte: Namen der Vereinfachungsschritte, s. `SignalGraphVereinfachung`.
+        """
 
         graph = graph.to_undirected()
         graph.add_edges_from(bahnsteig_graph.edges, typ="nachbar")
-        if filters is None:
-            filters = []
-        for filt in filters:
-            graph = filt(graph)
+        vereinfachung = SignalGraphVereinfachung(graph).anwenden(schritte or [])
+        self.zuordnung = vereinfachung.zuordnung()
 
-        def fino(node):
-            typ = graph.nodes[node]["typ"]
-            return typ in {6, 7}
+        self.layout_anwenden(vereinfachung.graph(), schluessel)
 
-        sub_nodes = sorted([x for x, y in graph.nodes(data=True) if y.get('typ', -1) in {6, 7}])
-        sub_graph = nx.subgraph(graph, sub_nodes).copy()
-        # for x, y in zip(sub_nodes, sub_nodes[1:] + [sub_nodes[0]]):
-        #     sub_graph.add_edge(x, y, typ='hilfslinie', distanz=1)
-        sub_edges = list(zip(sub_nodes, sub_nodes[1:] + [sub_nodes[0]]))
-        layout = netgraph.get_circular_layout(sub_edges)
+    def zeichnen(self):
+        self.axes.clear()
+        graph = self.graph
 
         node_colors = {key: self.colormap.get(typ, "r")
                        for key, typ in graph.nodes(data='typ', default='kein')}
@@ -113,8 +255,7 @@ class SignalDiagramm:
                                                     "fc": mpl.rcParams["axes.facecolor"],
                                                     "ec": mpl.rcParams["axes.facecolor"]}}
         self.netgraph = netgraph.InteractiveGraph(graph, ax=self.axes,
-                                      node_layout="spring",
-                                      # node_layout_kwargs=dict(node_positions=layout),
+                                      node_layout=self.positionen,
                                       node_color=node_colors,
                                       node_edge_width=0.0,
                                       node_labels=node_labels,
@@ -145,15 +286,11 @@ class SignalBahnhofDiagramm:
         self.vereinfachter_graph = None
 
     def graph_vereinfachen(self, graph):
-        g = graph.to_undirected()
-        g = graph_weichen_ersetzen(g)
-        g = graph_anschluesse_pruefen(g)
-        g = graph_bahnsteigsignale_ersetzen(g)
-        g = graph_signalpaare_ersetzen(g)
-        g = graph_schleifen_aufloesen(g)
-        g = graph_zwischensignale_entfernen(g)
-        g = graph_schleifen_aufloesen(g)
-        self.vereinfachter_graph = g
+        vereinfachung = SignalGraphVereinfachung(graph.to_undirected())
+        vereinfachung.anwenden(['weichen_ersetzen', 'anschluesse_pruefen', 'bahnsteigsignale_ersetzen',
+                                'signalpaare_ersetzen', 'schleifen_aufloesen', 'zwischensignale_entfernen',
+                                'schleifen_aufloesen'])
+        self.vereinfachter_graph = vereinfachung.graph()
 
     def draw_graph(self, graph: nx.Graph, bahnsteig_graph: nx.Graph, filters: Optional[Iterable[Callable]] = None):
         self.axes.clear()
@@ -209,8 +346,14 @@ class BahnhofDiagramm:
         self.axes = self.canvas.figure.subplots()
         self.colormap = BAHNHOF_COLORMAP
         self.netgraph = None
+        self.signatur = None
 
     def draw_graph(self, graph: BahnhofGraph):
+        signatur = graph_signature(graph)
+        if signatur == self.signatur:
+            return
+        self.signatur = signatur
+
         self.axes.clear()
 
         edges_gen = nx.bfs_edges(graph, graph.root(), sort_neighbors=sorted)
@@ -333,36 +476,75 @@ def liniengraph_schleifen_aufloesen(g: nx.Graph):
     return g
 
 
-class LinienDiagramm:
+class LinienDiagramm(LayoutDiagramm):
     """
     Stellt einen LinienGraph grafisch dar.
+
+    Das geometrische Layout (Kantenlänge nach Fahrzeit) wird im Hintergrund berechnet.
+    Da sich die Fahrzeiten laufend ändern, wird es nur bei einer Änderung der Topologie neu berechnet.
     """
-    def __init__(self):
-        self.canvas = FigureCanvas(Figure(figsize=(5, 3)))
-        self.axes = self.canvas.figure.subplots()
+    def __init__(self, cache: Optional[LayoutCache] = None):
+        super().__init__(cache)
         self.colormap = BAHNHOF_COLORMAP
-        self.netgraph = None
-
-    def draw_graph(self, graph: LinienGraph, filters: Optional[Iterable[Callable]] = None):
-        self.axes.clear()
+        self.darstellung = None
 
+    def draw_graph(self, graph: LinienGraph, filters: Optional[Iterable[Callable]] = None,
+                   schluessel: Optional[Tuple] = None):
+        graph = graph.copy()
         if filters is None:
             filters = []
         for filt in filters:
             graph = filt(graph)
 
+        darstellung = (graph_signature(graph), schluessel, self._kantenbeschriftung(graph), self._kantenbreite(graph))
+        if darstellung == self.darstellung:
+            return
+        self.darstellung = darstellung
+
+        if darstellung[0] == self.signatur and schluessel == self.schluessel:
+            self.graph = graph
+            if self.netgraph is not None:
+                self.zeichnen()
+        else:
+            self.layout_anwenden(graph, schluessel)
+
+    @staticmethod
+    def _kantenbeschriftung(graph: nx.Graph) -> Dict[Tuple[Any, Any], str]:
+        return {(e1, e2): str(round(zeit))
+                for e1, e2, zeit in graph.edges(data='fahrzeit_schnitt', default=0)
+                if zeit > 0}
+
+    @staticmethod
+    def _kantenbreite(graph: nx.Graph) -> Dict[Tuple[Any, Any], float]:
+        return {(e1, e2): min(1., max(1 / 100, fahrten / 10))
+                for e1, e2, fahrten in graph.edges(data='fahrten', default=0)}
+
+    def layout_berechnen(self, graph: nx.Graph, positionen: Optional[Dict[Hashable, Position]]) -> Callable:
+        knoten = list(graph.nodes)
+        kanten = list(graph.edges())
+        edge_length = {(e1, e2): max(1/1000, zeit * 60 / 1000)
+                       for e1, e2, zeit in graph.edges(data='fahrzeit_schnitt', default=0)}
+        if not kanten:
+            return super().layout_berechnen(graph, positionen)
+
+        def berechnen(zwischenstand: Callable, abgebrochen: Callable) -> Dict[Hashable, Position]:
+            pos = netgraph.get_geometric_layout(kanten, nodes=knoten, edge_length=edge_length,
+                                                 origin=(0, 0), scale=(1, 1))
+            return normalize_positions({n: (float(p[0]), float(p[1])) for n, p in pos.items()})
+
+        return berechnen
+
+    def zeichnen(self):
+        self.axes.clear()
+        graph = self.graph
+
         node_colors = {key: self.colormap.get(typ, "tab:gray")
                        for key, typ in graph.nodes(data='typ', default='?')}
         node_labels = {key: name
                        for key, name in graph.nodes(data='name', default='?')}
 
-        edge_labels = {(e1, e2): str(round(zeit))
-                       for e1, e2, zeit in graph.edges(data='fahrzeit_schnitt', default=0)
-                       if zeit > 0}
-        edge_length = {(e1, e2): max(1/1000, zeit * 60 / 1000)
-                       for e1, e2, zeit in graph.edges(data='fahrzeit_schnitt', default=0)}
-        edge_width = {(e1, e2): min(1., max(1 / 100, fahrten / 10))
-                      for e1, e2, fahrten in graph.edges(data='fahrten', default=0)}
+        edge_labels = self._kantenbeschriftung(graph)
+        edge_width = self._kantenbreite(graph)
 
         # node_size=3
         # node_edge_width
@@ -373,8 +555,7 @@ class LinienDiagramm:
 
         self.netgraph = netgraph.InteractiveGraph(graph,
                                                   ax=self.axes,
-                                                  node_layout="geometric",
-                                                  node_layout_kwargs=dict(edge_length=edge_length),
+                                                  node_layout=self.positionen,
                                                   node_color=node_colors,
                                                   node_edge_width=0.0,
                                                   node_labels=node_labels,
@@ -407,7 +588,12 @@ class GleisnetzWindow(QtWidgets.QMainWindow):
 
         self.setWindowTitle("Netzplan")
 
-        self.signal_diagramm = SignalDiagramm()
+        if self.zentrale.config_path:
+            self.layout_cache = LayoutCache(Path(self.zentrale.config_path) / "layouts")
+        else:
+            self.layout_cache = None
+
+        self.signal_diagramm = SignalDiagramm(self.layout_cache)
         self.signal_diagramm.canvas.setParent(self.ui.signal_graph_area)
         self.ui.signal_layout = QtWidgets.QHBoxLayout(self.ui.signal_graph_area)
         self.ui.signal_layout.setObjectName("signal_layout")
@@ -421,7 +607,7 @@ class GleisnetzWindow(QtWidgets.QMainWindow):
         self.ui.bahnhof_layout.addWidget(self.bahnhof_diagramm.canvas)
         self.bahnhof_diagramm.canvas.setFocusPolicy(QtCore.Qt.ClickFocus)
 
-        self.linien_diagramm = LinienDiagramm()
+        self.linien_diagramm = LinienDiagramm(self.layout_cache)
         self.linien_diagramm.canvas.setParent(self.ui.linien_graph_area)
         self.ui.linien_layout = QtWidgets.QHBoxLayout(self.ui.linien_graph_area)
         self.ui.linien_layout.setObjectName("linien_layout")
@@ -443,6 +629,19 @@ class GleisnetzWindow(QtWidgets.QMainWindow):
     def anlage(self) -> Anlage:
         return self.zentrale.anlage
 
+    def layout_schluessel(self, diagramm: str, filters: Iterable[Callable | str]) -> Optional[Tuple]:
+        """
+        Cache-Schlüssel eines Diagramms.
+
+        :param filters: Filterfunktionen oder Namen von Vereinfachungsschritten.
+        :return: (aid, build, diagramm, filternamen) oder None, wenn die Anlage nicht bekannt ist.
+        """
+
+        info = self.anlage.anlageninfo
+        if info is None:
+            return None
+        return info.aid, info.build, diagramm, tuple(f if isinstance(f, str) else f.__name__ for f in filters)
+
     def anlage_update(self, *args, **kwargs):
         try:
             # if self.anlage.signalgraph and not self.signal_diagramm.netgraph:
@@ -452,35 +651,44 @@ class GleisnetzWindow(QtWidgets.QMainWindow):
                 self.bahnhof_diagramm.draw_graph(self.anlage.bahnhofgraph)
 
             if self.anlage.liniengraph:
-                self.linien_diagramm.draw_graph(self.anlage.liniengraph)
+                filters = self.linien_filter()
+                self.linien_diagramm.draw_graph(self.anlage.liniengraph, filters=filters,
+                                                schluessel=self.layout_schluessel("linien", filters))
         except AttributeError as e:
             print("Fehler in Gleisnetz.anlage_update:", e, file=sys.stderr)
 
     @Slot()
     def on_signal_aktualisieren_button_clicked(self):
-        filters = []
+        schritte = []
 
         if self.ui.signal_weichen_check.isChecked():
-            filters.append(graph_weichen_ersetzen)
+            schritte.append('weichen_ersetzen')
         if self.ui.signal_anschluss_check.isChecked():
-            filters.append(graph_anschluesse_pruefen)
+            schritte.append('anschluesse_pruefen')
         if self.ui.signal_nachbarn_check.isChecked():
-            filters.append(graph_nachbarbahnsteige_vereinen)
+            schritte.append('nachbarbahnsteige_vereinen')
         if self.ui.signal_bahnsteig_check.isChecked():
-            filters.append(graph_bahnsteigsignale_ersetzen)
+            schritte.append('bahnsteigsignale_ersetzen')
         if self.ui.signal_paar_check.isChecked():
-            filters.append(graph_signalpaare_ersetzen)
+            schritte.append('signalpaare_ersetzen')
         if self.ui.signal_schleifen_check.isChecked():
-            filters.append(graph_schleifen_aufloesen)
+            schritte.append('schleifen_aufloesen')
         if self.ui.signal_zwischen_check.isChecked():
-            filters.append(graph_zwischensignale_entfernen)
+            schritte.append('zwischensignale_entfernen')
 
-        self.signal_diagramm.draw_graph(self.anlage.signalgraph, self.anlage.bahnsteiggraph, filters=filters)
+        self.signal_diagramm.draw_graph(self.anlage.signalgraph, self.anlage.bahnsteiggraph, schritte=schritte,
+                                        schluessel=self.layout_schluessel("signal", schritte))
 
-    @Slot()
-    def on_linie_aktualisieren_button_clicked(self):
+    def linien_filter(self) -> List[Callable]:
         filters = []
 
         if self.ui.linien_schleifen_check.isChecked():
             filters.append(liniengraph_schleifen_aufloesen)
-        self.linien_diagramm.draw_graph(self.anlage.liniengraph, filters=filters)
+
+        return filters
+
+    @Slot()
+    def on_linie_aktualisieren_button_clicked(self):
+        filters = self.linien_filter()
+        self.linien_diagramm.draw_graph(self.anlage.liniengraph, filters=filters,
+                                        schluessel=self.layout_schluessel("linien", filters))
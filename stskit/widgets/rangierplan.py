@@ -352,36 +352,105 @@ class Rangiervorgang:
     ersatzlok_zid: Optional[int] = None
     ersatzlok_von: Optional[str] = None
     ersatzlok_status: Lokstatus = field(default_factory=Lokstatus)
+    # ziel der ersatzlok am gleis des rangiervorgangs (für die gleisfehlerprüfung)
+    ersatzlok_ziel: Optional[ZielLabelType] = None
 
 
 class Rangierplan:
+    """
+    Rangiervorgänge aus Ziel- und Zuggraph
+
+    Die Rangierliste wird inkrementell nachgeführt.
+    Neue Vorgänge werden aus dem Index `ZielGraph.rangierziele` erstellt,
+    Loks werden über die Indizes `ZugGraph.loks`, `ZugGraph.ersatzloks` und `ZugGraph.lok_rollen` zugeordnet.
+    Die Statusdaten werden nur für Vorgänge aktualisiert,
+    deren Zug oder Loks in `ZielGraph.aenderungen` oder `ZugGraph.aenderungen` verzeichnet sind.
+    Zeiten und Verspätungen werden dagegen für alle offenen Vorgänge nachgeführt,
+    weil der Betrieb sie bei jeder Aktualisierung aus der Prognose neu berechnet
+    (z.B. nach Dispositionen oder Verspätungen von Anschlusszügen).
+    """
+
     def __init__(self, anlage: Anlage, betrieb: Betrieb):
         self.anlage = anlage
         self.betrieb: Betrieb = betrieb
         self.rangierliste: Dict[ZielLabelType, Rangiervorgang] = {}
-        # zugname, zid
-        self.loks: Dict[str, int] = {}
-        # zugname, zid
-        self.ersatzloks: Dict[str, int] = {}
         # lok-zid, key of rangierliste (loks und ersatzloks)
         self.lok_index: Dict[int, ZielLabelType] = {}
         # zug-zid, keys of rangierliste
         self.zug_index: Dict[int, Set[ZielLabelType]] = {}
+        # keys of rangierliste, bei denen lok oder ersatzlok noch nicht zugeordnet ist
+        self._lok_offen: Set[ZielLabelType] = set()
+
+    @property
+    def loks(self) -> Dict[str, int]:
+        """
+        Loks nach Zugname (ohne Präfix 'Lok'), s. `ZugGraph.loks`.
+        """
+        return self.anlage.zuggraph.loks
+
+    @property
+    def ersatzloks(self) -> Dict[str, int]:
+        """
+        Ersatzloks nach Zugname (ohne Präfix 'Ersatzlok'), s. `ZugGraph.ersatzloks`.
+        """
+        return self.anlage.zuggraph.ersatzloks
 
     def update(self):
         """
         Reguläre Aktualisierung der Rangiertabelle.
 
-        1. Sucht neue Loks im Zuggraphen.
-        2. Sucht Zuege, die Rangiervorgänge im Fahrplan haben.
-        3. Aktualisert die Zug- und Lokstatusdaten.
+        1. Erstellt Rangiervorgänge für neue Rangierziele im Zielgraphen.
+        2. Aktualisert die Zug- und Lokstatusdaten der geänderten Vorgänge.
+        3. Aktualisiert Zeiten und Verspätungen der übrigen offenen Vorgänge.
 
         Views der Rangiertabelle müssen nachher neu eingelesen werden.
         """
 
-        self.loks_suchen()
-        self.zuege_suchen()
-        self.zuege_aktualisieren()
+        self.archivierte_entfernen()
+        neue = self.zuege_suchen()
+        geaenderte = self._geaenderte_vorgaenge() | neue
+        self.zuege_aktualisieren(geaenderte)
+        self.zeiten_aktualisieren(fid for fid, rd in self.rangierliste.items()
+                                  if rd.t_erledigt == 0 and fid not in geaenderte)
+
+    def archivierte_entfernen(self):
+        """
+        Rangiervorgänge von archivierten Zügen entfernen (s. `ZugArchiv`).
+        """
+
+        archiv = self.anlage.archiv
+        for fid in [fid for fid in self.rangierliste if fid.zid in archiv]:
+            rd = self.rangierliste.pop(fid)
+            self._lok_offen.discard(fid)
+            try:
+                self.zug_index[fid.zid].discard(fid)
+                if not self.zug_index[fid.zid]:
+                    del self.zug_index[fid.zid]
+            except KeyError:
+                pass
+            for lok_zid in (rd.lok_zid, rd.ersatzlok_zid):
+                if self.lok_index.get(lok_zid) == fid:
+                    del self.lok_index[lok_zid]
+
+    def _geaenderte_vorgaenge(self) -> Set[ZielLabelType]:
+        """
+        Rangiervorgänge, deren Zug oder Loks sich seit der letzten Abfrage geändert haben.
+
+        Vorgänge, deren Loks noch nicht zugeordnet sind, werden immer geprüft.
+        """
+
+        zids = set(self.betrieb.zielgraph.aenderungen)
+        zids.update(self.anlage.zuggraph.aenderungen.keys())
+
+        fids = set(self._lok_offen)
+        for zid in zids:
+            fids.update(self.zug_index.get(zid, ()))
+            try:
+                fids.add(self.lok_index[zid])
+            except KeyError:
+                pass
+
+        return fids
 
     def _vorang_erstellen(self,
                           zug: ZugGraphNode,
@@ -406,11 +475,12 @@ class Rangierplan:
 
         return rd
 
-    def zuege_suchen(self):
+    def zuege_suchen(self) -> Set[ZielLabelType]:
         """
-        Züge suchen, die einen Rangiervorgang im Fahrplan haben.
+        Neue Rangiervorgänge aus dem Zielgraphen übernehmen.
 
-        Die Fahrziele mit Lokumlauf oder Lokwechsel werden in die Rangierlieste geschrieben.
+        Die Fahrziele mit Lokumlauf oder Lokwechsel (Index `ZielGraph.rangierziele`),
+        die noch nicht in der Rangierliste stehen, werden in die Rangierliste geschrieben.
         Die Rangierdaten-Objekt werden so weit wie möglich ausgefüllt.
         Die Lokdaten (zid und status) werden hier offen gelassen.
 
@@ -419,21 +489,25 @@ class Rangierplan:
         Dies ist leider nicht immer möglich, weil die Daten von der Pluginschnittstelle oft unvollständig sind.
         Wenn nur die Relation einer Lok fehlt, kann der Name dieses Anschlusses nicht angezeigt werden.
         Wenn beide Relationen fehlen, können die Ursprungs- und Ersatzloks nicht zugeordnet werden.
+
+        :return: fid der neuen Rangiervorgänge.
         """
 
-        for fid, ziel in self.betrieb.zielgraph.nodes(data=True):
-            if fid in self.rangierliste:
+        zielgraph = self.betrieb.zielgraph
+        neue = set()
+
+        for fid in zielgraph.rangierziele.difference(self.rangierliste.keys()):
+            try:
+                ziel = zielgraph.nodes[fid]
+                zug = self.anlage.zuggraph.nodes[fid.zid]
+            except KeyError:
                 continue
 
             if ziel.lokumlauf:
-                zug = self.anlage.zuggraph.nodes[fid.zid]
                 rd = self._vorang_erstellen(zug, ziel, vorgang="Lokumlauf")
                 rd.lok_nach = ziel.gleis
-                rd.zug_status.update_von_zug(zug, ziel.plan)
-                self.rangierliste[fid] = rd
 
             elif (enrs := ziel.lokwechsel) is not None:
-                zug = self.anlage.zuggraph.nodes[fid.zid]
                 rd = self._vorang_erstellen(zug, ziel, vorgang="Lokwechsel")
                 # anhand der enr herausfinden, welches die ersatzlok ist!
                 abstellgleise = {enr: self.anlage.bahnhofgraph.find_gleis_enr(enr) or
@@ -454,44 +528,44 @@ class Rangierplan:
                         if rd.ersatzlok_von is None:
                             rd.ersatzlok_von = abstellgleise[renr].name
 
-                rd.zug_status.update_von_zug(zug, ziel.plan)
-                self.rangierliste[fid] = rd
+            else:
+                continue
+
+            rd.zug_status.update_von_zug(zug, ziel.plan)
+            self.rangierliste[fid] = rd
+            self.zug_index.setdefault(fid.zid, set()).add(fid)
+            self._lok_offen.add(fid)
+            neue.add(fid)
+
+        return neue
 
-    def zuege_aktualisieren(self):
+    def zuege_aktualisieren(self, fids: Optional[Iterable[ZielLabelType]] = None):
         """
         Laufende Rangiervorgänge aus den Anlagedaten aktualisieren.
 
-        Überprüft den Status der in der Rangierliste verzeichneten Vorgänge:
+        Überprüft den Status der angegebenen Vorgänge:
         - Aktualisiert Zielgleis, Zeiten und Verspätung
         - Verknüpft Lok und Ersatzlok mit den Lokdaten aus dem loks-Verzeichnis falls noch nicht geschehen.
         - Aktualisiert den Status von Lok und Ersatzlok.
         - Prüft auf Übereinstimmung der Zielgleise von Zug und Ersatzlok.
         - Setzt die Erledigungszeit, wenn Zug, Lok und Ersatzlok neu alle erledigt sind.
+
+        :param fids: Zu aktualisierende Vorgänge. None = alle.
         """
 
-        for fid, rd in self.rangierliste.items():
-            ziel = self.betrieb.zielgraph.nodes[fid]
+        if fids is None:
+            fids = self.rangierliste.keys()
+        zielgraph = self.betrieb.zielgraph
+        zuggraph = self.anlage.zuggraph
 
-            rd.gleis = ziel.gleis
-            rd.p_an = ziel.p_an
+        for fid in fids:
             try:
-                rd.p_ab = ziel.p_ab
-            except AttributeError:
-                try:
-                    fid2 = self.betrieb.zielgraph.next_node(fid, ersatz_erlaubt=True)
-                    ziel2 = self.betrieb.zielgraph.nodes[fid2]
-                    rd.p_ab = ziel2.p_an
-                except (AttributeError, KeyError, ValueError):
-                    rd.p_ab = None
-
-            rd.v_an = ziel.v_an
-            rd.v_ab = ziel.v_ab
-            rd.t_an = ziel.p_an + ziel.v_an
-
-            if fid.zid in self.zug_index:
-                self.zug_index[fid.zid].add(fid)
-            else:
-                self.zug_index[fid.zid] = {fid}
+                rd = self.rangierliste[fid]
+                ziel = zielgraph.nodes[fid]
+            except KeyError:
+                continue
+
+            self._zeiten_uebernehmen(rd, ziel)
 
             if rd.lok_zid is None:
                 try:
@@ -501,8 +575,8 @@ class Rangierplan:
                     pass
                 else:
                     self.lok_index[rd.lok_zid] = fid
-            if rd.lok_zid is not None:
-                rd.lok_status.update_von_zug(self.anlage.zuggraph.nodes[rd.lok_zid])
+            if rd.lok_zid is not None and rd.lok_zid in zuggraph:
+                rd.lok_status.update_von_zug(zuggraph.nodes[rd.lok_zid])
 
             if rd.ersatzlok_zid is None:
                 try:
@@ -512,61 +586,84 @@ class Rangierplan:
                     pass
                 else:
                     self.lok_index[rd.ersatzlok_zid] = fid
-            if rd.ersatzlok_zid is not None:
-                rd.ersatzlok_status.update_von_zug(self.anlage.zuggraph.nodes[rd.ersatzlok_zid])
+            if rd.ersatzlok_zid is not None and rd.ersatzlok_zid in zuggraph:
+                rd.ersatzlok_status.update_von_zug(zuggraph.nodes[rd.ersatzlok_zid])
                 self.gleisfehler_pruefen(rd)
 
+            if rd.t_erledigt != 0 or (rd.lok_zid is not None and rd.ersatzlok_zid is not None):
+                self._lok_offen.discard(fid)
+
             if rd.t_erledigt == 0:
                 if (rd.zug_status.status == "erledigt" and
                         (rd.lok_zid is None or rd.lok_status.status == "erledigt") and
                         (rd.ersatzlok_zid is None or rd.ersatzlok_status.status == "erledigt")):
                     rd.t_erledigt = self.anlage.simzeit_minuten
 
-    def gleisfehler_pruefen(self, rd: Rangiervorgang):
+    def zeiten_aktualisieren(self, fids: Iterable[ZielLabelType]):
         """
-        Rangiervoraang auf Gleisfehler prüfen.
+        Zielgleis, Zeiten und Verspätungen der angegebenen Vorgänge aus dem Zielgraphen übernehmen.
 
-        Prüft, ob die Ersatzlok auf das gleiche Gleis wie ihr Zielzug programmiert ist.
-        Wenn nicht wird ein Gleisfehler gemeldet, so dass der Fdl die Lok auf das richtige Gleis leiten kann.
+        Die Zug- und Lokstatusdaten werden nicht verändert.
 
-        :param rd: Rangierdaten des Zuges.
+        :param fids: Zu aktualisierende Vorgänge.
         """
 
-        if rd.ersatzlok_zid not in self.betrieb.zielgraph.zuganfaenge:
-            return
+        zielgraph = self.betrieb.zielgraph
+        for fid in fids:
+            try:
+                rd = self.rangierliste[fid]
+                ziel = zielgraph.nodes[fid]
+            except KeyError:
+                continue
 
-        for fid in self.betrieb.zielgraph.zugpfad(rd.ersatzlok_zid):
-            ziel = self.betrieb.zielgraph.nodes[fid]
-            if ziel.plan == rd.plan:
-                rd.ersatzlok_status.gleisfehler = ziel.gleis != rd.gleis
-                break
+            self._zeiten_uebernehmen(rd, ziel)
+
+    def _zeiten_uebernehmen(self, rd: Rangiervorgang, ziel: ZielGraphNode):
+        zielgraph = self.betrieb.zielgraph
+        rd.gleis = ziel.gleis
+        rd.p_an = ziel.p_an
+        try:
+            rd.p_ab = ziel.p_ab
+        except AttributeError:
+            try:
+                fid2 = zielgraph.next_node(ziel.fid, ersatz_erlaubt=True)
+                ziel2 = zielgraph.nodes[fid2]
+                rd.p_ab = ziel2.p_an
+            except (AttributeError, KeyError, ValueError):
+                rd.p_ab = None
+
+        rd.v_an = ziel.v_an
+        rd.v_ab = ziel.v_ab
+        rd.t_an = ziel.p_an + ziel.v_an
 
-    def loks_suchen(self):
+    def gleisfehler_pruefen(self, rd: Rangiervorgang):
         """
-        Loks und Ersatzloks im Zuggraph suchen
+        Rangiervoraang auf Gleisfehler prüfen.
 
-        Sucht Züge im Zuggraph, die mit dem Präfix 'Lok' oder 'Ersatzlok' beginnen und eine negative zid haben.
-        Der Präfix wird abgetrennt und die Lok in den loks- bzw. ersatzloks-Dictionaries eingetragen.
+        Prüft, ob die Ersatzlok auf das gleiche Gleis wie ihr Zielzug programmiert ist.
+        Wenn nicht wird ein Gleisfehler gemeldet, so dass der Fdl die Lok auf das richtige Gleis leiten kann.
+
+        Das passende Ziel der Ersatzlok wird in `rd.ersatzlok_ziel` gemerkt
+        und nur neu gesucht, wenn sich der Fahrplan der Ersatzlok geändert hat.
 
-        Die Loks werden hier nicht mit einem Rangiervorgang verknüpft.
-        Dies erledigt die Methode zuege_aktualisieren.
+        :param rd: Rangierdaten des Zuges.
         """
 
-        for zid, zug in self.anlage.zuggraph.nodes(data=True):
-            if zid >= 0:
-                continue
+        zielgraph = self.betrieb.zielgraph
+        if rd.ersatzlok_zid not in zielgraph.zuganfaenge:
+            return
 
-            try:
-                parts = zug.name.split()
-            except AttributeError:
-                continue
+        if (rd.ersatzlok_ziel is None or rd.ersatzlok_zid in zielgraph.aenderungen or
+                not zielgraph.has_node(rd.ersatzlok_ziel)):
+            rd.ersatzlok_ziel = None
+            for fid in zielgraph.zugpfad(rd.ersatzlok_zid):
+                if zielgraph.nodes[fid].plan == rd.plan:
+                    rd.ersatzlok_ziel = fid
+                    break
 
-            if parts[0] == "Lok":
-                zug_name = " ".join(parts[1:])
-                self.loks[zug_name] = zid
-            elif parts[0] == "Ersatzlok":
-                zug_name = " ".join(parts[1:])
-                self.ersatzloks[zug_name] = zid
+        if rd.ersatzlok_ziel is not None:
+            ziel = zielgraph.nodes[rd.ersatzlok_ziel]
+            rd.ersatzlok_status.gleisfehler = ziel.gleis != rd.gleis
 
     def plugin_ereignis(self, ereignis: Ereignis) -> Set[ZielLabelType]:
         """
@@ -575,14 +672,12 @@ class Rangierplan:
         Verteilt die Ereignisnachricht auf die lok_ereignis- und zug_ereignis-Methoden.
         """
 
-        rd_ids = set()
-
         if ereignis.zid in self.lok_index:
-            rd_ids.update(self.lok_ereignis(ereignis))
+            return self.lok_ereignis(ereignis)
         elif ereignis.zid in self.zug_index:
-            rd_ids.update(self.zug_ereignis(ereignis))
-
-        return rd_ids
+            return self.zug_ereignis(ereignis)
+        else:
+            return set()
 
     def lok_ereignis(self, ereignis: Ereignis) -> Set[ZielLabelType]:
         """
@@ -600,11 +695,12 @@ class Rangierplan:
         except KeyError:
             return rd_ids
 
-        if ereignis.zid in self.loks.values():
+        rolle = self.anlage.zuggraph.lok_rollen.get(ereignis.zid)
+        if rolle == "Lok":
             if rd.lok_status.status != 'erledigt':
                 rd.lok_status.update_von_ereignis(ereignis)
                 rd_ids.add(fid)
-        elif ereignis.zid in self.ersatzloks.values():
+        elif rolle == "Ersatzlok":
             if rd.ersatzlok_status.status != 'erledigt':
                 rd.ersatzlok_status.update_von_ereignis(ereignis)
                 rd_ids.add(fid)
@@ -665,9 +761,12 @@ class RangiertabelleModell(QAbstractTableModel):
         self.rangierziele = list(self.rangierplan.rangierliste.keys())
         self.endResetModel()
 
-    def plugin_ereignis(self, ereignis: Ereignis):
-        fids = self.rangierplan.plugin_ereignis(ereignis)
-        self.emit_changes(ziele=fids)
+    def plugin_ereignisse(self, ereignisse: Iterable[Ereignis]):
+        fids = set()
+        for ereignis in ereignisse:
+            fids.update(self.rangierplan.plugin_ereignis(ereignis))
+        if fids:
+            self.emit_changes(ziele=fids)
 
     def emit_changes(self, ziele: Optional[Iterable[ZielLabelType]] = None, spalten: Optional[Iterable[str]] = None):
         """
@@ -935,6 +1034,7 @@ class RangierplanWindow(QWidget):
         self.ui.nachlaufzeit_spin.setValue(self.rangiertabelle_sort_filter.nachlaufzeit)
         self.ui.vorlaufzeit_spin.valueChanged.connect(self.vorlaufzeit_changed)
         self.ui.nachlaufzeit_spin.valueChanged.connect(self.nachlaufzeit_changed)
+        self.zentrale.nachlaufzeit_melden(self, self.rangiertabelle_sort_filter.nachlaufzeit)
 
         self.ui.suche_zug_edit.textEdited.connect(self.suche_zug_changed)
         self.ui.suche_loeschen_button.clicked.connect(self.suche_loeschen_clicked)
@@ -952,6 +1052,7 @@ class RangierplanWindow(QWidget):
         self.zentrale.plugin_ereignis.unregister(self)
         self.zentrale.plan_update.unregister(self)
         self.zentrale.betrieb_update.unregister(self)
+        self.zentrale.nachlaufzeit_abmelden(self)
         super().closeEvent(event)
 
     def plan_update(self, *args, **kwargs) -> None:
@@ -963,7 +1064,7 @@ class RangierplanWindow(QWidget):
         self.ui.zugliste_view.resizeRowsToContents()
 
     def plugin_ereignis(self, *args, **kwargs) -> None:
-        self.rangiertabelle_modell.plugin_ereignis(kwargs["ereignis"])
+        self.rangiertabelle_modell.plugin_ereignisse(kwargs["ereignisse"])
 
     @Slot()
     def vorlaufzeit_changed(self):
@@ -976,6 +1077,7 @@ class RangierplanWindow(QWidget):
     def nachlaufzeit_changed(self):
         try:
             self.rangiertabelle_sort_filter.nachlaufzeit = self.ui.nachlaufzeit_spin.value()
+            self.zentrale.nachlaufzeit_melden(self, self.rangiertabelle_sort_filter.nachlaufzeit)
         except ValueError:
             pass
 
@@ -0,0 +1,95 @@
+"""
+Auswahl von Betriebsschnappschüssen
+
+Das Modul deklariert ein Menü, mit dem die Dispositionen auf den Stand
+eines früheren Schnappschusses der `BetriebHistorie` zurückgesetzt werden können.
+Das Menü wird an eine Aktion der Werkzeugleiste angehängt:
+Die Aktion selbst setzt auf den Stand vor einer Minute zurück,
+das Aufklappmenü listet die älteren Schnappschüsse nach Simzeit.
+
+Die Historie muss in der `DatenZentrale` eingeschaltet sein (Kommandozeilenoption `--schnappschuesse`),
+ansonsten bleibt die Aktion deaktiviert.
+"""
+
+import logging
+from typing import Optional
+
+from PySide6 import QtWidgets
+from PySide6.QtCore import Slot
+from PySide6.QtGui import QAction
+
+from stskit.dispo.schnappschuss import BetriebHistorie, BetriebSchnappschuss
+from stskit.plugin.stsobj import minutes_to_time
+from stskit.zentrale import DatenZentrale
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class SchnappschussMenu(QtWidgets.QMenu):
+    """
+    Aufklappmenü der Zurücksetzen-Aktion
+
+    Attributes:
+        zentrale: Datenzentrale mit dem Betrieb.
+        aktion: Zurücksetzen-Aktion der Werkzeugleiste.
+    """
+
+    def __init__(self, zentrale: DatenZentrale, aktion: QAction, toolbar: QtWidgets.QToolBar):
+        super().__init__(toolbar)
+        self.zentrale = zentrale
+        self.aktion = aktion
+
+        self.aboutToShow.connect(self.eintraege_aktualisieren)
+        aktion.setMenu(self)
+        aktion.triggered.connect(self.letzten_wiederherstellen)
+        button = toolbar.widgetForAction(aktion)
+        if isinstance(button, QtWidgets.QToolButton):
+            button.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.MenuButtonPopup)
+
+    @property
+    def historie(self) -> Optional[BetriebHistorie]:
+        try:
+            return self.zentrale.betrieb.historie
+        except AttributeError:
+            return None
+
+    def update_action(self):
+        """
+        Aktion aktivieren, wenn ein älterer Schnappschuss vorhanden ist.
+        """
+
+        historie = self.historie
+        self.aktion.setEnabled(historie is not None and len(historie) >= 2)
+
+    @Slot()
+    def eintraege_aktualisieren(self):
+        """
+        Menü mit den Schnappschüssen vor dem aktuellen Stand füllen, den neuesten zuoberst.
+        """
+
+        self.clear()
+        historie = self.historie
+        if historie is None:
+            return
+
+        for schnappschuss in list(historie)[-2::-1]:
+            zeit = minutes_to_time(schnappschuss.zeit)
+            anzahl = len(schnappschuss.journal.entries)
+            eintrag = self.addAction(f"{zeit:%H:%M} ({anzahl} Dispositionen)")
+            eintrag.triggered.connect(lambda *args, s=schnappschuss: self.wiederherstellen(s))
+
+    @Slot()
+    def letzten_wiederherstellen(self):
+        """
+        Dispositionen auf den Stand vor mindestens einer Minute zurücksetzen.
+        """
+
+        historie = self.historie
+        if historie is not None and (schnappschuss := historie.suchen(1)) is not None:
+            self.wiederherstellen(schnappschuss)
+
+    def wiederherstellen(self, schnappschuss: BetriebSchnappschuss):
+        logger.info(f"Dispositionen auf den Stand von {minutes_to_time(schnappschuss.zeit):%H:%M} zurückgesetzt")
+        self.zentrale.betrieb.journal_wiederherstellen(schnappschuss)
+        self.update_action()
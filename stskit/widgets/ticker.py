@@ -9,7 +9,7 @@ Die EreignisTabelleModell-Klasse sammelt die Ereignisse und stellt über die Mod
 
 import copy
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Sequence
 from typing import Any
 
 from PySide6 import QtCore
@@ -153,22 +153,36 @@ class EreignisTabelleModell(QAbstractTableModel):
         return None
 
     def add_ereignis(self, ereignis: Ereignis):
-        if ereignis.art == "abfahrt" and ereignis.amgleis:
-            ereignis = copy.copy(ereignis)
-            ereignis.art = "bereit"
-        elif ereignis.art == "ankunft" and not ereignis.amgleis:
-            ereignis = copy.copy(ereignis)
-            ereignis.art = "durchfahrt"
-        elif ereignis.art == "wurdegruen":
-            ereignis = copy.copy(ereignis)
-            ereignis.art = "fahrt"
-        elif ereignis.art == "fluegeln":
-            ereignis = copy.copy(ereignis)
-            ereignis.art = "flügeln"
-
-        if ereignis not in self.ereignisse:
+        self.add_ereignisse([ereignis])
+
+    def add_ereignisse(self, ereignisse: Iterable[Ereignis]):
+        """
+        Ereignisse hinzufügen.
+
+        Das Modell wird nur einmal pro Aufruf zurückgesetzt, und nur wenn neue Ereignisse dabei sind.
+        """
+
+        neue = []
+        for ereignis in ereignisse:
+            if ereignis.art == "abfahrt" and ereignis.amgleis:
+                ereignis = copy.copy(ereignis)
+                ereignis.art = "bereit"
+            elif ereignis.art == "ankunft" and not ereignis.amgleis:
+                ereignis = copy.copy(ereignis)
+                ereignis.art = "durchfahrt"
+            elif ereignis.art == "wurdegruen":
+                ereignis = copy.copy(ereignis)
+                ereignis.art = "fahrt"
+            elif ereignis.art == "fluegeln":
+                ereignis = copy.copy(ereignis)
+                ereignis.art = "flügeln"
+
+            if ereignis not in self.ereignisse and ereignis not in neue:
+                neue.append(ereignis)
+
+        if neue:
             self.beginResetModel()
-            self.ereignisse.append(ereignis)
+            self.ereignisse.extend(neue)
             if len(self.ereignisse) > self.ereignis_limit:
                 self.ereignisse = self.ereignisse[-self.ereignis_limit:]
             self.endResetModel()
@@ -234,7 +248,7 @@ class TickerWindow(QWidget):
         super().__init__()
 
         self.zentrale = zentrale
-        self.zentrale.plugin_ereignis.register(self.add_ereignis)
+        self.zentrale.plugin_ereignis.register(self.add_ereignisse)
         
         self.ui = Ui_EreignisTickerWidget()
         self.ui.setupUi(self)
@@ -262,9 +276,9 @@ class TickerWindow(QWidget):
         self.zentrale.plugin_ereignis.unregister(self)
         super().closeEvent(event)
 
-    def add_ereignis(self, *args, ereignis: Ereignis, **kwargs):
+    def add_ereignisse(self, *args, ereignisse: Sequence[Ereignis], **kwargs):
         self.filter.simzeit = self.zentrale.simzeit_minuten
-        self.model.add_ereignis(ereignis)
+        self.model.add_ereignisse(ereignisse)
         self.ui.ticker_view.resizeColumnsToContents()
         self.ui.ticker_view.resizeRowsToContents()
         if self.ui.auto_scroll_checkbox.checkState() == Qt.CheckState.Checked:
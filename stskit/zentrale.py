@@ -6,20 +6,59 @@ und stellt die Schnittstelle zu den Benutzermodulen bereit.
 Änderungen an den Betriebsdaten werden über Observer gemeldet.
 """
 
+import datetime
 import logging
 import os
-from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from pathlib import Path
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+import trio
 
 from stskit.utils.observer import Observable
 from stskit.plugin.stsobj import Ereignis, time_to_minutes
 from stskit.plugin.stsgraph import GraphClient
 from stskit.dispo.anlage import Anlage
 from stskit.dispo.betrieb import Betrieb
-from stskit.dispo.auswertung import Auswertung
+from stskit.dispo.auswertung import Auswertung, FahrzeitAuswertung
+from stskit.dispo.historie import FahrzeitHistorie
+from stskit.dispo.prognoseexport import PrognoseExport
+from stskit.dispo.schnappschuss import BetriebHistorie
 
 logger = logging.getLogger(__name__)
 
 
+async def ereignis_stapel(kanal: trio.abc.ReceiveChannel[Ereignis],
+                          intervall: float = 0.2,
+                          max_anzahl: int = 200) -> AsyncIterator[List[Ereignis]]:
+    """
+    Ereignisse aus einem Kanal gebündelt auslesen.
+
+    Nach dem ersten Ereignis eines Stapels werden während `intervall` Sekunden
+    (oder bis `max_anzahl` erreicht ist) weitere Ereignisse gesammelt.
+    Einzelne Ereignisse werden also höchstens um `intervall` verzögert.
+
+    ~~~~~~{.py}
+    async for ereignisse in ereignis_stapel(client.ereignis_channel_out):
+        await zentrale.ereignisse(ereignisse)
+    ~~~~~~
+
+    :param kanal: Ereigniskanal, z.B. `PluginClient.ereignis_channel_out`.
+    :param intervall: Sammelzeit in Sekunden.
+    :param max_anzahl: Maximale Anzahl Ereignisse pro Stapel.
+    :return: Asynchroner Iterator von Ereignislisten. Endet, wenn der Kanal geschlossen wird.
+    """
+
+    async for ereignis in kanal:
+        stapel = [ereignis]
+        with trio.move_on_after(intervall):
+            async for ereignis in kanal:
+                stapel.append(ereignis)
+                if len(stapel) >= max_anzahl:
+                    break
+        yield stapel
+
+
 class DatenZentrale:
     """
     Zentrale Datenschnittstelle zum Simulator
@@ -62,18 +101,34 @@ class DatenZentrale:
     - auswertung_update: Änderungen am Fahrplan, die für das Auswertungsmodul interessant sind.
         Das Auswertungsmodul wird möglicherweise in einer folgenden Version überarbeitet.
         Der Observer sollte in neuen Modulen nicht verwendet werden.
-    - plugin_ereignis: Ereignismeldung vom Simulator.
+    - plugin_ereignis: Ereignismeldungen vom Simulator.
         Für Benutzermodule, die zeitnah auf Ereignisse vom Simulator reagieren müssen.
-        Der Observer triggert bei jedem Ereignis vom Simulator,
-        was bei gewissen Ereignisarten mehrmals pro Sekunde sein kann.
+        Die Ereignisse werden gebündelt (s. `ereignis_stapel`) und als Liste im Argument `ereignisse` übergeben.
+        Der Observer kann trotzdem mehrmals pro Sekunde triggern.
         Die Verarbeitung darf daher keine lange Zeit in Anspruch nehmen,
         insbesondere sollten komplexe Grafikaktualisierungen vermieden werden.
         Diese sollten z.B. an die Qt-Mainloop oder an betrieb_update delegiert werden.
+
+    Ausgefahrene Züge werden nach einer Nachlaufzeit archiviert (s. `ZugArchiv`) und
+    erscheinen dann nicht mehr in zuggraph, zielgraph und ereignisgraph.
+    Die Nachlaufzeit ist das Maximum von `archiv_nachlaufzeit` und
+    den von den offenen Fenstern mit `nachlaufzeit_melden` angemeldeten Nachlaufzeiten.
+
+    Mit `prognose_export` werden die Prognosen jeder Abfrage für die Auswertung nach der Schicht
+    im Unterverzeichnis `prognosen` des Konfigurationsverzeichnisses gespeichert (s. `PrognoseExport`).
+
+    Mit `schnappschuesse` > 0 hält der Betrieb so viele Schnappschüsse in einer `BetriebHistorie`.
+    Die Historie ist standardmässig aus, da das Erfassen jede Aktualisierung verlangsamt.
     """
 
-    def __init__(self, config_path: Optional[os.PathLike] = None):
+    def __init__(self, config_path: Optional[os.PathLike] = None, archiv_nachlaufzeit: Optional[int] = 60,
+                 prognose_export: bool = False, schnappschuesse: int = 0):
         self.simzeit_minuten: int = 0
         self.config_path: os.PathLike = config_path
+        self.archiv_nachlaufzeit: Optional[int] = archiv_nachlaufzeit
+        self.prognose_export: bool = prognose_export
+        self.schnappschuesse: int = schnappschuesse
+        self._nachlaufzeiten = weakref.WeakKeyDictionary()
         self.client: Optional[GraphClient] = None
         self.anlage: Optional[Anlage] = None
         self.betrieb: Optional[Betrieb] = None
@@ -91,6 +146,36 @@ class DatenZentrale:
         else:
             return self._betrieb_update
 
+    def nachlaufzeit_melden(self, besitzer: Any, minuten: int):
+        """
+        Nachlaufzeit eines Benutzermoduls anmelden.
+
+        Ausgefahrene Züge werden frühestens nach der längsten angemeldeten Nachlaufzeit archiviert.
+        Die Anmeldung erlischt, wenn der Besitzer gelöscht wird.
+
+        :param besitzer: Benutzermodul, z.B. Fensterobjekt.
+        :param minuten: Nachlaufzeit in Minuten.
+        """
+
+        self._nachlaufzeiten[besitzer] = minuten
+
+    def nachlaufzeit_abmelden(self, besitzer: Any):
+        try:
+            del self._nachlaufzeiten[besitzer]
+        except KeyError:
+            pass
+
+    def nachlaufzeit(self) -> Optional[int]:
+        """
+        Nachlaufzeit bis zur Archivierung ausgefahrener Züge.
+
+        :return: Minuten, oder None, wenn nicht archiviert wird.
+        """
+
+        if self.archiv_nachlaufzeit is None:
+            return None
+        return max([self.archiv_nachlaufzeit, *self._nachlaufzeiten.values()])
+
     async def update(self):
         """
         Aktuelle Daten von der Plugin-Schnittstelle abfragen.
@@ -101,13 +186,13 @@ class DatenZentrale:
         """
 
         await self._get_sts_data()
-        for art in Ereignis.arten:
-            await self.client.request_ereignis(art, self.client.zugliste.keys())
+        await self.client.request_ereignisse()
 
         self.simzeit_minuten = time_to_minutes(self.client.calc_simzeit())
 
         if not self.anlage:
             self.anlage = Anlage()
+        self.anlage.archiv_nachlaufzeit = self.nachlaufzeit()
         aenderungen = self.anlage.update(self.client, self.config_path)
         aenderungen -= {'zuggraph', 'zielgraph'}
         if aenderungen:
@@ -115,12 +200,22 @@ class DatenZentrale:
 
         if not self.betrieb:
             self.betrieb = Betrieb()
+            if self.prognose_export and self.config_path and self.anlage.anlageninfo:
+                name = f"{self.anlage.anlageninfo.aid}-{datetime.date.today():%Y%m%d}"
+                self.betrieb.prognose_export = PrognoseExport(Path(self.config_path) / "prognosen", name)
+            if self.schnappschuesse > 0:
+                self.betrieb.historie = BetriebHistorie(kapazitaet=self.schnappschuesse)
         self.betrieb.update(self.anlage, self.config_path)
         self.betrieb_update.trigger()
         self.plan_update.trigger()
 
         if not self.auswertung:
             self.auswertung = Auswertung(self.anlage)
+            if self.config_path and self.anlage.anlageninfo:
+                historie = FahrzeitHistorie.im_verzeichnis(self.config_path, self.anlage.anlageninfo.aid)
+                statistik = await trio.to_thread.run_sync(FahrzeitAuswertung.historie_statistik, historie)
+                self.auswertung.fahrzeiten.historie_laden(historie, statistik)
+                self.anlage.messungen_uebernehmen(self.auswertung.liniengraph_messungen())
         self.auswertung.zuege_uebernehmen(self.client.zugliste.values())
         self.auswertung_update.trigger()
 
@@ -162,22 +257,41 @@ class DatenZentrale:
         await self.client.request_zugfahrplan()
         await self.client.resolve_zugflags()
 
-    async def ereignis(self, ereignis):
+    async def ereignis(self, ereignis: Ereignis):
         """
         Ereignisdaten übernehmen.
 
+        Wie `ereignisse` mit einem einzelnen Ereignis.
+
         :param ereignis:
         :return:
         """
 
-        if self.anlage:
-            self.anlage.sim_ereignis_uebernehmen(ereignis)
-        if self.betrieb:
-            self.betrieb.sim_ereignis_uebernehmen(ereignis)
-        if self.auswertung:
-            self.auswertung.ereignis_uebernehmen(ereignis)
+        await self.ereignisse([ereignis])
+
+    async def ereignisse(self, ereignisse: Sequence[Ereignis]):
+        """
+        Mehrere Ereignisse in einem Durchgang übernehmen.
+
+        Die Ereignisse werden in der gegebenen Reihenfolge an Anlage, Betrieb und Auswertung übergeben.
+        Danach werden die Beobachter von plugin_ereignis einmal mit der ganzen Liste benachrichtigt.
+
+        :param ereignisse: Ereignisse in der Reihenfolge des Empfangs.
+        :return:
+        """
+
+        if not ereignisse:
+            return
+
+        for ereignis in ereignisse:
+            if self.anlage:
+                self.anlage.sim_ereignis_uebernehmen(ereignis)
+            if self.betrieb:
+                self.betrieb.sim_ereignis_uebernehmen(ereignis)
+            if self.auswertung:
+                self.auswertung.ereignis_uebernehmen(ereignis)
 
-        self.plugin_ereignis.notify(ereignis=ereignis)
+        self.plugin_ereignis.notify(ereignisse=ereignisse)
 
     def notify_anlage(self, aenderungen: Set[str]):
         self.anlage.aenderungen.update(aenderungen)
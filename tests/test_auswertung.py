@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+from mock import Mock
+
+from stskit.dispo.auswertung import Auswertung, FahrzeitAuswertung, FahrzeitStatistik
+from stskit.plugin.stsobj import ZugDetails
+
+
+class TestFahrzeitStatistik(unittest.TestCase):
+    def test_mittel_varianz(self):
+        stat = FahrzeitStatistik(kapazitaet=1)
+        werte = [1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16]
+        for w in werte:
+            stat.hinzufuegen("A", "B", w)
+        stat.hinzufuegen("B", "C", 60.)
+        stat.hinzufuegen("C", "D", 30.)
+
+        r = stat.abfragen([stat.zeile("A", "B"), -1, stat.zeile("B", "C")])
+        np.testing.assert_array_equal(r['anzahl'], [4, 0, 1])
+        self.assertAlmostEqual(r['avg'][0], np.mean(werte))
+        self.assertAlmostEqual(r['sdev'][0], np.std(werte))
+        self.assertEqual(r['min'][0], min(werte))
+        self.assertEqual(r['max'][0], max(werte))
+        self.assertTrue(np.isnan(r['avg'][1]))
+        self.assertEqual(r['avg'][2], 60.)
+        self.assertEqual(len(stat), 3)
+
+    def test_quantile(self):
+        stat = FahrzeitStatistik()
+        for w in range(0, 100):
+            stat.hinzufuegen("A", "B", float(w))
+        r = stat.abfragen([0], quantile=(0.5, 0.9))
+        self.assertAlmostEqual(r['q50'][0], 45., delta=stat.HISTOGRAMM_BREITE)
+        self.assertAlmostEqual(r['q90'][0], 85., delta=stat.HISTOGRAMM_BREITE)
+
+    def test_pfad(self):
+        stat = FahrzeitStatistik()
+        stat.hinzufuegen("A", "B", 60.)
+        stat.hinzufuegen("C", "B", 30.)
+        self.assertEqual(stat.fahrzeiten("A", "C"), [90.])
+        self.assertEqual(stat.fahrzeiten("B", "A"), [60., 60.])
+
+
+class TestFahrzeitAuswertung(unittest.TestCase):
+    def test_get_fahrzeiten(self):
+        auswertung = FahrzeitAuswertung()
+        auswertung.set_koordinaten({"X": ["1", "2"], "Y": ["3"]})
+        zug = ZugDetails()
+        auswertung.add_fahrzeit(zug, "1", "3", 100.)
+        auswertung.add_fahrzeit(zug, "2", "3", 200.)
+
+        r = auswertung.get_fahrzeiten([("1", "3"), ("2", "3"), ("X", "Y"), ("3", "1")])
+        np.testing.assert_array_equal(r['avg'][:3], [100., 200., 150.])
+        self.assertTrue(np.isnan(r['avg'][3]))
+        self.assertEqual(auswertung.get_fahrzeit("1", "3"), 100.)
+
+
+class TestAuswertung(unittest.TestCase):
+    def setUp(self):
+        anlage = Mock()
+        anlage.bahnhofgraph.bahnhoefe.return_value = ["X", "Y", "Z"]
+        anlage.bahnhofgraph.bahnhofgleise.side_effect = lambda bf: {"X": ["1", "2"], "Y": ["3"], "Z": ["4"]}[bf]
+        anlage.bahnhofgraph.anschlussstellen.return_value = []
+        self.auswertung = Auswertung(anlage)
+        zug = ZugDetails()
+        self.auswertung.fahrzeiten.add_fahrzeit(zug, "1", "3", 120.)
+        self.auswertung.fahrzeiten.add_fahrzeit(zug, "2", "3", 240.)
+        self.auswertung.fahrzeiten.add_fahrzeit(zug, "3", "4", 60.)
+
+    def test_fahrzeit_schaetzen(self):
+        # direkte gleis- und bahnhofverbindungen
+        self.assertEqual(self.auswertung.fahrzeit_schaetzen("", "1", "3"), 120.)
+        self.assertEqual(self.auswertung.fahrzeit_schaetzen("", "X", "Y"), 180.)
+        # pfad über teilstrecken
+        self.assertEqual(self.auswertung.fahrzeit_schaetzen("", "1", "4"), 180.)
+        self.assertTrue(np.isnan(self.auswertung.fahrzeit_schaetzen("", "1", "5")))
+
+    def test_liniengraph_messungen(self):
+        messungen = self.auswertung.liniengraph_messungen()
+        self.assertEqual(messungen, {("X", "Y"): {'fahrzeit_min': 2., 'fahrzeit_schnitt': 3.,
+                                                  'fahrzeit_max': 4., 'fahrten': 2},
+                                     ("Y", "Z"): {'fahrzeit_min': 1., 'fahrzeit_schnitt': 1.,
+                                                  'fahrzeit_max': 1., 'fahrten': 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
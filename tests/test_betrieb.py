@@ -1,8 +1,14 @@
+import types
 import unittest
 from mock import Mock
 
 from stskit.dispo.betrieb import Betrieb
-from stskit.model.ereignisgraph import EreignisLabelType, EreignisGraphNode
+from stskit.dispo.schnappschuss import BetriebHistorie
+from stskit.model.bahnhofgraph import BahnhofElement
+from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphEdge, EreignisLabelType, EreignisGraphNode
+from stskit.model.journal import JournalEntry, JournalEntryGroup, JournalIDType
+from stskit.model.zielgraph import ZielGraph
+from stskit.model.zuggraph import ZugGraph
 
 
 class TestEreignisGraph(unittest.TestCase):
@@ -17,3 +23,70 @@ class TestEreignisGraph(unittest.TestCase):
         self.assertIsNone(label)
         label = betrieb._ereignis_label_finden(test_data, {'An', 'Ab'})
         self.assertEqual(label, test_label)
+
+
+class TestBetriebUpdate(unittest.TestCase):
+    def setUp(self):
+        ereignisgraph = EreignisGraph()
+        self.labels = {}
+        for zid in [1, 2]:
+            labels = [EreignisLabelType(zid, 600 + 10 * zid + i, 'Ab') for i in range(3)]
+            for label in labels:
+                ereignisgraph.add_node(label, **EreignisGraphNode(zid=zid, typ='Ab', t_plan=label.zeit))
+            for u, v in zip(labels[:-1], labels[1:]):
+                ereignisgraph.add_edge(u, v, **EreignisGraphEdge(typ='P', zid=zid, dt_min=1))
+            ereignisgraph.zuganfaenge[zid] = labels[0]
+            self.labels[zid] = labels
+        ereignisgraph.prognose_index_erstellen()
+
+        zuggraph = ZugGraph()
+        zuggraph.add_node(1, zid=1)
+        zuggraph.add_node(2, zid=2)
+        self.anlage = types.SimpleNamespace(zielgraph=ZielGraph(), ereignisgraph=ereignisgraph, zuggraph=zuggraph,
+                                            archiv=None, simzeit_minuten=600)
+        self.betrieb = Betrieb()
+
+    def test_ohne_journal(self):
+        self.betrieb.update(self.anlage, "")
+        self.assertIs(self.betrieb.ereignisgraph.prognose_index, self.anlage.ereignisgraph.prognose_index)
+
+    def test_journal(self):
+        """
+        der nach dem abspielen des journals erstellte index wird bei gleicher struktur wiederverwendet.
+        """
+
+        entry = JournalEntry(target_graph='ereignisgraph', target_node=self.labels[2][1])
+        entry.add_edge(self.labels[1][2], self.labels[2][1], **EreignisGraphEdge(typ='A', zid=2, dt_min=2))
+        journal = JournalEntryGroup(entry)
+        journal.valid = True
+        self.betrieb.journal.add_entry(JournalIDType('Abfahrt', 2, BahnhofElement('Bf', 'A')), journal)
+
+        self.betrieb.update(self.anlage, "")
+        index = self.betrieb.ereignisgraph.prognose_index
+        self.assertIsNot(index, self.anlage.ereignisgraph.prognose_index)
+        self.assertEqual(len(index.kanten), 5)
+        self.assertEqual(self.betrieb.ereignisgraph.nodes[self.labels[2][1]].t_prog, 621)
+
+        self.betrieb.update(self.anlage, "")
+        self.assertIs(self.betrieb.ereignisgraph.prognose_index, index)
+
+        # geänderte kanten in der anlage ergeben einen neuen index
+        self.anlage.ereignisgraph.remove_edge(self.labels[1][1], self.labels[1][2])
+        self.anlage.ereignisgraph.prognose_index_erstellen()
+        self.betrieb.update(self.anlage, "")
+        self.assertIsNot(self.betrieb.ereignisgraph.prognose_index, index)
+        self.assertEqual(len(self.betrieb.ereignisgraph.prognose_index.kanten), 4)
+
+    def test_historie(self):
+        """
+        schnappschüsse werden nur mit eingeschalteter historie erfasst.
+        """
+
+        self.betrieb.update(self.anlage, "")
+        self.assertIsNone(self.betrieb.historie)
+
+        self.betrieb.historie = BetriebHistorie(kapazitaet=2)
+        for zeit in [600, 601, 602]:
+            self.anlage.simzeit_minuten = zeit
+            self.betrieb.update(self.anlage, "")
+        self.assertEqual([s.zeit for s in self.betrieb.historie], [601, 602])
@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from mock import patch
+
+from stskit.dispo import config
+from stskit.dispo.config import schema_validator
+
+
+class TestSchemaValidator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "test.schema.json"
+        self.schema_schreiben({"type": "object"}, 1_000_000_000)
+
+    def tearDown(self):
+        config._validatoren.pop(self.path, None)
+        self.tmp.cleanup()
+
+    def schema_schreiben(self, schema, mtime_ns):
+        self.path.write_text(json.dumps(schema), encoding="utf-8")
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_cache(self):
+        with patch("stskit.dispo.config.json_laden", wraps=config.json_laden) as laden:
+            schema1, validator1 = schema_validator(self.path)
+            schema2, validator2 = schema_validator(str(self.path))
+        self.assertEqual(laden.call_count, 1)
+        self.assertIs(validator2, validator1)
+        self.assertIs(schema2, schema1)
+        self.assertTrue(validator1.is_valid({}))
+        self.assertFalse(validator1.is_valid([]))
+
+    def test_invalidieren(self):
+        schema1, validator1 = schema_validator(self.path)
+        self.schema_schreiben({"type": "array"}, 2_000_000_000)
+        schema2, validator2 = schema_validator(self.path)
+        self.assertIsNot(validator2, validator1)
+        self.assertEqual(schema2, {"type": "array"})
+        self.assertTrue(validator2.is_valid([]))
+        self.assertFalse(validator2.is_valid({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import datetime
+import json
+import types
+import unittest
+
+import trio
+import trio.testing
+
+from stskit.dienst import DispoDienst, ZustandsVerteiler, delta_berechnen, delta_zusammenfassen, json_kodieren, \
+    parse_args
+from stskit.model.bahnhofgraph import BahnhofElement
+from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode, EreignisLabelType
+from stskit.model.zuggraph import ZugGraph
+
+
+class TestDelta(unittest.TestCase):
+    def test_delta_berechnen(self):
+        alt = {'zuege': {'1': {'gleis': 'A'}, '2': {'gleis': 'B'}}}
+        neu = {'zuege': {'1': {'gleis': 'C'}, '3': {'gleis': 'D'}}}
+        delta = delta_berechnen(alt, neu)
+        self.assertEqual(delta, {'zuege': {'geaendert': {'1': {'gleis': 'C'}, '3': {'gleis': 'D'}},
+                                           'entfernt': ['2']}})
+        self.assertEqual(delta_berechnen(neu, neu), {})
+
+    def test_delta_zusammenfassen(self):
+        d1 = {'zuege': {'geaendert': {'1': 'a', '2': 'b'}, 'entfernt': ['3']}}
+        d2 = {'zuege': {'geaendert': {'3': 'c'}, 'entfernt': ['2']},
+              'slots': {'geaendert': {'x': 1}, 'entfernt': []}}
+        d = delta_zusammenfassen(d1, d2)
+        self.assertEqual(d['zuege'], {'geaendert': {'1': 'a', '3': 'c'}, 'entfernt': ['2']})
+        self.assertEqual(d['slots'], {'geaendert': {'x': 1}, 'entfernt': []})
+
+
+class TestZustandsVerteiler(unittest.TestCase):
+    def test_versionen(self):
+        verteiler = ZustandsVerteiler(verlauf_laenge=2)
+        self.assertIsNone(verteiler.veroeffentlichen({}))
+        self.assertEqual(verteiler.version, 0)
+
+        verteiler.veroeffentlichen({'zuege': {'1': 'a'}})
+        verteiler.veroeffentlichen({'zuege': {'1': 'b', '2': 'c'}})
+        verteiler.veroeffentlichen({'zuege': {'2': 'c'}})
+        self.assertEqual(verteiler.version, 3)
+
+        msg = verteiler.delta_seit(1)
+        self.assertEqual(msg['version'], 3)
+        self.assertEqual(msg['delta']['zuege'], {'geaendert': {'2': 'c'}, 'entfernt': ['1']})
+        self.assertEqual(verteiler.delta_seit(3)['delta'], {})
+
+        # version 0 ist nicht mehr im verlauf
+        msg = verteiler.delta_seit(0)
+        self.assertTrue(msg['voll'])
+        self.assertEqual(msg['zuege'], {'2': 'c'})
+
+    def test_abonnieren(self):
+        async def ablauf():
+            verteiler = ZustandsVerteiler(puffer=1)
+            kanal = verteiler.abonnieren()
+            verteiler.veroeffentlichen({'zuege': {'1': 'a'}})
+            nachricht = kanal.receive_nowait()
+            self.assertEqual(nachricht['version'], 1)
+            self.assertEqual(nachricht['delta']['zuege']['geaendert'], {'1': 'a'})
+
+            # zu langsamer abonnent wird abgemeldet
+            verteiler.veroeffentlichen({'zuege': {'1': 'b'}})
+            verteiler.veroeffentlichen({'zuege': {'1': 'c'}})
+            self.assertEqual(len(verteiler._abonnenten), 0)
+
+        trio.run(ablauf)
+
+    def test_json_kodieren(self):
+        daten = json.loads(json_kodieren({'zeit': datetime.time(12, 30), 'gleis': str(BahnhofElement('Gl', '1'))}))
+        self.assertEqual(daten, {'zeit': '12:30:00', 'gleis': 'Gl 1'})
+
+
+class TestDispoDienst(unittest.TestCase):
+    def setUp(self):
+        self.dienst = DispoDienst(parse_args([]))
+
+    def test_zustand_erfassen(self):
+        self.assertEqual(self.dienst.zustand_erfassen(), {'zuege': {}, 'prognose': {}, 'slots': {}, 'warnungen': {}})
+
+        zuggraph = ZugGraph()
+        zuggraph.add_node(1, zid=1, name="RE 1", von="A", nach="B", gleis="2", plangleis="1", amgleis=True,
+                          sichtbar=True, verspaetung=3)
+        zuggraph.add_node(2, zid=2, name="S 2", ausgefahren=True)
+        ereignisgraph = EreignisGraph()
+        ereignisgraph.add_node(EreignisLabelType(1, 600, 'An'),
+                               **EreignisGraphNode(zid=1, typ='An', plan='1', gleis='2', t_plan=600, t_prog=603))
+        ereignisgraph.add_node(EreignisLabelType(1, 601, 'E'), **EreignisGraphNode(zid=1, typ='E', t_plan=601))
+        self.dienst.zentrale.anlage = types.SimpleNamespace(zuggraph=zuggraph)
+        self.dienst.zentrale.betrieb = types.SimpleNamespace(ereignisgraph=ereignisgraph)
+
+        gleis = BahnhofElement('Gl', '2')
+        slot = types.SimpleNamespace(key=(gleis, 1, 600), gleis=gleis, zid=1, zugname="RE 1", zeit=600, dauer=2,
+                                     abfahrt=602, verspaetung_an=3, verspaetung_ab=3, titel="RE 1", farbe="r")
+        slot2 = types.SimpleNamespace(**{**vars(slot), 'key': (gleis, 3, 601), 'zid': 3})
+        warnung = types.SimpleNamespace(key={slot2.key, slot.key}, gleise={gleis}, zeit=601, dauer=1,
+                                        status='gleis')
+        self.dienst.gleisbelegung = types.SimpleNamespace(update=lambda: None,
+                                                          slots={slot.key: slot, slot2.key: slot2},
+                                                          warnungen={'w': warnung})
+
+        zustand = self.dienst.zustand_erfassen()
+        self.assertEqual(zustand['zuege'], {'1': {'name': "RE 1", 'von': "A", 'nach': "B", 'gleis': "2",
+                                                  'plangleis': "1", 'amgleis': True, 'sichtbar': True,
+                                                  'verspaetung': 3}})
+        self.assertEqual(zustand['prognose'], {'1:An:600': {'zid': 1, 'typ': 'An', 'plan': '1', 'gleis': '2',
+                                                            't_plan': 600, 't_prog': 603, 't_mess': None}})
+        self.assertEqual(set(zustand['slots']), {'Gl 2:1:600', 'Gl 2:3:601'})
+        self.assertEqual(zustand['slots']['Gl 2:1:600']['gleis'], 'Gl 2')
+        self.assertEqual(zustand['warnungen'], {'Gl 2:1:600|Gl 2:3:601': {
+            'gleise': ['Gl 2'], 'zeit': 601, 'dauer': 1, 'status': 'gleis', 'slots': ['Gl 2:1:600', 'Gl 2:3:601']}})
+        self.assertIs(self.dienst.gleisbelegung.anlage, self.dienst.zentrale.anlage)
+
+    async def anfrage(self, zeile: bytes) -> bytes:
+        client, server = trio.testing.memory_stream_pair()
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(self.dienst.http_verbindung, server)
+            await client.send_all(zeile + b"\r\nHost: localhost\r\n\r\n")
+            antwort = b""
+            with trio.move_on_after(1):
+                while teil := await client.receive_some():
+                    antwort += teil
+                    if b"\r\n\r\n" in antwort and antwort.endswith(b"}"):
+                        break
+        return antwort
+
+    def test_http(self):
+        self.dienst.verteiler.veroeffentlichen({'zuege': {'1': 'a'}}, simzeit=600)
+        self.dienst.verteiler.veroeffentlichen({'zuege': {'1': 'b'}}, simzeit=601)
+
+        antwort = trio.run(self.anfrage, b"GET /snapshot HTTP/1.1")
+        kopf, body = antwort.split(b"\r\n\r\n", 1)
+        self.assertTrue(kopf.startswith(b"HTTP/1.1 200 OK"))
+        self.assertEqual(json.loads(body), {'version': 2, 'simzeit': 601, 'voll': True, 'zuege': {'1': 'b'}})
+
+        antwort = trio.run(self.anfrage, b"GET /delta?seit=1 HTTP/1.1")
+        body = json.loads(antwort.split(b"\r\n\r\n", 1)[1])
+        self.assertEqual(body['delta'], {'zuege': {'geaendert': {'1': 'b'}, 'entfernt': []}})
+
+        self.assertTrue(trio.run(self.anfrage, b"POST /snapshot HTTP/1.1").startswith(b"HTTP/1.1 405"))
+        self.assertTrue(trio.run(self.anfrage, b"GET /nichts HTTP/1.1").startswith(b"HTTP/1.1 404"))
+        self.assertTrue(trio.run(self.anfrage, b"GET").startswith(b"HTTP/1.1 400"))
+
+    def test_http_fehler(self):
+        """
+        ein fehler beim beantworten wird protokolliert und bricht den dienst nicht ab.
+        """
+
+        def fehler():
+            raise RuntimeError("test")
+
+        self.dienst.verteiler.snapshot = fehler
+        with self.assertLogs('stskit.dienst', 'ERROR'):
+            antwort = trio.run(self.anfrage, b"GET /snapshot HTTP/1.1")
+        self.assertEqual(antwort, b"")
+
+    def test_events(self):
+        async def ablauf():
+            client, server = trio.testing.memory_stream_pair()
+            with trio.fail_after(2):
+                await verbinden(client, server)
+
+        async def verbinden(client, server):
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(self.dienst.http_verbindung, server)
+                await client.send_all(b"GET /events HTTP/1.1\r\n\r\n")
+
+                daten = b""
+                while b"event: snapshot" not in daten or not daten.endswith(b"\n\n"):
+                    daten += await client.receive_some()
+                kopf, snapshot = daten.split(b"\r\n\r\n", 1)
+                self.assertIn(b"Content-Type: text/event-stream", kopf)
+                self.assertTrue(snapshot.startswith(b"event: snapshot\nid: 0\ndata: "))
+
+                self.dienst.verteiler.veroeffentlichen({'zuege': {'1': 'a'}}, simzeit=600)
+                daten = b""
+                while not daten.endswith(b"\n\n"):
+                    daten += await client.receive_some()
+                zeilen = daten.split(b"\n")
+                self.assertEqual(zeilen[:2], [b"event: delta", b"id: 1"])
+                nachricht = json.loads(zeilen[2].removeprefix(b"data: "))
+                self.assertEqual(nachricht['delta']['zuege']['geaendert'], {'1': 'a'})
+
+                # ein getrennter client beendet die verbindung beim nächsten delta
+                await client.aclose()
+                self.dienst.verteiler.veroeffentlichen({'zuege': {'1': 'b'}}, simzeit=601)
+
+        trio.run(ablauf)
+
+
+if __name__ == '__main__':
+    unittest.main()
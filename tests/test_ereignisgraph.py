@@ -1,3 +1,4 @@
+import copy
 import unittest
 
 import networkx as nx
@@ -265,6 +266,40 @@ class TestEreignisGraph(unittest.TestCase):
             types[typ] += 1
         self.assertDictEqual(types, expected_types, "Kantentypen")
 
+    def test_import_inkrementell(self):
+        """
+        Import beschränkt auf geänderte Züge
+
+        Alle Züge von Szenario 1 sind miteinander verknüpft und werden daher gemeinsam importiert.
+        """
+
+        self.szenario1()
+        for fid in self.zielgraph.nodes:
+            if not any(v.zid == fid.zid for v in self.zielgraph.predecessors(fid)):
+                self.zielgraph.zuganfaenge[fid.zid] = fid
+
+        voll = self.ereignisgraph
+        teil = EreignisGraph()
+        teil.zielgraph_importieren(self.zielgraph, zids={14})
+        self.assertSetEqual(set(teil.nodes), set(voll.nodes))
+        self.assertSetEqual(set(teil.edges), set(voll.edges))
+        self.assertDictEqual(teil.zuganfaenge, voll.zuganfaenge)
+        self.assertDictEqual(teil.zugenden, voll.zugenden)
+
+        leer = EreignisGraph()
+        leer.zielgraph_importieren(self.zielgraph, zids={99})
+        self.assertEqual(len(leer), 0)
+
+        # verspätung von zug 11 wird nur mit zids übernommen
+        fid = self.zielgraph.zuganfaenge[11]
+        self.zielgraph.nodes[fid]['v_ab'] = 3
+        label = voll.zuganfaenge[11]
+        t_prog = voll.nodes[label]['t_prog']
+        voll.zielgraph_importieren(self.zielgraph, zids=set())
+        self.assertEqual(voll.nodes[label]['t_prog'], t_prog)
+        voll.zielgraph_importieren(self.zielgraph, zids={11})
+        self.assertEqual(voll.nodes[label]['t_prog'], t_prog + 3)
+
     def test_zugpfad(self):
         """
         Zugpfad-Methode testen
@@ -335,6 +370,38 @@ class TestEreignisGraph(unittest.TestCase):
         exp = [(13, 'Ab'), (13, 'An'), (13, 'K'), (13, 'Ab'), (13, 'An'), (13, 'F'), (14, 'Ab'), (14, 'An')]
         self.assertListEqual(act, list(reversed(exp)), "Zug 14 fluegeln")
 
+    def test_zugpfad_aktualisieren(self):
+        """
+        Zwischengespeicherte Zugpfade nach Änderungen am Graphen testen
+        """
+        self.szenario1()
+        pfad = list(self.ereignisgraph.zugpfad(11, ersatz=True))
+        self.assertEqual(len(pfad), 7)
+
+        # zusätzlichen Halt zwischen erster Abfahrt und Ankunft einfügen
+        ab, an = pfad[0], pfad[1]
+        kante = self.ereignisgraph.edges[ab, an]
+        self.ereignisgraph.remove_edge(ab, an)
+        an_neu = EreignisLabelType(11, ab.zeit + 1, 'An')
+        ab_neu = EreignisLabelType(11, ab.zeit + 2, 'Ab')
+        self.ereignisgraph.add_node(an_neu, typ='An', zid=11)
+        self.ereignisgraph.add_node(ab_neu, typ='Ab', zid=11)
+        self.ereignisgraph.add_edge(ab, an_neu, **kante)
+        self.ereignisgraph.add_edge(an_neu, ab_neu, typ='H')
+        self.ereignisgraph.add_edge(ab_neu, an, **kante)
+
+        act = list(self.ereignisgraph.zugpfad(11, ersatz=True))
+        self.assertListEqual(act, [ab, an_neu, ab_neu] + pfad[1:], "Zug 11 mit Zusatzhalt")
+        act = list(self.ereignisgraph.rueckpfad(12, ersatz=True))
+        self.assertListEqual(act, list(reversed([ab, an_neu, ab_neu] + pfad[1:])), "Zug 12 rückwärts")
+
+        # Ersatzereignis entfernen: Zug 11 endet bei der letzten Ankunft
+        self.ereignisgraph.remove_node(pfad[4])
+        act = list(self.ereignisgraph.zugpfad(11, ersatz=True))
+        self.assertListEqual(act, [ab, an_neu, ab_neu] + pfad[1:4], "Zug 11 ohne Ersatz")
+        act = list(self.ereignisgraph.zugpfad(12, start=pfad[5], ersatz=True))
+        self.assertListEqual(act, pfad[5:], "Zug 12 ab Start")
+
     def test_prognose_1(self):
         """
         Prognose testen: keine Verspätungen
@@ -392,6 +459,62 @@ class TestEreignisGraph(unittest.TestCase):
         _test(20)
         _test(-5)
 
+    def _prognosen_vergleichen(self, msg: str):
+        vektoriell = copy.deepcopy(self.ereignisgraph)
+        self.ereignisgraph.prognose()
+        vektoriell.prognose_vektoriell()
+        exp = dict(self.ereignisgraph.nodes(data='t_prog'))
+        act = dict(vektoriell.nodes(data='t_prog'))
+        self.assertDictEqual(act, exp, msg)
+
+    def test_prognose_vektoriell(self):
+        """
+        Vektorielle Prognose mit der knotenweisen Prognose vergleichen
+        """
+
+        for szenario in [self.szenario1, self.szenario2, self.szenario3]:
+            szenario()
+            self._prognosen_vergleichen(szenario.__name__)
+
+        self.szenario1()
+        start_node = self.ereignisgraph.nodes[self.ereignisgraph.zuganfaenge[11]]
+        start_node.t_mess = start_node.t_plan + 10
+        self._prognosen_vergleichen("Eingangsverspätung")
+
+        # fdl-korrekturen: wartezeit, vorzeitige abfahrt und abwarten
+        pfad = list(self.ereignisgraph.zugpfad(13))
+        self.ereignisgraph.edges[pfad[3], pfad[4]]['dt_fdl'] = 3
+        self.ereignisgraph.edges[pfad[5], pfad[6]]['dt_fdl'] = -2
+        self.ereignisgraph.edges[pfad[5], pfad[6]]['dt_max'] = 1
+        self.ereignisgraph.add_edge(list(self.ereignisgraph.zugpfad(11))[1], pfad[1], typ='A', dt_min=2)
+        self._prognosen_vergleichen("Fdl-Korrekturen")
+
+    def test_prognose_index(self):
+        """
+        Zwischenspeicher der Graphstruktur für die vektorielle Prognose
+        """
+
+        self.szenario1()
+        self.ereignisgraph.prognose_vektoriell()
+        index = self.ereignisgraph._prognose_index
+        self.assertEqual(len(index.labels), len(self.ereignisgraph))
+        self.assertEqual(len(index.kanten), self.ereignisgraph.number_of_edges())
+        self.assertIs(copy.deepcopy(self.ereignisgraph)._prognose_index, index)
+
+        # attributänderungen behalten den index
+        start = self.ereignisgraph.zuganfaenge[11]
+        self.ereignisgraph.nodes[start].t_mess = 310
+        self.ereignisgraph.prognose_vektoriell()
+        self.assertIs(self.ereignisgraph._prognose_index, index)
+
+        pfad = list(self.ereignisgraph.zugpfad(11))
+        self.ereignisgraph.add_edge(pfad[0], pfad[1], dt_min=5)
+        self.assertIs(self.ereignisgraph._prognose_index, index)
+
+        # strukturänderungen verwerfen den index
+        self.ereignisgraph.add_edge(pfad[0], pfad[2], typ='A')
+        self.assertIsNone(self.ereignisgraph._prognose_index)
+
     def test_ereignis_suchen(self):
         self.szenario1()
 
@@ -409,6 +532,17 @@ class TestEreignisGraph(unittest.TestCase):
         act = self.ereignisgraph.zug_ereignis_suchen(12, start=prev_label, typ='Ab', quelle='sts')
         self.assertEqual(act, exp)
 
+        # start ausserhalb des gesuchten bereichs
+        with self.assertRaises(ValueError):
+            self.ereignisgraph.zug_ereignis_suchen(11, start=prev_label, typ='Ab')
+
+        # geaenderte gleisangabe wird im index nachgefuehrt
+        self.ereignisgraph.add_node(exp, plan='B 2')
+        with self.assertRaises(ValueError):
+            self.ereignisgraph.zug_ereignis_suchen(12, start=prev_label, plan=prev_plan, typ='Ab')
+        act = self.ereignisgraph.zug_ereignis_suchen(12, start=prev_label, plan='B 2', typ='Ab')
+        self.assertEqual(act, exp)
+
     def szenario2(self):
         """
         Loktausch zwischen 2 Zuegen (Stw Jenbach)
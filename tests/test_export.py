@@ -0,0 +1,176 @@
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from stskit.dispo.prognoseexport import PrognoseExport, prognosen_laden
+from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode, EreignisLabelType
+from stskit.model.zielgraph import ZielGraph
+from stskit.utils.export import ColumnarWriter, GraphDumper, read_columnar, read_graph_dump
+
+
+class TestGraphDumper(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_dump_laden(self):
+        g = ZielGraph()
+        g.add_node(1, typ='H', plan='A')
+        g.add_node(2, typ='D', plan='B')
+        g.add_edge(1, 2, typ='P')
+
+        dumper = GraphDumper(min_interval=0)
+        self.assertTrue(dumper.dump(g, self.path / "test.zielgraph"))
+        g.add_node(3, typ='H', plan='C')
+        dumper.flush()
+
+        r = read_graph_dump(self.path / "test.zielgraph.pickle")
+        self.assertIsInstance(r, ZielGraph)
+        self.assertEqual(set(r.nodes), {1, 2})
+        self.assertEqual(r.nodes[2]['plan'], 'B')
+        self.assertEqual(r.edges[1, 2]['typ'], 'P')
+
+    def test_rate_limit(self):
+        g = ZielGraph()
+        dumper = GraphDumper(min_interval=3600)
+        self.assertTrue(dumper.dump(g, self.path / "a"))
+        self.assertFalse(dumper.dump(g, self.path / "a"))
+        self.assertTrue(dumper.dump(g, self.path / "b"))
+        self.assertTrue(dumper.dump(g, self.path / "a", force=True))
+        dumper.flush()
+
+    def test_rotation(self):
+        g = ZielGraph()
+        dumper = GraphDumper(min_interval=0, backup_count=2)
+        for i in range(4):
+            g.add_node(i)
+            dumper.dump(g, self.path / "g")
+            dumper.flush()
+
+        namen = sorted(p.name for p in self.path.iterdir())
+        self.assertEqual(namen, ["g.1.pickle", "g.2.pickle", "g.pickle"])
+        self.assertEqual(len(read_graph_dump(self.path / "g.pickle")), 4)
+        self.assertEqual(len(read_graph_dump(self.path / "g.2.pickle")), 2)
+
+
+class TestColumnarWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "test"
+        self.columns = {'t': 'i4', 'id': 'i4', 'name': 'category', 'wert': 'f4'}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_schreiben_laden(self):
+        writer = ColumnarWriter(self.path, self.columns, stamp='t', chunk_rows=2)
+        writer.append([(1, 'a', 1.5), (2, None, None)], stamp=10)
+        writer.append([(1, 'b', 2.5), (2, 'a', 3.0)], stamp=11)
+        writer.close()
+
+        self.assertEqual(len(list(self.path.parent.glob("test-*.npz"))), 2)
+        r = read_columnar(self.path)
+        self.assertEqual(list(r), list(self.columns))
+        np.testing.assert_array_equal(r['t'], [10, 10, 11, 11])
+        np.testing.assert_array_equal(r['id'], [1, 2, 1, 2])
+        np.testing.assert_array_equal(r['name'], ['a', '', 'b', 'a'])
+        np.testing.assert_array_equal(r['wert'], np.array([1.5, np.nan, 2.5, 3.0], dtype=np.float32))
+
+    def test_nur_aenderungen(self):
+        writer = ColumnarWriter(self.path, self.columns, stamp='t', key=('id',))
+        writer.append([(1, 'a', 1.0), (2, 'a', 2.0)], stamp=10)
+        writer.append([(1, 'a', 1.0), (2, 'a', 2.5)], stamp=11)
+        writer.append([(1, 'a', 1.0), (2, 'a', 2.5), (3, 'c', None)], stamp=12)
+        writer.close()
+
+        r = read_columnar(self.path)
+        np.testing.assert_array_equal(r['t'], [10, 10, 11, 12])
+        np.testing.assert_array_equal(r['id'], [1, 2, 2, 3])
+
+    def test_fortsetzen(self):
+        writer = ColumnarWriter(self.path, self.columns, stamp='t')
+        writer.append([(1, 'a', 1.0)], stamp=10)
+        writer.close()
+        writer = ColumnarWriter(self.path, self.columns, stamp='t')
+        writer.append([(1, 'a', 2.0)], stamp=11)
+        writer.close()
+
+        r = read_columnar(self.path)
+        np.testing.assert_array_equal(r['t'], [10, 11])
+        self.assertEqual(read_columnar(self.path.with_name("leer")), {})
+
+    def test_spaltenreihenfolge(self):
+        """
+        die stempelspalte muss nicht die erste sein.
+        """
+
+        columns = {'id': 'i4', 'name': 'category', 't': 'i4', 'wert': 'f4'}
+        writer = ColumnarWriter(self.path, columns, stamp='t')
+        writer.append([(1, 'a', 1.5), (2, 'b', 2.5)], stamp=10)
+        writer.close()
+
+        r = read_columnar(self.path)
+        self.assertEqual(list(r), list(columns))
+        np.testing.assert_array_equal(r['id'], [1, 2])
+        np.testing.assert_array_equal(r['name'], ['a', 'b'])
+        np.testing.assert_array_equal(r['t'], [10, 10])
+        np.testing.assert_array_equal(r['wert'], np.array([1.5, 2.5], dtype=np.float32))
+
+    def test_geloescht(self):
+        columns = {'t': 'i4', 'id': 'i4', 'weg': 'bool', 'name': 'category', 'wert': 'f4'}
+        writer = ColumnarWriter(self.path, columns, stamp='t', key=('id',), deleted='weg')
+        writer.append([(1, 'a', 1.0), (2, 'b', 2.0)], stamp=10)
+        writer.append([(1, 'a', 1.0)], stamp=11)
+        writer.append([(1, 'a', 1.0)], stamp=12)
+        writer.append([(1, 'a', 1.0), (2, 'b', 2.0)], stamp=13)
+        writer.close()
+
+        r = read_columnar(self.path)
+        np.testing.assert_array_equal(r['t'], [10, 10, 11, 13])
+        np.testing.assert_array_equal(r['id'], [1, 2, 2, 2])
+        np.testing.assert_array_equal(r['weg'], [False, False, True, False])
+        np.testing.assert_array_equal(r['name'], ['a', 'b', '', 'b'])
+        self.assertTrue(np.isnan(r['wert'][2]))
+
+        with self.assertRaises(ValueError):
+            ColumnarWriter(self.path, columns, stamp='t', deleted='weg')
+        with self.assertRaises(ValueError):
+            ColumnarWriter(self.path, self.columns | {'weg': 'bool'}, stamp='t', key=('name',), deleted='weg')
+
+
+class TestPrognoseExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_archivierte_zuege(self):
+        graph = EreignisGraph()
+        for zid in [1, 2]:
+            label = EreignisLabelType(zid, 600, 'Ab')
+            graph.add_node(label, **EreignisGraphNode(zid=zid, zeit=600, typ='Ab', plan='1', t_plan=600))
+        betrieb = types.SimpleNamespace(anlage=types.SimpleNamespace(simzeit_minuten=600), ereignisgraph=graph)
+
+        export = PrognoseExport(self.tmp.name, "test")
+        export.erfassen(betrieb)
+        graph.remove_node(EreignisLabelType(2, 600, 'Ab'))
+        betrieb.anlage.simzeit_minuten = 601
+        export.erfassen(betrieb)
+        export.schliessen()
+
+        r = prognosen_laden(self.tmp.name, "test")
+        np.testing.assert_array_equal(r['abfrage'], [600, 600, 601])
+        np.testing.assert_array_equal(r['zid'], [1, 2, 2])
+        np.testing.assert_array_equal(r['geloescht'], [False, False, True])
+        np.testing.assert_array_equal(r['typ'], ['Ab', 'Ab', 'Ab'])
+
+
+if __name__ == '__main__':
+    unittest.main()
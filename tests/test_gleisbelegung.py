@@ -6,7 +6,7 @@ from mock import Mock, patch
 from unittest import TestCase, main
 
 from stskit.model.bahnhofgraph import BahnhofElement
-from stskit.plots.gleisbelegung import Gleisbelegung, Slot, SlotWarnung
+from stskit.dispo.gleisbelegung import Gleisbelegung, Slot, SlotWarnung
 
 
 class GleisbelegungTest(TestCase):
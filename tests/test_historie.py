@@ -0,0 +1,121 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from stskit.dispo.auswertung import FahrzeitAuswertung, FahrzeitStatistik
+from stskit.dispo.historie import DATEINAME, FahrzeitHistorie
+from stskit.model.bahnhofgraph import BahnsteigGraphNode
+from stskit.model.liniengraph import LinienGraph, LinienLabelType
+from stskit.model.zielgraph import FahrzeitSpeicher, ZielGraphNode
+from stskit.plugin.stsobj import ZugDetails
+
+
+class TestFahrzeitHistorie(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_speichern_laden(self):
+        historie = FahrzeitHistorie.im_verzeichnis(self.path, 11)
+        auswertung = FahrzeitAuswertung()
+        auswertung.set_koordinaten({"X": ["1", "2"], "Y": ["3"]})
+        auswertung.historie_laden(historie)
+        zug = ZugDetails()
+        auswertung.add_fahrzeit(zug, "1", "3", 120.)
+        auswertung.add_fahrzeit(zug, "2", "3", 240.)
+        historie.schliessen()
+
+        andere_anlage = FahrzeitHistorie.im_verzeichnis(self.path, 12)
+        self.assertEqual(andere_anlage.aggregat('bahnhof'), {})
+
+        neu = FahrzeitAuswertung()
+        neu.historie_laden(FahrzeitHistorie.im_verzeichnis(self.path, 11))
+        self.assertEqual(neu.get_fahrzeit("1", "3"), 120.)
+        self.assertEqual(len(neu.bahnhof_zeiten), 1)
+
+        aggregat = FahrzeitHistorie.im_verzeichnis(self.path, 11).aggregat('bahnhof')
+        self.assertEqual(aggregat[("X", "Y")], {'fahrzeit_min': 2., 'fahrzeit_schnitt': 3.,
+                                                'fahrzeit_max': 4., 'fahrten': 2})
+
+    def test_statistik(self):
+        """
+        die zusammengefasste statistik entspricht der statistik der einzelnen messpunkte.
+        """
+
+        historie = FahrzeitHistorie.im_verzeichnis(self.path, 11)
+        werte = [95., 120., 121., 180., 4000.]
+        for wert in werte:
+            historie.eintragen('gleis', "1", "3", wert)
+        historie.schliessen()
+
+        geladen = FahrzeitAuswertung()
+        geladen.historie_laden(FahrzeitHistorie.im_verzeichnis(self.path, 11))
+        einzeln = FahrzeitStatistik()
+        for wert in werte:
+            einzeln.hinzufuegen("1", "3", wert)
+
+        i = geladen.gleis_zeiten.zeile("1", "3")
+        erwartet = einzeln.abfragen([0])
+        resultat = geladen.gleis_zeiten.abfragen([i])
+        for key in erwartet:
+            np.testing.assert_allclose(resultat[key], erwartet[key], err_msg=key)
+
+    def test_bereinigen(self):
+        historie = FahrzeitHistorie.im_verzeichnis(self.path, 11)
+        historie.eintragen('bahnhof', "X", "Y", 120.)
+        historie.schliessen()
+
+        con = sqlite3.connect(self.path / DATEINAME)
+        with con:
+            con.execute("UPDATE messungen SET zeitpunkt = zeitpunkt - 2 * 24 * 3600")
+        con.close()
+
+        historie = FahrzeitHistorie(self.path / DATEINAME, 11, max_alter=24 * 3600)
+        historie.eintragen('bahnhof', "X", "Y", 240.)
+        historie.schliessen()
+
+        historie.max_alter = None
+        self.assertEqual(list(historie.messungen('bahnhof')), [("X", "Y", 240.)])
+
+    def test_liniengraph(self):
+        lg = LinienGraph()
+        x = LinienLabelType("Bf", "X")
+        y = LinienLabelType("Bf", "Y")
+        z = LinienLabelType("Bf", "Z")
+        for knoten in (x, y, z):
+            lg.add_node(knoten, typ=knoten.typ, name=knoten.name, fahrten=1)
+        lg.add_edge(x, y, fahrzeit_min=4, fahrzeit_max=4, fahrten=1, fahrzeit_summe=4., fahrzeit_schnitt=4.)
+        lg.add_edge(y, z, fahrzeit_min=5, fahrzeit_max=5, fahrten=1, fahrzeit_summe=5., fahrzeit_schnitt=5.)
+
+        messungen = {("Y", "X"): {'fahrzeit_min': 2., 'fahrzeit_schnitt': 3., 'fahrzeit_max': 4., 'fahrten': 3}}
+        lg.messungen_uebernehmen(messungen)
+        lg.messungen_uebernehmen(messungen)
+
+        kante = lg.edges[x, y]
+        self.assertEqual(kante['fahrten'], 4)
+        self.assertEqual(kante['fahrten_gemessen'], 3)
+        self.assertEqual(kante['fahrzeit_min'], 2.)
+        self.assertAlmostEqual(kante['fahrzeit_schnitt'], 13. / 4)
+        self.assertEqual(lg.edges[y, z]['fahrten'], 1)
+        self.assertNotIn('fahrten_gemessen', lg.edges[y, z])
+
+        speicher = FahrzeitSpeicher()
+        self.assertAlmostEqual(speicher.fahrzeit(lg, y, x, "fahrzeit_schnitt"), 13. / 4)
+        self.assertEqual(speicher.fahrzeit(lg, x, z, "fahrzeit_schnitt"), 1)
+
+        # neue kanten werden bei der erstellung vorbelegt
+        lg.remove_edge(x, y)
+        lg.linie_eintragen(ZielGraphNode(typ='D', p_ab=600), BahnsteigGraphNode(typ='Bf', name='X'),
+                           ZielGraphNode(typ='D', p_an=603), BahnsteigGraphNode(typ='Bf', name='Y'))
+        kante = lg.edges[x, y]
+        self.assertEqual(kante['fahrten'], 4)
+        self.assertEqual(kante['fahrzeit_max'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import importlib
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from stskit.utils.importtime import ImportTimer
+
+
+class TestImportTimer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = Path(self.tmp.name)
+        pkg = path / "_importtime_test"
+        pkg.mkdir()
+        (pkg / "__init__.py").write_text("")
+        (pkg / "aussen.py").write_text("import time\nimport _importtime_test.innen\ntime.sleep(0.02)\n")
+        (pkg / "innen.py").write_text("import time\ntime.sleep(0.05)\n")
+        sys.path.insert(0, str(path))
+        self.timer = ImportTimer()
+
+    def tearDown(self):
+        self.timer.uninstall()
+        sys.path.remove(self.tmp.name)
+        for name in [m for m in sys.modules if m.startswith("_importtime_test")]:
+            del sys.modules[name]
+        self.tmp.cleanup()
+
+    def test_verschachtelt(self):
+        self.timer.install()
+        self.timer.install()
+        self.assertEqual(sys.meta_path.count(self.timer), 1)
+        importlib.import_module("_importtime_test.aussen")
+        self.timer.uninstall()
+        self.assertNotIn(self.timer, sys.meta_path)
+
+        records = self.timer.records
+        # das paket ist fertig geladen, bevor das untermodul geladen wird
+        self.assertIsNone(records["_importtime_test"].parent)
+        self.assertIsNone(records["_importtime_test.aussen"].parent)
+        self.assertEqual(records["_importtime_test.innen"].parent, "_importtime_test.aussen")
+
+        aussen = records["_importtime_test.aussen"]
+        innen = records["_importtime_test.innen"]
+        self.assertGreaterEqual(innen.cumulative, 0.05)
+        self.assertGreaterEqual(aussen.cumulative, innen.cumulative + 0.02)
+        self.assertLess(aussen.self_time, aussen.cumulative - 0.04)
+        self.assertAlmostEqual(self.timer.total("_importtime_test.innen"), innen.cumulative)
+        self.assertEqual(self.timer.total("nicht_geladen"), 0.)
+
+    def test_report(self):
+        self.timer.install()
+        importlib.import_module("_importtime_test.aussen")
+        self.timer.uninstall()
+
+        bericht = self.timer.report(count=1)
+        zeilen = bericht.splitlines()
+        self.assertIn("3 modules", zeilen[0])
+        self.assertEqual(zeilen[1], "top-level imports (cumulative s):")
+        self.assertTrue(zeilen[2].endswith("_importtime_test.aussen"))
+        self.assertEqual(zeilen[3], "modules (self s):")
+        self.assertTrue(zeilen[4].endswith("_importtime_test.innen"))
+        self.assertEqual(len(zeilen), 5)
+
+    def test_vorher_geladen(self):
+        importlib.import_module("_importtime_test.innen")
+        self.timer.install()
+        importlib.import_module("_importtime_test.aussen")
+        self.timer.uninstall()
+
+        self.assertIn("_importtime_test.aussen", self.timer.records)
+        self.assertNotIn("_importtime_test.innen", self.timer.records)
+
+
+class TestStartImporte(unittest.TestCase):
+    def gui_module(self, modul: str) -> str:
+        """
+        modul in einem neuen prozess importieren und die geladenen gui-pakete auflisten.
+        """
+
+        code = f"import sys, {modul}; print(sorted(m for m in ('matplotlib', 'PySide6') if m in sys.modules))"
+        ergebnis = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                  cwd=Path(__file__).parent.parent, check=True)
+        return ergebnis.stdout.strip()
+
+    def test_zentrale_ohne_gui(self):
+        """
+        die datenzentrale darf matplotlib und PySide6 nicht beim import laden.
+        """
+
+        self.assertEqual(self.gui_module("stskit.zentrale"), "[]")
+
+    def test_dienst_ohne_gui(self):
+        """
+        der hintergrunddienst läuft ohne matplotlib und PySide6.
+        """
+
+        self.assertEqual(self.gui_module("stskit.dienst"), "[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+
+import networkx as nx
+
+from stskit.utils.layout import LayoutCache, graph_signature, normalize_positions, seed_positions, spring_layout
+
+
+class TestLayout(unittest.TestCase):
+    def test_graph_signature(self):
+        g1 = nx.Graph([(1, 2), (2, 3)])
+        g2 = nx.Graph([(3, 2), (2, 1)])
+        g3 = nx.Graph([(1, 2), (1, 3)])
+        self.assertEqual(graph_signature(g1), graph_signature(g2))
+        self.assertNotEqual(graph_signature(g1), graph_signature(g3))
+
+    def test_normalize_positions(self):
+        pos = normalize_positions({1: (0., 0.), 2: (10., 5.)}, margin=0.)
+        self.assertEqual(pos[1], (0., 0.25))
+        self.assertEqual(pos[2], (1., 0.75))
+
+    def test_seed_positions(self):
+        g = nx.Graph([(1, 2), (2, 3), (3, 4), (5, 6)])
+        pos = seed_positions(g, {1: (0., 0.), 2: (1., 0.), 9: (5., 5.)})
+        self.assertEqual(set(pos), {1, 2, 3, 4, 5, 6})
+        self.assertEqual(pos[1], (0., 0.))
+        self.assertEqual(pos[2], (1., 0.))
+        self.assertAlmostEqual(pos[3][0], 1., delta=0.1)
+        self.assertAlmostEqual(pos[4][0], 1., delta=0.1)
+
+    def test_spring_layout(self):
+        g = nx.path_graph(10)
+        stufen = []
+        pos = spring_layout(g, stages=(2, 5), progress=stufen.append)
+        self.assertEqual(len(stufen), 2)
+        self.assertEqual(set(pos), set(g.nodes))
+        for x, y in pos.values():
+            self.assertTrue(0. <= x <= 1. and 0. <= y <= 1.)
+
+        stufen.clear()
+        spring_layout(g, stages=(2, 5), progress=stufen.append, cancelled=lambda: len(stufen) > 0)
+        self.assertEqual(len(stufen), 1)
+
+    def test_cache(self):
+        g = nx.Graph([(("Gl", "1"), ("Gl", "2"))])
+        pos = {("Gl", "1"): (0.1, 0.2), ("Gl", "2"): (0.3, 0.4)}
+        with tempfile.TemporaryDirectory() as d:
+            cache = LayoutCache(d)
+            key = (1, 2, "signal", ())
+            self.assertIsNone(cache.load(key, g))
+            cache.save(key, g, pos)
+            self.assertEqual(cache.load(key, g), pos)
+            self.assertIsNone(cache.load((1, 3, "signal", ()), g))
+            g.add_edge(("Gl", "2"), ("Gl", "3"))
+            self.assertIsNone(cache.load(key, g))
+
+
+if __name__ == '__main__':
+    unittest.main()
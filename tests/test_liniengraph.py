@@ -40,5 +40,64 @@ class TestStreckenZeitachse(unittest.TestCase):
         self.assertEqual(expected_result, result)
 
 
+class TestStrecke(unittest.TestCase):
+    """
+    Strecken zwischen Anschlüssen
+
+    E1 - A - B - C - E2
+             |
+             E3
+    """
+
+    def setUp(self):
+        self.graph = LinienGraph()
+        self.e1 = LinienLabelType('Anst', 'E1')
+        self.e2 = LinienLabelType('Anst', 'E2')
+        self.e3 = LinienLabelType('Anst', 'E3')
+        self.bf_A = LinienLabelType('Bf', 'A')
+        self.bf_B = LinienLabelType('Bf', 'B')
+        self.bf_C = LinienLabelType('Bf', 'C')
+        for node in [self.e1, self.e2, self.e3, self.bf_A, self.bf_B, self.bf_C]:
+            self.graph.add_node(node, typ=node.typ, name=node.name, fahrten=3)
+        self.graph.nodes[self.e3]['fahrten'] = 1
+        for u, v in [(self.e1, self.bf_A), (self.bf_A, self.bf_B), (self.bf_B, self.bf_C), (self.bf_C, self.e2),
+                     (self.bf_B, self.e3)]:
+            self.graph.add_edge(u, v, fahrzeit_min=2)
+
+    def test_strecke(self):
+        self.assertEqual([self.e1, self.bf_A, self.bf_B, self.bf_C, self.e2], self.graph.strecke(self.e1, self.e2))
+        self.assertEqual([self.e1], self.graph.strecke(self.e1, self.e1))
+        self.assertEqual([], self.graph.strecke(self.e1, LinienLabelType('Bf', 'X')))
+
+    def test_strecken_vorschlagen(self):
+        strecken = self.graph.strecken_vorschlagen(min_fahrten=2, min_laenge=3)
+        self.assertEqual([[self.e1, self.bf_A, self.bf_B, self.bf_C, self.e2],
+                          [self.e2, self.bf_C, self.bf_B, self.bf_A, self.e1]], strecken)
+
+        strecken = self.graph.strecken_vorschlagen()
+        self.assertEqual(6, len(strecken))
+
+    def test_baeume_verwerfen(self):
+        self.graph.strecke(self.e1, self.e2)
+        self.graph.strecke(self.e3, self.e2)
+
+        # C und E3 sind von E1 gleich weit entfernt, von E3 aus ist die neue kante eine abkuerzung
+        self.graph.add_edge(self.bf_C, self.e3)
+        self.assertIn(self.e1, self.graph._baeume)
+        self.assertNotIn(self.e3, self.graph._baeume)
+
+        # abkuerzung verwirft den baum von E1
+        self.graph.add_edge(self.bf_A, self.bf_C)
+        self.assertNotIn(self.e1, self.graph._baeume)
+        self.assertEqual([self.e1, self.bf_A, self.bf_C, self.e2], self.graph.strecke(self.e1, self.e2))
+
+        # entfernen einer baumkante
+        self.graph.remove_edge(self.bf_A, self.bf_C)
+        self.assertEqual([self.e1, self.bf_A, self.bf_B, self.bf_C, self.e2], self.graph.strecke(self.e1, self.e2))
+
+        self.graph.remove_node(self.bf_B)
+        self.assertEqual([], self.graph.strecke(self.e1, self.e2))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from types import SimpleNamespace
+
+from stskit.model.zielgraph import ZielGraph, ZielGraphNode, ZielLabelType
+from stskit.model.zugarchiv import ZugArchiv
+from stskit.model.zuggraph import ZugGraph, ZugGraphNode
+from stskit.widgets.rangierplan import Rangierplan
+
+
+class TestRangierplan(unittest.TestCase):
+    """
+    Rangierplan mit einem Lokumlauf von Zug 1 an Gleis 2
+
+    Lok und Ersatzlok sind bekannt, damit der Vorgang nicht bei jeder Aktualisierung als offen geprüft wird.
+    """
+
+    def setUp(self):
+        zuggraph = ZugGraph()
+        zuggraph.add_node(1, **ZugGraphNode(zid=1, name="RE 1", von="A", nach="B", gleis="2", plangleis="2",
+                                            sichtbar=True, amgleis=False, ausgefahren=False))
+        for zid, name in [(2, "Lok RE 1"), (3, "Ersatzlok RE 1")]:
+            zuggraph.add_node(zid, **ZugGraphNode(zid=zid, name=name, von="", nach="", gleis="", plangleis="",
+                                                  sichtbar=False, amgleis=False, ausgefahren=False))
+        zuggraph.loks["RE 1"] = 2
+        zuggraph.ersatzloks["RE 1"] = 3
+        zielgraph = ZielGraph()
+        self.fid = ZielLabelType(1, 600, 1)
+        zielgraph.add_node(self.fid, **ZielGraphNode(fid=self.fid, zid=1, typ='D', plan='2', gleis='2',
+                                                     flags='L', lokumlauf=True, lokwechsel=None,
+                                                     p_an=600, p_ab=610, v_an=0, v_ab=0))
+        zielgraph.zuganfaenge[1] = self.fid
+        zielgraph.rangierziele.add(self.fid)
+
+        self.anlage = SimpleNamespace(zuggraph=zuggraph, archiv=ZugArchiv(), simzeit_minuten=590)
+        self.betrieb = SimpleNamespace(zielgraph=zielgraph)
+        self.plan = Rangierplan(self.anlage, self.betrieb)
+
+    def test_verspaetung_ohne_aenderung(self):
+        """
+        Verspätungen aus der Prognose werden auch ohne Eintrag in den Änderungslisten übernommen.
+        """
+
+        self.plan.update()
+        rd = self.plan.rangierliste[self.fid]
+        self.assertEqual(rd.t_an, 600)
+        self.assertEqual(rd.lok_zid, 2)
+        self.assertNotIn(self.fid, self.plan._lok_offen)
+
+        self.betrieb.zielgraph.reset_aenderungen()
+        self.anlage.zuggraph.reset_aenderungen()
+        ziel = self.betrieb.zielgraph.nodes[self.fid]
+        ziel.v_an = 5
+        ziel.v_ab = 3
+        self.plan.update()
+
+        self.assertEqual(rd.v_an, 5)
+        self.assertEqual(rd.v_ab, 3)
+        self.assertEqual(rd.t_an, 605)
+
+
+if __name__ == '__main__':
+    unittest.main()
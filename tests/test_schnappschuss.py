@@ -0,0 +1,98 @@
+import copy
+import types
+import unittest
+
+import networkx as nx
+
+from stskit.dispo.schnappschuss import BetriebHistorie
+from stskit.model.ereignisgraph import EreignisGraph, EreignisGraphNode, EreignisGraphEdge, EreignisLabelType
+from stskit.model.graphbasics import frozen_snapshot
+from stskit.model.journal import Journal
+from stskit.model.zielgraph import ZielGraph
+
+
+class TestFrozenSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.graph = EreignisGraph()
+        self.labels = [EreignisLabelType(1, 600 + i, 'Ab') for i in range(4)]
+        for label in self.labels:
+            self.graph.add_node(label, **EreignisGraphNode(zid=1, typ='Ab', t_plan=label.zeit, t_prog=label.zeit))
+        for u, v in zip(self.labels[:-1], self.labels[1:]):
+            self.graph.add_edge(u, v, **EreignisGraphEdge(typ='P', zid=1, dt_min=1))
+        self.graph.zuganfaenge[1] = self.labels[0]
+
+    def test_teilen(self):
+        s1 = frozen_snapshot(self.graph)
+        self.graph.nodes[self.labels[2]]['t_prog'] = 610
+        s2 = frozen_snapshot(self.graph, s1)
+
+        self.assertIsInstance(s2, EreignisGraph)
+        self.assertTrue(nx.is_frozen(s2))
+        self.assertEqual(s1.nodes[self.labels[2]]['t_prog'], 602)
+        self.assertEqual(s2.nodes[self.labels[2]]['t_prog'], 610)
+        self.assertIs(s1.nodes[self.labels[0]], s2.nodes[self.labels[0]])
+        self.assertIsNot(s1.nodes[self.labels[2]], s2.nodes[self.labels[2]])
+        self.assertIs(s1._succ[self.labels[0]], s2._succ[self.labels[0]])
+        self.assertIs(s1.edges[self.labels[0], self.labels[1]], s2.edges[self.labels[0], self.labels[1]])
+        self.assertIs(s2.edges[self.labels[0], self.labels[1]], s2._pred[self.labels[1]][self.labels[0]])
+        self.assertEqual(s2.zuganfaenge, {1: self.labels[0]})
+        self.assertIsNot(s2.zuganfaenge, self.graph.zuganfaenge)
+
+        # der originalgraph teilt keine daten mit dem schnappschuss
+        self.assertIsNot(self.graph.nodes[self.labels[0]], s2.nodes[self.labels[0]])
+        self.graph.remove_edge(self.labels[2], self.labels[3])
+        self.assertTrue(s2.has_edge(self.labels[2], self.labels[3]))
+        s3 = frozen_snapshot(self.graph, s2)
+        self.assertFalse(s3.has_edge(self.labels[2], self.labels[3]))
+        self.assertIsNot(s3._succ[self.labels[2]], s2._succ[self.labels[2]])
+        self.assertEqual(len(list(s3.zugpfad(1))), 3)
+
+        with self.assertRaises(nx.NetworkXError):
+            s2.add_node(EreignisLabelType(2, 700, 'An'))
+
+    def test_labels_teilen(self):
+        s1 = frozen_snapshot(self.graph)
+        s2 = frozen_snapshot(copy.deepcopy(self.graph), s1)
+        self.assertIs(next(iter(s1.nodes)), next(iter(s2.nodes)))
+        self.assertIs(s1._succ, s2._succ)
+        self.assertIs(s1.nodes[self.labels[1]], s2.nodes[self.labels[1]])
+
+
+class TestBetriebHistorie(unittest.TestCase):
+    def setUp(self):
+        self.betrieb = types.SimpleNamespace(anlage=types.SimpleNamespace(simzeit_minuten=0),
+                                             zielgraph=ZielGraph(),
+                                             ereignisgraph=EreignisGraph(),
+                                             journal=Journal())
+
+    def erfassen(self, historie: BetriebHistorie, zeit: int):
+        self.betrieb.anlage.simzeit_minuten = zeit
+        return historie.erfassen(self.betrieb)
+
+    def test_ring(self):
+        historie = BetriebHistorie(kapazitaet=3, intervall=5)
+        for zeit in [600, 602, 605, 611, 615]:
+            self.erfassen(historie, zeit)
+        self.assertEqual([s.zeit for s in historie], [605, 611, 615])
+
+        self.assertEqual(historie.suchen(0).zeit, 615)
+        self.assertEqual(historie.suchen(4).zeit, 611)
+        self.assertEqual(historie.suchen(10).zeit, 605)
+        self.assertIsNone(historie.suchen(11))
+
+    def test_mitternacht(self):
+        historie = BetriebHistorie(kapazitaet=5, intervall=1)
+        for zeit in [1438, 1439, 0, 1]:
+            self.erfassen(historie, zeit)
+        self.assertEqual(historie.suchen(3).zeit, 1438)
+
+    def test_journal(self):
+        historie = BetriebHistorie()
+        self.betrieb.journal.add_entry('a', 'eintrag')
+        schnappschuss = self.erfassen(historie, 600)
+        self.betrieb.journal.add_entry('b', 'eintrag')
+        self.assertEqual(list(schnappschuss.journal.entries), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
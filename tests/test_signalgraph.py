@@ -0,0 +1,98 @@
+import unittest
+
+from stskit.model.bahnhofgraph import BahnhofLabelType
+from stskit.model.signalgraph import (SignalGraph, SignalGraphUngerichtet, SignalGraphVereinfachung, SignalGraphWege,
+                                      graph_vereinfachen, graph_schleifen_aufloesen, graph_signalpaare_ersetzen)
+from stskit.plugin.stsobj import Knoten
+
+
+class TestSignalGraphVereinfachung(unittest.TestCase):
+    """
+    Vereinfachung eines kleinen Gleisbilds
+
+    E1 - S1 - S2 - W1 - B1 - S3 - A1
+                   |
+                   S4 - B2
+    """
+
+    def setUp(self):
+        self.graph = SignalGraphUngerichtet()
+        typen = {'E1': Knoten.Typ.EINFAHRT, 'A1': Knoten.Typ.AUSFAHRT,
+                 'S1': Knoten.Typ.SIGNAL, 'S2': Knoten.Typ.SIGNAL, 'S3': Knoten.Typ.SIGNAL, 'S4': Knoten.Typ.SIGNAL,
+                 'W1': Knoten.Typ.WEICHE_OBEN,
+                 'B1': Knoten.Typ.BAHNSTEIG, 'B2': Knoten.Typ.BAHNSTEIG}
+        for name, typ in typen.items():
+            self.graph.add_node(name, typ=typ, name=name)
+        kanten = [('E1', 'S1'), ('S1', 'S2'), ('S2', 'W1'), ('W1', 'B1'), ('B1', 'S3'), ('S3', 'A1'),
+                  ('W1', 'S4'), ('S4', 'B2')]
+        self.graph.add_edges_from(kanten, typ='verbindung', distanz=1)
+
+    def test_vereinfachen(self):
+        g, zuordnung = graph_vereinfachen(self.graph, ['weichen_ersetzen', 'signalpaare_ersetzen',
+                                                       'zwischensignale_entfernen'])
+
+        self.assertIsInstance(g, SignalGraphUngerichtet)
+        self.assertSetEqual(set(g.nodes), {'E1', 'A1', 'B1', 'B2'})
+        self.assertTrue(g.has_edge('E1', 'B1') or g.has_edge('E1', 'B2'))
+        self.assertTrue(g.has_edge('B1', 'A1'))
+        self.assertEqual(g.number_of_edges(), 3)
+        self.assertEqual(zuordnung['S3'], 'B1')
+        self.assertSetEqual(set(zuordnung), set(self.graph.nodes))
+        self.assertSetEqual(set(zuordnung.values()), set(g.nodes))
+
+        # das original bleibt unveraendert
+        self.assertEqual(self.graph.number_of_nodes(), 9)
+        self.assertEqual(self.graph.number_of_edges(), 8)
+
+    def test_signalpaare(self):
+        g = graph_signalpaare_ersetzen(self.graph)
+        signale = [n for n, typ in g.nodes(data='typ') if typ == Knoten.Typ.SIGNAL]
+        self.assertEqual(len(signale), 3)
+        paar = next(n for n in signale if n in {'S1', 'S2'})
+        self.assertTrue(g.has_edge('E1', paar))
+        self.assertTrue(g.has_edge(paar, 'W1'))
+
+    def test_schleifen_aufloesen(self):
+        self.graph.add_edge('S1', 'W1', typ='verbindung', distanz=1)
+        g = graph_schleifen_aufloesen(self.graph)
+        self.assertTrue(g.has_edge('S1', 'S2'))
+        self.assertTrue(g.has_edge('S2', 'W1'))
+        self.assertFalse(g.has_edge('S1', 'W1'))
+
+    def test_unbekannter_schritt(self):
+        with self.assertRaises(ValueError):
+            SignalGraphVereinfachung(self.graph).anwenden(['weichen_entfernen'])
+
+
+class TestSignalGraphWege(unittest.TestCase):
+    """
+    Wege zwischen Bahnhöfen
+
+    1 -> 2 -> 3 -> 4 -> 5 -> 6, Gleise 1 und 2 gehören zu Bf A, 4 zu Bf B, 6 zu Bf C.
+    """
+
+    def setUp(self):
+        self.graph = SignalGraph()
+        kanten = [(1, 2), (2, 3), (3, 4), (4, 5), (5, 6)]
+        self.graph.add_edges_from(kanten, typ='verbindung', distanz=1)
+        self.bf_a = BahnhofLabelType('Bf', 'A')
+        self.bf_b = BahnhofLabelType('Bf', 'B')
+        self.bf_c = BahnhofLabelType('Bf', 'C')
+        self.zuordnung = {1: self.bf_a, 2: self.bf_a, 4: self.bf_b, 6: self.bf_c}
+
+    def test_weg(self):
+        wege = SignalGraphWege(self.graph, self.zuordnung)
+        self.assertEqual([self.bf_a, 3, self.bf_b, 5, self.bf_c], wege.weg(self.bf_a, self.bf_c))
+        self.assertEqual([self.bf_b, 5, self.bf_c], wege.weg(self.bf_b, self.bf_c))
+        self.assertEqual([], wege.weg(self.bf_c, self.bf_a))
+        self.assertEqual([], wege.weg(BahnhofLabelType('Bf', 'X'), self.bf_a))
+
+    def test_aktuell(self):
+        wege = SignalGraphWege(self.graph, self.zuordnung)
+        self.assertTrue(wege.aktuell(self.graph, dict(self.zuordnung)))
+        self.assertFalse(wege.aktuell(self.graph, {1: self.bf_a}))
+        self.assertFalse(wege.aktuell(self.graph.copy(), self.zuordnung))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from stskit.plugin.stsobj import BahnsteigInfo, FahrplanZeile, Knoten, ZugDetails
+from stskit.plugin.stsplugin import PluginClient
+
+
+class TestPluginClient(unittest.TestCase):
+    def setUp(self):
+        self.client = PluginClient(name="test", autor="test", version="0", text="test")
+        for name in ["A1", "A2", "B1"]:
+            bi = BahnsteigInfo()
+            bi.name = name
+            self.client.bahnsteigliste[name] = bi
+
+    def _zug(self, zid: int, gleise: list[str]) -> ZugDetails:
+        zug = ZugDetails()
+        zug.zid = zid
+        zug.name = f"RE {zid}"
+        for gleis in gleise:
+            zeile = FahrplanZeile(zug)
+            zeile.gleis = zeile.plan = gleis
+            zug.fahrplan.append(zeile)
+        self.client.zugliste[zid] = zug
+        self.client._zug_markieren(zid)
+        return zug
+
+    def test_bahnsteig_zuege_inkrementell(self):
+        zug1 = self._zug(1, ["A1", "B1"])
+        zug2 = self._zug(2, ["A2", "X"])
+        self.client.update_bahnsteig_zuege()
+        self.assertEqual(self.client.bahnsteigliste["A1"].zuege, {1: zug1})
+        self.assertEqual(self.client.bahnsteigliste["A2"].zuege, {2: zug2})
+        self.assertEqual(self.client.bahnsteigliste["B1"].zuege, {1: zug1})
+
+        zug1.fahrplan[0].gleis = "A2"
+        self.client._zug_markieren(1)
+        del self.client.zugliste[2]
+        self.client._zug_markieren(2)
+        self.client.update_bahnsteig_zuege()
+        self.assertEqual(self.client.bahnsteigliste["A1"].zuege, {})
+        self.assertEqual(self.client.bahnsteigliste["A2"].zuege, {1: zug1})
+        self.assertEqual(self.client.bahnsteigliste["B1"].zuege, {1: zug1})
+
+    def test_wege_zuege_inkrementell(self):
+        einfahrt = Knoten()
+        einfahrt.key = einfahrt.name = "Ost"
+        einfahrt.typ = Knoten.TYP_NUMMER["Einfahrt"]
+        bahnsteig = Knoten()
+        bahnsteig.key = bahnsteig.name = "A1"
+        bahnsteig.typ = Knoten.TYP_NUMMER["Bahnsteig"]
+        self.client._wege_einfahrten = {einfahrt.name: einfahrt}
+        self.client._wege_haltepunkte = {bahnsteig.name: bahnsteig}
+
+        zug = self._zug(1, ["A1"])
+        zug.von = "Ost"
+        self.client.update_wege_zuege()
+        self.assertEqual(einfahrt.zuege, {1: zug})
+        self.assertEqual(bahnsteig.zuege, {1: zug})
+
+        zug.von = "West"
+        self.client._zug_markieren(1)
+        self.client.update_wege_zuege()
+        self.assertEqual(einfahrt.zuege, {})
+        self.assertEqual(bahnsteig.zuege, {1: zug})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import collections
+import functools
+import unittest
+
+import trio
+
+from stskit.plugin.stsplugin import PluginClient
+from stskit.plugin.stsproxy import PluginProxy
+
+
+class FakeSimulator:
+    """
+    Minimaler Simulator: beantwortet register, simzeit und zugliste und sendet auf Abruf ein Ereignis.
+    """
+
+    def __init__(self):
+        self.anfragen = collections.Counter()
+        self.ereignis_angemeldet = trio.Event()
+        self.stream = None
+
+    async def verbindung(self, stream):
+        self.stream = stream
+        await stream.send_all(b"<status code='300'>The Sim is ready</status>\n")
+        puffer = b""
+        async for daten in stream:
+            puffer += daten
+            *zeilen, puffer = puffer.split(b"\n")
+            for zeile in zeilen:
+                tag = zeile.decode().strip()[1:].split(" ")[0]
+                self.anfragen[tag] += 1
+                if tag == "register":
+                    await stream.send_all(b"<status code='220'>OK</status>\n")
+                elif tag == "simzeit":
+                    await stream.send_all(b"<simzeit sender='0' zeit='36000000' />\n")
+                elif tag == "zugliste":
+                    await stream.send_all(b"<zugliste>\n<zug zid='1' name='RE 1' von='A' nach='B' />\n</zugliste>\n")
+                elif tag == "ereignis":
+                    self.ereignis_angemeldet.set()
+
+    async def ereignis_senden(self):
+        await self.stream.send_all(b"<ereignis zid='1' art='einfahrt' name='RE 1' verspaetung='0' gleis='1' "
+                                   b"plangleis='1' von='A' nach='B' sichtbar='true' amgleis='false' />\n")
+
+
+class TestPluginProxy(unittest.TestCase):
+    def test_zwei_klienten(self):
+        sim = FakeSimulator()
+        proxy = PluginProxy()
+        empfangen = []
+
+        async def klient(port, name, task_status=trio.TASK_STATUS_IGNORED):
+            client = PluginClient(name=name, autor="test", version="0", text="test")
+            await client.connect(host="127.0.0.1", port=port)
+            async with client.stream:
+                async with trio.open_nursery() as nursery:
+                    await nursery.start(client.receiver)
+                    await client.register()
+                    simzeit = await client.request_simzeit()
+                    self.assertEqual(simzeit.hour, 10)
+                    await client.request_zugliste()
+                    self.assertEqual(list(client.zugliste.keys()), [1])
+                    await client.request_ereignis("einfahrt", [1])
+                    task_status.started()
+                    ereignis = await client.ereignis_channel_out.receive()
+                    empfangen.append((name, ereignis.art, ereignis.zid))
+                    nursery.cancel_scope.cancel()
+
+        async def ablauf():
+            with trio.fail_after(5):
+                await _ablauf()
+
+        async def _ablauf():
+            async with trio.open_nursery() as nursery:
+                sim_listeners = await nursery.start(functools.partial(trio.serve_tcp, sim.verbindung, 0,
+                                                                      host="127.0.0.1"))
+                sim_port = sim_listeners[0].socket.getsockname()[1]
+                proxy_listeners = await nursery.start(proxy.start, "127.0.0.1", sim_port, "127.0.0.1", 0)
+                proxy_port = proxy_listeners[0].socket.getsockname()[1]
+
+                async with trio.open_nursery() as klienten:
+                    await klienten.start(klient, proxy_port, "a")
+                    await klienten.start(klient, proxy_port, "b")
+                    await sim.ereignis_angemeldet.wait()
+                    await trio.sleep(0.1)
+                    await sim.ereignis_senden()
+
+                nursery.cancel_scope.cancel()
+
+        trio.run(ablauf)
+
+        self.assertEqual(sorted(empfangen), [("a", "einfahrt", 1), ("b", "einfahrt", 1)])
+        self.assertEqual(sim.anfragen["register"], 1)
+        self.assertEqual(sim.anfragen["simzeit"], 1)
+        self.assertEqual(sim.anfragen["zugliste"], 1)
+        self.assertEqual(sim.anfragen["ereignis"], 1)
+        self.assertEqual(proxy.statistik["cache"], 1)
+
+    def test_anfrage_fehler(self):
+        """
+        nach einem fehlgeschlagenen upstream wiederholen alle wartenden die anfrage.
+        """
+
+        proxy = PluginProxy()
+        aufrufe = []
+
+        async def anfrage(tag, attribute):
+            aufrufe.append(tag)
+            await trio.sleep(0.01)
+            if len(aufrufe) == 1:
+                raise trio.BrokenResourceError()
+            return "<zugliste />"
+
+        proxy.upstream.anfrage = anfrage
+        antworten = []
+
+        async def klient():
+            try:
+                antworten.append(await proxy.anfrage("zugliste", {}))
+            except trio.BrokenResourceError:
+                antworten.append(None)
+
+        async def ablauf():
+            async with trio.open_nursery() as nursery:
+                for _ in range(3):
+                    nursery.start_soon(klient)
+                    await trio.lowlevel.checkpoint()
+
+        trio.run(ablauf)
+
+        self.assertEqual(antworten, [None, "<zugliste />", "<zugliste />"])
+        self.assertEqual(len(aufrufe), 3)
+        self.assertEqual(proxy._laufend, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import trio
+
+from stskit.plugin.stsobj import Ereignis
+from stskit.zentrale import DatenZentrale, ereignis_stapel
+
+
+class Beobachter:
+    def __init__(self):
+        self.aufrufe = []
+
+    def plugin_ereignis(self, *args, ereignisse, **kwargs):
+        self.aufrufe.append(list(ereignisse))
+
+
+def _ereignis(zid: int, art: str = "einfahrt") -> Ereignis:
+    ereignis = Ereignis()
+    ereignis.zid = zid
+    ereignis.art = art
+    return ereignis
+
+
+class TestEreignisStapel(unittest.TestCase):
+    def test_buendeln(self):
+        stapel = []
+
+        async def sender(kanal):
+            async with kanal:
+                for zid in range(5):
+                    await kanal.send(_ereignis(zid))
+                await trio.sleep(0.5)
+                await kanal.send(_ereignis(10))
+
+        async def ablauf():
+            send, receive = trio.open_memory_channel(0)
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(sender, send)
+                async for ereignisse in ereignis_stapel(receive, intervall=0.1, max_anzahl=3):
+                    stapel.append([e.zid for e in ereignisse])
+
+        trio.run(ablauf)
+        self.assertEqual(stapel, [[0, 1, 2], [3, 4], [10]])
+
+    def test_zentrale_ereignisse(self):
+        zentrale = DatenZentrale()
+        beobachter = Beobachter()
+        zentrale.plugin_ereignis.register(beobachter.plugin_ereignis)
+
+        async def ablauf():
+            await zentrale.ereignisse([_ereignis(1), _ereignis(2)])
+            await zentrale.ereignisse([])
+            await zentrale.ereignis(_ereignis(3))
+
+        trio.run(ablauf)
+        self.assertEqual([[e.zid for e in aufruf] for aufruf in beobachter.aufrufe], [[1, 2], [3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
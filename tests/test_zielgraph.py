@@ -0,0 +1,91 @@
+import datetime
+import unittest
+
+from stskit.model.bahnhofgraph import BahnhofElement, BahnhofGraph
+from stskit.model.liniengraph import LinienGraph
+from stskit.model.zielgraph import FahrzeitSpeicher, ZielGraph, ZielGraphNode, ZielLabelType, minuten_verschieben
+from stskit.plugin.stsobj import minutes_to_time, time_to_minutes
+
+
+class TestEinfahrtszeiten(unittest.TestCase):
+    """
+    Korrektur der Ein- und Ausfahrtszeiten testen
+    """
+
+    def setUp(self):
+        self.bahnhofgraph = BahnhofGraph()
+        self.bahnhofgraph.add_edge(BahnhofElement('Anst', 'X'), BahnhofElement('Agl', 'x1'))
+        self.bahnhofgraph.add_edge(BahnhofElement('Bf', 'A'), BahnhofElement('Gl', 'a1'))
+
+        self.liniengraph = LinienGraph()
+        self.liniengraph.add_edge(BahnhofElement('Anst', 'X'), BahnhofElement('Bf', 'A'),
+                                  fahrzeit_schnitt=3., fahrzeit_min=2)
+
+        self.zielgraph = ZielGraph()
+        self.einfahrt = ZielLabelType(1, 0, '11')
+        self.halt = ZielLabelType(1, 600, 'a1')
+        self.ausfahrt = ZielLabelType(1, 1440, '12')
+        self.zielgraph.add_node(self.einfahrt, **ZielGraphNode(fid=self.einfahrt, zid=1, typ='E', plan='x1',
+                                                               p_an=600, p_ab=600))
+        self.zielgraph.add_node(self.halt, **ZielGraphNode(fid=self.halt, zid=1, typ='H', plan='a1',
+                                                           p_an=600, p_ab=602))
+        self.zielgraph.add_node(self.ausfahrt, **ZielGraphNode(fid=self.ausfahrt, zid=1, typ='A', plan='x1',
+                                                               p_an=602, p_ab=602))
+        self.zielgraph.add_edge(self.einfahrt, self.halt, typ='P')
+        self.zielgraph.add_edge(self.halt, self.ausfahrt, typ='P')
+        self.zielgraph.einausfahrten[self.einfahrt] = self.halt
+        self.zielgraph.einausfahrten[self.ausfahrt] = self.halt
+
+    def test_minuten_verschieben(self):
+        """
+        Minutenarithmetik mit der Umrechnung via datetime vergleichen
+        """
+
+        for minuten in [0, 1, 59.5, 600, 600.25, 1439, 1439.9]:
+            for dt in [-1440, -3, -2.5, -1, 0, 1, 1.4, 2.5, 3, 61]:
+                d = datetime.datetime.combine(datetime.datetime.today(), minutes_to_time(minuten))
+                d += datetime.timedelta(minutes=dt)
+                self.assertEqual(minuten_verschieben(minuten, dt), time_to_minutes(d.time()), f"{minuten}{dt:+}")
+
+    def test_korrigieren(self):
+        speicher = FahrzeitSpeicher()
+        self.zielgraph.einfahrtszeiten_korrigieren(self.liniengraph, self.bahnhofgraph, speicher=speicher)
+        self.assertEqual(self.zielgraph.nodes[self.einfahrt].p_an, 597)
+        self.assertEqual(self.zielgraph.nodes[self.ausfahrt].p_an, 605)
+        self.assertSetEqual(self.zielgraph.aenderungen, {1})
+        self.assertEqual(speicher.betriebsstellen[BahnhofElement('Gl', 'a1')], BahnhofElement('Bf', 'A'))
+
+        # unveraenderte fahrzeit: keine aenderung
+        vorher = self.zielgraph
+        self.setUp()
+        self.zielgraph.einfahrtszeiten_korrigieren(self.liniengraph, self.bahnhofgraph, vorher=vorher, speicher=speicher)
+        self.assertSetEqual(self.zielgraph.aenderungen, set())
+
+        # andere metrik
+        self.setUp()
+        self.zielgraph.einfahrtszeiten_korrigieren(self.liniengraph, self.bahnhofgraph, metrik='fahrzeit_min',
+                                                   vorher=vorher, speicher=speicher)
+        self.assertEqual(self.zielgraph.nodes[self.einfahrt].p_an, 598)
+        self.assertSetEqual(self.zielgraph.aenderungen, {1})
+
+    def test_liniengraph_abgleichen(self):
+        speicher = FahrzeitSpeicher()
+        self.assertTrue(speicher.liniengraph_abgleichen(self.liniengraph))
+        self.zielgraph.einfahrtszeiten_korrigieren(self.liniengraph, self.bahnhofgraph, speicher=speicher)
+        self.assertEqual(len(speicher.fahrzeiten), 2)
+
+        # unveränderte kanten behalten die fahrzeiten
+        self.liniengraph.add_edge(BahnhofElement('Bf', 'A'), BahnhofElement('Anst', 'X'), fahrten=5)
+        self.assertFalse(speicher.liniengraph_abgleichen(self.liniengraph))
+        self.assertEqual(len(speicher.fahrzeiten), 2)
+
+        self.liniengraph.add_edge(BahnhofElement('Anst', 'X'), BahnhofElement('Bf', 'A'), fahrzeit_manuell=5)
+        self.assertTrue(speicher.liniengraph_abgleichen(self.liniengraph))
+        self.assertEqual(speicher.fahrzeiten, {})
+
+        self.liniengraph.add_edge(BahnhofElement('Bf', 'A'), BahnhofElement('Bf', 'B'))
+        self.assertTrue(speicher.liniengraph_abgleichen(self.liniengraph))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from types import SimpleNamespace
+
+from PySide6 import QtCore
+
+from stskit.model.ereignisgraph import EreignisGraph
+from stskit.model.zielgraph import ZielGraph, ZielGraphNode, ZielLabelType
+from stskit.model.zugarchiv import ZugArchiv
+from stskit.model.zuggraph import ZugGraph, ZugGraphNode
+from stskit.widgets.fahrplan import FahrplanModell
+
+
+class TestZugArchiv(unittest.TestCase):
+    """
+    Archivierung ausgefahrener Züge testen
+
+    Zug 1 wird durch Zug 2 ersetzt, Zug 3 ist unabhängig.
+    """
+
+    def setUp(self):
+        self.zuggraph = ZugGraph()
+        self.zielgraph = ZielGraph()
+
+        for zid, t0 in [(1, 600), (2, 610), (3, 620)]:
+            self.zuggraph.add_node(zid, **ZugGraphNode(zid=zid, name=f"RE {zid}", sichtbar=True, ausgefahren=False))
+            self.zug_erstellen(zid, t0)
+
+        self.zuggraph.zuege_verknuepfen('E', 1, 2)
+        self.zielgraph.add_edge(self.zielgraph.zugenden[1], self.zielgraph.zuganfaenge[2], typ='E')
+
+        self.ereignisgraph = EreignisGraph()
+        self.ereignisgraph.zielgraph_importieren(self.zielgraph)
+        self.archiv = ZugArchiv()
+
+    def zug_erstellen(self, zid: int, t0: int):
+        labels = [ZielLabelType(zid, t0 + 5 * i, i + 1) for i in range(3)]
+        for label, typ, plan in zip(labels, ['E', 'D', 'A'], ['Agl 1', '1', 'Agl 2']):
+            self.zielgraph.add_node(label, **ZielGraphNode(fid=label, zid=zid, typ=typ, plan=plan, gleis=plan,
+                                                           flags='', status='', mindestaufenthalt=0,
+                                                           p_an=label.zeit, p_ab=label.zeit, v_an=0, v_ab=0))
+        self.zielgraph.add_edge(labels[0], labels[1], typ='P')
+        self.zielgraph.add_edge(labels[1], labels[2], typ='P')
+        self.zielgraph.zuganfaenge[zid] = labels[0]
+        self.zielgraph.zugenden[zid] = labels[-1]
+
+    def ausfahren(self, zids, zeit):
+        self.zuggraph.reset_aenderungen()
+        for zid in zids:
+            self.zuggraph.zug_ausfahren(zid)
+        self.archiv.ausfahrten_erfassen(self.zuggraph, zeit)
+
+    def test_kandidaten(self):
+        self.ausfahren([1, 3], 630)
+        self.assertSetEqual(self.archiv.kandidaten(self.zuggraph, 650, 30), set())
+        self.assertSetEqual(self.archiv.kandidaten(self.zuggraph, 660, 30), {3})
+
+        # verknuepfte zuege werden nur gemeinsam archiviert
+        self.ausfahren([2], 640)
+        self.assertSetEqual(self.archiv.kandidaten(self.zuggraph, 660, 30), {3})
+        self.assertSetEqual(self.archiv.kandidaten(self.zuggraph, 670, 30), {1, 2, 3})
+
+    def test_mitternacht(self):
+        self.ausfahren([3], 1430)
+        self.assertSetEqual(self.archiv.kandidaten(self.zuggraph, 10, 30), set())
+        self.assertSetEqual(self.archiv.kandidaten(self.zuggraph, 20, 30), {3})
+
+    def test_archivieren(self):
+        self.ausfahren([1, 2], 630)
+        zids = self.archiv.kandidaten(self.zuggraph, 700, 30)
+        self.archiv.archivieren(zids, self.zuggraph, self.zielgraph, self.ereignisgraph)
+
+        self.assertSetEqual(set(self.archiv), {1, 2})
+        self.assertEqual(self.archiv.zug(1).name, "RE 1")
+        self.assertNotIn('obj', self.archiv.zug(1))
+        self.assertEqual([ziel.plan for ziel in self.archiv.ziele(2)], ['Agl 1', '1', 'Agl 2'])
+        self.assertEqual([typ for _, _, typ in self.archiv.zuege[1].verknuepfungen], ['E'])
+        self.assertGreater(len(self.archiv.zuege[1].ereignisse), 0)
+
+        self.assertListEqual(list(self.zuggraph.nodes), [3])
+        self.assertSetEqual({fid.zid for fid in self.zielgraph.nodes}, {3})
+        self.assertSetEqual(set(self.zielgraph.zuganfaenge), {3})
+        self.assertSetEqual(set(self.zielgraph.zugenden), {3})
+        self.assertSetEqual({label.zid for label in self.ereignisgraph.nodes}, {3})
+        self.assertSetEqual(set(self.ereignisgraph.zuganfaenge), {3})
+        self.assertEqual(len(list(self.ereignisgraph.zugpfad(3))), 4)
+        self.assertEqual(self.archiv.ausfahrzeiten, {})
+
+    def test_fahrplan(self):
+        """
+        Der Fahrplan eines archivierten Zuges wird aus dem Archiv angezeigt.
+        """
+
+        anlage = SimpleNamespace(zuggraph=self.zuggraph, archiv=self.archiv)
+        modell = FahrplanModell(anlage, SimpleNamespace(zielgraph=self.zielgraph))
+        modell.set_zug(1)
+        self.assertEqual(modell.rowCount(), 3)
+
+        self.ausfahren([1, 2], 630)
+        self.archiv.archivieren(self.archiv.kandidaten(self.zuggraph, 700, 30),
+                                self.zuggraph, self.zielgraph, self.ereignisgraph)
+        modell.update()
+
+        self.assertEqual(modell.zug.name, "RE 1")
+        self.assertEqual(modell.rowCount(), 3)
+        gleise = [modell.data(modell.index(row, 0), QtCore.Qt.DisplayRole) for row in range(3)]
+        self.assertEqual(gleise, ['Agl 1', '1', 'Agl 2'])
+        self.assertEqual(modell.data(modell.index(2, 6), QtCore.Qt.DisplayRole), "E → RE 2")
+        self.assertEqual(modell.zweige, {ZielLabelType(1, 610, 3): ZielLabelType(2, 610, 1)})
+
+        modell.set_zug(4)
+        self.assertEqual(modell.rowCount(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
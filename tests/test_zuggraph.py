@@ -0,0 +1,71 @@
+import datetime
+import unittest
+
+from stskit.model.zielgraph import ZielGraph, ZielLabelType
+from stskit.model.zuggraph import ZugGraph
+from stskit.plugin.stsobj import FahrplanZeile, ZugDetails
+
+
+def _zug(zid: int, name: str, flags: str = "") -> ZugDetails:
+    zug = ZugDetails()
+    zug.zid = zid
+    zug.name = name
+    zug.von = "X"
+    zug.nach = "Y"
+    zug.sichtbar = False
+    zeile = FahrplanZeile(zug)
+    zeile.plan = zeile.gleis = "A1"
+    zeile.an = datetime.time(10, 0)
+    zeile.ab = datetime.time(10, 5)
+    zeile.flags = flags
+    zug.fahrplan.append(zeile)
+    return zug
+
+
+class TestZugGraph(unittest.TestCase):
+    def test_lok_index(self):
+        zuggraph = ZugGraph()
+        zuggraph.zug_details_importieren(_zug(1, "RE 10"))
+        zuggraph.zug_details_importieren(_zug(-1, "Lok RE 10"))
+        zuggraph.zug_details_importieren(_zug(-2, "Ersatzlok RE 10"))
+        self.assertEqual(zuggraph.loks, {"RE 10": -1})
+        self.assertEqual(zuggraph.ersatzloks, {"RE 10": -2})
+        self.assertEqual(zuggraph.lok_rollen, {-1: "Lok", -2: "Ersatzlok"})
+
+        ansicht = zuggraph.copy(as_view=True)
+        self.assertIs(ansicht.loks, zuggraph.loks)
+
+        zuggraph.zug_details_importieren(_zug(-1, "Lok RE 11"))
+        self.assertEqual(zuggraph.loks, {"RE 11": -1})
+
+    def test_aenderungen(self):
+        zuggraph = ZugGraph()
+        zug = _zug(1, "RE 10")
+        zuggraph.zug_details_importieren(zug)
+        self.assertEqual(zuggraph.aenderungen, {1: None})
+
+        zuggraph.reset_aenderungen()
+        zuggraph.zug_details_importieren(zug)
+        self.assertEqual(zuggraph.aenderungen, {})
+
+        zug.sichtbar = True
+        zuggraph.zug_details_importieren(zug)
+        self.assertEqual(zuggraph.aenderungen[1].sichtbar, False)
+
+
+class TestRangierziele(unittest.TestCase):
+    def test_rangierziele(self):
+        zielgraph = ZielGraph()
+        zug = _zug(1, "RE 10", flags="L")
+        zielgraph.zug_details_importieren(zug)
+        fid = ZielLabelType.from_fahrplanzeile(zug.fahrplan[0].fid)
+        self.assertEqual(zielgraph.rangierziele, {fid})
+        self.assertEqual(zielgraph.copy().rangierziele, {fid})
+
+        zug.fahrplan[0].flags = ""
+        zielgraph.zug_details_importieren(zug)
+        self.assertEqual(zielgraph.rangierziele, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
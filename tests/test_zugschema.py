@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from mock import patch
+
+from stskit.model.zugschema import Zugschema
+
+
+class TestFindSchemas(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        self.vorher = (Zugschema.schemadateien, Zugschema.schematitel,
+                       Zugschema._titel_cache, Zugschema._dateien_cache)
+        Zugschema.schemadateien = {}
+        Zugschema.schematitel = {}
+        Zugschema._titel_cache = {}
+        Zugschema._dateien_cache = {}
+        self.schreiben("test", "Test", 1)
+
+    def tearDown(self):
+        (Zugschema.schemadateien, Zugschema.schematitel,
+         Zugschema._titel_cache, Zugschema._dateien_cache) = self.vorher
+        self.tmp.cleanup()
+
+    def schreiben(self, name: str, titel: str, sekunden: int):
+        """
+        schemadatei schreiben und die änderungszeiten von datei und verzeichnis setzen.
+        """
+
+        p = self.path / f"zugschema.{name}.json"
+        p.write_text(json.dumps({"titel": titel, "kategorien": {}}), encoding="utf-8")
+        os.utime(p, ns=(sekunden * 1_000_000_000,) * 2)
+        os.utime(self.path, ns=(sekunden * 1_000_000_000,) * 2)
+
+    def test_cache(self):
+        Zugschema.find_schemas(self.path)
+        self.assertEqual(Zugschema.schematitel, {"test": "Test"})
+
+        with patch.object(Path, "glob", side_effect=AssertionError("glob")), \
+                patch("builtins.open", side_effect=AssertionError("open")):
+            Zugschema.find_schemas(self.path)
+        self.assertEqual(Zugschema.schemadateien, {"test": self.path / "zugschema.test.json"})
+
+    def test_invalidieren(self):
+        Zugschema.find_schemas(self.path)
+
+        # neue datei: das verzeichnis wird neu durchsucht
+        self.schreiben("neu", "Neu", 2)
+        Zugschema.find_schemas(self.path)
+        self.assertEqual(Zugschema.schematitel, {"test": "Test", "neu": "Neu"})
+
+        # geänderte datei im unveränderten verzeichnis: der titel wird neu gelesen
+        self.schreiben("test", "Geändert", 2)
+        with patch.object(Path, "glob", side_effect=AssertionError("glob")):
+            Zugschema.find_schemas(self.path)
+        self.assertEqual(Zugschema.schematitel["test"], "Geändert")
+
+    def test_fehlendes_verzeichnis(self):
+        Zugschema.find_schemas(self.path / "fehlt")
+        self.assertEqual(Zugschema.schemadateien, {})
+
+
+if __name__ == '__main__':
+    unittest.main()